@@ -1,6 +1,8 @@
-from typing import Literal
+from typing import Literal, Type
+from pydantic import BaseModel
 from app.agents.alumni_researcher_agent.agent import alumni_researcher_agent
-# from app.agents.email_finder_agent.agent import email_finder_agent
+from app.agents.alumni_researcher_agent.subagents.formatter_agent import AlumniResearcherOutputSchema
+from app.agents.email_finder_agent.agent import EmailFinderOutputSchema, email_finder_agent
 
 AgentMode = Literal["alumni_researcher", "email_finder"]
 
@@ -23,8 +25,33 @@ def get_root_agent(mode: AgentMode = "alumni_researcher"):
     if normalized_mode in ["alumni_researcher"]:
         return alumni_researcher_agent
     elif normalized_mode in ["email_finder"]:
-        raise NotImplementedError("Email finder agent is not implemented yet.")
+        return email_finder_agent
     else:
         raise ValueError(
             f"Invalid agent mode: {mode}. Supported modes: 'alumni_researcher', 'email_finder'"
-        )
\ No newline at end of file
+        )
+
+
+def get_output_schema(mode: AgentMode = "alumni_researcher") -> Type[BaseModel]:
+    """
+    Get the schema the root agent's final response is parsed into.
+    
+    Args:
+        mode: The agent mode to use. Can be "alumni_researcher" or "email_finder". Defaults to "alumni_researcher".
+    
+    Returns:
+        The output schema for the specified mode.
+    
+    Raises:
+        ValueError: If an invalid mode is specified.
+    """
+    normalized_mode = mode.lower().strip()
+    
+    if normalized_mode in ["alumni_researcher"]:
+        return AlumniResearcherOutputSchema
+    elif normalized_mode in ["email_finder"]:
+        return EmailFinderOutputSchema
+    else:
+        raise ValueError(
+            f"Invalid agent mode: {mode}. Supported modes: 'alumni_researcher', 'email_finder'"
+        )
@@ -3,12 +3,50 @@ from app.agents.alumni_researcher_agent.subagents import (
     background_information_agent,
     social_media_agent,
 )
+from app.agents.alumni_researcher_agent.subagents.formatter_agent.prompts import FORMATTER_HANDOFF_INSTRUCTION
+from app.agents.alumni_researcher_agent.subagents.social_media_agent.prompts import SOCIAL_MEDIA_HANDOFF_INSTRUCTION
+from app.agents.alumni_researcher_agent.callbacks import store_query_before_agent_callback
+from app.configs.llms import AGENT_HANDOFF_MODE
 
 from google.adk.agents import SequentialAgent
 
+# Dynamic instruction of each sub-agent that reads its inputs from session state in
+# "state" handoff mode (the background information agent only needs the query)
+HANDOFF_INSTRUCTIONS = [
+    (social_media_agent, SOCIAL_MEDIA_HANDOFF_INSTRUCTION),
+    (formatter_agent, FORMATTER_HANDOFF_INSTRUCTION),
+]
+
+
+def set_handoff_mode(mode: str) -> None:
+    """
+    Choose how the sub-agents receive the previous agents' results.
+
+    In "conversation" mode every sub-agent sees the whole session so far. In
+    "state" mode the social media and formatter agents skip the conversation
+    history (include_contents="none") and get the query and earlier results from
+    session state through their instruction. That only shortens the formatter's
+    prompt (the social media tool exchange is not replayed to it); the social
+    media agent's history was already just the query and the background reply.
+    The sub-agents are module-level singletons, so this affects every runner
+    built from them.
+
+    Args:
+        mode: "conversation" or "state"
+    """
+    if mode not in ("conversation", "state"):
+        raise ValueError(f"Invalid handoff mode: {mode}. Supported: 'conversation', 'state'")
+    for agent, instruction in HANDOFF_INSTRUCTIONS:
+        agent.include_contents = "none" if mode == "state" else "default"
+        agent.instruction = instruction if mode == "state" else ""
+
+
+set_handoff_mode(AGENT_HANDOFF_MODE)
+
 # Create sequential agent: first collect background information, then identify social media links, then format the results
 alumni_researcher_agent = SequentialAgent(
     name="alumni_researcher_agent",
     description="An alumni researcher agent that finds current practice information for Yale University medical alumni, identifies their social media profiles, and formats it into structured output.",
     sub_agents=[background_information_agent, social_media_agent, formatter_agent],
-)
\ No newline at end of file
+    before_agent_callback=store_query_before_agent_callback,
+)
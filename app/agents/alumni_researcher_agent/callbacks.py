@@ -0,0 +1,18 @@
+"""Callbacks for the alumni researcher root agent."""
+
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from app.agents import state_keys
+
+
+def store_query_before_agent_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+    """Before-agent callback that saves the user's query in session state for the sub-agents' instructions."""
+    user_content = callback_context.user_content
+    if user_content:
+        callback_context.state[state_keys.ALUMNI_QUERY] = "\n".join(
+            part.text for part in user_content.parts or [] if part.text
+        )
+    return None
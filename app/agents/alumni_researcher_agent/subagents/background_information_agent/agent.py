@@ -1,21 +1,63 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import google_search
-from .prompts import BACKGROUND_INFORMATION_AGENT_PROMPT
+from google.adk.tools.google_search_tool import GoogleSearchTool
+from .prompts import BACKGROUND_INFORMATION_AGENT_PROMPT, PRACTICE_PAGE_FETCH_PROMPT
+from .callbacks import institution_hint_before_model_callback
+from .tools import fetch_practice_page_tool
+from app.configs.http import PRACTICE_PAGE_FETCH_ENABLED
 from app.configs.llms import BACKGROUND_INFORMATION_MODEL
 from app.configs.llms import BACKGROUND_INFORMATION_MODEL_THINKING_BUDGET
 from google.adk.planners import BuiltInPlanner
 from google.genai import types
+from app.agents import state_keys
+from app.utils.model_client_utils import agent_model
+from app.utils.context_cache_utils import (
+    context_cache_after_model_callback,
+    context_cache_before_model_callback,
+)
+from app.utils.cascade_utils import (
+    accepted_stage_before_agent_callback,
+    model_cascade_before_model_callback,
+)
+from app.utils.grounding_utils import grounding_sources_after_model_callback
+from app.utils.thinking_utils import (
+    adaptive_thinking_after_model_callback,
+    adaptive_thinking_before_model_callback,
+)
 
 # Define the planner
 planner = BuiltInPlanner(
     thinking_config=types.ThinkingConfig(thinking_budget=BACKGROUND_INFORMATION_MODEL_THINKING_BUDGET)
 )
 
+# google_search is a Gemini built-in tool and cannot be combined with function tools
+# directly; with bypass_multi_tools_limit ADK runs it through a search sub-agent
+if PRACTICE_PAGE_FETCH_ENABLED:
+    tools = [GoogleSearchTool(bypass_multi_tools_limit=True), fetch_practice_page_tool]
+    instruction = BACKGROUND_INFORMATION_AGENT_PROMPT + PRACTICE_PAGE_FETCH_PROMPT
+else:
+    tools = [google_search]
+    instruction = BACKGROUND_INFORMATION_AGENT_PROMPT
+
 background_information_agent = LlmAgent(
-    model=BACKGROUND_INFORMATION_MODEL,
+    model=agent_model(BACKGROUND_INFORMATION_MODEL),
     name="background_information_agent",
     description="A specialized background information agent that finds current practice information for Yale University medical alumni, including practice URLs and detailed narratives about their post-Yale career.",
-    instruction=BACKGROUND_INFORMATION_AGENT_PROMPT,
-    tools=[google_search],
+    # Static so the prompt is an identical prefix for every alumnus (see context_cache_utils)
+    static_instruction=instruction,
+    tools=tools,
     planner=planner,
+    output_key=state_keys.BACKGROUND_INFORMATION,
+    before_agent_callback=accepted_stage_before_agent_callback,
+    before_model_callback=[
+        institution_hint_before_model_callback,
+        model_cascade_before_model_callback,
+        adaptive_thinking_before_model_callback,
+        context_cache_before_model_callback,
+    ],
+    after_model_callback=[
+        grounding_sources_after_model_callback,
+        adaptive_thinking_after_model_callback,
+        context_cache_after_model_callback,
+    ],
 )
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""Callbacks for the background information agent."""
+
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from app.configs.institutions import INSTITUTION_INDEX_ENABLED
+from app.utils.institution_utils import institution_index
+from .prompts import INSTITUTION_HINT_PROMPT
+
+
+def institution_hint_before_model_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+) -> Optional[LlmResponse]:
+    """
+    Before-model callback that gives the model the most common known institutions.
+
+    The hint changes as the index grows, so it goes in front of the conversation
+    rather than into the system instruction, which stays a cacheable static prefix.
+    """
+    if not INSTITUTION_INDEX_ENABLED:
+        return None
+    hint = institution_index.hint()
+    if hint:
+        text = INSTITUTION_HINT_PROMPT.format(institutions=hint).strip()
+        llm_request.contents.insert(0, types.Content(role="user", parts=[types.Part(text=text)]))
+    return None
@@ -83,3 +83,20 @@ You should provide your findings in a format that can be easily converted to com
 
 Provide a comprehensive summary of all current practices found, ensuring no duplicates, including all practice names, URLs, and a detailed unified narrative covering their work across all practices."""
 
+
+
+# Appended to the prompt when PRACTICE_PAGE_FETCH_ENABLED is set
+PRACTICE_PAGE_FETCH_PROMPT = """
+
+**Reading Profile Pages:**
+- You can call `fetch_practice_page_tool(url="...")` to read a practice or hospital profile page in a browser
+- Use it ONLY for a profile page from your search results whose snippet is too thin to confirm the person's current role (many hospital profile pages are rendered by JavaScript and show nothing in search snippets)
+- Fetch at most 2 pages, and only URLs that appeared in your search results
+- If the tool returns an error, continue with the information from your search results"""
+
+# Sent by institution_hint_before_model_callback when the institution index has entries
+INSTITUTION_HINT_PROMPT = """
+
+**Known Institutions:**
+These institutions have already been found for other alumni of this roster. If a practice is one of them, use the name exactly as written here; names and URLs are also matched against this list afterwards, so you do not need to spend effort reconciling variants of these names.
+{institutions}"""
@@ -0,0 +1,38 @@
+"""Tools for the background information agent to read practice profile pages."""
+
+from app.utils.browser_utils import get_browser_pool
+
+
+async def fetch_practice_page_tool(url: str) -> dict:
+    """
+    Fetch a practice or hospital profile page in a headless browser and return its text.
+    
+    Use this for profile pages found through search whose content is rendered by
+    JavaScript (search snippets and plain HTTP fetches show little or nothing).
+    
+    Args:
+        url: Full URL of the page to read
+        
+    Returns:
+        dict: The page's final URL, HTTP status, title and visible text (truncated),
+              or an error message
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    result = await get_browser_pool().fetch(url)
+    if result.error:
+        return {
+            "action": "fetch_practice_page",
+            "url": url,
+            "message": f"Error fetching page: {result.error}",
+        }
+    return {
+        "action": "fetch_practice_page",
+        "url": url,
+        "final_url": result.final_url,
+        "status_code": result.status_code,
+        "title": result.title,
+        "text": result.text,
+        "truncated": result.truncated,
+    }
@@ -1,3 +1,15 @@
-from .agent import formatter_agent, AlumniResearcherOutputSchema
+from .agent import (
+    formatter_agent,
+    batch_formatter_agent,
+    AlumniResearcherOutputSchema,
+    BatchFormatterOutputSchema,
+    BatchFormatterRecord,
+)
 
-__all__ = ["formatter_agent", "AlumniResearcherOutputSchema"]
\ No newline at end of file
+__all__ = [
+    "formatter_agent",
+    "batch_formatter_agent",
+    "AlumniResearcherOutputSchema",
+    "BatchFormatterOutputSchema",
+    "BatchFormatterRecord",
+]
\ No newline at end of file
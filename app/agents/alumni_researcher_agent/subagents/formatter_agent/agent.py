@@ -1,10 +1,22 @@
+from typing import List
 from google.adk.agents import LlmAgent
 from pydantic import BaseModel, Field
-from .prompts import FORMATTER_AGENT_PROMPT
-from app.configs.llms import FORMATTER_MODEL
+from .callbacks import defer_to_batch_formatter_before_agent_callback
+from .prompts import BATCH_FORMATTER_PROMPT_SUFFIX, FORMATTER_AGENT_PROMPT
+from app.configs.llms import FORMATTER_BATCH_THINKING_BUDGET, FORMATTER_MODEL
 from app.configs.llms import FORMATTER_MODEL_THINKING_BUDGET 
 from google.adk.planners import BuiltInPlanner
 from google.genai import types
+from app.utils.model_client_utils import agent_model
+from app.utils.context_cache_utils import (
+    context_cache_after_model_callback,
+    context_cache_before_model_callback,
+)
+from app.utils.cascade_utils import model_cascade_before_model_callback
+from app.utils.thinking_utils import (
+    adaptive_thinking_after_model_callback,
+    adaptive_thinking_before_model_callback,
+)
 
 class AlumniResearcherOutputSchema(BaseModel):
     """Schema for comprehensive background information about Yale University medical alumni."""
@@ -45,16 +57,53 @@ class AlumniResearcherOutputSchema(BaseModel):
         description="Link to the alumni's Facebook profile. Empty string if not found or not identified."
     )
 
+class BatchFormatterRecord(AlumniResearcherOutputSchema):
+    """One alumnus formatted by the batch formatter, tagged with the id of its input section."""
+    alumni_id: str = Field(
+        description="The id of the '### Alumnus <id>' section this record was formatted from."
+    )
+
+
+class BatchFormatterOutputSchema(BaseModel):
+    """Schema for several alumni formatted in one call."""
+    records: List[BatchFormatterRecord] = Field(
+        default_factory=list,
+        description="One record per alumnus section in the input, in any order."
+    )
+
 # Define the planner
 planner = BuiltInPlanner(
     thinking_config=types.ThinkingConfig(thinking_budget=FORMATTER_MODEL_THINKING_BUDGET)
 )
 
 formatter_agent = LlmAgent(
-    model=FORMATTER_MODEL,
+    model=agent_model(FORMATTER_MODEL),
     name="formatter_agent",
     description="A formatter agent that formats comprehensive professional information about Yale University medical alumni into structured output.",
-    instruction=FORMATTER_AGENT_PROMPT,
+    # Static so the prompt is an identical prefix for every alumnus (see context_cache_utils)
+    static_instruction=FORMATTER_AGENT_PROMPT,
     output_schema=AlumniResearcherOutputSchema,
     planner=planner,
-)
\ No newline at end of file
+    before_agent_callback=defer_to_batch_formatter_before_agent_callback,
+    before_model_callback=[
+        model_cascade_before_model_callback,
+        adaptive_thinking_before_model_callback,
+        context_cache_before_model_callback,
+    ],
+    after_model_callback=[adaptive_thinking_after_model_callback, context_cache_after_model_callback],
+)
+
+# Formats several alumni per call outside the pipeline (see app/services/batch_formatter.py);
+# it is the root of its own runner, not a sub-agent of the alumni researcher
+batch_formatter_agent = LlmAgent(
+    model=agent_model(FORMATTER_MODEL),
+    name="batch_formatter_agent",
+    description="A formatter agent that formats information about several Yale University medical alumni into structured output in one call.",
+    static_instruction=FORMATTER_AGENT_PROMPT + BATCH_FORMATTER_PROMPT_SUFFIX,
+    output_schema=BatchFormatterOutputSchema,
+    planner=BuiltInPlanner(
+        thinking_config=types.ThinkingConfig(thinking_budget=FORMATTER_BATCH_THINKING_BUDGET)
+    ),
+    before_model_callback=context_cache_before_model_callback,
+    after_model_callback=context_cache_after_model_callback,
+)
@@ -0,0 +1,17 @@
+"""Callbacks for the formatter agent."""
+
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from app.agents import state_keys
+
+
+def defer_to_batch_formatter_before_agent_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """Before-agent callback that skips the formatter when the batch formatter will format this alumnus."""
+    if not callback_context.state.get(state_keys.FORMATTER_DEFERRED):
+        return None
+    return types.Content(role="model", parts=[types.Part(text="Formatting deferred to the batch formatter.")])
@@ -79,3 +79,21 @@ You will receive:
 - For social media links, use the exact URLs provided by the social media agent, or empty strings if not provided
 
 Format the output from both the background information agent and social media agent into the structured schema, ensuring all fields are properly populated."""
+
+# Dynamic instruction in "state" handoff mode, where the agent does not see the
+# conversation: the query and the background information come from session state, and
+# the social media agent's reply is the first message of the agent's turn
+FORMATTER_HANDOFF_INSTRUCTION = """Alumnus: {alumni_query}
+Social media agent output: see the message above.
+
+Background information agent output:
+{background_information?}"""
+
+# Appended to FORMATTER_AGENT_PROMPT for the batch formatter, which formats several alumni per call
+BATCH_FORMATTER_PROMPT_SUFFIX = """
+
+**Batch Mode:**
+The input contains several alumni, each in its own section starting with "### Alumnus <id>" and holding that alumnus's query, background information agent output and social media agent output.
+- Return one record per section in `records`, with `alumni_id` set to the section's id
+- Format each alumnus only from its own section; never carry practices, links or narrative over from another section
+- Apply every rule above to each record independently"""
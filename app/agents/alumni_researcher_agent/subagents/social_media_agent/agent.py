@@ -1,10 +1,25 @@
 from google.adk.agents import LlmAgent
+from app.agents import state_keys
 from app.configs.llms import SOCIAL_MEDIA_MODEL
 from app.configs.llms import SOCIAL_MEDIA_MODEL_THINKING_BUDGET
 from .prompts import SOCIAL_MEDIA_AGENT_PROMPT
 from .tools import search_social_media_candidates_tool
+from .callbacks import resolve_social_media_before_agent_callback
 from google.adk.planners import BuiltInPlanner
 from google.genai import types
+from app.utils.model_client_utils import agent_model
+from app.utils.context_cache_utils import (
+    context_cache_after_model_callback,
+    context_cache_before_model_callback,
+)
+from app.utils.cascade_utils import (
+    accepted_stage_before_agent_callback,
+    model_cascade_before_model_callback,
+)
+from app.utils.thinking_utils import (
+    adaptive_thinking_after_model_callback,
+    adaptive_thinking_before_model_callback,
+)
 
 # Define the planner
 planner = BuiltInPlanner(
@@ -12,11 +27,20 @@ planner = BuiltInPlanner(
 )
 
 social_media_agent = LlmAgent(
-    model=SOCIAL_MEDIA_MODEL,
+    model=agent_model(SOCIAL_MEDIA_MODEL),
     name="social_media_agent",
     description="A social media profile identification agent that selects the most appropriate social media profile links for Yale University medical alumni from candidate search results.",
-    instruction=SOCIAL_MEDIA_AGENT_PROMPT,
+    # Static so the prompt is an identical prefix for every alumnus (see context_cache_utils)
+    static_instruction=SOCIAL_MEDIA_AGENT_PROMPT,
     tools=[search_social_media_candidates_tool],
     planner=planner,
+    output_key=state_keys.SOCIAL_MEDIA_LINKS,
+    before_agent_callback=[accepted_stage_before_agent_callback, resolve_social_media_before_agent_callback],
+    before_model_callback=[
+        model_cascade_before_model_callback,
+        adaptive_thinking_before_model_callback,
+        context_cache_before_model_callback,
+    ],
+    after_model_callback=[adaptive_thinking_after_model_callback, context_cache_after_model_callback],
 )
 
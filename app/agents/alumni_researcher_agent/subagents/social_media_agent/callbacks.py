@@ -0,0 +1,95 @@
+"""Callbacks for the social media agent."""
+
+import re
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from app.agents import state_keys
+from app.configs.app import logger
+from app.configs.llms import (
+    SOCIAL_MEDIA_MAX_LINKS,
+    SOCIAL_MEDIA_RESOLVER_ENABLED,
+    SOCIAL_MEDIA_TOP_K,
+)
+from app.utils.grounding_utils import collect_candidates_with_grounding
+from app.utils.resolver_utils import (
+    filter_platforms,
+    format_social_media_selection,
+    resolve_social_media_candidates,
+    searched_candidates_for,
+    social_media_resolver_stats,
+)
+from app.utils.search_utils import rank_social_media_candidates
+
+# The alumni name in the query built by main.py ("alumni name: <name>, year of entry: <year>")
+ALUMNI_NAME_PATTERN = re.compile(r"alumni name:\s*([^,\n]+)", re.IGNORECASE)
+
+
+def _alumni_name(callback_context: CallbackContext) -> Optional[str]:
+    """Extract the alumni name from the user's query, if it has the expected shape."""
+    user_content = callback_context.user_content
+    text = "\n".join(part.text for part in (user_content.parts or []) if part.text) if user_content else ""
+    match = ALUMNI_NAME_PATTERN.search(text)
+    return match.group(1).strip() if match else None
+
+
+async def resolve_social_media_before_agent_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """
+    Search and resolve unambiguous platforms before the social media agent runs.
+
+    If every platform resolves, the selection is returned as the agent's reply and
+    its LLM calls are skipped. Otherwise the resolved links and the candidates of
+    the remaining platforms are stored in session state for the search tool.
+
+    Args:
+        callback_context: Callback context of the social media agent
+
+    Returns:
+        The agent's reply when all platforms are resolved, otherwise None
+    """
+    if not SOCIAL_MEDIA_RESOLVER_ENABLED:
+        return None
+    alumni_name = _alumni_name(callback_context)
+    if not alumni_name:
+        return None
+
+    # Candidates of an earlier search stage (staged pipeline), otherwise search now for
+    # the platforms the background agent's grounding sources do not cover
+    results_by_platform = searched_candidates_for(callback_context.state, alumni_name)
+    if results_by_platform is None:
+        results_by_platform = await collect_candidates_with_grounding(
+            callback_context.state,
+            full_name=alumni_name,
+            max_links=SOCIAL_MEDIA_MAX_LINKS,
+        )
+    ranked = rank_social_media_candidates(
+        full_name=alumni_name,
+        results_by_platform=results_by_platform,
+        top_k=SOCIAL_MEDIA_TOP_K,
+    )
+    selected, ambiguous = resolve_social_media_candidates(alumni_name, ranked, results_by_platform)
+    social_media_resolver_stats.record(len(selected), len(ambiguous))
+    logger.info(
+        "Social media resolver for %s: auto-selected %s platform(s), %s left to the LLM",
+        alumni_name,
+        len(selected),
+        len(ambiguous),
+    )
+
+    callback_context.state[state_keys.SOCIAL_MEDIA_AUTO_SELECTED] = selected
+    if not ambiguous:
+        # output_key is only applied to model replies, so hand the selection over explicitly
+        selection = format_social_media_selection(selected)
+        callback_context.state[state_keys.SOCIAL_MEDIA_LINKS] = selection
+        return types.Content(role="model", parts=[types.Part(text=selection)])
+
+    callback_context.state[state_keys.SOCIAL_MEDIA_RESOLVED_NAME] = alumni_name
+    callback_context.state[state_keys.SOCIAL_MEDIA_PENDING_CANDIDATES] = filter_platforms(
+        results_by_platform, ambiguous
+    )
+    return None
+
@@ -1,11 +1,68 @@
 """Tools for the social media agent to search for candidate links."""
 
+from typing import Dict, List, Tuple
 from google.adk.tools.tool_context import ToolContext
-from app.utils.search_utils import search_social_media_profiles
-from app.configs.llms import SOCIAL_MEDIA_MAX_LINKS
+from app.agents import state_keys
+from app.utils.grounding_utils import collect_candidates_with_grounding
+from app.utils.resolver_utils import pending_candidates_for, searched_candidates_for
+from app.utils.search_utils import (
+    format_social_media_markdown,
+    format_social_media_table,
+    rank_social_media_candidates,
+)
+from app.configs.llms import (
+    SOCIAL_MEDIA_COMPACT_CANDIDATES,
+    SOCIAL_MEDIA_MAX_LINKS,
+    SOCIAL_MEDIA_SNIPPET_CHARS,
+    SOCIAL_MEDIA_TOP_K,
+)
 
 
-def search_social_media_candidates_tool(
+def build_candidate_payload(
+    alumni_name: str,
+    results_by_platform: Dict[str, List[Dict[str, str]]],
+) -> Tuple[str, str, int]:
+    """
+    Turn raw search results into the candidate text shown to the social media agent.
+    
+    Args:
+        alumni_name: Full name of the alumni
+        results_by_platform: Raw candidates per platform from the search utility
+        
+    Returns:
+        Tuple of (response key, candidate text, number of candidates shown). The key is
+        "candidate_links_table" for the compact ranked table, otherwise
+        "candidate_links_markdown".
+    """
+    if SOCIAL_MEDIA_COMPACT_CANDIDATES:
+        ranked = rank_social_media_candidates(
+            full_name=alumni_name,
+            results_by_platform=results_by_platform,
+            top_k=SOCIAL_MEDIA_TOP_K,
+        )
+        # Show the search results of platforms the ranker emptied unscored rather than "none",
+        # since the resolver leaves those platforms to the model
+        for platform_name, results in ranked.items():
+            if not results and results_by_platform.get(platform_name):
+                ranked[platform_name] = [
+                    {**result, "score": 0} for result in results_by_platform[platform_name][:SOCIAL_MEDIA_TOP_K]
+                ]
+        table = format_social_media_table(
+            full_name=alumni_name,
+            ranked_by_platform=ranked,
+            snippet_chars=SOCIAL_MEDIA_SNIPPET_CHARS,
+        )
+        return "candidate_links_table", table, sum(len(results) for results in ranked.values())
+    
+    markdown = format_social_media_markdown(
+        full_name=alumni_name,
+        results_by_platform=results_by_platform,
+        max_links=SOCIAL_MEDIA_MAX_LINKS,
+    )
+    return "candidate_links_markdown", markdown, sum(len(results) for results in results_by_platform.values())
+
+
+async def search_social_media_candidates_tool(
     tool_context: ToolContext,
     alumni_name: str,
 ) -> dict:
@@ -13,28 +70,52 @@ def search_social_media_candidates_tool(
     Search for social media candidate links for a given alumni name.
     
     This tool searches across multiple platforms (X/Twitter, LinkedIn, Doximity,
-    Google Scholar, Facebook) and returns candidate links in markdown format.
+    Google Scholar, Facebook) and returns candidate links, either as a compact
+    locally ranked table or in markdown format (SOCIAL_MEDIA_COMPACT_CANDIDATES).
+    Platforms already resolved by the rule-based resolver are returned under
+    "auto_selected_links" and left out of the candidates.
     
     Args:
         tool_context: Context for accessing session state
         alumni_name: Full name of the alumni to search for
         
     Returns:
-        dict: A dictionary containing the search results in markdown format
+        dict: A dictionary containing the candidate links
     """
     try:
-        # Run the search utility with max_links from config
-        social_media_markdown = search_social_media_profiles(
-            full_name=alumni_name,
-            max_links=SOCIAL_MEDIA_MAX_LINKS,
+        # Reuse the candidates the resolver already searched for (only the platforms
+        # it could not decide), then those of an earlier search stage; otherwise take
+        # the background agent's grounding candidates and search the platforms they
+        # leave open, with max_links from config
+        results_by_platform = pending_candidates_for(tool_context.state, alumni_name)
+        auto_selected = tool_context.state.get(state_keys.SOCIAL_MEDIA_AUTO_SELECTED) or {}
+        if results_by_platform is None:
+            results_by_platform = searched_candidates_for(tool_context.state, alumni_name)
+            if results_by_platform is None:
+                results_by_platform = await collect_candidates_with_grounding(
+                    tool_context.state,
+                    full_name=alumni_name,
+                    max_links=SOCIAL_MEDIA_MAX_LINKS,
+                )
+            auto_selected = {}
+        payload_key, payload, candidate_count = build_candidate_payload(
+            alumni_name=alumni_name,
+            results_by_platform=results_by_platform,
         )
         
-        return {
+        # Record how many candidates there are to choose from (used to size the
+        # thinking budget of the selection step)
+        tool_context.state[state_keys.SOCIAL_MEDIA_CANDIDATE_COUNT] = candidate_count
+        
+        response = {
             "action": "search_social_media_candidates",
             "alumni_name": alumni_name,
             "message": f"Successfully searched for social media profiles for {alumni_name}",
-            "candidate_links_markdown": social_media_markdown,
+            payload_key: payload,
         }
+        if auto_selected:
+            response["auto_selected_links"] = auto_selected
+        return response
     except Exception as e:
         return {
             "action": "search_social_media_candidates",
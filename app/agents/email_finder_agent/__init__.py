@@ -0,0 +1,3 @@
+from .agent import EmailFinderOutputSchema, email_finder_agent
+
+__all__ = ["email_finder_agent", "EmailFinderOutputSchema"]
\ No newline at end of file
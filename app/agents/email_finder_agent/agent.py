@@ -0,0 +1,52 @@
+from google.adk.agents import LlmAgent
+from google.adk.planners import BuiltInPlanner
+from google.genai import types
+from pydantic import BaseModel, Field
+from .callbacks import resolve_email_before_agent_callback, search_tool_call_before_model_callback
+from .prompts import EMAIL_FINDER_AGENT_PROMPT, EMAIL_FINDER_INSTRUCTION
+from .tools import search_email_candidates_tool
+from app.agents.alumni_researcher_agent.callbacks import store_query_before_agent_callback
+from app.configs.llms import EMAIL_FINDER_MODEL, EMAIL_FINDER_MODEL_THINKING_BUDGET
+from app.utils.model_client_utils import agent_model
+from app.utils.context_cache_utils import (
+    context_cache_after_model_callback,
+    context_cache_before_model_callback,
+)
+
+
+class EmailFinderOutputSchema(BaseModel):
+    """Schema for the professional email of a Yale University medical alumnus."""
+    email: str = Field(
+        default="",
+        description="The alumnus's professional email address, selected from the candidate emails. Empty string if no candidate is clearly theirs."
+    )
+    email_source_url: str = Field(
+        default="",
+        description="URL of the page where the selected email was found. Empty string if no email was selected."
+    )
+    other_emails: str = Field(
+        default="",
+        description="Comma-separated list of other email addresses of the alumnus from the candidates (e.g. at a second practice). Empty string if none."
+    )
+
+# Define the planner
+planner = BuiltInPlanner(
+    thinking_config=types.ThinkingConfig(thinking_budget=EMAIL_FINDER_MODEL_THINKING_BUDGET)
+)
+
+# Root agent of the "email_finder" mode. It starts from the alumni researcher's stored
+# record (passed in the initial session state), so it needs no background research.
+email_finder_agent = LlmAgent(
+    model=agent_model(EMAIL_FINDER_MODEL),
+    name="email_finder_agent",
+    description="An email finder agent that identifies the professional email address of Yale University medical alumni, reusing earlier research about their current practices.",
+    # Static so the prompt is an identical prefix for every alumnus (see context_cache_utils)
+    static_instruction=EMAIL_FINDER_AGENT_PROMPT,
+    instruction=EMAIL_FINDER_INSTRUCTION,
+    tools=[search_email_candidates_tool],
+    output_schema=EmailFinderOutputSchema,
+    planner=planner,
+    before_agent_callback=[store_query_before_agent_callback, resolve_email_before_agent_callback],
+    before_model_callback=[search_tool_call_before_model_callback, context_cache_before_model_callback],
+    after_model_callback=context_cache_after_model_callback,
+)
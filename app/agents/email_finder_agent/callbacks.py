@@ -0,0 +1,114 @@
+"""Callbacks for the email finder agent."""
+
+import json
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from app.agents import state_keys
+from app.agents.alumni_researcher_agent.subagents.social_media_agent.callbacks import ALUMNI_NAME_PATTERN
+from app.configs.app import logger
+from app.utils.email_utils import (
+    collect_page_email_candidates,
+    email_finder_stats,
+    rank_email_candidates,
+    resolve_email_candidates,
+)
+
+
+def _alumni_name(callback_context: CallbackContext) -> Optional[str]:
+    """Extract the alumni name from the user's query, if it has the expected shape."""
+    user_content = callback_context.user_content
+    text = "\n".join(part.text for part in (user_content.parts or []) if part.text) if user_content else ""
+    match = ALUMNI_NAME_PATTERN.search(text)
+    return match.group(1).strip() if match else None
+
+
+async def resolve_email_before_agent_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """
+    Scan the stored practice pages for emails before the email finder agent runs.
+
+    If one candidate is unambiguous, it is returned as the agent's structured reply
+    and the agent's model calls are skipped. Otherwise the page candidates are
+    stored in session state for the search tool.
+
+    Args:
+        callback_context: Callback context of the email finder agent
+
+    Returns:
+        The agent's reply when the email is resolved locally, otherwise None
+    """
+    from .agent import EmailFinderOutputSchema
+
+    alumni_name = _alumni_name(callback_context)
+    if not alumni_name:
+        return None
+    research = callback_context.state.get(state_keys.EMAIL_RESEARCH) or {}
+    domains = research.get("institution_domains", [])
+
+    candidates = await collect_page_email_candidates(research.get("practice_urls", []))
+    ranked = rank_email_candidates(alumni_name, candidates, domains)
+    selected = resolve_email_candidates(ranked)
+    email_finder_stats.record_row(has_research=bool(research.get("summary")), resolved=selected is not None)
+    logger.info(
+        "Email resolver for %s: %s candidate(s) on stored pages, %s",
+        alumni_name,
+        len(ranked),
+        f"auto-selected {selected['email']}" if selected else "left to the LLM",
+    )
+
+    if selected is not None:
+        others = [entry["email"] for entry in ranked[1:] if entry["name_match"]]
+        record = EmailFinderOutputSchema(
+            email=selected["email"],
+            email_source_url=selected["sources"][0] if selected["sources"] else "",
+            other_emails=", ".join(others),
+        )
+        return types.Content(role="model", parts=[types.Part(text=json.dumps(record.model_dump()))])
+
+    callback_context.state[state_keys.EMAIL_RESOLVED_NAME] = alumni_name
+    callback_context.state[state_keys.EMAIL_PAGE_CANDIDATES] = candidates
+    return None
+
+
+def search_tool_call_before_model_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+) -> Optional[LlmResponse]:
+    """
+    Issue the search tool call without a model call once the stored pages have been scanned.
+
+    The agent's first model turn only calls search_email_candidates_tool with the
+    alumni name, which the resolver already knows.
+
+    Args:
+        callback_context: Callback context of the email finder agent
+        llm_request: The model request about to be sent
+
+    Returns:
+        A response carrying the tool call on the first turn, otherwise None
+    """
+    alumni_name = callback_context.state.get(state_keys.EMAIL_RESOLVED_NAME)
+    if not alumni_name:
+        return None
+    tool_called = any(
+        part.function_response and part.function_response.name == "search_email_candidates_tool"
+        for content in llm_request.contents
+        for part in content.parts or []
+    )
+    if tool_called:
+        return None
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[types.Part(function_call=types.FunctionCall(
+                name="search_email_candidates_tool",
+                args={"alumni_name": alumni_name},
+            ))],
+        ),
+    )
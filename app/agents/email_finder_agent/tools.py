@@ -0,0 +1,58 @@
+"""Tools for the email finder agent to search for candidate emails."""
+
+from google.adk.tools.tool_context import ToolContext
+from app.agents import state_keys
+from app.configs.llms import EMAIL_FINDER_MAX_SEARCH_DOMAINS, EMAIL_FINDER_TOP_K
+from app.utils.email_utils import (
+    format_email_candidates_table,
+    rank_email_candidates,
+    search_email_candidates,
+)
+
+
+def search_email_candidates_tool(
+    tool_context: ToolContext,
+    alumni_name: str,
+) -> dict:
+    """
+    Find candidate emails for a given alumni name.
+
+    Starts from the emails already found on the alumnus's stored practice pages
+    and only searches the web when none of them matches the name: one search per
+    institution domain from the stored research, or a broad search when there is
+    no stored research. Candidates are returned as a compact ranked table.
+
+    Args:
+        tool_context: Context for accessing session state
+        alumni_name: Full name of the alumni to search for
+
+    Returns:
+        dict: A dictionary containing the candidate emails and institution domains
+    """
+    try:
+        research = tool_context.state.get(state_keys.EMAIL_RESEARCH) or {}
+        domains = research.get("institution_domains", [])
+        candidates = []
+        if tool_context.state.get(state_keys.EMAIL_RESOLVED_NAME) == alumni_name:
+            candidates = list(tool_context.state.get(state_keys.EMAIL_PAGE_CANDIDATES) or [])
+        ranked = rank_email_candidates(alumni_name, candidates, domains)
+
+        # New lookups only for what the stored pages did not answer
+        if not any(entry["name_match"] for entry in ranked):
+            candidates += search_email_candidates(alumni_name, domains[:EMAIL_FINDER_MAX_SEARCH_DOMAINS])
+            ranked = rank_email_candidates(alumni_name, candidates, domains)
+
+        return {
+            "action": "search_email_candidates",
+            "alumni_name": alumni_name,
+            "message": f"Found {len(ranked)} candidate email(s) for {alumni_name}",
+            "institution_domains": domains,
+            "candidate_emails_table": format_email_candidates_table(ranked, EMAIL_FINDER_TOP_K),
+        }
+    except Exception as e:
+        return {
+            "action": "search_email_candidates",
+            "alumni_name": alumni_name,
+            "message": f"Error searching for emails: {str(e)}",
+            "candidate_emails_table": "",
+        }
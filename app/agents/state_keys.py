@@ -0,0 +1,62 @@
+"""Session state keys shared by the agents, tools, callbacks and services."""
+
+# Attempt number for the current alumnus (1 on the first run, incremented on retry)
+ATTEMPT = "agent_attempt"
+
+# Model tier per sub-agent name ("cheap" runs that agent on the cascade's cheap model;
+# absent means the agent's own model)
+MODEL_TIERS = "model_tiers"
+
+# Sub-agents whose outputs an earlier cascade attempt accepted; the outputs are in the
+# initial state and the agents are skipped
+CASCADE_ACCEPTED_STAGES = "cascade_accepted_stages"
+
+# The user's query for the current alumnus, stored by the root agent so sub-agents that
+# do not see the conversation can read it through their instruction
+ALUMNI_QUERY = "alumni_query"
+
+# Output of the background information agent (set through its output_key)
+BACKGROUND_INFORMATION = "background_information"
+
+# "Platform: url" lines chosen by the social media agent (its output_key, or the
+# resolver's selection when every platform was resolved without the LLM)
+SOCIAL_MEDIA_LINKS = "social_media_links"
+
+# Number of social media candidate links returned by the search tool
+SOCIAL_MEDIA_CANDIDATE_COUNT = "social_media_candidate_count"
+
+# Per-call thinking budget log written by the adaptive thinking callbacks
+THINKING_BUDGET_LOG = "thinking_budget_log"
+
+# Budget chosen for the model call in flight (temp: keys are not persisted)
+CURRENT_THINKING_BUDGET = "temp:current_thinking_budget"
+
+# Links chosen by the rule-based resolver before the social media agent runs
+SOCIAL_MEDIA_AUTO_SELECTED = "social_media_auto_selected"
+
+# Raw candidates of the platforms the resolver left to the LLM, keyed by platform,
+# plus the name they were searched for (so the search tool can skip searching again)
+SOCIAL_MEDIA_PENDING_CANDIDATES = "social_media_pending_candidates"
+SOCIAL_MEDIA_RESOLVED_NAME = "social_media_resolved_name"
+
+# Web sources (uri, title, citing text) of the background information agent's
+# google_search grounding, reused as social media candidates
+GROUNDING_SOURCES = "grounding_sources"
+
+# Raw candidates of every platform searched ahead of the social media agent by the
+# staged pipeline's search stage, and the name they were searched for
+SOCIAL_MEDIA_SEARCH_RESULTS = "social_media_search_results"
+SOCIAL_MEDIA_SEARCH_NAME = "social_media_search_name"
+
+# Set in the initial state when the formatter step runs in a batch outside the pipeline
+FORMATTER_DEFERRED = "formatter_deferred"
+
+# Email finder: what it reuses from the stored alumni researcher record (practice URLs
+# and institution domains, plus a text summary for its instruction), set in the initial state
+EMAIL_RESEARCH = "email_research"
+EMAIL_RESEARCH_SUMMARY = "email_research_summary"
+
+# Emails found on the stored practice pages, and the name they were collected for
+# (so the search tool only searches for what the pages did not answer)
+EMAIL_PAGE_CANDIDATES = "email_page_candidates"
+EMAIL_RESOLVED_NAME = "email_resolved_name"
@@ -0,0 +1 @@
+"""Offline benchmarks for the alumni pipeline (run with ``python -m app.benchmarks.<name>``)."""
@@ -0,0 +1,145 @@
+"""Headless-browser fetch benchmark against a local static server.
+
+Fetches JS-rendered stub profile pages (each pulling images, a font and an
+analytics script) three ways and reports pages/sec, latency percentiles, how many
+pages rendered their content and how many requests reached the server:
+
+    cold     launch a browser per page (what a naive fetch tool does)
+    context  one warm browser, a fresh unfiltered context per page
+    pool     BrowserPool: warm contexts reused, images/fonts/analytics blocked
+
+Requires the browser binaries (`playwright install chromium`).
+
+Usage:
+    python -m app.benchmarks.browser_pool_benchmark --pages 100 --concurrency 4
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.benchmarks.common import peak_rss_mb, percentile, print_report, write_json
+from app.benchmarks.fakes import JS_RENDERED_MARKER, StubHttpServer
+from app.configs.http import BROWSER_PAGE_TIMEOUT_SECONDS, BROWSER_POOL_CONTEXTS
+from app.utils.browser_utils import BrowserPool
+
+
+async def _render_text(browser: Any, url: str) -> str:
+    """Render a page in a new unfiltered context and return its body text."""
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.goto(url, wait_until="domcontentloaded", timeout=BROWSER_PAGE_TIMEOUT_SECONDS * 1000)
+        return await page.inner_text("body")
+    finally:
+        await context.close()
+
+
+async def run_mode(
+    fetch: Callable[[str], Awaitable[str]],
+    urls: List[str],
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Fetch every URL with bounded concurrency and collect timing and render stats."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    rendered = 0
+
+    async def fetch_one(url: str) -> None:
+        nonlocal rendered
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                text = await fetch(url)
+            except Exception:
+                text = ""
+            latencies.append(time.perf_counter() - start)
+        if JS_RENDERED_MARKER in text:
+            rendered += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch_one(url) for url in urls))
+    wall_seconds = time.perf_counter() - start
+    return {
+        "pages/sec": len(urls) / wall_seconds if wall_seconds else 0.0,
+        "latency p50 (s)": percentile(latencies, 50),
+        "latency p95 (s)": percentile(latencies, 95),
+        "rendered": rendered / max(1, len(urls)),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from playwright.async_api import async_playwright
+
+    metrics: Dict[str, Any] = {"pages": args.pages, "concurrency": args.concurrency}
+    with StubHttpServer(latency_seconds=args.latency) as server:
+        urls = [server.url(f"page/alumnus-{idx}") for idx in range(args.pages)]
+
+        if "cold" in args.modes:
+            async with async_playwright() as playwright:
+                async def fetch_cold(url: str) -> str:
+                    browser = await playwright.chromium.launch(headless=True)
+                    try:
+                        return await _render_text(browser, url)
+                    finally:
+                        await browser.close()
+
+                server.reset_counters()
+                for key, value in (await run_mode(fetch_cold, urls, args.concurrency)).items():
+                    metrics[f"cold: {key}"] = value
+                metrics["cold: server requests"] = server.requests
+
+        if "context" in args.modes:
+            async with async_playwright() as playwright:
+                browser = await playwright.chromium.launch(headless=True)
+                try:
+                    server.reset_counters()
+                    results = await run_mode(lambda url: _render_text(browser, url), urls, args.concurrency)
+                finally:
+                    await browser.close()
+            for key, value in results.items():
+                metrics[f"context: {key}"] = value
+            metrics["context: server requests"] = server.requests
+
+        if "pool" in args.modes:
+            async with BrowserPool(contexts=args.concurrency) as pool:
+                async def fetch_pooled(url: str) -> str:
+                    return (await pool.fetch(url)).text
+
+                server.reset_counters()
+                results = await run_mode(fetch_pooled, urls, args.concurrency)
+                blocked = pool.requests_blocked
+            for key, value in results.items():
+                metrics[f"pool: {key}"] = value
+            metrics["pool: server requests"] = server.requests
+            metrics["pool: requests blocked"] = blocked
+
+    metrics["peak RSS (MiB)"] = peak_rss_mb()
+    return metrics
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=BROWSER_POOL_CONTEXTS,
+                        help="Pages in flight (and pool contexts)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub server delay per request (seconds)")
+    parser.add_argument("--modes", nargs="+", choices=["cold", "context", "pool"], default=["cold", "context", "pool"])
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = asyncio.run(run_benchmark(args))
+    print_report("Headless browser fetch (local static server)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
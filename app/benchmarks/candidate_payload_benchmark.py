@@ -0,0 +1,100 @@
+"""Prompt-size benchmark for the social media candidate payload.
+
+Compares, per alumnus, the verbose markdown report with the compact ranked table
+sent to social_media_agent, and checks that the true profile (known for the
+synthetic roster) survives the top-K cut.
+
+Usage:
+    python -m app.benchmarks.candidate_payload_benchmark --rows 200 --top-k 3
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+from typing import Any, Dict, List, Optional
+
+from app.benchmarks.common import (
+    estimate_tokens,
+    percentile,
+    print_report,
+    synthetic_roster,
+    write_json,
+)
+from app.benchmarks.fakes import FakeDDGS, LatencyProfile, fake_profile_urls
+from app.configs import benchmark as benchmark_config
+from app.configs.llms import SOCIAL_MEDIA_MAX_LINKS, SOCIAL_MEDIA_SNIPPET_CHARS, SOCIAL_MEDIA_TOP_K
+from app.utils.search_utils import (
+    collect_social_media_candidates,
+    format_social_media_markdown,
+    format_social_media_table,
+    rank_social_media_candidates,
+    set_search_client_factory,
+)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Measure markdown vs. table token estimates over a synthetic roster."""
+    # Searches are local and instant here; only payload size matters
+    set_search_client_factory(lambda: FakeDDGS(latency=LatencyProfile()))
+
+    markdown_tokens: List[int] = []
+    table_tokens: List[int] = []
+    reductions: List[float] = []
+    true_profiles = 0
+    true_profiles_kept = 0
+    true_profiles_ranked_first = 0
+
+    for row in synthetic_roster(args.rows, args.seed):
+        full_name = f"{row['First Name']} {row['Last Name']}"
+        results = collect_social_media_candidates(full_name, max_links=SOCIAL_MEDIA_MAX_LINKS)
+        ranked = rank_social_media_candidates(full_name, results, top_k=args.top_k)
+
+        markdown = format_social_media_markdown(full_name, results, max_links=SOCIAL_MEDIA_MAX_LINKS)
+        table = format_social_media_table(full_name, ranked, snippet_chars=args.snippet_chars)
+        markdown_tokens.append(estimate_tokens(markdown))
+        table_tokens.append(estimate_tokens(table))
+        reductions.append(1 - table_tokens[-1] / max(1, markdown_tokens[-1]))
+
+        for platform, url in fake_profile_urls(full_name).items():
+            true_profiles += 1
+            kept_urls = [candidate["href"] for candidate in ranked[platform]]
+            if url in kept_urls:
+                true_profiles_kept += 1
+                if kept_urls[0] == url:
+                    true_profiles_ranked_first += 1
+
+    return {
+        "rows": args.rows,
+        "top k": args.top_k,
+        "markdown tokens (mean)": sum(markdown_tokens) / max(1, len(markdown_tokens)),
+        "table tokens (mean)": sum(table_tokens) / max(1, len(table_tokens)),
+        "reduction per alumnus (mean)": sum(reductions) / max(1, len(reductions)),
+        "reduction per alumnus (p5)": percentile(reductions, 5),
+        "reduction per alumnus (p95)": percentile(reductions, 95),
+        "true profiles": true_profiles,
+        "true profile kept in top k": true_profiles_kept / max(1, true_profiles),
+        "true profile ranked first": true_profiles_ranked_first / max(1, true_profiles),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=benchmark_config.BENCHMARK_ROWS)
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--top-k", type=int, default=SOCIAL_MEDIA_TOP_K)
+    parser.add_argument("--snippet-chars", type=int, default=SOCIAL_MEDIA_SNIPPET_CHARS)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = run_benchmark(args)
+    print_report("Social media candidate payload (estimated prompt tokens)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Shared helpers for the offline benchmarks: synthetic rosters, stats and reporting."""
+
+import json
+import math
+import random
+import resource
+import sys
+from typing import Any, Dict, List, Sequence
+
+# Name pools for synthetic rosters
+FIRST_NAMES = [
+    "Alice", "Benjamin", "Chen", "Daniela", "Emeka", "Farah", "Gabriel", "Hana",
+    "Ivan", "Julia", "Kofi", "Leila", "Mateo", "Nadia", "Omar", "Priya",
+    "Quentin", "Rosa", "Samuel", "Tara", "Umar", "Valeria", "William", "Yuki",
+]
+LAST_NAMES = [
+    "Anderson", "Bhatt", "Castillo", "Dubois", "Eriksen", "Fischer", "Goldberg",
+    "Hashemi", "Ito", "Johansson", "Kowalski", "Lopez", "Mensah", "Nakamura",
+    "Okafor", "Patel", "Rossi", "Schmidt", "Tanaka", "Vasquez", "Weber", "Zhang",
+]
+
+
+def synthetic_roster(rows: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Build a deterministic roster shaped like data/residents_base_info.csv.
+
+    Args:
+        rows: Number of alumni to generate
+        seed: RNG seed
+
+    Returns:
+        List of dicts with "First Name", "Last Name" and "Year" keys
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "First Name": rng.choice(FIRST_NAMES),
+            "Last Name": rng.choice(LAST_NAMES),
+            "Year": rng.randint(1985, 2022),
+        }
+        for _ in range(rows)
+    ]
+
+
+def estimate_tokens(text: str, chars_per_token: int = 4) -> int:
+    """Rough token count for English/URL-heavy text (about 4 characters per token)."""
+    return len(text) // chars_per_token
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100). Returns 0.0 for empty input."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def print_report(title: str, metrics: Dict[str, Any]) -> None:
+    """Print metrics as an aligned two-column table."""
+    width = max(len(key) for key in metrics) if metrics else 0
+    print(f"\n{title}")
+    print("-" * len(title))
+    for key, value in metrics.items():
+        if isinstance(value, float):
+            value = f"{value:,.3f}"
+        print(f"{key.ljust(width)}  {value}")
+
+
+def write_json(path: str, payload: Dict[str, Any]) -> None:
+    """Write benchmark results to a JSON file."""
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
@@ -0,0 +1,317 @@
+"""Per-event processing overhead of call_root_agent_async.
+
+Replays synthetic ADK events shaped like a pipeline run (model calls with
+usage metadata, function calls and responses, intermediate and final text
+replies) through three event loops and reports microseconds per event:
+
+    legacy    get_token_counts + process_agent_message per event, copied
+              unchanged from the loop call_root_agent_async used before the
+              handler pipeline
+    pipeline  EventPipeline with token accounting and final-response capture
+    metrics   the same pipeline plus MetricsEventHandler (live run metrics)
+
+Each mode runs with the app logger at its configured level and again at DEBUG
+(with output discarded), where the pipeline adds its trace handler. All modes
+must agree on the accumulated token counts and final response text.
+
+Usage:
+    python -m app.benchmarks.event_pipeline_benchmark --events 20000
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.genai import types
+
+from app.benchmarks.common import print_report, write_json
+from app.configs import benchmark as benchmark_config
+from app.configs.app import logger
+from app.utils.metrics_utils import MetricsEventHandler, RunMetrics
+from app.utils.event_utils import (
+    TOKEN_COUNT_FIELDS,
+    DebugTraceHandler,
+    EventPipeline,
+    FinalResponseHandler,
+    TokenAccountingHandler,
+)
+
+AGENTS = ["background_information_agent", "social_media_agent", "formatter_agent"]
+
+
+# The per-event helpers of app/utils/agent_utils.py before the handler pipeline, as
+# they were (f-string logging included), so the legacy mode measures the original loop
+async def legacy_process_agent_message(event: Any) -> Optional[str]:
+    """
+    Process and log agent response events, returning text only from final events.
+
+    Args:
+        event: Agent response event containing content parts
+
+    Returns:
+        Extracted text content if event is final and has text, None otherwise
+    """
+    # Log basic event info
+    logger.debug(f"Event ID: {event.id}, Author: {event.author}")
+
+    # Check for specific parts and log them
+    if logger.level == logging.DEBUG:
+        if event.content and event.content.parts:
+            for part in event.content.parts:
+                if hasattr(part, "executable_code") and part.executable_code:
+                    # Log executable code
+                    logger.debug(f"Agent generated code: {part.executable_code.code}")
+                elif (
+                    hasattr(part, "code_execution_result")
+                    and part.code_execution_result
+                ):
+                    # Log code execution results
+                    logger.debug(
+                        f"Code Execution Result: {part.code_execution_result.outcome} - Output: {part.code_execution_result.output}"
+                    )
+                elif hasattr(part, "tool_response") and part.tool_response:
+                    # Log tool responses
+                    logger.debug(f"Tool Response: {part.tool_response.output}")
+                elif hasattr(part, "function_call") and part.function_call:
+                    # Log function calls
+                    logger.debug(f"Function Call: {part.function_call.name}")
+                elif hasattr(part, "function_response") and part.function_response:
+                    # Log function responses
+                    logger.debug(
+                        f"Function Response: {part.function_response.response}"
+                    )
+                # Log any text parts found in any event for debugging
+                elif hasattr(part, "text") and part.text and not part.text.isspace():
+                    logger.debug(f"Text content: '{part.text.strip()}'")
+
+    # Check for final response
+    final_response = None
+    if hasattr(event, "is_final_response") and event.is_final_response():
+        logger.info("Final agent response detected")
+        if (
+            event.content
+            and event.content.parts
+            and hasattr(event.content.parts[0], "text")
+            and event.content.parts[0].text
+        ):
+            final_response = event.content.parts[0].text.strip()
+            logger.info(f"Final agent response text: {final_response[:100]}...")
+        else:
+            logger.warning("Final agent response detected but no text content found")
+    else:
+        logger.debug("Non-final event - no text returned")
+
+    return final_response
+
+
+def legacy_get_token_counts(event):
+    """
+    Extract token counts from an event object's usage_metadata.
+    
+    Args:
+        event: Event object containing usage_metadata
+        
+    Returns:
+        dict: Dictionary containing all token counts
+    """
+    try:
+        usage_metadata = event.usage_metadata
+        
+        # Extract basic token counts
+        token_counts = {
+            'total_token_count': getattr(usage_metadata, 'total_token_count', 0),
+            'prompt_token_count': getattr(usage_metadata, 'prompt_token_count', 0),
+            'candidates_token_count': getattr(usage_metadata, 'candidates_token_count', 0),
+            'cached_content_token_count': getattr(usage_metadata, 'cached_content_token_count', 0),
+            'thoughts_token_count': getattr(usage_metadata, 'thoughts_token_count', 0)
+        }
+        
+        # Extract cache tokens details
+        if hasattr(usage_metadata, 'cache_tokens_details') and usage_metadata.cache_tokens_details:
+            cache_tokens = {}
+            for item in usage_metadata.cache_tokens_details:
+                modality = item.modality.name if hasattr(item.modality, 'name') else str(item.modality)
+                cache_tokens[modality.lower()] = item.token_count
+            token_counts['cache_tokens_by_modality'] = cache_tokens
+        
+        # Extract prompt tokens details
+        if hasattr(usage_metadata, 'prompt_tokens_details') and usage_metadata.prompt_tokens_details:
+            prompt_tokens = {}
+            for item in usage_metadata.prompt_tokens_details:
+                modality = item.modality.name if hasattr(item.modality, 'name') else str(item.modality)
+                prompt_tokens[modality.lower()] = item.token_count
+            token_counts['prompt_tokens_by_modality'] = prompt_tokens
+        
+        return token_counts
+        
+    except AttributeError as e:
+        # If the event doesn't have usage_metadata or expected structure
+        return {'error': f'Could not extract token counts: {str(e)}'}
+    except Exception as e:
+        return {'error': f'Unexpected error: {str(e)}'}
+
+
+def _usage(rng: random.Random) -> types.GenerateContentResponseUsageMetadata:
+    prompt = rng.randint(1000, 3000)
+    candidates = rng.randint(50, 400)
+    thoughts = rng.choice([0, 256, 1024])
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt,
+        candidates_token_count=candidates,
+        thoughts_token_count=thoughts,
+        cached_content_token_count=prompt - 300,
+        total_token_count=prompt + candidates + thoughts,
+        prompt_tokens_details=[types.ModalityTokenCount(modality=types.MediaModality.TEXT, token_count=prompt)],
+    )
+
+
+def synthetic_events(count: int, seed: int) -> List[Event]:
+    """
+    Build events in the order one alumnus produces them, repeated until count is reached.
+
+    Per alumnus: background model reply, social media function call, function
+    response and reply, formatter JSON reply (the only final response with text).
+    """
+    rng = random.Random(seed)
+    events: List[Event] = []
+    while len(events) < count:
+        events.append(Event(
+            author=AGENTS[0],
+            content=types.Content(role="model", parts=[types.Part(text="Practice names: Yale New Haven Hospital\n" * 4)]),
+            usage_metadata=_usage(rng),
+        ))
+        events.append(Event(
+            author=AGENTS[1],
+            content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+                name="search_social_media_candidates_tool", args={"alumni_name": "Alice Patel"},
+            ))]),
+            usage_metadata=_usage(rng),
+        ))
+        events.append(Event(
+            author=AGENTS[1],
+            content=types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+                name="search_social_media_candidates_tool", response={"result": "linkedin | 0.9 | https://..."},
+            ))]),
+        ))
+        events.append(Event(
+            author=AGENTS[1],
+            content=types.Content(role="model", parts=[types.Part(text="LinkedIn: https://www.linkedin.com/in/x")]),
+            usage_metadata=_usage(rng),
+        ))
+        events.append(Event(
+            author=AGENTS[2],
+            content=types.Content(role="model", parts=[types.Part(text='{"current_practices_names": "Yale"}')]),
+            usage_metadata=_usage(rng),
+        ))
+    return events[:count]
+
+
+async def run_legacy(events: List[Event]) -> Tuple[Dict[str, int], Optional[str]]:
+    """The per-event work call_root_agent_async did before the handler pipeline."""
+    totals = dict.fromkeys(TOKEN_COUNT_FIELDS, 0)
+    prompt_by_modality: Dict[str, int] = {}
+    event_details = []
+    final_text = None
+    for event in events:
+        token_counts = legacy_get_token_counts(event)
+        if "error" not in token_counts:
+            event_details.append({"event_id": event.id, "author": event.author, "token_counts": token_counts})
+            for key in TOKEN_COUNT_FIELDS:
+                if token_counts.get(key) is not None:
+                    totals[key] += token_counts[key]
+            for modality, count in token_counts.get("prompt_tokens_by_modality", {}).items():
+                prompt_by_modality[modality] = prompt_by_modality.get(modality, 0) + count
+            logger.debug(f"Event {event.id} token counts: {token_counts}")
+        response = await legacy_process_agent_message(event)
+        if response:
+            final_text = response
+    return totals, final_text
+
+
+async def run_pipeline(events: List[Event]) -> Tuple[Dict[str, int], Optional[str]]:
+    tokens = TokenAccountingHandler()
+    final_response = FinalResponseHandler()
+    pipeline = EventPipeline([tokens, final_response, DebugTraceHandler()])
+    for event in events:
+        pipeline(event)
+    return tokens.totals, final_response.text
+
+
+async def run_pipeline_with_metrics(events: List[Event]) -> Tuple[Dict[str, int], Optional[str]]:
+    tokens = TokenAccountingHandler()
+    final_response = FinalResponseHandler()
+    metrics = MetricsEventHandler({agent: "gemini-2.5-flash" for agent in AGENTS}, metrics=RunMetrics())
+    pipeline = EventPipeline([tokens, final_response, DebugTraceHandler(), metrics])
+    for event in events:
+        pipeline(event)
+    pipeline.finish()
+    return tokens.totals, final_response.text
+
+
+@contextlib.contextmanager
+def log_level(level: int) -> Iterator[None]:
+    """Set the app logger's level, with its output discarded."""
+    previous_level, previous_handlers = logger.level, logger.handlers[:]
+    logger.setLevel(level)
+    logger.handlers = [logging.NullHandler()]
+    try:
+        yield
+    finally:
+        logger.setLevel(previous_level)
+        logger.handlers = previous_handlers
+
+
+async def time_mode(run: Any, events: List[Event], repeats: int) -> Tuple[float, Tuple[Dict[str, int], Optional[str]]]:
+    """Best-of-repeats microseconds per event, and the mode's result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = await run(events)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / max(1, len(events)), result
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    events = synthetic_events(args.events, args.seed)
+    metrics: Dict[str, Any] = {"events": len(events), "repeats": args.repeats}
+    results = {}
+    for level_name, level in [("configured", logger.level), ("debug", logging.DEBUG)]:
+        with log_level(level):
+            for mode, run in [("legacy", run_legacy), ("pipeline", run_pipeline), ("metrics", run_pipeline_with_metrics)]:
+                us_per_event, results[mode] = await time_mode(run, events, args.repeats)
+                metrics[f"{mode} ({level_name} logging): us/event"] = us_per_event
+    metrics["results agree"] = results["legacy"] == results["pipeline"] == results["metrics"]
+    metrics["speedup (configured logging)"] = (
+        metrics["legacy (configured logging): us/event"] / metrics["pipeline (configured logging): us/event"]
+    )
+    return metrics
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per mode (best is reported)")
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = asyncio.run(run_benchmark(args))
+    print_report("Event processing overhead (synthetic events)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
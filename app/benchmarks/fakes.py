@@ -0,0 +1,895 @@
+"""Deterministic offline stand-ins for the Gemini model and DDGS search.
+
+These let the full pipeline (ADKService -> call_root_agent_async -> sub-agents
+-> tools) run without network access, with configurable latency, token usage
+and failure rates, so throughput can be measured reproducibly.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+from app.configs import benchmark as benchmark_config
+from app.utils.search_utils import SOCIAL_MEDIA_PLATFORMS
+
+# Label ADK attaches to every model request with the calling agent's name
+ADK_AGENT_NAME_LABEL = "adk_agent_name"
+
+# Fallback budget used to derive thoughts tokens when thinking is dynamic (-1)
+DYNAMIC_THINKING_BUDGET = 1024
+
+# Small pool of institutions the fake background agent "finds"
+FAKE_INSTITUTIONS = [
+    ("Yale New Haven Hospital", "ynhh.org"),
+    ("Johns Hopkins Hospital", "hopkinsmedicine.org"),
+    ("Massachusetts General Hospital", "massgeneral.org"),
+    ("Mayo Clinic", "mayoclinic.org"),
+    ("Stanford Health Care", "stanfordhealthcare.org"),
+    ("Radiology Associates of Connecticut", "radiologyct.com"),
+    ("NYU Langone Health", "nyulangone.org"),
+    ("Cleveland Clinic", "clevelandclinic.org"),
+]
+
+# Other ways the same institutions get written (real agents are inconsistent across rows)
+FAKE_INSTITUTION_ALIASES = {
+    "Yale New Haven Hospital": ["Yale-New Haven Hospital", "YNHH", "Yale New Haven Health"],
+    "Johns Hopkins Hospital": ["The Johns Hopkins Hospital", "JHH", "Johns Hopkins Medicine"],
+    "Massachusetts General Hospital": ["Mass General Hospital", "MGH", "Massachusetts General Hospital (MGH)"],
+    "Mayo Clinic": ["Mayo Clinic Rochester", "The Mayo Clinic"],
+    "Stanford Health Care": ["Stanford Healthcare", "Stanford Medicine"],
+    "Radiology Associates of Connecticut": ["Radiology Associates of CT", "Radiology Associates of Connecticut PC"],
+    "NYU Langone Health": ["NYU Langone", "NYU Langone Medical Center"],
+    "Cleveland Clinic": ["The Cleveland Clinic", "Cleveland Clinic Foundation"],
+}
+
+# Lines the fake social media agent emits (same format the real prompt asks for)
+SOCIAL_OUTPUT_LABELS = {
+    "X (Twitter)": "x_twitter_link",
+    "LinkedIn": "linkedin_link",
+    "Doximity": "doximity_link",
+    "Google Scholar": "google_scholar_link",
+    "Facebook": "facebook_link",
+}
+
+_NAME_PATTERN = re.compile(r"alumni name:\s*([^,\n]+)", re.IGNORECASE)
+_EMAIL_QUERY_PATTERN = re.compile(r'^"([^"]+)" (?:email|radiologist email)')
+_URL_PATTERN = re.compile(r"https?://[^\s\"'\\|,)\]]+")
+
+
+def _stable_int(text: str) -> int:
+    """Hash a string to a stable integer (Python's hash() is salted per process)."""
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+@dataclass
+class LatencyProfile:
+    """Latency distribution for a fake backend call."""
+
+    distribution: str = "constant"  # "constant", "uniform" or "lognormal"
+    mean_seconds: float = 0.0
+    spread: float = 0.0  # sigma for lognormal, +/- fraction of the mean for uniform
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency value in seconds."""
+        if self.mean_seconds <= 0:
+            return 0.0
+        if self.distribution == "constant":
+            return self.mean_seconds
+        if self.distribution == "uniform":
+            low = self.mean_seconds * (1 - self.spread)
+            high = self.mean_seconds * (1 + self.spread)
+            return max(0.0, rng.uniform(low, high))
+        if self.distribution == "lognormal":
+            # Pick mu so that the distribution mean equals mean_seconds
+            sigma = self.spread
+            mu = math.log(self.mean_seconds) - (sigma ** 2) / 2
+            return rng.lognormvariate(mu, sigma)
+        raise ValueError(
+            f"Invalid latency distribution: {self.distribution}. "
+            "Supported: 'constant', 'uniform', 'lognormal'"
+        )
+
+
+def model_latency_from_config() -> LatencyProfile:
+    """Build the fake model latency profile from app.configs.benchmark."""
+    return LatencyProfile(
+        distribution=benchmark_config.FAKE_MODEL_LATENCY_DISTRIBUTION,
+        mean_seconds=benchmark_config.FAKE_MODEL_LATENCY_MEAN_SECONDS,
+        spread=benchmark_config.FAKE_MODEL_LATENCY_SPREAD,
+    )
+
+
+def search_latency_from_config() -> LatencyProfile:
+    """Build the fake search latency profile from app.configs.benchmark."""
+    return LatencyProfile(
+        distribution=benchmark_config.FAKE_SEARCH_LATENCY_DISTRIBUTION,
+        mean_seconds=benchmark_config.FAKE_SEARCH_LATENCY_MEAN_SECONDS,
+        spread=benchmark_config.FAKE_SEARCH_LATENCY_SPREAD,
+    )
+
+
+def _profile_url(platform: str, full_name: str) -> str:
+    """Build a platform profile URL for a name (whether or not the person has one)."""
+    slug = _slugify(full_name)
+    compact = slug.replace("-", "")
+    seed = _stable_int(full_name)
+    if platform == "X (Twitter)":
+        return f"https://x.com/{compact}"
+    if platform == "LinkedIn":
+        return f"https://www.linkedin.com/in/{slug}-{seed % 900 + 100}"
+    if platform == "Doximity":
+        return f"https://www.doximity.com/pub/{slug}-md"
+    if platform == "Google Scholar":
+        return f"https://scholar.google.com/citations?user={format(seed, 'x')[:12].upper()}"
+    return f"https://www.facebook.com/{compact}"
+
+
+def fake_profile_urls(full_name: str) -> Dict[str, str]:
+    """
+    Return the "true" profile URL per platform for a synthetic alumnus.
+
+    Some platforms are deliberately missing (derived from the name hash) so the
+    workload includes alumni with little or no web presence.
+
+    Args:
+        full_name: Full name of the alumnus
+
+    Returns:
+        Mapping of platform name to profile URL (only platforms the person is on)
+    """
+    seed = _stable_int(full_name)
+    # Out of 10: how likely each platform is to have a profile
+    presence = {"X (Twitter)": 3, "LinkedIn": 9, "Doximity": 8, "Google Scholar": 5, "Facebook": 3}
+    return {
+        platform: _profile_url(platform, full_name)
+        for idx, platform in enumerate(SOCIAL_MEDIA_PLATFORMS)
+        if (seed >> (idx * 4)) % 10 < presence[platform]
+    }
+
+
+def fake_institution(full_name: str) -> tuple[str, str]:
+    """Return the (name, domain) of the institution a synthetic alumnus works at."""
+    return FAKE_INSTITUTIONS[_stable_int(full_name) % len(FAKE_INSTITUTIONS)]
+
+
+def fake_practices(full_name: str) -> tuple[List[str], List[str]]:
+    """
+    Return the practice names and URLs the fake background agent reports.
+
+    Like the real agent, the institution is named inconsistently across alumni and
+    is sometimes listed twice under different names.
+    """
+    institution, domain = fake_institution(full_name)
+    names = [institution]
+    urls = [f"https://www.{domain}/doctors/{_slugify(full_name)}"]
+    seed = _stable_int(f"practices:{full_name}")
+    aliases = FAKE_INSTITUTION_ALIASES.get(institution, [])
+    if aliases and seed % 2:
+        names[0] = aliases[(seed >> 1) % len(aliases)]
+    if aliases and (seed >> 4) % 4 == 0:
+        names.append(aliases[(seed >> 6) % len(aliases)])
+        urls.append(f"https://{domain}/")
+    return names, urls
+
+
+def fake_grounding_metadata(full_name: str) -> types.GroundingMetadata:
+    """
+    Return the google_search grounding of the fake background agent's reply.
+
+    It cites the practice pages and, for some alumni, their LinkedIn, Doximity or
+    Google Scholar profile (FAKE_GROUNDING_PROFILE_RATE per platform, from the name hash).
+    """
+    _, urls = fake_practices(full_name)
+    profiles = fake_profile_urls(full_name)
+    seed = _stable_int(f"grounding:{full_name}")
+    for idx, platform in enumerate(["LinkedIn", "Doximity", "Google Scholar"]):
+        if platform in profiles and (seed >> (idx * 8)) % 100 < benchmark_config.FAKE_GROUNDING_PROFILE_RATE * 100:
+            urls.append(profiles[platform])
+    chunks = [
+        types.GroundingChunk(web=types.GroundingChunkWeb(uri=url, title=urlsplit(url).hostname))
+        for url in urls
+    ]
+    supports = [
+        types.GroundingSupport(
+            segment=types.Segment(text=f"{full_name} is an attending radiologist (MD)."),
+            grounding_chunk_indices=list(range(len(chunks))),
+        )
+    ]
+    return types.GroundingMetadata(grounding_chunks=chunks, grounding_supports=supports)
+
+
+def fake_email(full_name: str) -> str:
+    """Return the work email of a synthetic alumnus (first initial + last name at their institution)."""
+    first, _, last = full_name.partition(" ")
+    _, domain = fake_institution(full_name)
+    return f"{first[:1]}{re.sub(r'[^a-z]', '', last.lower())}@{domain}".lower()
+
+
+def fake_practice_page(url: str) -> str:
+    """
+    Return the HTML of a practice page reported by the fake background agent.
+
+    A doctor page lists a colleague's email and, for most alumni, the alumnus's own
+    (the rest only have it in search results). Other pages list a shared mailbox.
+    """
+    match = re.search(r"https?://(?:www\.)?([^/]+)/doctors/([a-z0-9-]+)", url)
+    if not match:
+        domain = re.sub(r"^https?://(?:www\.)?", "", url).split("/")[0]
+        return f"<html><body>Contact us: info@{domain}</body></html>"
+    domain, slug = match.groups()
+    full_name = " ".join(part.capitalize() for part in slug.split("-"))
+    emails = [f"scheduling@{domain}", f"a.colleague@{domain}"]
+    if _stable_int(f"email-page:{full_name}") % 10 < 6:
+        emails.append(fake_email(full_name).replace("@", " [at] "))
+    return f"<html><body><h1>{full_name}, MD</h1><p>Contact: {'; '.join(emails)}</p></body></html>"
+
+
+async def fake_page_fetcher(client: Any, url: str) -> str:
+    """Page fetcher for email_utils.set_page_fetcher that serves fake_practice_page offline."""
+    return fake_practice_page(url)
+
+
+class FakeDDGS:
+    """
+    Drop-in replacement for ``ddgs.DDGS`` that serves synthetic results.
+
+    Results depend only on the query, so repeated runs are identical. Latency
+    and failures are drawn from a shared seeded RNG.
+    """
+
+    # Class-level counters so factories that build one client per search can
+    # still be inspected after a run
+    calls = 0
+    failures = 0
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        latency: Optional[LatencyProfile] = None,
+        failure_rate: float = benchmark_config.FAKE_SEARCH_FAILURE_RATE,
+        results_per_query: int = benchmark_config.FAKE_SEARCH_RESULTS_PER_QUERY,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.latency = latency if latency is not None else search_latency_from_config()
+        self.failure_rate = failure_rate
+        self.results_per_query = results_per_query
+        self.rng = rng if rng is not None else random.Random(benchmark_config.BENCHMARK_SEED)
+
+    @classmethod
+    def reset_counters(cls) -> None:
+        with cls._lock:
+            cls.calls = 0
+            cls.failures = 0
+
+    def text(self, query: str, max_results: Optional[int] = None, **kwargs: Any) -> List[Dict[str, str]]:
+        """Return synthetic search results shaped like ``DDGS.text``."""
+        with FakeDDGS._lock:
+            FakeDDGS.calls += 1
+            delay = self.latency.sample(self.rng)
+            fail = self.rng.random() < self.failure_rate
+            if fail:
+                FakeDDGS.failures += 1
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"Fake search failure for query: {query}")
+
+        results = self._results_for_query(query)
+        limit = max_results if max_results is not None else self.results_per_query
+        return results[:limit]
+
+    def _results_for_query(self, query: str) -> List[Dict[str, str]]:
+        email_query = _EMAIL_QUERY_PATTERN.match(query)
+        if email_query:
+            return self._email_results(email_query.group(1))
+        full_name = query.split(",")[0].strip()
+        platform = next(
+            (name for name in SOCIAL_MEDIA_PLATFORMS if query.rstrip().endswith(name)),
+            "LinkedIn",
+        )
+        rng = random.Random(_stable_int(query))
+        first, _, last = full_name.partition(" ")
+        institution, domain = fake_institution(full_name)
+        true_url = fake_profile_urls(full_name).get(platform)
+        namesake_url = _profile_url(platform, f"{first} {rng.choice('ABCDEJKMRT')}. {last}")
+
+        results: List[Dict[str, str]] = []
+        if true_url:
+            results.append({
+                "title": f"{full_name}, MD - Radiologist - {institution} | {platform}",
+                "href": true_url,
+                "body": f"{full_name} is a radiologist at {institution}. Residency: Yale School of Medicine.",
+            })
+        # Namesakes in other professions and non-profile pages on the same platform
+        results.append({
+            "title": f"{first} {last} - Software Engineer | {platform}",
+            "href": namesake_url,
+            "body": f"{first} {last}. Software engineer in Austin, Texas.",
+        })
+        results.append({
+            "title": f"Congratulations to Dr. {last} on the new imaging center | {platform}",
+            "href": namesake_url.split("?")[0].rstrip("/") + "/posts/announcement-" + str(rng.randint(1000, 9999)),
+            "body": f"Our radiology team welcomes Dr. {full_name}...",
+        })
+        # Off-platform results that the platform filter should drop
+        while len(results) < self.results_per_query:
+            results.append({
+                "title": f"{full_name} - {institution} Radiology",
+                "href": f"https://www.{domain}/doctors/{_slugify(full_name)}-{rng.randint(1, 99)}",
+                "body": f"Find a doctor: {full_name}, Diagnostic Radiology, {institution}.",
+            })
+        rng.shuffle(results)
+        return results
+
+    def _email_results(self, full_name: str) -> List[Dict[str, str]]:
+        """Results of an email search: a directory page with the email and a namesake's."""
+        first, _, last = full_name.partition(" ")
+        institution, domain = fake_institution(full_name)
+        slug = _slugify(full_name)
+        return [
+            {
+                "title": f"{full_name}, MD | {institution} Radiology Directory",
+                "href": f"https://www.{domain}/directory/{slug}",
+                "body": f"{full_name}, Diagnostic Radiology. Email: {fake_email(full_name)}",
+            },
+            {
+                "title": f"{first} {last} - Real Estate Agent",
+                "href": f"https://www.example-realty.com/agents/{slug}",
+                "body": f"Contact {first} at {first.lower()}{last.lower()}realty@gmail.com",
+            },
+        ][:self.results_per_query]
+
+
+class FakeCaches:
+    """
+    In-memory stand-in for ``client.aio.caches``: stores the cached system
+    instruction and tools so FakeLlm can serve requests that reference a cache.
+    """
+
+    def __init__(self, chars_per_token: int) -> None:
+        self.chars_per_token = chars_per_token
+        self.contents: Dict[str, Dict[str, Any]] = {}
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+
+    @staticmethod
+    def _expire_time(ttl: Optional[str]) -> float:
+        return time.time() + float((ttl or "3600s").rstrip("s"))
+
+    async def create(self, model: str, config: types.CreateCachedContentConfig) -> types.CachedContent:
+        self.created += 1
+        name = f"cachedContents/fake-{self.created}"
+        instruction = config.system_instruction if isinstance(config.system_instruction, str) else ""
+        token_count = len(instruction) // self.chars_per_token
+        self.contents[name] = {
+            "system_instruction": instruction,
+            "tools": config.tools,
+            "token_count": token_count,
+            "expire_time": self._expire_time(config.ttl),
+        }
+        return types.CachedContent(
+            name=name,
+            model=model,
+            display_name=config.display_name,
+            usage_metadata=types.CachedContentUsageMetadata(total_token_count=token_count),
+        )
+
+    async def update(self, name: str, config: types.UpdateCachedContentConfig) -> types.CachedContent:
+        if name not in self.contents:
+            raise RuntimeError(f"Fake cache not found: {name}")
+        self.updated += 1
+        self.contents[name]["expire_time"] = self._expire_time(config.ttl)
+        return types.CachedContent(name=name)
+
+    async def delete(self, name: str) -> None:
+        if self.contents.pop(name, None) is not None:
+            self.deleted += 1
+
+    def lookup(self, name: str) -> Dict[str, Any]:
+        """Return a live cache for a request, raising like the API for unknown or expired ones."""
+        content = self.contents.get(name)
+        if content is None or content["expire_time"] < time.time():
+            raise RuntimeError(f"Fake model: cached content {name} not found or expired")
+        return content
+
+
+@dataclass
+class FakeGenaiClient:
+    """Minimal ``google.genai.Client`` shape (``client.aio.caches``) backed by FakeCaches."""
+
+    caches: FakeCaches
+
+    @property
+    def aio(self) -> "FakeGenaiClient":
+        return self
+
+
+class FakeLlm(BaseLlm):
+    """
+    Offline stand-in for Gemini that plays the role of each sub-agent.
+
+    The calling agent is identified from the ``adk_agent_name`` label ADK puts on
+    every request, falling back to request shape (output schema, tools).
+    Token usage is derived from request/response text length so that prompt
+    size changes show up in the benchmark numbers. Requests that reference a
+    cached content (``config.cached_content``) are served from ``api_client``'s
+    caches, and the cached part is reported as cached content tokens. Requests
+    for another model (the model cascade's cheap tier) are faster, and their
+    background and link answers are sometimes wrong. Background replies carry
+    google_search grounding metadata (see fake_grounding_metadata).
+    """
+
+    model: str = benchmark_config.FAKE_MODEL_NAME
+    latency: LatencyProfile = LatencyProfile()
+    failure_rate: float = benchmark_config.FAKE_MODEL_FAILURE_RATE
+    batch_record_failure_rate: float = benchmark_config.FAKE_BATCH_RECORD_FAILURE_RATE
+    chars_per_token: int = benchmark_config.FAKE_MODEL_CHARS_PER_TOKEN
+    thoughts_fraction: float = benchmark_config.FAKE_MODEL_THOUGHTS_FRACTION
+    cheap_latency_factor: float = benchmark_config.FAKE_CHEAP_MODEL_LATENCY_FACTOR
+    cheap_error_rate: float = benchmark_config.FAKE_CHEAP_MODEL_ERROR_RATE
+    seed: int = benchmark_config.BENCHMARK_SEED
+
+    _rng: random.Random = PrivateAttr()
+    _calls_by_agent: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _failures: int = PrivateAttr(default=0)
+    _api_client: FakeGenaiClient = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+        self._api_client = FakeGenaiClient(FakeCaches(self.chars_per_token))
+
+    @property
+    def api_client(self) -> FakeGenaiClient:
+        return self._api_client
+
+    @classmethod
+    def from_config(cls) -> "FakeLlm":
+        """Build a fake model from app.configs.benchmark defaults."""
+        return cls(latency=model_latency_from_config())
+
+    @property
+    def calls_by_agent(self) -> Dict[str, int]:
+        return dict(self._calls_by_agent)
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent_name = self._agent_name(llm_request)
+        self._calls_by_agent[agent_name] = self._calls_by_agent.get(agent_name, 0) + 1
+
+        cheap = bool(llm_request.model) and llm_request.model != self.model
+        latency = self.latency.sample(self._rng)
+        await asyncio.sleep(latency * self.cheap_latency_factor if cheap else latency)
+        if self._rng.random() < self.failure_rate:
+            self._failures += 1
+            raise RuntimeError(f"Fake model failure (simulated 503) for {agent_name}")
+
+        cached_text = ""
+        if llm_request.config.cached_content:
+            cached_text = self._api_client.caches.lookup(llm_request.config.cached_content)["system_instruction"]
+        request_text = "\n".join(filter(None, [cached_text, self._request_text(llm_request)]))
+        full_name = self._alumni_name(request_text)
+        grounding_metadata = None
+
+        if agent_name == "email_finder_agent":
+            parts = self._email_finder_parts(llm_request, full_name)
+        elif agent_name == "social_media_agent" or "search_social_media_candidates_tool" in llm_request.tools_dict:
+            parts = self._social_media_parts(llm_request, full_name, cheap)
+        elif agent_name == "batch_formatter_agent":
+            parts = [types.Part(text=self._batch_formatter_text(request_text))]
+        elif agent_name == "formatter_agent" or llm_request.config.response_schema is not None:
+            parts = [types.Part(text=self._formatter_text(request_text))]
+        else:
+            parts = [types.Part(text=self._background_text(full_name, cheap))]
+            grounding_metadata = fake_grounding_metadata(full_name)
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=self._usage(llm_request, request_text, parts, cached_chars=len(cached_text)),
+            grounding_metadata=grounding_metadata,
+            finish_reason=types.FinishReason.STOP,
+        )
+
+    def _agent_name(self, llm_request: LlmRequest) -> str:
+        labels = llm_request.config.labels or {}
+        if ADK_AGENT_NAME_LABEL in labels:
+            return labels[ADK_AGENT_NAME_LABEL]
+        if "search_social_media_candidates_tool" in llm_request.tools_dict:
+            return "social_media_agent"
+        if llm_request.config.response_schema is not None:
+            return "formatter_agent"
+        return "background_information_agent"
+
+    @staticmethod
+    def _request_text(llm_request: LlmRequest) -> str:
+        """Flatten the system instruction and contents into one string."""
+        chunks = []
+        if isinstance(llm_request.config.system_instruction, str):
+            chunks.append(llm_request.config.system_instruction)
+        for content in llm_request.contents:
+            for part in content.parts or []:
+                if part.text:
+                    chunks.append(part.text)
+                elif part.function_call:
+                    chunks.append(json.dumps(part.function_call.args or {}))
+                elif part.function_response:
+                    chunks.append(json.dumps(part.function_response.response or {}))
+        return "\n".join(chunks)
+
+    @staticmethod
+    def _alumni_name(request_text: str) -> str:
+        matches = _NAME_PATTERN.findall(request_text)
+        return matches[-1].strip() if matches else "Unknown Alumnus"
+
+    def _background_text(self, full_name: str, cheap: bool = False) -> str:
+        institution, _ = fake_institution(full_name)
+        names, urls = fake_practices(full_name)
+        if cheap and self._rng.random() < self.cheap_error_rate:
+            # A weaker model misses the practices
+            names, urls = [], []
+        return (
+            f"Current practices for {full_name}:\n"
+            f"Practice names: {', '.join(names)}\n"
+            f"Practice URLs: {', '.join(urls)}\n"
+            f"Narrative: {full_name} completed radiology training at Yale and is now an "
+            f"attending radiologist at {institution}, focusing on body imaging.\n"
+            f"Additional information: Board certified in Diagnostic Radiology."
+        )
+
+    def _social_media_parts(self, llm_request: LlmRequest, full_name: str, cheap: bool = False) -> List[types.Part]:
+        # Not only the last content: a dynamic instruction can follow the tool response
+        responses = [
+            part.function_response
+            for content in llm_request.contents
+            for part in content.parts or []
+            if part.function_response and part.function_response.name == "search_social_media_candidates_tool"
+        ]
+        if not responses:
+            return [types.Part(function_call=types.FunctionCall(
+                name="search_social_media_candidates_tool",
+                args={"alumni_name": full_name},
+            ))]
+
+        # Act as an oracle: pick the person's true profile when it was offered
+        candidate_text = json.dumps([response.response for response in responses])
+        offered = set(_URL_PATTERN.findall(candidate_text))
+        true_urls = fake_profile_urls(full_name)
+        lines = []
+        for platform in SOCIAL_MEDIA_PLATFORMS:
+            url = true_urls.get(platform, "")
+            lines.append(f"{platform}: {url if url in offered else ''}")
+        if cheap and self._rng.random() < self.cheap_error_rate:
+            # A weaker model picks a page that is not the person's profile
+            lines[list(SOCIAL_MEDIA_PLATFORMS).index("LinkedIn")] = "LinkedIn: https://www.linkedin.com/in/radiology-jobs"
+        return [types.Part(text="\n".join(lines))]
+
+    def _email_finder_parts(self, llm_request: LlmRequest, full_name: str) -> List[types.Part]:
+        responses = [
+            part.function_response.response
+            for content in llm_request.contents
+            for part in content.parts or []
+            if part.function_response and part.function_response.name == "search_email_candidates_tool"
+        ]
+        if not responses:
+            return [types.Part(function_call=types.FunctionCall(
+                name="search_email_candidates_tool",
+                args={"alumni_name": full_name},
+            ))]
+
+        # Act as an oracle: pick the person's true email when it was offered
+        table = str(responses[-1].get("candidate_emails_table", ""))
+        email = fake_email(full_name)
+        source = ""
+        for line in table.splitlines()[1:]:
+            cells = [cell.strip() for cell in line.split("|")]
+            if cells[0] == email:
+                source = cells[2].split(",")[0].strip()
+        record = {"email": email if source else "", "email_source_url": source, "other_emails": ""}
+        return [types.Part(function_call=types.FunctionCall(name="set_model_response", args=record))]
+
+    @staticmethod
+    def _formatter_text(request_text: str) -> str:
+        def last_match(pattern: str) -> str:
+            matches = re.findall(pattern, request_text, re.MULTILINE)
+            return matches[-1].strip() if matches else ""
+
+        record = {
+            "current_practices_names": last_match(r"^Practice names:[ \t]*(.*)$"),
+            "current_practices_urls": last_match(r"^Practice URLs:[ \t]*(.*)$"),
+            "current_practice_narrative": last_match(r"^Narrative:[ \t]*(.*)$"),
+            "additional_information": last_match(r"^Additional information:[ \t]*(.*)$"),
+        }
+        for label, field_name in SOCIAL_OUTPUT_LABELS.items():
+            # Not anchored: ADK prefixes other agents' replies with "[agent] said: "
+            record[field_name] = last_match(rf"{re.escape(label)}:[ \t]*(https?://\S+)[ \t]*$")
+        return json.dumps(record)
+
+    def _batch_formatter_text(self, request_text: str) -> str:
+        """Format each "### Alumnus <id>" section; some records are dropped or corrupted."""
+        sections = re.split(r"^### Alumnus (\S+)[ \t]*$", request_text, flags=re.MULTILINE)
+        records = []
+        for alumni_id, block in zip(sections[1::2], sections[2::2]):
+            record = json.loads(self._formatter_text(block))
+            if self._rng.random() < self.batch_record_failure_rate:
+                if self._rng.random() < 0.5:
+                    continue
+                record["linkedin_link"] = "see LinkedIn"
+            records.append({"alumni_id": alumni_id, **record})
+        return json.dumps({"records": records})
+
+    def _usage(
+        self,
+        llm_request: LlmRequest,
+        request_text: str,
+        parts: List[types.Part],
+        cached_chars: int = 0,
+    ) -> types.GenerateContentResponseUsageMetadata:
+        response_chars = sum(
+            len(part.text) if part.text else len(json.dumps(part.function_call.args or {}))
+            for part in parts
+        )
+        prompt_tokens = len(request_text) // self.chars_per_token
+        candidates_tokens = response_chars // self.chars_per_token
+
+        thoughts_tokens = 0
+        thinking_config = llm_request.config.thinking_config
+        if thinking_config is not None and thinking_config.thinking_budget is not None:
+            budget = thinking_config.thinking_budget
+            if budget < 0:
+                budget = DYNAMIC_THINKING_BUDGET
+            thoughts_tokens = int(budget * self.thoughts_fraction)
+
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=candidates_tokens,
+            thoughts_token_count=thoughts_tokens,
+            cached_content_token_count=cached_chars // self.chars_per_token,
+            total_token_count=prompt_tokens + candidates_tokens + thoughts_tokens,
+        )
+
+
+# Marker text the JS-rendered stub page inserts into the DOM after load
+JS_RENDERED_MARKER = "Rendered profile"
+
+
+def _js_rendered_page(slug: str) -> str:
+    """A hospital-profile-like page whose content only exists after its script runs."""
+    return f"""<!doctype html>
+<html><head><title>{slug} | Stub Health</title>
+<link rel="preload" href="/asset/font-{slug}.woff2" as="font" crossorigin>
+<script async src="https://www.googletagmanager.com/gtag/js?id=G-STUB"></script>
+</head><body><div id="app">Loading...</div>
+<img src="/asset/headshot-{slug}.jpg"><img src="/asset/banner.png">
+<script>
+  document.getElementById("app").innerText =
+    "{JS_RENDERED_MARKER}: Dr. {slug}, Diagnostic Radiology. Residency: Yale School of Medicine.";
+</script></body></html>"""
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Route-driven responses for StubHttpServer (see its docstring)."""
+
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self._respond(send_body=False)
+
+    def do_GET(self) -> None:
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool) -> None:
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.requests_by_method[self.command] = server.requests_by_method.get(self.command, 0) + 1
+        time.sleep(server.latency_seconds)
+
+        kind, _, rest = self.path.lstrip("/").partition("/")
+        if kind == "nohead" and self.command == "HEAD":
+            self._send(405, send_body)
+        elif kind == "redirect":
+            hops, _, tail = rest.partition("/")
+            remaining = int(hops) - 1 if hops.isdigit() else 0
+            location = f"/redirect/{remaining}/{tail}" if remaining > 0 else f"/ok/{tail}"
+            self._send(301, send_body, {"Location": location})
+        elif kind == "gone":
+            self._send(404, send_body)
+        elif kind == "blocked":
+            self._send(999, send_body)
+        elif kind == "page":
+            self._send(200, send_body, body=_js_rendered_page(rest).encode("utf-8"))
+        elif kind == "asset":
+            self._send(200, send_body, body=b"\0" * 20_000, content_type="application/octet-stream")
+        else:
+            self._send(200, send_body)
+
+    def _send(
+        self,
+        status: int,
+        send_body: bool,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"<html><body>stub</body></html>",
+        content_type: str = "text/html",
+    ) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class StubHttpServer:
+    """
+    Local HTTP server with canned behaviours, for URL verification tooling.
+
+    The first path segment selects the behaviour:
+        /ok/...           200
+        /nohead/...       405 for HEAD, 200 for GET
+        /redirect/N/...   N 301 hops, then /ok/...
+        /gone/...         404
+        /blocked/...      999 (LinkedIn-style bot refusal)
+        /page/<slug>      HTML whose text is rendered by JavaScript, with image,
+                          font and analytics requests (for browser fetching)
+        /asset/...        20 kB binary (images, fonts)
+
+    Every request is delayed by latency_seconds. Use as a context manager; the
+    server runs in a background thread on an ephemeral port.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, host: str = "127.0.0.1") -> None:
+        self._server = ThreadingHTTPServer((host, 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.latency_seconds = latency_seconds
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._server.requests_by_method = {}
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    @property
+    def requests_by_method(self) -> Dict[str, int]:
+        return dict(self._server.requests_by_method)
+
+    def reset_counters(self) -> None:
+        with self._server.lock:
+            self._server.requests = 0
+            self._server.requests_by_method = {}
+
+    def url(self, path: str, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.port}/{path.lstrip('/')}"
+
+    def __enter__(self) -> "StubHttpServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _StubGeminiHandler(BaseHTTPRequestHandler):
+    """generateContent responses for StubGeminiServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        # One handler instance per TCP connection; keep-alive requests reuse it
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self) -> None:
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with server.lock:
+            server.requests += 1
+            if server.failures_left > 0:
+                server.failures_left -= 1
+                status = 503
+            else:
+                status = 200
+        time.sleep(server.latency_seconds)
+        if status != 200:
+            body = json.dumps({"error": {"code": status, "message": "stub overload", "status": "UNAVAILABLE"}})
+        else:
+            body = json.dumps({
+                "candidates": [{
+                    "content": {"role": "model", "parts": [{"text": "stub response"}]},
+                    "finishReason": "STOP",
+                }],
+                "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 10, "totalTokenCount": 110},
+                "modelVersion": self.path.rsplit("/", 1)[-1].split(":")[0],
+            })
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubGeminiServer:
+    """
+    Local stand-in for the Gemini API's generateContent endpoint, for model client tooling.
+
+    Counts requests and TCP connections, so connection reuse can be measured. The
+    first ``failures`` requests get a 503 (to exercise retries). Every request is
+    delayed by latency_seconds. Use as a context manager; the server runs in a
+    background thread on an ephemeral port.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, failures: int = 0, host: str = "127.0.0.1") -> None:
+        self._server = ThreadingHTTPServer((host, 0), _StubGeminiHandler)
+        self._server.daemon_threads = True
+        self._server.latency_seconds = latency_seconds
+        self._server.lock = threading.Lock()
+        self._server.failures_left = failures
+        self._server.requests = 0
+        self._server.connections = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self._server.server_address[0]}:{self._server.server_address[1]}/"
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    def reset_counters(self, failures: int = 0) -> None:
+        with self._server.lock:
+            self._server.requests = 0
+            self._server.connections = 0
+            self._server.failures_left = failures
+
+    def __enter__(self) -> "StubGeminiServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
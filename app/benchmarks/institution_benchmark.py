@@ -0,0 +1,96 @@
+"""Institution canonicalization benchmark over synthetic practice fields.
+
+Runs the practice names and URLs the fake background agent reports for a
+synthetic roster (institutions named inconsistently, sometimes listed twice)
+through the InstitutionIndex, and reports name variants per institution, rows
+with duplicate practices and canonicalization accuracy before and after, plus
+the size of the known-institution hint given to the agent.
+
+Usage:
+    python -m app.benchmarks.institution_benchmark --rows 500
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from app.benchmarks.common import estimate_tokens, print_report, synthetic_roster, write_json
+from app.benchmarks.fakes import fake_institution, fake_practices
+from app.configs import benchmark as benchmark_config
+from app.utils.institution_utils import InstitutionIndex, split_csv_field
+
+
+def _variants_per_institution(rows: List[Dict[str, Any]], field: str) -> float:
+    """Average number of distinct names written for the same true institution."""
+    variants: Dict[str, Set[str]] = defaultdict(set)
+    for row in rows:
+        for name in split_csv_field(row[field]):
+            variants[row["institution"]].add(name)
+    return sum(len(names) for names in variants.values()) / max(1, len(variants))
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rows = []
+    for alumnus in synthetic_roster(args.rows, args.seed):
+        full_name = f"{alumnus['First Name']} {alumnus['Last Name']}"
+        names, urls = fake_practices(full_name)
+        rows.append({
+            "institution": fake_institution(full_name)[0],
+            "names": ", ".join(names),
+            "urls": ", ".join(urls),
+        })
+
+    index = InstitutionIndex(path=None)
+    start = time.perf_counter()
+    for row in rows:
+        row["canonical_names"], row["canonical_urls"] = index.canonicalize_practices(row["names"], row["urls"])
+    elapsed = time.perf_counter() - start
+
+    # The canonical name of an institution can change while the index learns which
+    # variant is most common; a later run (persisted index) sees the settled names
+    for row in rows:
+        row["settled_names"] = index.canonicalize_practices(row["names"], row["urls"], learn=False)[0]
+    hint = index.hint()
+    return {
+        "rows": len(rows),
+        "true institutions": len({row["institution"] for row in rows}),
+        "index entries": len(index),
+        "name variants per institution (raw)": _variants_per_institution(rows, "names"),
+        "name variants per institution (first pass)": _variants_per_institution(rows, "canonical_names"),
+        "name variants per institution (settled index)": _variants_per_institution(rows, "settled_names"),
+        "rows with duplicate practices (raw)": sum(len(split_csv_field(row["names"])) > 1 for row in rows),
+        "rows with duplicate practices (canonical)": sum(
+            len(split_csv_field(row["canonical_names"])) > 1 for row in rows
+        ),
+        "rows matching true institution (settled index)": sum(
+            row["settled_names"] == index.canonicalize_practices(row["institution"], "", learn=False)[0]
+            for row in rows
+        ) / max(1, len(rows)),
+        "canonicalize us/row": elapsed / max(1, len(rows)) * 1e6,
+        "hint entries": len(hint.splitlines()),
+        "hint tokens": estimate_tokens(hint),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=benchmark_config.BENCHMARK_ROWS)
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = run_benchmark(args)
+    print_report("Institution canonicalization (synthetic practices)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Per-row logging overhead: eager f-strings with an inline handler vs. lazy records through a queue.
+
+Replays the log calls one alumnus makes in ADKService, the search utilities and
+call_root_agent_async (session setup, searches, per-event traces, final
+response and token totals) in two styles and reports microseconds per row:
+
+    eager   f-string messages and a FileHandler writing in the calling thread
+            (the logging setup before the queue listener)
+    lazy    %-style messages and the app's queue handler, with the listener
+            thread formatting and writing
+
+Both write to os.devnull with the app's LOG_FORMAT. Each style runs with the
+logger at CRITICAL (a normal run), INFO and DEBUG (verbose tracing). For the
+lazy style, the time for the listener to drain the queue is reported separately.
+
+Usage:
+    python -m app.benchmarks.logging_benchmark --rows 5000
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.benchmarks.common import print_report, write_json
+from app.configs import benchmark as benchmark_config
+from app.configs.app import LOG_FORMAT
+from app.utils.logging_utils import configure_logging
+
+PLATFORMS = ["LinkedIn", "Doximity", "X (Twitter)", "Google Scholar", "Facebook"]
+LEVELS = {"critical": logging.CRITICAL, "info": logging.INFO, "debug": logging.DEBUG}
+
+
+def synthetic_row(seed: int) -> Dict[str, Any]:
+    """Build the values one alumnus's log calls format."""
+    response_text = json.dumps({
+        "current_practices_names": "Yale New Haven Hospital, Radiology Associates of Connecticut",
+        "current_practices_urls": "https://www.ynhh.org/doctors/alice-patel, https://radiologyct.com/",
+        "current_practice_narrative": "Alice Patel completed radiology training at Yale. " * 20,
+        "linkedin_link": "https://www.linkedin.com/in/alice-patel",
+    })
+    event_details = [
+        {"event_id": f"evt-{seed}-{i}", "author": "social_media_agent", "total_token_count": 2400 + i}
+        for i in range(4)
+    ]
+    return {
+        "session_id": f"session-{seed}",
+        "name": "Alice Patel",
+        "events": [
+            {"id": f"evt-{seed}-{i}", "author": "social_media_agent", "call": "search_social_media_candidates_tool",
+             "response": {"result": "linkedin | 0.9 | https://www.linkedin.com/in/alice-patel\n" * 10}}
+            for i in range(5)
+        ],
+        "response_text": response_text,
+        "token_counts": {"total_token_count": 9800, "prompt_token_count": 8200, "event_details": event_details},
+        "elapsed": 12.3456,
+    }
+
+
+def eager_row(logger: logging.Logger, row: Dict[str, Any]) -> None:
+    """The row's log calls as f-strings (formatted whether or not the level is enabled)."""
+    logger.info(f"Created new session for query: session_id={row['session_id']}")
+    logger.info(f"Calling root agent in mode: {'alumni_researcher'}")
+    logger.info(f"Starting social media search for: {row['name']}")
+    for platform in PLATFORMS:
+        logger.info(f"Searching {platform}...")
+        logger.info(f"Searching for: {row['name']}, Yale Radiology, {platform}")
+        logger.info(f"Found {3} matching results for {platform}")
+    for event in row["events"]:
+        logger.debug(f"Event ID: {event['id']}, Author: {event['author']}")
+        logger.debug(f"Function Call: {event['call']}")
+        logger.debug(f"Function Response: {event['response']}")
+    logger.info("Final agent response detected")
+    logger.info(f"Final agent response text: {row['response_text'][:100]}...")
+    logger.info(f"Total accumulated token counts: {row['token_counts']}")
+    logger.info(f"Root agent completed successfully in {row['elapsed']:.2f} seconds")
+    logger.info(f"Total tokens used: {row['token_counts'].get('total_token_count', 0)}")
+
+
+def lazy_row(logger: logging.Logger, row: Dict[str, Any]) -> None:
+    """The same log calls with %-style arguments, formatted only if a handler receives them."""
+    logger.info("Created new session for query: session_id=%s", row["session_id"])
+    logger.info("Calling root agent in mode: %s", "alumni_researcher")
+    logger.info("Starting social media search for: %s", row["name"])
+    for platform in PLATFORMS:
+        logger.info("Searching %s...", platform)
+        logger.info("Searching for: %s, Yale Radiology, %s", row["name"], platform)
+        logger.info("Found %s matching results for %s", 3, platform)
+    for event in row["events"]:
+        logger.debug("Event ID: %s, Author: %s", event["id"], event["author"])
+        logger.debug("Function Call: %s", event["call"])
+        logger.debug("Function Response: %s", event["response"])
+    logger.info("Final agent response detected")
+    logger.info("Final agent response text: %.100s...", row["response_text"])
+    logger.info("Total accumulated token counts: %s", row["token_counts"])
+    logger.info("Root agent completed successfully in %.2f seconds", row["elapsed"])
+    logger.info("Total tokens used: %s", row["token_counts"].get("total_token_count", 0))
+
+
+def eager_logger(level: int) -> logging.Logger:
+    """Logger set up like setup_logging() was before the queue listener."""
+    logger = logging.getLogger("logging_benchmark.eager")
+    logger.propagate = False
+    logger.setLevel(level)
+    logger.handlers.clear()
+    handler = logging.FileHandler(os.devnull, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+    return logger
+
+
+def measure(
+    write_row: Callable[[logging.Logger, Dict[str, Any]], None],
+    logger: logging.Logger,
+    rows: List[Dict[str, Any]],
+) -> float:
+    """Return microseconds per row spent in the row's log calls."""
+    start = time.perf_counter()
+    for row in rows:
+        write_row(logger, row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def run_benchmark(rows_count: int) -> Dict[str, Any]:
+    rows = [synthetic_row(seed) for seed in range(rows_count)]
+    metrics: Dict[str, Any] = {"rows": rows_count}
+    for level_name, level in LEVELS.items():
+        logger = eager_logger(level)
+        metrics[f"eager, {level_name} (µs/row)"] = measure(eager_row, logger, rows)
+        logger.handlers[0].close()
+
+        logger = logging.getLogger("logging_benchmark.lazy")
+        logger.propagate = False
+        listener = configure_logging(logger, level, LOG_FORMAT, console=False, file_path=os.devnull)
+        metrics[f"lazy queue, {level_name} (µs/row)"] = measure(lazy_row, logger, rows)
+        start = time.perf_counter()
+        listener.stop()
+        metrics[f"lazy queue, {level_name}: listener drain (µs/row)"] = (
+            (time.perf_counter() - start) / rows_count * 1e6
+        )
+        for handler in listener.handlers:
+            handler.close()
+    return metrics
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=benchmark_config.BENCHMARK_ROWS * 50)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = run_benchmark(args.rows)
+    print_report("Per-row logging overhead", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
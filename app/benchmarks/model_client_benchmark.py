@@ -0,0 +1,130 @@
+"""Model client connection reuse against a local stub of the Gemini API.
+
+Concurrent rows each make a sequence of model calls, cycling over the agents'
+models, the way ADK makes them (through LlmAgent.canonical_model):
+- per-request: agents constructed with a model name, so ADK builds a new Gemini
+  instance, genai client and HTTP session for every call (the default)
+- shared: agents constructed with PooledGemini models, whose calls all go through
+  the one pooled client of app/utils/model_client_utils.py
+
+The stub counts TCP connections. It serves plain HTTP, so the measured latency
+leaves out the TLS handshake every new connection to the real API also pays.
+
+Usage:
+    python -m app.benchmarks.model_client_benchmark
+    python -m app.benchmarks.model_client_benchmark --rows 100 --concurrency 16 --calls-per-row 6 --latency 0.02
+    python -m app.benchmarks.model_client_benchmark --failures 5   # 503s retried by the shared client
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from app.benchmarks.common import percentile, print_report, write_json
+from app.benchmarks.fakes import StubGeminiServer
+from app.configs import benchmark as benchmark_config
+from app.configs.llms import BACKGROUND_INFORMATION_MODEL, FORMATTER_MODEL, SOCIAL_MEDIA_MODEL
+from app.utils.model_client_utils import PooledGemini, model_client_pool
+
+MODEL_NAMES = [BACKGROUND_INFORMATION_MODEL, SOCIAL_MEDIA_MODEL, FORMATTER_MODEL]
+
+
+def build_agents(mode: str) -> List[LlmAgent]:
+    """One agent per model in MODEL_NAMES, constructed the way the mode does it."""
+    return [
+        LlmAgent(name=f"agent_{idx}", model=PooledGemini(model=name) if mode == "shared" else name)
+        for idx, name in enumerate(MODEL_NAMES)
+    ]
+
+
+async def run_mode(args: argparse.Namespace, server: StubGeminiServer, mode: str) -> Dict[str, Any]:
+    """Run every row's calls with bounded concurrency and read the stub's counters."""
+    agents = build_agents(mode)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def run_row(row: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            for call in range(args.calls_per_row):
+                model = agents[call % len(agents)].canonical_model
+                request = LlmRequest(
+                    model=model.model,
+                    contents=[types.Content(role="user", parts=[types.Part(text=f"row {row}, call {call}")])],
+                )
+                start = time.perf_counter()
+                try:
+                    async for _ in model.generate_content_async(request):
+                        pass
+                except Exception:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+
+    server.reset_counters(failures=args.failures)
+    start = time.perf_counter()
+    await asyncio.gather(*(run_row(row) for row in range(args.rows)))
+    wall_seconds = time.perf_counter() - start
+    if mode == "shared":
+        await model_client_pool.aclose()
+    calls = args.rows * args.calls_per_row
+    return {
+        "wall seconds": wall_seconds,
+        "calls": calls,
+        "failed calls": failures,
+        "HTTP requests": server.requests,
+        "TCP connections": server.connections,
+        "calls per connection": calls / server.connections if server.connections else 0.0,
+        "call latency p50 (s)": percentile(latencies, 50),
+        "call latency p95 (s)": percentile(latencies, 95),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {
+        "rows": args.rows,
+        "concurrency": args.concurrency,
+        "calls per row": args.calls_per_row,
+        "stub latency (s)": args.latency,
+        "injected 503s": args.failures,
+    }
+    with StubGeminiServer(latency_seconds=args.latency) as server:
+        os.environ["GOOGLE_GEMINI_BASE_URL"] = server.base_url
+        os.environ["GOOGLE_API_KEY"] = "benchmark"
+        os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "false"
+        for mode in ("per-request", "shared"):
+            for key, value in (await run_mode(args, server, mode)).items():
+                metrics[f"{mode}: {key}"] = value
+    return metrics
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=benchmark_config.BENCHMARK_ROWS)
+    parser.add_argument("--concurrency", type=int, default=8, help="Rows in flight")
+    parser.add_argument("--calls-per-row", type=int, default=5, help="Sequential model calls per row")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub seconds per request")
+    parser.add_argument("--failures", type=int, default=0, help="503 responses served first in each mode")
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = asyncio.run(run_benchmark(args))
+    print_report("Model client benchmark (local stub endpoint)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Results output benchmark: per-row CSV rewrites vs. the streaming result sinks.
+
+Writes a synthetic results table one row at a time, the way main.py does while
+the roster is processed, and reports wall time, file size and the time to read
+the table back:
+
+    rewrite  rebuild the DataFrame and rewrite the whole CSV after every row
+    csv      CsvResultSink: append one row per write
+    parquet  ParquetResultSink: typed columns, one row group per --row-group-size rows (needs
+             pyarrow; reported as unavailable when it is not installed)
+
+Usage:
+    python -m app.benchmarks.output_sink_benchmark --rows 2000
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.benchmarks.common import print_report, synthetic_roster, write_json
+from app.benchmarks.fakes import fake_practices, fake_profile_urls
+from app.configs import benchmark as benchmark_config
+from app.configs.output import PARQUET_ROW_GROUP_SIZE
+from app.services.result_sinks import CsvResultSink, ParquetResultSink, ResultSink
+
+SOCIAL_COLUMNS = {
+    "X (Twitter)": "X (Twitter) Link",
+    "LinkedIn": "LinkedIn Link",
+    "Doximity": "Doximity Link",
+    "Google Scholar": "Google Scholar Link",
+    "Facebook": "Facebook Link",
+}
+
+
+def build_rows(rows: int, seed: int) -> List[Dict[str, Any]]:
+    """Results rows shaped like main.build_row_data output."""
+    rng = random.Random(seed)
+    result_rows = []
+    for alumnus in synthetic_roster(rows, seed):
+        full_name = f"{alumnus['First Name']} {alumnus['Last Name']}"
+        names, urls = fake_practices(full_name)
+        profiles = fake_profile_urls(full_name)
+        row: Dict[str, Any] = {
+            "Name": full_name,
+            "Year of Entry to Yale": alumnus["Year"],
+            "Current Practices Names": ", ".join(names),
+            "Current Practices URLs": ", ".join(urls),
+            "Current Practice Narrative": f"{full_name} is an attending radiologist at {names[0]}. " * 3,
+            "Additional Information": "Board certified in Diagnostic Radiology.",
+        }
+        for platform, column in SOCIAL_COLUMNS.items():
+            row[column] = profiles.get(platform, "")
+        prompt = rng.randint(4000, 7000)
+        row.update({
+            "Total tokens used": prompt + 1500,
+            "Prompt tokens used": prompt,
+            "Candidates tokens used": 500,
+            "Cached content tokens used": prompt - 800,
+            "Thoughts tokens used": 1000,
+        })
+        result_rows.append(row)
+    return result_rows
+
+
+class RewriteSink(ResultSink):
+    """Baseline: the whole CSV is rewritten after every row."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._rows: List[Dict[str, Any]] = []
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._rows.append(row)
+        pd.DataFrame(self._rows).to_csv(self.path, index=False)
+
+
+def run_mode(
+    make_sink: Callable[[str], ResultSink],
+    read: Callable[[str], pd.DataFrame],
+    rows: List[Dict[str, Any]],
+    path: str,
+) -> Dict[str, Any]:
+    """Write every row through a sink, then read the table back."""
+    start = time.perf_counter()
+    sink = make_sink(path)
+    for row in rows:
+        sink.write(row)
+    sink.close()
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = read(path)
+    read_seconds = time.perf_counter() - start
+    return {
+        "write seconds": write_seconds,
+        "ms per row": write_seconds * 1000 / max(1, len(rows)),
+        "file size (KiB)": os.path.getsize(path) / 1024,
+        "read seconds": read_seconds,
+        "rows read": len(table),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rows = build_rows(args.rows, args.seed)
+    metrics: Dict[str, Any] = {"rows": len(rows)}
+    modes = {
+        "rewrite": (RewriteSink, pd.read_csv, "results_rewrite.csv"),
+        "csv": (CsvResultSink, pd.read_csv, "results.csv"),
+        "parquet": (
+            lambda path: ParquetResultSink(path, row_group_size=args.row_group_size),
+            pd.read_parquet,
+            "results.parquet",
+        ),
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in args.modes:
+            make_sink, read, filename = modes[mode]
+            try:
+                mode_metrics = run_mode(make_sink, read, rows, os.path.join(tmp_dir, filename))
+            except ImportError as e:
+                # The parquet sink needs pyarrow; the other modes are still worth reporting
+                metrics[f"{mode}: unavailable"] = str(e)
+                continue
+            for key, value in mode_metrics.items():
+                metrics[f"{mode}: {key}"] = value
+    return metrics
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--row-group-size", type=int, default=PARQUET_ROW_GROUP_SIZE)
+    parser.add_argument("--modes", nargs="+", choices=["rewrite", "csv", "parquet"],
+                        default=["rewrite", "csv", "parquet"])
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = run_benchmark(args)
+    print_report("Results output (row-by-row writes)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
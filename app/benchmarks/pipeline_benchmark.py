@@ -0,0 +1,466 @@
+"""End-to-end throughput benchmark for the alumni pipeline on offline fakes.
+
+Runs the real ADKService / Runner / sub-agent / tool stack with FakeLlm in place
+of Gemini and FakeDDGS in place of DDGS, and reports rows/sec, latency
+percentiles, token usage and memory.
+
+Usage:
+    python -m app.benchmarks.pipeline_benchmark --rows 100 --concurrency 4
+    python -m app.benchmarks.pipeline_benchmark --target main --rows 20
+    python -m app.benchmarks.pipeline_benchmark --target main --rows 20 --refresh-passes 2
+    python -m app.benchmarks.pipeline_benchmark --target main --rows 20 --email-pass
+    python -m app.benchmarks.pipeline_benchmark --target main --rows 20 --no-search-prefetch
+    python -m app.benchmarks.pipeline_benchmark --target main --rows 20 --staged
+    python -m app.benchmarks.pipeline_benchmark --target main --rows 20 --model-cascade
+    python -m app.benchmarks.pipeline_benchmark --rows 40 --concurrency 8 --batch-formatter
+    python -m app.benchmarks.pipeline_benchmark --rows 20 --concurrency 4 --stream
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from pydantic import BaseModel
+
+from app.agents.agent_factory import get_root_agent
+from app.agents.alumni_researcher_agent.agent import set_handoff_mode
+from app.agents.alumni_researcher_agent.subagents.formatter_agent import batch_formatter_agent
+from app.benchmarks.common import (
+    peak_rss_mb,
+    percentile,
+    print_report,
+    synthetic_roster,
+    write_json,
+)
+from app.benchmarks.fakes import FakeDDGS, FakeLlm, LatencyProfile, fake_email, fake_page_fetcher
+from app.configs import benchmark as benchmark_config
+from app.configs.pipeline import STAGE_RATE_LIMITS
+from app.configs.llms import (
+    AGENT_HANDOFF_MODE,
+    ADAPTIVE_THINKING_ENABLED,
+    FORMATTER_BATCH_MAX_SIZE,
+    FORMATTER_BATCH_MAX_WAIT_SECONDS,
+    SOCIAL_MEDIA_RESOLVER_ENABLED,
+)
+from app.services import ADKService, BatchFormatter, StagedAlumniPipeline
+from app.utils.agent_utils import set_agent_models
+from app.utils.cascade_utils import CHEAP_TIER, STRONG_TIER, model_cascade
+from app.utils.context_cache_utils import static_context_cache
+from app.utils.email_utils import email_finder_stats, set_page_fetcher
+from app.utils.grounding_utils import grounding_candidate_stats, grounding_collector
+from app.utils.institution_utils import institution_index
+from app.utils.resolver_utils import social_media_resolver_stats
+from app.utils.search_utils import search_prefetcher, set_search_client_factory
+from app.utils.streaming_utils import BackgroundReady, FinalResult, SocialLinksSelected
+from app.utils.thinking_utils import thinking_budget_controller
+
+
+def install_fakes(args: argparse.Namespace) -> FakeLlm:
+    """Point the agent tree and the search utilities at the offline fakes."""
+    fake_model = FakeLlm(
+        latency=LatencyProfile(
+            distribution=args.latency_distribution,
+            mean_seconds=args.model_latency,
+            spread=benchmark_config.FAKE_MODEL_LATENCY_SPREAD,
+        ),
+        failure_rate=args.model_failure_rate,
+        batch_record_failure_rate=args.batch_record_failure_rate,
+        seed=args.seed,
+    )
+    set_agent_models(get_root_agent("alumni_researcher"), fake_model)
+    set_agent_models(batch_formatter_agent, fake_model)
+    set_agent_models(get_root_agent("email_finder"), fake_model)
+    set_page_fetcher(fake_page_fetcher)
+
+    search_rng = random.Random(args.seed + 1)
+    search_latency = LatencyProfile(
+        distribution=args.latency_distribution,
+        mean_seconds=args.search_latency,
+        spread=benchmark_config.FAKE_SEARCH_LATENCY_SPREAD,
+    )
+    set_search_client_factory(
+        lambda: FakeDDGS(
+            latency=search_latency,
+            failure_rate=args.search_failure_rate,
+            rng=search_rng,
+        )
+    )
+    FakeDDGS.reset_counters()
+    # Start from an empty in-memory institution index so data/institution_index.json is
+    # neither read nor overwritten
+    institution_index.path = None
+    institution_index.clear()
+    static_context_cache.reset()
+    static_context_cache.enabled = args.context_cache
+    search_prefetcher.enabled = args.search_prefetch
+    model_cascade.enabled = args.model_cascade
+    model_cascade.reset_stats()
+    grounding_collector.enabled = args.grounding_candidates
+    grounding_candidate_stats.reset()
+    # Shared with StagedAlumniPipeline's defaults
+    if args.search_rate:
+        STAGE_RATE_LIMITS["search"] = args.search_rate
+    else:
+        STAGE_RATE_LIMITS.pop("search", None)
+    set_handoff_mode(args.handoff_mode)
+    return fake_model
+
+
+async def run_service_target(
+    roster: List[Dict[str, Any]],
+    concurrency: int,
+    batch_formatter: Optional[BatchFormatter] = None,
+    stream: bool = False,
+) -> tuple[List[float], int, Dict[str, int], Dict[str, Any]]:
+    """
+    Run the roster through ADKService.get_agent_response with bounded concurrency.
+
+    With stream, rows go through ADKService.stream_agent_response instead, and
+    the time from the row's start to its first background and social links
+    partials is returned as extra metrics.
+
+    Returns:
+        Tuple of (per-row latencies, successful rows, summed token counts, extra metrics)
+    """
+    adk_service = ADKService(
+        user_id="benchmark",
+        agent_mode="alumni_researcher",
+        batch_formatter=batch_formatter,
+    )
+    await adk_service.initialize()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    first_partial: Dict[type, List[float]] = {BackgroundReady: [], SocialLinksSelected: []}
+    successes = 0
+    tokens: Dict[str, int] = {}
+
+    async def stream_row(query: str) -> tuple[Optional[BaseModel], Optional[Dict[str, Any]]]:
+        seen = set()
+        final = None
+        async for partial in adk_service.stream_agent_response(query=query):
+            if isinstance(partial, FinalResult):
+                final = partial
+            elif type(partial) not in seen:
+                seen.add(type(partial))
+                first_partial[type(partial)].append(partial.elapsed_seconds)
+        return final.response, final.token_counts
+
+    async def run_row(row: Dict[str, Any]) -> None:
+        nonlocal successes
+        query = f"alumni name: {row['First Name']} {row['Last Name']}, year of entry: {row['Year']}"
+        async with semaphore:
+            start = time.perf_counter()
+            if stream:
+                response, token_counts = await stream_row(query)
+            else:
+                response, token_counts = await adk_service.get_agent_response(query=query)
+            latencies.append(time.perf_counter() - start)
+        if response is not None:
+            successes += 1
+        for key, value in (token_counts or {}).items():
+            if key.endswith("_token_count") and isinstance(value, int):
+                tokens[key] = tokens.get(key, 0) + value
+
+    await asyncio.gather(*(run_row(row) for row in roster))
+    await adk_service.close()
+    extra_metrics: Dict[str, Any] = {}
+    if stream:
+        extra_metrics["stream: background ready p50 (s)"] = percentile(first_partial[BackgroundReady], 50)
+        extra_metrics["stream: social links selected p50 (s)"] = percentile(first_partial[SocialLinksSelected], 50)
+        extra_metrics["stream: final result p50 (s)"] = percentile(latencies, 50)
+    return latencies, successes, tokens, extra_metrics
+
+
+async def run_main_target(
+    roster: List[Dict[str, Any]],
+    refresh_passes: int = 1,
+    email_pass: bool = False,
+    staged: bool = False,
+) -> tuple[List[float], int, Dict[str, int], Dict[str, Any]]:
+    """
+    Run the roster through app.main.main(), including its per-row CSV writes.
+
+    Per-row latency is captured by timing ADKService.get_agent_response. The
+    knowledge store lives in a temporary directory; with refresh_passes > 1 the
+    roster is run again in incremental mode. Row latencies and results-CSV tokens
+    cover the last pass; wall time and call counts cover all passes.
+
+    With email_pass, app.find_emails.find_emails() then runs on the same knowledge
+    store, and its accuracy and tokens are added to the extra metrics.
+
+    With staged, rows go through the StagedAlumniPipeline; row latency is then
+    each row's time from its search stage to its write, and the per-stage
+    throughput, utilization and peak queue depth are returned as extra metrics.
+    """
+    from app.main import main
+
+    latencies: List[float] = []
+    original = ADKService.get_agent_response
+
+    async def timed_get_agent_response(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    stage_reports: Dict[str, Dict[str, Any]] = {}
+    original_write = StagedAlumniPipeline._write
+    original_run = StagedAlumniPipeline.run
+
+    async def timed_write(self, row):
+        latencies.append(time.perf_counter() - row.started_at)
+        return await original_write(self, row)
+
+    async def reporting_run(self, rows):
+        try:
+            await original_run(self, rows)
+        finally:
+            stage_reports.update(self.executor.report())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "roster.csv")
+        results_path = os.path.join(tmp_dir, "results.csv")
+        pd.DataFrame(roster).to_csv(csv_path, index=False)
+
+        store_url = f"sqlite:///{os.path.join(tmp_dir, 'knowledge_store.db')}"
+        ADKService.get_agent_response = timed_get_agent_response
+        StagedAlumniPipeline._write = timed_write
+        StagedAlumniPipeline.run = reporting_run
+        try:
+            for refresh_pass in range(refresh_passes):
+                latencies.clear()
+                # main() prints a line per row; keep the benchmark output readable
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    await main(
+                        csv_path=csv_path,
+                        results_csv_path=results_path,
+                        refresh_mode="full" if refresh_pass == 0 else "incremental",
+                        knowledge_store_url=store_url,
+                        # Fake URLs point at real hosts; url_verification_benchmark covers this stage
+                        verify_urls=False,
+                        metrics_server=False,
+                        metrics_snapshot_path=os.path.join(tmp_dir, "run_metrics.json"),
+                        staged=staged,
+                    )
+        finally:
+            ADKService.get_agent_response = original
+            StagedAlumniPipeline._write = original_write
+            StagedAlumniPipeline.run = original_run
+
+        extra_metrics: Dict[str, Any] = {}
+        for stage, report in stage_reports.items():
+            extra_metrics[f"stage {stage}: items/sec"] = report["items_per_second"]
+            extra_metrics[f"stage {stage}: utilization"] = report["utilization"]
+            extra_metrics[f"stage {stage}: peak queue"] = report["max_queue_depth"]
+        if email_pass:
+            extra_metrics.update(await run_email_pass(roster, csv_path, store_url, tmp_dir))
+
+        # Failed rows are only in the errors file
+        results = pd.read_csv(results_path)
+        token_columns = {
+            "total_token_count": "Total tokens used",
+            "prompt_token_count": "Prompt tokens used",
+            "candidates_token_count": "Candidates tokens used",
+            "cached_content_token_count": "Cached content tokens used",
+            "thoughts_token_count": "Thoughts tokens used",
+        }
+        tokens = {
+            key: int(results[column].fillna(0).sum())
+            for key, column in token_columns.items()
+            if column in results.columns
+        }
+    return latencies, len(results), tokens, extra_metrics
+
+
+async def run_email_pass(
+    roster: List[Dict[str, Any]],
+    csv_path: str,
+    store_url: str,
+    tmp_dir: str,
+) -> Dict[str, Any]:
+    """Run app.find_emails over the roster on an existing knowledge store and score the emails."""
+    from app.find_emails import find_emails
+
+    emails_path = os.path.join(tmp_dir, "emails.csv")
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await find_emails(csv_path=csv_path, results_csv_path=emails_path, knowledge_store_url=store_url)
+    wall_seconds = time.perf_counter() - start
+
+    emails = pd.read_csv(emails_path).fillna("")
+    expected = {f"{row['First Name']} {row['Last Name']}": fake_email(f"{row['First Name']} {row['Last Name']}") for row in roster}
+    correct = sum(1 for _, row in emails.iterrows() if row["Email"] == expected.get(row["Name"]))
+    wrong = sum(1 for _, row in emails.iterrows() if row["Email"] and row["Email"] != expected.get(row["Name"]))
+    report = email_finder_stats.report()
+    return {
+        "email: wall seconds": wall_seconds,
+        "email: rows": len(emails),
+        "email: correct": correct,
+        "email: wrong": wrong,
+        "email: resolved without the LLM": report["rows_resolved_without_llm"],
+        "email: web searches": report["new_searches"],
+        "email: tokens per row": pd.to_numeric(emails["Total tokens used"], errors="coerce").fillna(0).sum() / max(1, len(roster)),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one benchmark configuration and return its metrics."""
+    fake_model = install_fakes(args)
+    roster = synthetic_roster(args.rows, args.seed)
+    batch_formatter = (
+        BatchFormatter(max_batch_size=args.batch_size, max_wait_seconds=args.batch_wait)
+        if args.batch_formatter
+        else None
+    )
+
+    if args.trace_memory:
+        tracemalloc.start()
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+
+    if args.target == "main":
+        latencies, successes, tokens, extra_metrics = await run_main_target(
+            roster, args.refresh_passes, args.email_pass, args.staged
+        )
+    else:
+        latencies, successes, tokens, extra_metrics = await run_service_target(
+            roster, args.concurrency, batch_formatter, args.stream
+        )
+
+    wall_seconds = time.perf_counter() - start
+    metrics: Dict[str, Any] = {
+        "target": args.target,
+        "rows": len(roster),
+        "concurrency": args.concurrency if args.target == "service" else 1,
+        "handoff mode": args.handoff_mode,
+        "batched formatter": bool(batch_formatter),
+        "successful rows": successes,
+        "failed rows": len(roster) - successes,
+        "wall seconds": wall_seconds,
+        "rows/sec": len(roster) / wall_seconds if wall_seconds else 0.0,
+        "latency p50 (s)": percentile(latencies, 50),
+        "latency p95 (s)": percentile(latencies, 95),
+        "latency max (s)": max(latencies) if latencies else 0.0,
+        "model calls": sum(fake_model.calls_by_agent.values()),
+        "model failures": fake_model.failures,
+        "search calls": FakeDDGS.calls,
+        "search failures": FakeDDGS.failures,
+        "tokens per row": tokens.get("total_token_count", 0) / max(1, len(roster)),
+        "prompt tokens per row": tokens.get("prompt_token_count", 0) / max(1, len(roster)),
+        "thoughts tokens per row": tokens.get("thoughts_token_count", 0) / max(1, len(roster)),
+        "cached prompt tokens per row": tokens.get("cached_content_token_count", 0) / max(1, len(roster)),
+        "peak RSS (MiB)": peak_rss_mb(),
+        "peak RSS growth (MiB)": peak_rss_mb() - rss_before,
+    }
+    if args.target == "main" and search_prefetcher.enabled and not args.staged:
+        report = search_prefetcher.report()
+        metrics["prefetch: hit rate"] = report["hit_rate"]
+        metrics["prefetch: waited for running searches"] = report["waits"]
+        metrics["prefetch: evicted"] = report["evicted"]
+    report = grounding_candidate_stats.report()
+    if report["rows"]:
+        metrics["grounding: rows with candidates"] = report["rows_with_candidates"]
+        metrics["grounding: DDGS searches saved per row"] = report["searches_saved_per_row"]
+    if model_cascade.enabled:
+        report = model_cascade.report()
+        metrics["cascade: rows entirely on cheap tier"] = report["fraction_by_tier"][CHEAP_TIER]
+        metrics["cascade: rows with an escalated stage"] = report["fraction_by_tier"][STRONG_TIER]
+        for stage, fraction in report["cheap_fraction_by_stage"].items():
+            metrics[f"cascade: {stage} accepted on cheap tier"] = fraction
+        metrics["cascade: cost saved (USD)"] = report["cost_saved_usd"]
+        metrics["cascade: model seconds saved"] = report["seconds_saved"]
+    metrics.update(extra_metrics)
+    for agent_name, calls in sorted(fake_model.calls_by_agent.items()):
+        metrics[f"calls: {agent_name}"] = calls
+    for agent_name, usage in static_context_cache.report().items():
+        metrics[f"prompt tokens per call: {agent_name}"] = usage["prompt_tokens"] / max(1, usage["calls"])
+    if batch_formatter is not None:
+        report = batch_formatter.stats.report()
+        metrics["formatter: alumni per call"] = report["records_per_call"]
+        metrics["formatter: records re-run"] = report["records_rerun"]
+        metrics["formatter: records failed"] = report["records_failed"]
+    if args.trace_memory:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        metrics["traced peak (MiB)"] = traced_peak / (1024 * 1024)
+    return metrics
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["service", "main"], default="service",
+                        help="service: ADKService with bounded concurrency; main: the app.main loop incl. CSV writes")
+    parser.add_argument("--rows", type=int, default=benchmark_config.BENCHMARK_ROWS)
+    parser.add_argument("--concurrency", type=int, default=benchmark_config.BENCHMARK_CONCURRENCY)
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--latency-distribution", default=benchmark_config.FAKE_MODEL_LATENCY_DISTRIBUTION,
+                        choices=["constant", "uniform", "lognormal"])
+    parser.add_argument("--model-latency", type=float, default=benchmark_config.FAKE_MODEL_LATENCY_MEAN_SECONDS,
+                        help="Mean seconds per fake model call")
+    parser.add_argument("--search-latency", type=float, default=benchmark_config.FAKE_SEARCH_LATENCY_MEAN_SECONDS,
+                        help="Mean seconds per fake ddgs.text call")
+    parser.add_argument("--model-failure-rate", type=float, default=benchmark_config.FAKE_MODEL_FAILURE_RATE)
+    parser.add_argument("--search-failure-rate", type=float, default=benchmark_config.FAKE_SEARCH_FAILURE_RATE)
+    parser.add_argument("--refresh-passes", type=int, default=1,
+                        help="main target only: extra passes re-run the roster as incremental refreshes")
+    parser.add_argument("--email-pass", action="store_true",
+                        help="main target only: then find every alumnus's email, reusing the stored research")
+    parser.add_argument("--handoff-mode", choices=["conversation", "state"], default=AGENT_HANDOFF_MODE,
+                        help="How sub-agents receive earlier results: full conversation or session state")
+    parser.add_argument("--staged", action="store_true",
+                        help="main target only: research through the staged pipeline (app/configs/pipeline.py)")
+    parser.add_argument("--search-rate", type=float, default=STAGE_RATE_LIMITS.get("search"),
+                        help="--staged only: search stage rows/sec (0 for no rate limit)")
+    parser.add_argument("--no-search-prefetch", dest="search_prefetch", action="store_false",
+                        help="main target only: search for each row on the spot instead of prefetching ahead")
+    parser.add_argument("--grounding-candidates", action="store_true",
+                        help="Take social media candidates from the background agent's grounding sources")
+    parser.add_argument("--model-cascade", action="store_true",
+                        help="Run each row on the cheap model first and escalate on low confidence")
+    parser.add_argument("--no-context-cache", dest="context_cache", action="store_false",
+                        help="Send the static instructions inline instead of through the context cache")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read rows through ADKService.stream_agent_response (--target service only)")
+    parser.add_argument("--batch-formatter", action="store_true",
+                        help="Format concurrent rows in batches (--target service only)")
+    parser.add_argument("--batch-size", type=int, default=FORMATTER_BATCH_MAX_SIZE)
+    parser.add_argument("--batch-wait", type=float, default=FORMATTER_BATCH_MAX_WAIT_SECONDS,
+                        help="Maximum seconds a batch waits to fill")
+    parser.add_argument("--batch-record-failure-rate", type=float,
+                        default=benchmark_config.FAKE_BATCH_RECORD_FAILURE_RATE,
+                        help="Probability that the fake batch formatter drops or garbles a record")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report tracemalloc peak (slower)")
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = asyncio.run(run_benchmark(args))
+    print_report("Pipeline benchmark (offline fakes)", metrics)
+    if ADAPTIVE_THINKING_ENABLED:
+        print("\nThinking budgets vs. result quality:")
+        print(thinking_budget_controller.format_report())
+    if SOCIAL_MEDIA_RESOLVER_ENABLED:
+        print("\nSocial media resolver:")
+        print(social_media_resolver_stats.format_report())
+    print("\nPrompt tokens served from the context cache:")
+    print(static_context_cache.format_report())
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
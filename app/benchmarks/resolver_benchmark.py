@@ -0,0 +1,207 @@
+"""Coverage and agreement benchmark for the rule-based social media resolver.
+
+Each fixture line holds an alumnus, the raw candidates per platform and the links
+selected from them. The benchmark runs the resolver over the candidates and
+reports how many platforms (and whole alumni) it resolves without the LLM, and
+how often its picks agree with the fixture's selections.
+
+Agreement with the LLM is only reported for records whose selections the LLM made
+("selection_source": "llm"): fixtures built from a recorded run (--from-results,
+with the run's cassette so the candidates are the ones the LLM saw). The bundled
+fixture is generated from the offline fakes ("selection_source": "fakes"); its
+selections are the fake profiles the fake search results are built around, so it
+is reported as agreement with the fakes' ground truth, a consistency check only.
+
+Fixtures are JSONL with one object per alumnus:
+    {"name": ..., "results_by_platform": {platform: [{title, href, body}]},
+     "llm_selection": {platform: url or ""}, "selection_source": "llm" or "fakes"}
+
+Usage:
+    python -m app.benchmarks.resolver_benchmark
+    python -m app.benchmarks.resolver_benchmark --fixture path/to/fixture.jsonl
+    # Regenerate the offline fixture (FakeDDGS candidates, fake ground-truth selections)
+    python -m app.benchmarks.resolver_benchmark --write-fixture --rows 25
+    # Build a fixture from a recorded run: run app/main.py with SOCIAL_MEDIA_RESOLVER_ENABLED = False
+    # and --record-cassette first; the LLM's links come from the results CSV and the
+    # candidates from the searches recorded in the cassette
+    python -m app.benchmarks.resolver_benchmark --write-fixture --from-results data/alumni_results.csv \
+        --cassette data/cassettes/run.jsonl.gz --fixture data/resolver_fixture.jsonl
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.benchmarks.common import print_report, synthetic_roster, write_json
+from app.benchmarks.fakes import FakeDDGS, LatencyProfile, fake_profile_urls
+from app.configs import benchmark as benchmark_config
+from app.configs.llms import SOCIAL_MEDIA_MAX_LINKS, SOCIAL_MEDIA_TOP_K
+from app.utils.cassette_utils import Cassette, ReplaySearchClient
+from app.utils.resolver_utils import SocialMediaResolverStats, resolve_social_media_candidates
+from app.utils.search_utils import (
+    collect_social_media_candidates,
+    rank_social_media_candidates,
+    set_search_client_factory,
+)
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "social_media_selection.jsonl")
+
+# Where a fixture's selections come from, and how its agreement is labelled
+SELECTION_SOURCES = {
+    "llm": "recorded LLM selections",
+    "fakes": "fakes' ground truth",
+}
+
+# Results CSV column holding the selected link for each platform
+RESULTS_LINK_COLUMNS = {
+    "X (Twitter)": "X (Twitter) Link",
+    "LinkedIn": "LinkedIn Link",
+    "Doximity": "Doximity Link",
+    "Google Scholar": "Google Scholar Link",
+    "Facebook": "Facebook Link",
+}
+
+
+def fake_fixture_records(rows: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """Build fixture records from FakeDDGS candidates and the fakes' ground-truth profiles (no model selections)."""
+    set_search_client_factory(lambda: FakeDDGS(latency=LatencyProfile(), failure_rate=0.0))
+    for row in synthetic_roster(rows, seed):
+        full_name = f"{row['First Name']} {row['Last Name']}"
+        results = collect_social_media_candidates(full_name, max_links=SOCIAL_MEDIA_MAX_LINKS)
+        true_urls = fake_profile_urls(full_name)
+        selection = {}
+        for platform_name, candidates in results.items():
+            offered = {candidate["href"] for candidate in candidates}
+            url = true_urls.get(platform_name, "")
+            selection[platform_name] = url if url in offered else ""
+        yield {"name": full_name, "results_by_platform": results, "llm_selection": selection, "selection_source": "fakes"}
+
+
+def results_fixture_records(results_csv_path: str, cassette_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Build fixture records from a results CSV of a run with the resolver disabled.
+
+    Args:
+        results_csv_path: Results CSV of the run (the LLM's selected links)
+        cassette_path: Cassette recorded in the same run; its searches are replayed so
+                       the candidates are the ones the LLM chose from (without it,
+                       DDGS is searched again and may return different results)
+    """
+    if cassette_path:
+        cassette = Cassette(cassette_path, mode="replay", time_scale=0.0)
+        set_search_client_factory(lambda: ReplaySearchClient(cassette))
+    results_df = pd.read_csv(results_csv_path).fillna("")
+    for _, row in results_df.iterrows():
+        if row.get("Error"):
+            continue
+        full_name = row["Name"]
+        results = collect_social_media_candidates(full_name, max_links=SOCIAL_MEDIA_MAX_LINKS)
+        selection = {platform: str(row.get(column, "")) for platform, column in RESULTS_LINK_COLUMNS.items()}
+        yield {"name": full_name, "results_by_platform": results, "llm_selection": selection, "selection_source": "llm"}
+
+
+def load_fixture(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_fixture(path: str, records: Iterator[Dict[str, Any]]) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def evaluate(records: List[Dict[str, Any]], top_k: int) -> tuple[Dict[str, Any], List[str]]:
+    """
+    Run the resolver over fixture records and compare its picks with the recorded selections.
+
+    Returns:
+        Tuple of (metrics, one line per auto-selected link that differs from the LLM's)
+    """
+    stats = SocialMediaResolverStats()
+    # Per selection source: [auto-selected links compared, agreements]
+    compared = {source: [0, 0] for source in SELECTION_SOURCES}
+    disagreements: List[str] = []
+
+    for record in records:
+        full_name = record["name"]
+        source = record.get("selection_source", "llm")
+        ranked = rank_social_media_candidates(full_name, record["results_by_platform"], top_k=top_k)
+        selected, ambiguous = resolve_social_media_candidates(full_name, ranked, record["results_by_platform"])
+        stats.record(len(selected), len(ambiguous))
+        for platform_name, url in selected.items():
+            compared[source][0] += 1
+            recorded_url = record["llm_selection"].get(platform_name, "")
+            if url.rstrip("/") == recorded_url.rstrip("/"):
+                compared[source][1] += 1
+            else:
+                disagreements.append(
+                    f"{full_name} / {platform_name}: resolver={url or '-'} {source}={recorded_url or '-'}"
+                )
+
+    report = stats.report()
+    metrics: Dict[str, Any] = {
+        "alumni": report["rows"],
+        "alumni resolved without LLM": report["rows_resolved_without_llm"],
+        "social media LLM calls (baseline)": report["rows"] * SocialMediaResolverStats.LLM_CALLS_PER_ROW,
+        "social media LLM calls avoided": report["llm_calls_avoided"],
+        "platforms auto-selected": report["platforms_auto_selected"],
+        "platforms left to LLM": report["platforms_deferred"],
+        "auto-selected fraction": report["auto_selected_fraction"],
+    }
+    for source, label in SELECTION_SOURCES.items():
+        links, agreements = compared[source]
+        if links:
+            metrics[f"agreement with {label}"] = agreements / links
+            metrics[f"links compared with {label}"] = links
+    if not compared["llm"][0]:
+        metrics["agreement with recorded LLM selections"] = "n/a (fixture has no LLM selections)"
+    metrics["disagreements"] = len(disagreements)
+    return metrics, disagreements
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE_PATH)
+    parser.add_argument("--top-k", type=int, default=SOCIAL_MEDIA_TOP_K)
+    parser.add_argument("--write-fixture", action="store_true", help="(Re)build the fixture instead of evaluating")
+    parser.add_argument("--from-results", help="Results CSV to take LLM selections from (with --write-fixture)")
+    parser.add_argument("--cassette", help="Cassette of the --from-results run to take the candidates from")
+    parser.add_argument("--rows", type=int, default=25, help="Synthetic alumni in a generated fixture")
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.write_fixture:
+        records = (
+            results_fixture_records(args.from_results, args.cassette)
+            if args.from_results
+            else fake_fixture_records(args.rows, args.seed)
+        )
+        count = write_fixture(args.fixture, records)
+        print(f"Wrote {count} fixture records to {args.fixture}")
+        return
+
+    metrics, disagreements = evaluate(load_fixture(args.fixture), args.top_k)
+    print_report(f"Social media resolver vs. recorded selections ({os.path.basename(args.fixture)})", metrics)
+    for line in disagreements[:10]:
+        print(f"  {line}")
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Lookup latency of the warm lookup service (app/serve.py) vs. cold one-shot lookups, on offline fakes.
+
+Cold: every lookup is a fresh ``python -m app.benchmarks.service_benchmark --cold NAME``
+process (interpreter start, imports, agent construction, session database reset and
+one lookup through app.serve.lookup_once), timed from outside.
+
+Warm: one in-process service over HTTP is asked for
+1. distinct alumni, one at a time (each researched),
+2. a burst of identical concurrent lookups for a new alumnus (coalesced onto one run),
+3. the distinct alumni again (served from the knowledge store).
+
+Usage:
+    python -m app.benchmarks.service_benchmark
+    python -m app.benchmarks.service_benchmark --lookups 8 --burst 16 --cold-runs 3 --model-latency 0.5
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from app.benchmarks.common import percentile, print_report, synthetic_roster, write_json
+from app.benchmarks.pipeline_benchmark import install_fakes, parse_args as pipeline_args
+from app.configs import benchmark as benchmark_config
+from app.configs.service import SERVICE_MAX_CONCURRENCY
+from app.serve import lookup_once, start_lookup_service, stop_lookup_service
+
+
+def _fake_args(args: argparse.Namespace) -> argparse.Namespace:
+    """Pipeline benchmark options for install_fakes."""
+    return pipeline_args([
+        "--seed", str(args.seed),
+        "--model-latency", str(args.model_latency),
+        "--search-latency", str(args.search_latency),
+    ])
+
+
+def _get(url: str) -> Tuple[float, Dict[str, Any]]:
+    """GET a JSON endpoint and return (seconds, body)."""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        body = json.loads(response.read())
+    return time.perf_counter() - start, body
+
+
+def _roster_names(rows: int, seed: int) -> List[Tuple[str, str]]:
+    """Distinct (name, year) pairs from the synthetic roster."""
+    pairs = []
+    for row in synthetic_roster(rows * 4, seed):
+        pair = (f"{row['First Name']} {row['Last Name']}", str(row["Year"]))
+        if pair not in pairs:
+            pairs.append(pair)
+    return pairs[:rows]
+
+
+def run_cold(args: argparse.Namespace, names: List[Tuple[str, str]], knowledge_store_url: str) -> List[float]:
+    """Time one fresh process per lookup."""
+    latencies = []
+    for name, year in names[:args.cold_runs]:
+        command = [
+            sys.executable, "-m", "app.benchmarks.service_benchmark",
+            "--cold", name, "--year", year, "--knowledge-store", knowledge_store_url,
+            "--seed", str(args.seed),
+            "--model-latency", str(args.model_latency),
+            "--search-latency", str(args.search_latency),
+        ]
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_warm(
+    args: argparse.Namespace,
+    names: List[Tuple[str, str]],
+    burst_name: Tuple[str, str],
+    knowledge_store_url: str,
+) -> Dict[str, Any]:
+    """Start the service in-process and time lookups over HTTP."""
+    install_fakes(_fake_args(args))
+    start = time.perf_counter()
+    service, server = await start_lookup_service(
+        port=0, max_concurrency=args.max_concurrency, knowledge_store_url=knowledge_store_url
+    )
+    startup_seconds = time.perf_counter() - start
+
+    def url(name: str, year: str) -> str:
+        return f"{server.url}/lookup?{urlencode({'name': name, 'year': year})}"
+
+    # The blocking client requests get their own threads: in the default executor they
+    # would hold the threads the service's searches (asyncio.to_thread) need
+    loop = asyncio.get_running_loop()
+    client_executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.burst + len(names))
+
+    def get(name: str, year: str) -> "asyncio.Future[Tuple[float, Dict[str, Any]]]":
+        return loop.run_in_executor(client_executor, _get, url(name, year))
+
+    try:
+        research = [(await get(name, year))[0] for name, year in names]
+        burst = await asyncio.gather(*(get(*burst_name) for _ in range(args.burst)))
+        cached = [(await get(name, year))[0] for name, year in names]
+    finally:
+        client_executor.shutdown(wait=False)
+        await stop_lookup_service(service, server)
+    report = service.report()
+    return {
+        "startup_seconds": startup_seconds,
+        "research": research,
+        "burst": [seconds for seconds, _ in burst],
+        "burst_sources": [body["source"] for _, body in burst],
+        "cached": cached,
+        "agent_runs": report["agent_runs"],
+        "requests": report["requests"],
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    names = _roster_names(args.lookups + 1, args.seed)
+    burst_name, names = names[-1], names[:-1]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cold = run_cold(args, names, f"sqlite:///{os.path.join(tmp_dir, 'cold_store.db')}")
+        warm = await run_warm(args, names, burst_name, f"sqlite:///{os.path.join(tmp_dir, 'warm_store.db')}")
+    return {
+        "lookups": len(names),
+        "burst size": args.burst,
+        "model latency (s)": args.model_latency,
+        "cold lookup p50 (s)": percentile(cold, 50),
+        "cold lookup max (s)": max(cold) if cold else 0.0,
+        "warm service startup (s)": warm["startup_seconds"],
+        "warm research p50 (s)": percentile(warm["research"], 50),
+        "warm research p95 (s)": percentile(warm["research"], 95),
+        "burst lookup p50 (s)": percentile(warm["burst"], 50),
+        "burst lookup max (s)": max(warm["burst"]) if warm["burst"] else 0.0,
+        "burst lookups coalesced": warm["burst_sources"].count("coalesced"),
+        "burst lookups from cache": warm["burst_sources"].count("cache"),
+        "cached lookup p50 (s)": percentile(warm["cached"], 50),
+        "cached lookup p95 (s)": percentile(warm["cached"], 95),
+        "service requests": warm["requests"],
+        "service agent runs": warm["agent_runs"],
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=6, help="Distinct alumni looked up")
+    parser.add_argument("--burst", type=int, default=8, help="Identical concurrent lookups for one new alumnus")
+    parser.add_argument("--cold-runs", type=int, default=2, help="Fresh processes timed for the cold lookups")
+    parser.add_argument("--max-concurrency", type=int, default=SERVICE_MAX_CONCURRENCY)
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--model-latency", type=float, default=benchmark_config.FAKE_MODEL_LATENCY_MEAN_SECONDS)
+    parser.add_argument("--search-latency", type=float, default=benchmark_config.FAKE_SEARCH_LATENCY_MEAN_SECONDS)
+    parser.add_argument("--cold", metavar="NAME", help=argparse.SUPPRESS)  # One cold lookup (child process)
+    parser.add_argument("--year", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--knowledge-store", help=argparse.SUPPRESS)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.cold:
+        install_fakes(_fake_args(args))
+        asyncio.run(lookup_once(args.cold, args.year, knowledge_store_url=args.knowledge_store))
+        return
+    metrics = asyncio.run(run_benchmark(args))
+    print_report("Lookup service benchmark (offline fakes)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
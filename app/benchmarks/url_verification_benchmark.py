@@ -0,0 +1,160 @@
+"""URL verification benchmark against a local HTTP stub server.
+
+Builds results rows whose practice URLs and social links point at StubHttpServer
+routes (ok, HEAD-refusing, redirect chains, 404s, bot-blocked), then verifies them
+with a sequential requests.Session loop (the straightforward approach) and with
+the pooled async UrlVerifier, and checks both against the expected outcomes.
+
+Usage:
+    python -m app.benchmarks.url_verification_benchmark --rows 200 --latency 0.02
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from app.benchmarks.common import print_report, write_json
+from app.benchmarks.fakes import StubHttpServer
+from app.configs import benchmark as benchmark_config
+from app.configs.http import (
+    URL_VERIFICATION_HEAD_FALLBACK_STATUSES,
+    URL_VERIFICATION_INCONCLUSIVE_STATUSES,
+    URL_VERIFICATION_PER_HOST_LIMIT,
+)
+from app.services.url_verifier import UrlVerifier, row_urls, verify_result_rows
+
+# Route -> expected verifier status, with the share of links using it
+ROUTES = [
+    ("ok", "ok", 0.55),
+    ("nohead", "ok", 0.15),
+    ("redirect/2", "ok", 0.15),
+    ("gone", "broken", 0.10),
+    ("blocked", "blocked", 0.05),
+]
+SOCIAL_COLUMNS = ["X (Twitter) Link", "LinkedIn Link", "Doximity Link", "Google Scholar Link", "Facebook Link"]
+
+
+def build_rows(server: StubHttpServer, rows: int, seed: int) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Build results rows pointing at the stub server.
+
+    Practice URLs are drawn from a small shared pool (many alumni work at the same
+    hospitals) and served from a second host name so per-host limits apply.
+
+    Returns:
+        Tuple of (rows, expected status per URL)
+    """
+    rng = random.Random(seed)
+    routes = [route for route, _, _ in ROUTES]
+    weights = [weight for _, _, weight in ROUTES]
+    expected_by_route = {route: status for route, status, _ in ROUTES}
+    expected: Dict[str, str] = {}
+
+    def make_url(host: str, slug: str) -> str:
+        route = rng.choices(routes, weights)[0]
+        url = server.url(f"{route}/{slug}", host=host)
+        expected[url] = expected_by_route[route]
+        return url
+
+    practice_pool = [make_url("localhost", f"practice-{idx}") for idx in range(max(5, rows // 10))]
+    result_rows = []
+    for idx in range(rows):
+        row: Dict[str, Any] = {
+            "Name": f"Alumnus {idx}",
+            "Year of Entry to Yale": 2000 + idx % 20,
+            "Current Practices URLs": ", ".join(rng.sample(practice_pool, k=rng.randint(1, 2))),
+        }
+        for column in SOCIAL_COLUMNS:
+            row[column] = make_url("127.0.0.1", f"{column.split()[0].lower()}-{idx}") if rng.random() < 0.6 else ""
+        result_rows.append(row)
+    return result_rows, expected
+
+
+def verify_sequential(urls: List[str]) -> Dict[str, str]:
+    """Baseline: one URL at a time over a requests.Session (HEAD, GET fallback, redirects)."""
+    statuses = {}
+    with requests.Session() as session:
+        for url in urls:
+            try:
+                response = session.head(url, allow_redirects=True, timeout=10)
+                if response.status_code in URL_VERIFICATION_HEAD_FALLBACK_STATUSES:
+                    response = session.get(url, allow_redirects=True, timeout=10, stream=True)
+                    response.close()
+                code = response.status_code
+                statuses[url] = (
+                    "ok" if code < 400 else "blocked" if code in URL_VERIFICATION_INCONCLUSIVE_STATUSES else "broken"
+                )
+            except requests.RequestException:
+                statuses[url] = "broken"
+    return statuses
+
+
+def accuracy(statuses: Dict[str, str], expected: Dict[str, str]) -> float:
+    return sum(1 for url, status in expected.items() if statuses.get(url) == status) / max(1, len(expected))
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    with StubHttpServer(latency_seconds=args.latency) as server:
+        rows, expected = build_rows(server, args.rows, args.seed)
+        link_count = sum(len(row_urls(row)) for row in rows)
+        unique_urls = list(expected)
+
+        server.reset_counters()
+        start = time.perf_counter()
+        sequential_statuses = verify_sequential(unique_urls)
+        sequential_seconds = time.perf_counter() - start
+        sequential_requests = server.requests
+
+        server.reset_counters()
+        start = time.perf_counter()
+        async with UrlVerifier(per_host_limit=args.per_host_limit) as verifier:
+            failing_rows = await verify_result_rows(rows, verifier)
+            checks = await verifier.verify_many(unique_urls)  # served from the cache
+        pooled_seconds = time.perf_counter() - start
+        pooled_requests = server.requests
+        pooled_statuses = {url: check.status for url, check in checks.items()}
+
+    return {
+        "rows": len(rows),
+        "links in rows": link_count,
+        "unique URLs": len(unique_urls),
+        "per-host limit": args.per_host_limit,
+        "server latency (s)": args.latency,
+        "sequential seconds": sequential_seconds,
+        "sequential requests": sequential_requests,
+        "sequential accuracy": accuracy(sequential_statuses, expected),
+        "pooled seconds": pooled_seconds,
+        "pooled requests": pooled_requests,
+        "pooled accuracy": accuracy(pooled_statuses, expected),
+        "speedup": sequential_seconds / pooled_seconds if pooled_seconds else 0.0,
+        "rows flagged (broken URLs)": len(failing_rows),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=benchmark_config.BENCHMARK_ROWS)
+    parser.add_argument("--seed", type=int, default=benchmark_config.BENCHMARK_SEED)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub server delay per request (seconds)")
+    parser.add_argument("--per-host-limit", type=int, default=URL_VERIFICATION_PER_HOST_LIMIT)
+    parser.add_argument("--json", dest="json_path", help="Write metrics to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    metrics = asyncio.run(run_benchmark(args))
+    print_report("URL verification (local stub server)", metrics)
+    if args.json_path:
+        write_json(args.json_path, metrics)
+
+
+if __name__ == "__main__":
+    main()
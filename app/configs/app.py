@@ -1,7 +1,11 @@
 """Application configuration constants."""
 
 import logging
+import os
 import warnings
+from typing import Optional
+
+from app.utils.logging_utils import configure_logging
 
 # Application metadata
 APP_NAME: str = "Yale Alumni Assistant"
@@ -21,30 +25,38 @@ warnings.filterwarnings("ignore", module="google")
 # Logging configuration
 # Set to logging.INFO for production, logging.DEBUG for verbose logging
 # To disable terminal logging, set to logging.CRITICAL or use a file handler only
-LOG_LEVEL = logging.CRITICAL
+# The ALUMNI_LOG_LEVEL environment variable (e.g. "DEBUG") overrides it for one run
+LOG_LEVEL = logging.getLevelName(os.environ.get("ALUMNI_LOG_LEVEL", "CRITICAL").upper())
+
+# Level used while verbose tracing is toggled on at runtime (kill -USR1 <pid>)
+VERBOSE_LOG_LEVEL = logging.DEBUG
+
+# Format of the console and plain-text file sinks
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Optional file sinks (None disables them); the JSON sink writes one object per line
+LOG_FILE_PATH: Optional[str] = None
+LOG_JSON_PATH: Optional[str] = None
+
+# Hand records to a listener thread that formats and writes them, so a log call
+# only costs the caller a queue put
+LOG_QUEUE_ENABLED = True
 
 # Configure logging
 def setup_logging():
     """Setup application logging configuration."""
     # Create logger
     logger = logging.getLogger(APP_NAME)
-    logger.setLevel(LOG_LEVEL)
-
-    # Clear any existing handlers
-    logger.handlers.clear()
 
-    # Create console handler with a higher log level
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(LOG_LEVEL)
-
-    # Create formatter and add it to the handler
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    # Console, file and JSON sinks behind a queue listener thread
+    configure_logging(
+        logger,
+        level=LOG_LEVEL,
+        log_format=LOG_FORMAT,
+        file_path=LOG_FILE_PATH,
+        json_path=LOG_JSON_PATH,
+        use_queue=LOG_QUEUE_ENABLED,
     )
-    console_handler.setFormatter(formatter)
-
-    # Add the handler to the logger
-    logger.addHandler(console_handler)
 
     return logger
 
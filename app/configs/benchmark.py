@@ -0,0 +1,32 @@
+"""Offline benchmark configuration (fake model, fake search and workload defaults)."""
+
+# Workload
+BENCHMARK_ROWS = 50  # Number of synthetic alumni per run
+BENCHMARK_CONCURRENCY = 1  # Rows processed at once (main.py processes rows one at a time)
+BENCHMARK_SEED = 1234  # Seed for latency/failure sampling and synthetic data
+
+# Fake Gemini model
+FAKE_MODEL_NAME = "gemini-2.5-flash"  # Must look like a Gemini model so google_search is accepted
+FAKE_MODEL_LATENCY_DISTRIBUTION = "lognormal"  # Options: "constant", "uniform", "lognormal"
+FAKE_MODEL_LATENCY_MEAN_SECONDS = 0.05  # Mean latency per model call
+FAKE_MODEL_LATENCY_SPREAD = 0.5  # Sigma for lognormal, +/- fraction of the mean for uniform
+FAKE_MODEL_FAILURE_RATE = 0.0  # Probability that a model call raises
+FAKE_MODEL_CHARS_PER_TOKEN = 4  # Used to derive prompt/candidates token counts from text length
+FAKE_MODEL_THOUGHTS_FRACTION = 0.5  # Fraction of the thinking budget reported as thoughts tokens
+FAKE_BATCH_RECORD_FAILURE_RATE = 0.05  # Probability that the batch formatter drops or garbles one record
+# Requests for any other model (the model cascade's cheap tier) are answered faster and worse
+FAKE_CHEAP_MODEL_LATENCY_FACTOR = 0.5  # Latency relative to FAKE_MODEL_NAME
+FAKE_CHEAP_MODEL_ERROR_RATE = 0.2  # Probability that a background or link answer is wrong
+
+FAKE_GROUNDING_PROFILE_RATE = 0.5  # Probability that the background agent's grounding cites a profile the person has
+
+# Fake DDGS search
+FAKE_SEARCH_LATENCY_DISTRIBUTION = "lognormal"
+FAKE_SEARCH_LATENCY_MEAN_SECONDS = 0.02  # Mean latency per ddgs.text call
+FAKE_SEARCH_LATENCY_SPREAD = 0.5
+FAKE_SEARCH_FAILURE_RATE = 0.0  # Probability that a ddgs.text call raises
+FAKE_SEARCH_RESULTS_PER_QUERY = 10  # Results returned per query (before max_results)
+
+# Cassette replay (app/replay_run.py)
+CASSETTE_DIR = "data/cassettes"  # Where main.py --record-cassette NAME.jsonl.gz files usually go
+CASSETTE_REPLAY_TIME_SCALE = 0.0  # Recorded latency factor: 1.0 original timing, 0.1 ten times faster, 0 none
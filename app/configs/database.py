@@ -9,10 +9,13 @@ from typing import Generator
 DATABASE_URL = os.path.join(os.path.dirname(__file__), "../../data/database.db")
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_URL}"
 
-# Remove the existing database file if it exists
-if os.path.exists(DATABASE_URL):
-    print(f"Removing existing database file at {DATABASE_URL}...")
-    os.remove(DATABASE_URL)
+
+def reset_database() -> None:
+    """Remove the existing database file if it exists (ADKService does this on startup)."""
+    if os.path.exists(DATABASE_URL):
+        print(f"Removing existing database file at {DATABASE_URL}...")
+        os.remove(DATABASE_URL)
+
 
 # SQLAlchemy engine and session configuration
 engine = create_engine(
@@ -0,0 +1,44 @@
+"""HTTP client configuration for post-processing stages (URL verification)."""
+
+# URL verification (see app/services/url_verifier.py)
+# After a run, every practice URL and social link in the results is checked over one
+# pooled async HTTP client: HEAD first, GET when HEAD is refused, redirects followed.
+URL_VERIFICATION_ENABLED = True
+URL_VERIFICATION_MAX_CONNECTIONS = 50  # Pool size across all hosts
+URL_VERIFICATION_PER_HOST_LIMIT = 4  # Concurrent requests per host (be polite to practice sites)
+URL_VERIFICATION_TIMEOUT_SECONDS = 10.0
+URL_VERIFICATION_MAX_REDIRECTS = 10
+# HEAD responses with these statuses are retried as GET (servers that do not implement HEAD)
+URL_VERIFICATION_HEAD_FALLBACK_STATUSES = [400, 403, 404, 405, 501]
+# Statuses that mean "the site refused to answer a bot", not "the page is gone"
+# (999 is LinkedIn's anti-scraping response); such URLs are reported as blocked, not broken
+URL_VERIFICATION_INCONCLUSIVE_STATUSES = [401, 403, 429, 999]
+# Mark rows with broken URLs as incomplete in the knowledge store so the next
+# incremental refresh re-researches only those rows
+URL_VERIFICATION_FLAG_FAILING_ROWS = True
+URL_VERIFICATION_USER_AGENT = "Mozilla/5.0 (compatible; YaleAlumniResearch/1.0; link check)"
+
+# Headless browser fetch pool (see app/utils/browser_utils.py)
+# Lets the background information agent read JS-rendered practice profile pages. Needs
+# the browser binaries (`playwright install chromium`). When enabled, the agent gets a
+# fetch_practice_page tool next to google_search (ADK then runs google_search through a
+# sub-agent, since Gemini built-in tools cannot be combined with function tools).
+PRACTICE_PAGE_FETCH_ENABLED = False
+BROWSER_POOL_CONTEXTS = 4  # Warm browser contexts kept open (one page each at a time)
+BROWSER_CONTEXT_MAX_PAGES = 50  # Recycle a context after this many pages to bound memory
+BROWSER_PAGE_TIMEOUT_SECONDS = 15.0  # Per-page navigation timeout
+BROWSER_CONTEXT_WAIT_SECONDS = 60.0  # A fetch gives up (with an error) after waiting this long for a context
+BROWSER_PAGE_SETTLE_SECONDS = 1.0  # Extra wait for client-side rendering after DOMContentLoaded
+BROWSER_PAGE_MAX_CHARS = 6000  # Visible text returned to the agent per page
+# Requests aborted in every context: resource types and analytics/ads hosts
+BROWSER_BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+BROWSER_BLOCKED_HOST_PATTERNS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "newrelic.com",
+    "adservice.google.com",
+]
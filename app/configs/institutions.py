@@ -0,0 +1,29 @@
+"""Institution index configuration (see app/utils/institution_utils.py)."""
+
+import os
+
+# Canonical practice names, aliases and domains learned across runs. Practice names and
+# URLs are canonicalized and deduplicated against it after the formatter, and the most
+# common institutions are given to the background information agent as a naming hint.
+INSTITUTION_INDEX_ENABLED = True
+INSTITUTION_INDEX_PATH = os.path.join(os.path.dirname(__file__), "../../data/institution_index.json")
+INSTITUTION_HINT_MAX_ENTRIES = 25  # Institutions listed in the agent hint (most frequent first)
+INSTITUTION_HINT_MIN_SEEN = 2  # Only hint institutions seen for at least this many alumni
+# Domains that host profiles for many institutions; never used to identify an institution
+INSTITUTION_GENERIC_DOMAINS = [
+    "linkedin.com",
+    "doximity.com",
+    "healthgrades.com",
+    "vitals.com",
+    "webmd.com",
+    "zocdoc.com",
+    "usnews.com",
+    "npiprofile.com",
+    "google.com",
+    "facebook.com",
+    "x.com",
+    "twitter.com",
+    "wikipedia.org",
+    "researchgate.net",
+    "pubmed.ncbi.nlm.nih.gov",
+]
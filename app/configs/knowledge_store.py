@@ -0,0 +1,19 @@
+"""Knowledge store configuration (see app/services/knowledge_store.py)."""
+
+import os
+
+# Resolved alumni records persist across runs in their own database file (the session
+# database of app/configs/database.py is recreated on every batch run).
+KNOWLEDGE_STORE_PATH = os.path.join(os.path.dirname(__file__), "../../data/knowledge_store.db")
+KNOWLEDGE_STORE_URL = f"sqlite:///{KNOWLEDGE_STORE_PATH}"
+
+# Refresh policy for main.py: "full" re-researches every alumnus, "incremental" only
+# those without a stored record, with a record older than KNOWLEDGE_STORE_MAX_AGE_DAYS,
+# or with an empty required field (an incomplete record)
+KNOWLEDGE_STORE_REFRESH_MODE = "incremental"
+KNOWLEDGE_STORE_MAX_AGE_DAYS = 90
+KNOWLEDGE_STORE_REQUIRED_FIELDS = [
+    "current_practices_names",
+    "current_practices_urls",
+    "current_practice_narrative",
+]
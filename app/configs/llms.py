@@ -11,4 +11,144 @@ SOCIAL_MEDIA_MAX_LINKS = 20  # Maximum number of links to collect per platform
 
 # Formatter Agent
 FORMATTER_MODEL = "gemini-2.5-flash"
-FORMATTER_MODEL_THINKING_BUDGET = 1024  # HTML formatting and structured output generation
\ No newline at end of file
+FORMATTER_MODEL_THINKING_BUDGET = 1024  # HTML formatting and structured output generation
+# Adaptive thinking budgets (see app/utils/thinking_utils.py)
+# When enabled, each call picks a budget from the agent's ladder using cheap signals
+# (candidate count, background text length); retries escalate to the top rung, which
+# matches the fixed budgets above so hard cases never get less reasoning than before.
+# A budget of 0 disables thinking (supported by gemini-2.5-flash, not by 2.5-pro).
+# The background agent runs first, so there is no signal yet to size its budget by; its
+# ladder is just the fixed budget.
+ADAPTIVE_THINKING_ENABLED = True
+BACKGROUND_INFORMATION_THINKING_BUDGETS = [BACKGROUND_INFORMATION_MODEL_THINKING_BUDGET]
+SOCIAL_MEDIA_THINKING_BUDGETS = [0, 1024, SOCIAL_MEDIA_MODEL_THINKING_BUDGET]
+FORMATTER_THINKING_BUDGETS = [0, 512, FORMATTER_MODEL_THINKING_BUDGET]
+SOCIAL_MEDIA_FEW_CANDIDATES = 5  # At or below this many candidates, link selection is easy
+FORMATTER_SHORT_BACKGROUND_CHARS = 600  # Background text shorter than this is easy to format
+
+# Maximum attempts per alumnus; attempts after the first escalate thinking budgets
+AGENT_MAX_ATTEMPTS = 2
+
+# Model cascade (see app/utils/cascade_utils.py)
+# When enabled, every sub-agent first runs on the cheap model and its output is checked
+# locally: the background information is not empty, every chosen profile link carries
+# the alumnus's last name (platforms whose URLs hold no name are exempt), and the
+# formatter's record parses into the output schema. A record without a current practice
+# (when required) fails the background stage. Only the stage that fails escalates: it
+# runs again on its agent's own model with the top thinking budgets, as any retry does,
+# and the accepted stages keep their outputs. Needs AGENT_MAX_ATTEMPTS >= 2.
+MODEL_CASCADE_ENABLED = False
+CASCADE_CHEAP_MODEL = "gemini-2.5-flash-lite"
+CASCADE_REQUIRE_PRACTICES = True
+CASCADE_NAMELESS_PLATFORMS = ["Google Scholar"]  # Profile URLs keyed by user id
+
+# Shared model client (see app/utils/model_client_utils.py)
+# ADK builds a new Gemini instance, and with it a new genai client and connection pool,
+# for every request of an agent whose model is a name. When enabled, every LlmAgent gets
+# a Gemini model whose requests all go through one genai client on a pooled httpx client,
+# so connections are kept alive and reused across agents and concurrent rows.
+MODEL_CLIENT_SHARED = True
+MODEL_CLIENT_MAX_CONNECTIONS = 32  # Open connections to the model API at once
+MODEL_CLIENT_MAX_KEEPALIVE_CONNECTIONS = 16  # Idle connections kept for reuse
+MODEL_CLIENT_KEEPALIVE_EXPIRY_SECONDS = 60.0
+MODEL_CLIENT_HTTP2 = False  # Needs the h2 package (httpx[http2]); falls back to HTTP/1.1 without it
+MODEL_CLIENT_CONNECT_TIMEOUT_SECONDS = 10.0
+MODEL_CLIENT_TIMEOUT_SECONDS = 120.0  # Per request; thinking calls with search can take a while
+# Retries of failed requests (on these statuses), with exponential backoff and jitter
+MODEL_CLIENT_RETRY_ATTEMPTS = 3  # Total attempts per request
+MODEL_CLIENT_RETRY_INITIAL_DELAY_SECONDS = 1.0
+MODEL_CLIENT_RETRY_MAX_DELAY_SECONDS = 30.0
+MODEL_CLIENT_RETRY_STATUS_CODES = [408, 429, 500, 502, 503, 504]
+
+# How sub-agents hand results to the next one (see app/agents/alumni_researcher_agent/agent.py)
+# "conversation": each agent sees the whole session so far, including earlier agents'
+#                 tool calls and tool responses
+# "state": each agent writes its result to session state; the social media and formatter
+#          agents see only the query and the state fields they need (plus the previous
+#          agent's final reply, which ADK always includes). Only the formatter's prompt
+#          shrinks (the social media tool exchange is no longer replayed to it); the
+#          social media agent's history was already just the query and that reply
+AGENT_HANDOFF_MODE = "state"
+
+# Social media candidate payload (see app/utils/search_utils.py)
+# When enabled, candidates are scored locally, obvious non-profiles are dropped and the
+# agent receives a compact table of the top K per platform instead of the full markdown.
+SOCIAL_MEDIA_COMPACT_CANDIDATES = True
+SOCIAL_MEDIA_TOP_K = 3  # Candidates kept per platform
+SOCIAL_MEDIA_SNIPPET_CHARS = 160  # Characters kept from each result description
+
+# Rule-based social media resolver (see app/utils/resolver_utils.py)
+# Before the social media agent runs, candidates are searched and ranked locally.
+# Namesakes in other professions are set aside. A platform is auto-selected when its
+# best candidate's URL slug (title for ID-style profile URLs) contains the full name,
+# its score clears the minimum and it leads the runner-up by the margin; platforms with
+# no candidate that could be the person resolve to empty. If every platform resolves,
+# the agent's LLM calls are skipped; otherwise the agent only sees the remaining
+# (ambiguous) platforms.
+SOCIAL_MEDIA_RESOLVER_ENABLED = True
+SOCIAL_MEDIA_AUTO_SELECT_MIN_SCORE = 8.0
+SOCIAL_MEDIA_AUTO_SELECT_MIN_MARGIN = 2.0
+
+# Grounding candidates (see app/utils/grounding_utils.py)
+# The background information agent's google_search grounding often cites the alumnus's
+# LinkedIn, Doximity or Google Scholar page. Its sources are kept in session state and
+# merged into the social media candidates; a platform whose grounding holds a profile
+# URL carrying the full name is not searched with DDGS. Grounding URIs that point at
+# Google's redirect host are resolved (HEAD request) only when their title names a
+# platform. Off by default: the search prefetcher (on by default) searches every
+# platform of a row before the background agent runs, so grounding would add HEAD
+# requests but save no searches. Enable it together with SEARCH_PREFETCH_ENABLED = False.
+GROUNDING_CANDIDATES_ENABLED = False
+GROUNDING_MAX_REDIRECTS = 5  # Redirects resolved per alumnus
+GROUNDING_REDIRECT_TIMEOUT_SECONDS = 3.0
+GROUNDING_SNIPPET_CHARS = 300  # Characters kept from the response text citing a source
+
+# Search prefetching (see app/utils/prefetch_utils.py)
+# While a row is researched, the platform searches of the next SEARCH_PREFETCH_DEPTH
+# rows run in background threads, so DDGS latency overlaps the LLM work. Finished
+# results wait in a bounded in-memory store until the row's social media step takes
+# them; rows beyond the entry or size caps are searched on the spot as before.
+SEARCH_PREFETCH_ENABLED = True
+SEARCH_PREFETCH_DEPTH = 2
+SEARCH_PREFETCH_WORKERS = 2
+SEARCH_PREFETCH_MAX_ENTRIES = 8
+SEARCH_PREFETCH_MAX_BYTES = 2 * 1024 * 1024
+
+# Explicit context caching of the static sub-agent instructions (see app/utils/context_cache_utils.py)
+# Each agent's static instruction (system instruction + tool declarations) is registered
+# once per run as a Gemini cached content and referenced by every later request, instead
+# of being resent for every alumnus. ADK's own context cache is scoped to a session and
+# each alumnus gets a new session, so it never reuses a cache across the roster.
+CONTEXT_CACHE_ENABLED = True
+CONTEXT_CACHE_TTL_SECONDS = 3600  # Lifetime of a cache (extended while the run is going)
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 300  # Extend the TTL when less than this is left
+CONTEXT_CACHE_MIN_TOKENS = 1024  # Gemini's minimum cacheable size for 2.5 Flash (estimated at 4 chars/token)
+CONTEXT_CACHE_RETRY_SECONDS = 600  # After a failed cache creation, send instructions inline this long
+
+# Batched formatting (see app/services/batch_formatter.py)
+# When enabled, the pipeline stops after the social media agent and the formatter step
+# runs for up to FORMATTER_BATCH_MAX_SIZE alumni in one model call. Concurrent rows are
+# grouped by a micro-batching queue that waits at most FORMATTER_BATCH_MAX_WAIT_SECONDS
+# for a batch to fill, so this only pays off when several rows are in flight at once.
+FORMATTER_BATCH_ENABLED = False
+FORMATTER_BATCH_MAX_SIZE = 8
+FORMATTER_BATCH_MAX_WAIT_SECONDS = 0.5
+FORMATTER_BATCH_MAX_RERUNS = 1  # Extra calls for records that fail validation
+FORMATTER_BATCH_THINKING_BUDGET = 1024
+
+# Email finder agent (agent mode "email_finder", see app/agents/email_finder_agent)
+# Finds a professional email per alumnus from an alumni researcher run's stored record
+# (knowledge store): the stored practice pages are scanned for emails, which are scored
+# locally against the name and the institution domains. A clear winner is returned
+# without a model call; otherwise the agent picks from the candidates, which include new
+# searches restricted to the institution domains (or a broad search when there is no
+# stored research).
+EMAIL_FINDER_MODEL = "gemini-2.5-flash"
+EMAIL_FINDER_MODEL_THINKING_BUDGET = 512
+EMAIL_FINDER_MAX_PAGES = 3  # Stored practice pages scanned per alumnus
+EMAIL_FINDER_PAGE_TIMEOUT_SECONDS = 10.0
+EMAIL_FINDER_SEARCH_RESULTS = 10  # Results per new search
+EMAIL_FINDER_MAX_SEARCH_DOMAINS = 2  # Institution domains searched when the pages have no match
+EMAIL_FINDER_TOP_K = 5  # Candidates shown to the agent
+EMAIL_FINDER_AUTO_SELECT_MIN_SCORE = 7.0
+EMAIL_FINDER_AUTO_SELECT_MIN_MARGIN = 2.0
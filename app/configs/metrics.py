@@ -0,0 +1,20 @@
+"""Live run metrics configuration (see app/utils/metrics_utils.py)."""
+
+import os
+
+# Metrics are always recorded in memory (a few dict updates per row, model call and
+# search); these settings control how main.py exposes them during a run.
+# Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics (and the same
+# snapshot as JSON on /metrics.json)
+METRICS_SERVER_ENABLED = True
+METRICS_HOST = "127.0.0.1"  # Local only; use "0.0.0.0" to let a remote Prometheus scrape it
+METRICS_PORT = 9464  # 0 picks a free port
+
+# JSON snapshot rewritten every METRICS_SNAPSHOT_INTERVAL_SECONDS (and at the end of the run)
+METRICS_SNAPSHOT_ENABLED = True
+METRICS_SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), "../../data/run_metrics.json")
+METRICS_SNAPSHOT_INTERVAL_SECONDS = 30.0
+
+# Histogram buckets (seconds) for per-stage latencies: whole rows, agent runs,
+# sub-agents, searches and formatter batches
+METRICS_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
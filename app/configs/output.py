@@ -0,0 +1,16 @@
+"""Output configuration for main.py results (see app/services/result_sinks.py)."""
+
+# Formats the results table is written in, next to the results CSV path:
+#   "csv"      alumni_results.csv, appended row by row (rewritten once after URL checks)
+#   "parquet"  alumni_results.parquet with typed columns, written in row groups (opt-in;
+#              needs pyarrow, skipped with a warning when it is not installed)
+# Failed alumni never go into the results table; they are written to
+# alumni_results_errors.jsonl instead.
+RESULT_FORMATS = ["csv"]
+PARQUET_ROW_GROUP_SIZE = 100  # Rows buffered before a row group is written
+
+# Per-run event log: one JSONL file per run in a "runs" directory next to the results,
+# with an event per researched, reused or failed alumnus (including the full token
+# counts and per-agent event details) and the URL check of every row
+EVENT_LOG_ENABLED = True
+EVENT_LOG_DIRNAME = "runs"
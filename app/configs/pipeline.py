@@ -0,0 +1,29 @@
+"""Staged pipeline configuration (see app/services/staged_pipeline.py)."""
+
+# Instead of one Runner call per alumnus, main.py can push the rows to research through
+# stages connected by bounded queues: search (DDGS), background (background information
+# agent), social_media (social media agent), formatter (formatter agent or batch
+# formatter), verification (URL checks, only with URL verification on) and write
+# (knowledge store and result sinks). Each stage has its own workers, so a slow stage
+# does not starve the others, and an optional rate limit (item starts per second across
+# its workers). Results are written in completion order, not roster order.
+# Needs AGENT_HANDOFF_MODE = "state": every sub-agent runs in its own session.
+STAGED_PIPELINE_ENABLED = False
+
+# Concurrent workers per stage (the write stage must stay at 1)
+STAGE_WORKERS = {
+    "search": 2,
+    "background": 4,
+    "social_media": 4,
+    "formatter": 4,
+    "verification": 4,
+    "write": 1,
+}
+
+# Item starts per second per stage; stages not listed are not rate-limited
+STAGE_RATE_LIMITS = {
+    "search": 1.0,  # Five DDGS queries per row
+}
+
+# Capacity of each stage's input queue; a full queue holds back the stage before it
+STAGE_QUEUE_SIZE = 8
@@ -0,0 +1,33 @@
+"""Dry-run planner configuration (see app/plan_run.py)."""
+
+from app.configs.llms import BACKGROUND_INFORMATION_MODEL, FORMATTER_MODEL, SOCIAL_MEDIA_MODEL
+
+# Models whose prices the planner uses. Historical token columns are per row, not per
+# agent, so rows are priced at the most expensive of these (an upper bound when the
+# agents use different models).
+PLANNER_MODELS = sorted({BACKGROUND_INFORMATION_MODEL, SOCIAL_MEDIA_MODEL, FORMATTER_MODEL})
+
+# USD per million tokens (paid tier, prompts up to 200k tokens). "output" covers
+# candidates and thoughts tokens; "cached" is the price of prompt tokens served from a
+# context cache (cache storage is not included). Update when the price list changes.
+MODEL_PRICES_PER_MILLION_TOKENS = {
+    "gemini-2.5-flash": {"input": 0.30, "cached": 0.03, "output": 2.50},
+    "gemini-2.5-flash-lite": {"input": 0.10, "cached": 0.01, "output": 0.40},
+    "gemini-2.5-pro": {"input": 1.25, "cached": 0.125, "output": 10.00},
+}
+
+# Rate limits for the wall time estimate
+PLANNER_MODEL_REQUESTS_PER_MINUTE = 1000  # Gemini 2.5 Flash, tier 1
+PLANNER_SEARCH_REQUESTS_PER_MINUTE = 60  # Conservative pace for DDGS before it starts refusing
+PLANNER_CONCURRENCY = 1  # Rows in flight (main.py processes rows one at a time)
+
+# Used only when there is no history (no researched rows in the results CSV, event
+# logs or metrics snapshot)
+PLANNER_DEFAULT_ROW_SECONDS = 60.0
+PLANNER_DEFAULT_MODEL_CALLS_PER_ROW = 4
+PLANNER_DEFAULT_TOKENS_PER_ROW = {
+    "prompt_token_count": 12000,
+    "candidates_token_count": 1500,
+    "cached_content_token_count": 6000,
+    "thoughts_token_count": 3000,
+}
@@ -0,0 +1,30 @@
+"""Lookup service configuration (see app/serve.py and app/services/lookup_service.py)."""
+
+import os
+
+from app.configs.knowledge_store import KNOWLEDGE_STORE_MAX_AGE_DAYS
+
+# app/serve.py keeps one warm ADKService and answers single-alumnus lookups over HTTP
+# (GET /lookup?name=...&year=...), instead of paying the batch script's startup per
+# lookup. Identical lookups in flight share one agent run, and a complete stored record
+# younger than SERVICE_CACHE_MAX_AGE_DAYS is served from the knowledge store.
+SERVICE_HOST = "127.0.0.1"  # Local only; use "0.0.0.0" to accept remote lookups
+SERVICE_PORT = 8765  # 0 picks a free port
+SERVICE_USER_ID = "lookup-service"  # ADK user id of the service's sessions
+
+# The service keeps its sessions in its own database, so it can run next to a batch
+# (main.py resets data/database.db when it starts)
+SERVICE_SESSION_DATABASE_PATH = os.path.join(os.path.dirname(__file__), "../../data/service_sessions.db")
+SERVICE_SESSION_DATABASE_URL = f"sqlite:///{SERVICE_SESSION_DATABASE_PATH}"
+
+# Agent runs at once across all requests; further lookups wait for a slot
+# (cache hits and coalesced lookups do not take one)
+SERVICE_MAX_CONCURRENCY = 4
+
+# A request gets a 504 after this long (its agent run keeps going and is stored)
+SERVICE_REQUEST_TIMEOUT_SECONDS = 300.0
+
+SERVICE_CACHE_MAX_AGE_DAYS = KNOWLEDGE_STORE_MAX_AGE_DAYS
+
+# Latencies kept per lookup source for the /stats percentiles
+SERVICE_LATENCY_WINDOW = 1000
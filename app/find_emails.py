@@ -0,0 +1,133 @@
+"""Find the professional email of every alumnus, reusing the stored alumni research."""
+
+from app.configs import app as app_config  # This will apply warnings filters
+
+from app.services import ADKService, KnowledgeStore, RunOutputs
+from app.utils.context_cache_utils import static_context_cache
+from app.utils.email_utils import build_email_research, email_finder_stats
+from app.utils.institution_utils import institution_index
+from app.utils.model_client_utils import model_client_pool
+from app.agents import state_keys
+from app.configs.knowledge_store import KNOWLEDGE_STORE_URL
+from app.configs.llms import CONTEXT_CACHE_ENABLED
+from app.configs.output import EVENT_LOG_ENABLED
+import dotenv
+import pandas as pd
+import os
+import time
+from typing import Any, Dict, Optional
+from tqdm import tqdm
+
+
+def build_email_row_data(
+    alumni_name: str,
+    year_of_entry: Any,
+    response,
+    has_research: bool,
+    token_counts: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Build one emails CSV row from a parsed email finder response (token columns last)."""
+    return {
+        "Name": alumni_name,
+        "Year of Entry to Yale": year_of_entry,
+        "Email": response.email or "",
+        "Email Source": response.email_source_url or "",
+        "Other Emails": response.other_emails or "",
+        "Stored Research": "yes" if has_research else "no",
+        "Total tokens used": token_counts.get("total_token_count", 0),
+        "Prompt tokens used": token_counts.get("prompt_token_count", 0),
+        "Candidates tokens used": token_counts.get("candidates_token_count", 0),
+        "Cached content tokens used": token_counts.get("cached_content_token_count", 0),
+        "Thoughts tokens used": token_counts.get("thoughts_token_count", 0),
+    }
+
+
+async def find_emails(
+    csv_path: Optional[str] = None,
+    results_csv_path: Optional[str] = None,
+    knowledge_store_url: str = KNOWLEDGE_STORE_URL,
+    event_log: bool = EVENT_LOG_ENABLED,
+):
+    """
+    Run the email finder agent over the roster and save the emails to CSV.
+
+    Each alumnus starts from their alumni researcher record in the knowledge
+    store: the stored practice pages are scanned for emails first, and an
+    unambiguous match is taken without a model call. Otherwise the agent picks
+    from the page emails plus searches restricted to the practices' domains.
+    Alumni without a stored record fall back to a broad search.
+
+    Args:
+        csv_path: Input roster CSV (defaults to data/residents_base_info.csv)
+        results_csv_path: Output CSV (defaults to data/alumni_emails.csv)
+        knowledge_store_url: Database URL of the knowledge store
+        event_log: Write the per-run event log
+    """
+    dotenv.load_dotenv()
+
+    adk_service = ADKService(user_id="Pouria", agent_mode="email_finder")
+    await adk_service.initialize()
+    knowledge_store = KnowledgeStore(db_url=knowledge_store_url)
+    email_finder_stats.reset()
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if csv_path is None:
+        csv_path = os.path.join(project_root, "data", "residents_base_info.csv")
+    initial_data = pd.read_csv(csv_path)
+    if results_csv_path is None:
+        results_csv_path = os.path.join(project_root, "data", "alumni_emails.csv")
+
+    outputs = RunOutputs(results_csv_path, formats=["csv"], event_log=event_log)
+    outputs.event("run_started", agent_mode="email_finder", roster=csv_path, rows=len(initial_data))
+
+    failed_rows = 0
+    for index, row in tqdm(initial_data.iterrows(), total=len(initial_data), desc="Finding emails", leave=True):
+        alumni_name = f"{row['First Name']} {row['Last Name']}"
+        year_of_entry = row["Year"]
+        try:
+            stored = knowledge_store.get(alumni_name, year_of_entry)
+            research = build_email_research(stored.record if stored else None, institution_index)
+            query = f"alumni name: {alumni_name}, year of entry: {year_of_entry}"
+
+            start_time = time.perf_counter()
+            response, token_counts = await adk_service.get_agent_response(
+                query=query,
+                initial_state={
+                    state_keys.EMAIL_RESEARCH: research,
+                    state_keys.EMAIL_RESEARCH_SUMMARY: research["summary"] or "None (not researched yet).",
+                },
+            )
+            if response is None:
+                raise ValueError("Agent returned None response")
+            token_counts = token_counts or {}
+
+            outputs.write_result(
+                build_email_row_data(alumni_name, year_of_entry, response, stored is not None, token_counts),
+                event="email_found" if response.email else "email_not_found",
+                elapsed_seconds=time.perf_counter() - start_time,
+                record=response.model_dump(),
+                token_counts=token_counts,
+            )
+            tqdm.write(f"✓ {alumni_name}: {response.email or 'no email found'}")
+        except Exception as e:
+            tqdm.write(f"Error finding the email of {alumni_name} (index {index}): {e}")
+            outputs.write_error(alumni_name, year_of_entry, e)
+            failed_rows += 1
+
+    await adk_service.close()
+    if CONTEXT_CACHE_ENABLED:
+        await static_context_cache.close()
+    await model_client_pool.aclose()
+
+    outputs.event("run_finished", rows=len(outputs.rows), failed=failed_rows)
+    outputs.close()
+
+    print("\nFinal results saved to:")
+    for path in outputs.paths:
+        print(f"  {path}")
+    print(f"Total rows processed: {len(outputs.rows) + failed_rows} ({failed_rows} failed)")
+    print("\nEmail finder:")
+    print(email_finder_stats.format_report())
+    if CONTEXT_CACHE_ENABLED:
+        print("\nPrompt tokens served from the context cache:")
+        print(static_context_cache.format_report())
@@ -1,70 +1,274 @@
 # Import config early to suppress warnings before ADK imports
 from app.configs import app as app_config  # This will apply warnings filters
+from app.configs.app import DEFAULT_AGENT_MODE, VERBOSE_LOG_LEVEL, logger
 
-from app.services import ADKService
+from app.agents.agent_factory import get_root_agent
+from app.agents.alumni_researcher_agent.subagents.formatter_agent import batch_formatter_agent
+from app.find_emails import find_emails
+from app.services import ADKService, KnowledgeStore, RunOutputs, StagedAlumniPipeline, StagedRow, verify_result_rows
+from app.utils.browser_utils import close_browser_pool
+from app.utils.cassette_utils import Cassette, install_cassette
+from app.utils.context_cache_utils import static_context_cache
+from app.utils.institution_utils import institution_index
+from app.utils.logging_utils import install_log_level_toggle, set_log_level
+from app.utils.metrics_utils import MetricsServer, run_metrics
+from app.utils.model_client_utils import model_client_pool
+from app.configs.http import URL_VERIFICATION_ENABLED, URL_VERIFICATION_FLAG_FAILING_ROWS
+from app.configs.institutions import INSTITUTION_INDEX_ENABLED
+from app.configs.knowledge_store import (
+    KNOWLEDGE_STORE_MAX_AGE_DAYS,
+    KNOWLEDGE_STORE_REFRESH_MODE,
+    KNOWLEDGE_STORE_URL,
+)
+from app.configs.llms import (
+    ADAPTIVE_THINKING_ENABLED,
+    CONTEXT_CACHE_ENABLED,
+    SEARCH_PREFETCH_DEPTH,
+    SOCIAL_MEDIA_MAX_LINKS,
+    SOCIAL_MEDIA_RESOLVER_ENABLED,
+)
+from app.configs.metrics import (
+    METRICS_PORT,
+    METRICS_SERVER_ENABLED,
+    METRICS_SNAPSHOT_ENABLED,
+    METRICS_SNAPSHOT_PATH,
+)
+from app.configs.output import EVENT_LOG_ENABLED, RESULT_FORMATS
+from app.configs.pipeline import STAGED_PIPELINE_ENABLED
+from app.utils.cascade_utils import model_cascade
+from app.utils.grounding_utils import grounding_candidate_stats, grounding_collector
+from app.utils.resolver_utils import social_media_resolver_stats
+from app.utils.search_utils import search_prefetcher
+from app.utils.thinking_utils import thinking_budget_controller
+import argparse
 import asyncio
+import logging
 import dotenv
 import pandas as pd
 import os
+import time
+from typing import Any, Dict, List, Optional
 from tqdm import tqdm
 
-async def main():
+
+def build_row_data(alumni_name: str, year_of_entry: Any, response, token_counts: Dict[str, Any]) -> Dict[str, Any]:
+    """Build one results CSV row from a parsed agent response (token columns last)."""
+    # Create row data with practice information, social media links, and additional info
+    row_data = {
+        "Name": alumni_name,
+        "Year of Entry to Yale": year_of_entry,
+        "Current Practices Names": response.current_practices_names or "",
+        "Current Practices URLs": response.current_practices_urls or "",
+        "Current Practice Narrative": response.current_practice_narrative or "",
+        "Additional Information": response.additional_information or "",
+        "X (Twitter) Link": response.x_twitter_link or "",
+        "LinkedIn Link": response.linkedin_link or "",
+        "Doximity Link": response.doximity_link or "",
+        "Google Scholar Link": response.google_scholar_link or "",
+        "Facebook Link": response.facebook_link or "",
+    }
     
+    # Add token counts at the end
+    row_data.update({
+        "Total tokens used": token_counts.get("total_token_count", 0),
+        "Prompt tokens used": token_counts.get("prompt_token_count", 0),
+        "Candidates tokens used": token_counts.get("candidates_token_count", 0),
+        "Cached content tokens used": token_counts.get("cached_content_token_count", 0),
+        "Thoughts tokens used": token_counts.get("thoughts_token_count", 0),
+    })
+    return row_data
+
+
+def rows_to_research(
+    initial_data: pd.DataFrame,
+    knowledge_store: KnowledgeStore,
+    refresh_mode: str,
+    max_age_days: float,
+) -> List[str]:
+    """
+    List the names of the roster rows a run will research, in roster order.
+
+    Applies the same reuse decision as the main loop (every row in a full refresh;
+    missing, incomplete or stale records in an incremental one). Rows whose names
+    cannot be built are left out; the main loop reports them.
+    """
+    names: List[str] = []
+    for _, row in initial_data.iterrows():
+        try:
+            alumni_name = row["First Name"] + " " + row["Last Name"]
+        except TypeError:
+            continue
+        if refresh_mode == "incremental":
+            stored = knowledge_store.get(alumni_name, row["Year"])
+            if knowledge_store.needs_refresh(stored, max_age_days=max_age_days) is None:
+                continue
+        names.append(alumni_name)
+    return names
+
+
+async def main(
+    csv_path: Optional[str] = None,
+    results_csv_path: Optional[str] = None,
+    refresh_mode: str = KNOWLEDGE_STORE_REFRESH_MODE,
+    max_age_days: float = KNOWLEDGE_STORE_MAX_AGE_DAYS,
+    knowledge_store_url: str = KNOWLEDGE_STORE_URL,
+    verify_urls: bool = URL_VERIFICATION_ENABLED,
+    result_formats: Optional[List[str]] = None,
+    event_log: bool = EVENT_LOG_ENABLED,
+    metrics_server: bool = METRICS_SERVER_ENABLED,
+    metrics_snapshot_path: Optional[str] = METRICS_SNAPSHOT_PATH if METRICS_SNAPSHOT_ENABLED else None,
+    staged: bool = STAGED_PIPELINE_ENABLED,
+):
+    """
+    Run the agent pipeline over the roster and save results to CSV.
+
+    The results table is also written in the other RESULT_FORMATS (e.g. Parquet)
+    next to the CSV. Failed alumni go to a separate errors file, and the event
+    log keeps every alumnus's full token counts. Live metrics are served on a
+    local port (Prometheus text format) and written to a JSON snapshot file.
+
+    Every researched alumnus is saved to the knowledge store. In "incremental"
+    mode, alumni whose stored record is complete and younger than max_age_days
+    are taken from the store instead of being re-researched.
+
+    With staged, the alumni to research go through the StagedAlumniPipeline
+    (search, sub-agents, URL checks and writes as separate stages with their
+    own workers) after the reused rows are written, instead of one at a time.
+
+    Args:
+        csv_path: Input roster CSV (defaults to data/residents_base_info.csv)
+        results_csv_path: Output CSV (defaults to data/alumni_results.csv)
+        refresh_mode: "full" or "incremental"
+        max_age_days: Maximum age of a reusable stored record
+        knowledge_store_url: Database URL of the knowledge store
+        verify_urls: Check every URL in the results after the run and flag rows
+                     with broken URLs for re-research
+        result_formats: Results table formats (defaults to RESULT_FORMATS)
+        event_log: Write the per-run event log
+        metrics_server: Serve live metrics over HTTP during the run
+        metrics_snapshot_path: Periodic JSON metrics snapshot file (None disables it)
+        staged: Research the alumni through the staged pipeline
+    """
+    if refresh_mode not in ("full", "incremental"):
+        raise ValueError(f"Invalid refresh mode: {refresh_mode}. Supported: 'full', 'incremental'")
+
     # Load the environment variables
     dotenv.load_dotenv()
 
     user_id = "Pouria"
     agent_mode = "alumni_researcher"
 
+    # kill -USR1 <pid> turns verbose tracing on (and off again) during the run
+    install_log_level_toggle(logger, VERBOSE_LOG_LEVEL)
+
+    # Expose live metrics for the length of the run
+    run_metrics.reset()
+    metrics = MetricsServer(
+        port=None if not metrics_server else METRICS_PORT,
+        snapshot_path=metrics_snapshot_path,
+    )
+    metrics.start()
+    if metrics.url:
+        print(f"Live metrics: {metrics.url}")
+
     # Initialize the ADK service with user_id and agent_mode
     adk_service = ADKService(user_id=user_id, agent_mode=agent_mode)
     # Initialize session and runner
     await adk_service.initialize()
+    
+    # Open the cross-run knowledge store
+    knowledge_store = KnowledgeStore(db_url=knowledge_store_url)
 
     # Get the initial data
     # Get project root (one level up from app/)
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    csv_path = os.path.join(project_root, "data", "residents_base_info.csv")
+    if csv_path is None:
+        csv_path = os.path.join(project_root, "data", "residents_base_info.csv")
     initial_data = pd.read_csv(csv_path) 
 
     # Truncate to the first rows
     # initial_data = initial_data.head(3)
 
     # Get the output CSV path
-    results_csv_path = os.path.join(project_root, "data", "alumni_results.csv")
-
-    # Function to save results to CSV (called after each row is processed)
-    def save_results_to_csv(update_data):
-        """Save the current results to CSV file, overwriting previous results."""
-        if not update_data:
-            return
-        
-        results_df = pd.DataFrame(update_data)
-        
-        # Ensure token columns are at the end by reordering columns if needed
-        token_columns = ["Total tokens used", "Prompt tokens used", "Candidates tokens used", 
-                         "Cached content tokens used", "Thoughts tokens used"]
-        other_columns = [col for col in results_df.columns if col not in token_columns]
-        # Reorder: all other columns first, then token columns at the end
-        column_order = other_columns + [col for col in token_columns if col in results_df.columns]
-        results_df = results_df[column_order]
-        
-        results_df.to_csv(results_csv_path, index=False)
-
-    # update_dict to store the results
-    update_data = []        
+    if results_csv_path is None:
+        results_csv_path = os.path.join(project_root, "data", "alumni_results.csv")
+
+    # Results are written row by row to every sink as they come in
+    outputs = RunOutputs(
+        results_csv_path,
+        formats=result_formats if result_formats is not None else RESULT_FORMATS,
+        event_log=event_log,
+    )
+    outputs.event("run_started", refresh_mode=refresh_mode, roster=csv_path, rows=len(initial_data))
+
+    # Rows to research are collected for the staged pipeline, which has its own search stage
+    staged_pipeline = (
+        StagedAlumniPipeline(adk_service, knowledge_store, outputs, build_row_data, verify_urls=verify_urls)
+        if staged else None
+    )
+    staged_rows: List[StagedRow] = []
+    prefetch_searches = search_prefetcher.enabled and staged_pipeline is None
+
+    # Names of the rows this run researches, in roster order, for the search prefetcher
+    research_names = (
+        rows_to_research(initial_data, knowledge_store, refresh_mode, max_age_days)
+        if prefetch_searches else []
+    )
+    search_prefetcher.reset_stats()
+    model_cascade.reset_stats()
+    grounding_candidate_stats.reset()
+
+    reused_rows = 0
+    failed_rows = 0
+    refresh_reasons: Dict[str, int] = {}
     for index, row in tqdm(initial_data.iterrows(), total=len(initial_data), desc="Processing alumni", leave=True):
 
         try:
             alumni_name = row["First Name"] + " " + row["Last Name"]
             year_of_entry = row["Year"]
             
+            # Reuse the stored record when it is complete and fresh enough
+            reason = "full"
+            if refresh_mode == "incremental":
+                stored = knowledge_store.get(alumni_name, year_of_entry)
+                reason = knowledge_store.needs_refresh(stored, max_age_days=max_age_days)
+                if reason is None:
+                    # No tokens were spent on this row in this run
+                    outputs.write_result(
+                        build_row_data(alumni_name, year_of_entry, stored.record, {}),
+                        event="reused",
+                        researched_at=stored.researched_at,
+                    )
+                    reused_rows += 1
+                    run_metrics.rows.inc(outcome="reused")
+                    tqdm.write(f"✓ Reused stored record: {alumni_name} (Year: {year_of_entry}, researched {stored.researched_at:%Y-%m-%d})")
+                    continue
+            researched = sum(refresh_reasons.values())
+            refresh_reasons[reason] = refresh_reasons.get(reason, 0) + 1
+            
             # Construct query
             query = f"alumni name: {alumni_name}, year of entry: {year_of_entry}"
             
-            response, token_counts = await adk_service.get_agent_response(
-                query=query,
-            )
+            if staged_pipeline is not None:
+                staged_rows.append(StagedRow(alumni_name, year_of_entry, query=query, refresh_reason=reason))
+                continue
+            
+            # Search for this row and the next ones in the background while the agent runs
+            if prefetch_searches:
+                search_prefetcher.prefetch(
+                    research_names[researched:researched + 1 + SEARCH_PREFETCH_DEPTH],
+                    SOCIAL_MEDIA_MAX_LINKS,
+                )
+            
+            start_time = time.perf_counter()
+            try:
+                response, token_counts = await adk_service.get_agent_response(
+                    query=query,
+                )
+            finally:
+                # Drop the searches of a row that failed before its social media step
+                if prefetch_searches:
+                    search_prefetcher.discard(alumni_name, SOCIAL_MEDIA_MAX_LINKS)
             
             if response is None:
                 raise ValueError("Agent returned None response")
@@ -78,38 +282,16 @@ async def main():
                     "thoughts_token_count": 0,
                 }
             
-            # Create row data with practice information, social media links, and additional info
-            # Token columns will be added at the end
-            row_data = {
-                "Name": alumni_name,
-                "Year of Entry to Yale": year_of_entry,
-                "Current Practices Names": response.current_practices_names or "",
-                "Current Practices URLs": response.current_practices_urls or "",
-                "Current Practice Narrative": response.current_practice_narrative or "",
-                "Additional Information": response.additional_information or "",
-                "X (Twitter) Link": response.x_twitter_link or "",
-                "LinkedIn Link": response.linkedin_link or "",
-                "Doximity Link": response.doximity_link or "",
-                "Google Scholar Link": response.google_scholar_link or "",
-                "Facebook Link": response.facebook_link or "",
-            }
-            
-            # Add token counts at the end
-            token_data = {
-                "Total tokens used": token_counts.get("total_token_count", 0),
-                "Prompt tokens used": token_counts.get("prompt_token_count", 0),
-                "Candidates tokens used": token_counts.get("candidates_token_count", 0),
-                "Cached content tokens used": token_counts.get("cached_content_token_count", 0),
-                "Thoughts tokens used": token_counts.get("thoughts_token_count", 0),
-            }
-            
-            # Combine row data with token data (tokens at the end)
-            row_data.update(token_data)
-            update_data.append(row_data)
-            
-            # Save results after each successful row processing
-            save_results_to_csv(update_data)
-            print(f"✓ Processed and saved: {alumni_name} (Year: {year_of_entry})")
+            knowledge_store.put(alumni_name, year_of_entry, response, token_counts=token_counts)
+            outputs.write_result(
+                build_row_data(alumni_name, year_of_entry, response, token_counts),
+                event="researched",
+                refresh_reason=reason,
+                elapsed_seconds=time.perf_counter() - start_time,
+                record=response.model_dump(),
+                token_counts=token_counts,
+            )
+            tqdm.write(f"✓ Processed and saved: {alumni_name} (Year: {year_of_entry})")
             
         except Exception as e:
             # Handle case where alumni_name or year_of_entry might not be set
@@ -121,20 +303,135 @@ async def main():
                 error_year = row["Year"]
             except:
                 error_year = None
-            print(f"Error getting agent response for {error_alumni_name} with year of entry {error_year} (index {index}): {e}")
-            update_data.append({
-                "Name": error_alumni_name,
-                "Year of Entry to Yale": error_year if error_year else "",
-                "Error": str(e),
-            })
-            
-            # Save results after each error case as well
-            save_results_to_csv(update_data)
-            print(f"✗ Error saved for: {error_alumni_name}")
+            tqdm.write(f"Error getting agent response for {error_alumni_name} with year of entry {error_year} (index {index}): {e}")
+            outputs.write_error(error_alumni_name, error_year if error_year else "", e)
+            failed_rows += 1
+            tqdm.write(f"✗ Error saved for: {error_alumni_name}")
             continue
 
-    print(f"\nFinal results saved to {results_csv_path}")
-    print(f"Total rows processed: {len(update_data)}")
+    if staged_pipeline is not None and staged_rows:
+        await staged_pipeline.run(staged_rows)
+        failed_rows += staged_pipeline.failed_rows
+
+    # Wait for formatter batches still in flight
+    await adk_service.close()
+    search_prefetcher.close()
+
+    # Shut down the headless browser if the fetch tool started it
+    await close_browser_pool()
+
+    # Delete this run's instruction caches instead of paying storage until they expire
+    if CONTEXT_CACHE_ENABLED:
+        await static_context_cache.close()
+
+    # Close the shared model client's and the grounding redirects' pooled connections
+    await model_client_pool.aclose()
+    await grounding_collector.aclose()
+
+    # Persist the institutions learned in this run for the next one
+    if INSTITUTION_INDEX_ENABLED:
+        institution_index.save()
+
+    # Verify every URL in the results concurrently and annotate the rows
+    if verify_urls:
+        # Rows the staged pipeline's verification stage checked keep their annotations
+        await verify_result_rows([row for row in outputs.rows if "URL Check" not in row])
+        failing_rows = [row for row in outputs.rows if row.get("URL Check") == "failed"]
+        outputs.rewrite()
+        for row in outputs.rows:
+            if row.get("URL Check"):
+                outputs.event(
+                    "url_check",
+                    name=row["Name"],
+                    year_of_entry=row["Year of Entry to Yale"],
+                    status=row["URL Check"],
+                    broken=row["Broken URLs"],
+                    redirected=row["Redirected URLs"],
+                )
+        print(f"\nURL check: {len(failing_rows)} row(s) with broken URLs")
+        if URL_VERIFICATION_FLAG_FAILING_ROWS:
+            # Only these rows are re-researched by the next incremental refresh
+            flagged = sum(
+                knowledge_store.mark_incomplete(row["Name"], row["Year of Entry to Yale"])
+                for row in failing_rows
+            )
+            print(f"Flagged {flagged} row(s) for re-research")
+
+    outputs.event("run_finished", rows=len(outputs.rows), reused=reused_rows, failed=failed_rows)
+    outputs.close()
+    metrics.stop()
+
+    print("\nFinal results saved to:")
+    for path in outputs.paths:
+        print(f"  {path}")
+    if metrics.snapshot_path:
+        print(f"  {metrics.snapshot_path}")
+    print(f"Total rows processed: {len(outputs.rows) + failed_rows} ({failed_rows} failed)")
+    print(f"Reused from knowledge store: {reused_rows}")
+    print(f"Researched ({refresh_mode} refresh): {sum(refresh_reasons.values())} {refresh_reasons}")
+    if ADAPTIVE_THINKING_ENABLED:
+        print("\nThinking budgets vs. result quality:")
+        print(thinking_budget_controller.format_report())
+    if SOCIAL_MEDIA_RESOLVER_ENABLED:
+        print("\nSocial media resolver:")
+        print(social_media_resolver_stats.format_report())
+    if staged_pipeline is not None:
+        print("\nStaged pipeline:")
+        print(staged_pipeline.format_report())
+    if grounding_collector.enabled:
+        print("\nGrounding sources as social media candidates:")
+        print(grounding_candidate_stats.format_report())
+    if model_cascade.enabled:
+        print("\nModel cascade:")
+        print(model_cascade.format_report())
+    if prefetch_searches:
+        print("\nSearch prefetching:")
+        print(search_prefetcher.format_report())
+    if CONTEXT_CACHE_ENABLED:
+        print("\nPrompt tokens served from the context cache:")
+        print(static_context_cache.format_report())
+    if adk_service.batch_formatter is not None:
+        print("\nBatched formatting:")
+        print(adk_service.batch_formatter.stats.format_report())
+    if INSTITUTION_INDEX_ENABLED:
+        print(f"\nInstitution index: {len(institution_index)} institutions, "
+              f"{institution_index.hits}/{institution_index.lookups} practice names matched a known institution")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Research the alumni roster and save results to CSV.")
+    parser.add_argument("--refresh-mode", choices=["full", "incremental"], default=KNOWLEDGE_STORE_REFRESH_MODE,
+                        help="full: re-research everyone; incremental: only missing, stale or incomplete records")
+    parser.add_argument("--max-age-days", type=float, default=KNOWLEDGE_STORE_MAX_AGE_DAYS,
+                        help="Stored records older than this are re-researched in incremental mode")
+    parser.add_argument("--agent-mode", choices=["alumni_researcher", "email_finder"], default=DEFAULT_AGENT_MODE,
+                        help="alumni_researcher: research practices and profiles; "
+                             "email_finder: find emails, reusing the stored research")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help="Override LOG_LEVEL for this run (also settable with ALUMNI_LOG_LEVEL)")
+    parser.add_argument("--staged", action=argparse.BooleanOptionalAction, default=STAGED_PIPELINE_ENABLED,
+                        help="Research through the staged pipeline (per-stage workers and queues, see app/configs/pipeline.py)")
+    parser.add_argument("--record-cassette", metavar="PATH",
+                        help="Record every model and search call of the run to this cassette "
+                             "(e.g. data/cassettes/run.jsonl.gz) for offline replay with app.replay_run")
+    args = parser.parse_args()
+    if args.log_level:
+        set_log_level(logger, getattr(logging, args.log_level))
+
+    cassette = None
+    if args.record_cassette:
+        os.makedirs(os.path.dirname(os.path.abspath(args.record_cassette)), exist_ok=True)
+        cassette = Cassette(
+            args.record_cassette,
+            mode="record",
+            metadata={"agent_mode": args.agent_mode, "refresh_mode": args.refresh_mode},
+        )
+        install_cassette(cassette, [get_root_agent(args.agent_mode), batch_formatter_agent])
+    try:
+        if args.agent_mode == "email_finder":
+            asyncio.run(find_emails())
+        else:
+            asyncio.run(main(refresh_mode=args.refresh_mode, max_age_days=args.max_age_days, staged=args.staged))
+    finally:
+        if cassette is not None:
+            cassette.close()
+            print(f"\n{cassette.format_report()}")
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""Estimate the tokens, cost, search calls and wall time of a roster run without running it.
+
+The estimate comes from history: per-row token columns of the results CSV,
+per-row times and model calls from the event logs in data/runs/, and search
+calls per row from the last metrics snapshot. Roster rows that the knowledge
+store can serve in an incremental refresh are counted as free. No model or
+search calls are made.
+
+Usage:
+    python -m app.plan_run
+    python -m app.plan_run data/new_roster.csv --concurrency 4 --refresh-mode full
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import glob
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.configs.knowledge_store import (
+    KNOWLEDGE_STORE_MAX_AGE_DAYS,
+    KNOWLEDGE_STORE_REFRESH_MODE,
+    KNOWLEDGE_STORE_URL,
+)
+from app.configs.metrics import METRICS_SNAPSHOT_PATH
+from app.configs.output import EVENT_LOG_DIRNAME
+from app.configs.planner import (
+    MODEL_PRICES_PER_MILLION_TOKENS,
+    PLANNER_CONCURRENCY,
+    PLANNER_DEFAULT_MODEL_CALLS_PER_ROW,
+    PLANNER_DEFAULT_ROW_SECONDS,
+    PLANNER_DEFAULT_TOKENS_PER_ROW,
+    PLANNER_MODEL_REQUESTS_PER_MINUTE,
+    PLANNER_SEARCH_REQUESTS_PER_MINUTE,
+)
+from app.utils.pricing_utils import pricing_model, row_cost
+
+# Results CSV token columns and the usage fields they hold
+TOKEN_COLUMN_FIELDS = {
+    "Prompt tokens used": "prompt_token_count",
+    "Candidates tokens used": "candidates_token_count",
+    "Cached content tokens used": "cached_content_token_count",
+    "Thoughts tokens used": "thoughts_token_count",
+}
+
+
+def load_token_history(results_csv_path: str) -> pd.DataFrame:
+    """
+    Token counts of the researched rows of a results CSV.
+
+    Reused rows (all token columns zero) and CSVs without token columns give no history.
+
+    Returns:
+        DataFrame with one column per usage field and one row per researched alumnus
+    """
+    if not os.path.exists(results_csv_path):
+        return pd.DataFrame(columns=list(TOKEN_COLUMN_FIELDS.values()))
+    results_df = pd.read_csv(results_csv_path)
+    columns = [column for column in TOKEN_COLUMN_FIELDS if column in results_df.columns]
+    tokens = results_df[columns].apply(pd.to_numeric, errors="coerce").fillna(0).rename(columns=TOKEN_COLUMN_FIELDS)
+    return tokens[tokens.sum(axis=1) > 0]
+
+
+def load_event_history(runs_dir: str) -> Dict[str, Any]:
+    """
+    Per-row times, model calls and failures from the per-run event logs.
+
+    Returns:
+        Dict with "row_seconds" and "model_calls" lists (one entry per researched
+        alumnus) and the "researched" and "failed" counts
+    """
+    history: Dict[str, Any] = {"row_seconds": [], "model_calls": [], "researched": 0, "failed": 0}
+    for path in sorted(glob.glob(os.path.join(runs_dir, "*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("event") == "failed":
+                    history["failed"] += 1
+                elif record.get("event") == "researched":
+                    history["researched"] += 1
+                    if record.get("elapsed_seconds") is not None:
+                        history["row_seconds"].append(float(record["elapsed_seconds"]))
+                    event_details = (record.get("token_counts") or {}).get("event_details")
+                    if event_details:
+                        history["model_calls"].append(len(event_details))
+    return history
+
+
+def load_metrics_history(snapshot_path: str) -> Dict[str, Optional[float]]:
+    """
+    Row latency and search calls per row from the last run's metrics snapshot.
+
+    Returns:
+        Dict with "row_seconds" (mean) and "searches_per_row", None where unknown
+    """
+    history: Dict[str, Optional[float]] = {"row_seconds": None, "searches_per_row": None}
+    if not os.path.exists(snapshot_path):
+        return history
+    with open(snapshot_path, encoding="utf-8") as f:
+        metrics = json.load(f).get("metrics", {})
+    row_stage = metrics.get("alumni_stage_seconds", {}).get("row")
+    if row_stage and row_stage.get("count"):
+        history["row_seconds"] = row_stage["mean"]
+    rows = metrics.get("alumni_rows_total", {})
+    researched = rows.get("success", 0) + rows.get("failed", 0)
+    if researched:
+        history["searches_per_row"] = sum(metrics.get("alumni_search_calls_total", {}).values()) / researched
+    return history
+
+
+def classify_roster(
+    roster_df: pd.DataFrame,
+    refresh_mode: str,
+    max_age_days: float,
+    knowledge_store_url: str = KNOWLEDGE_STORE_URL,
+) -> Dict[str, int]:
+    """
+    Count roster rows by what main.py would do with them: "reused" or a refresh reason.
+
+    The knowledge store is only read; without a store file every row is "missing".
+    """
+    if refresh_mode == "full":
+        return {"full": len(roster_df)}
+    store_file = knowledge_store_url[len("sqlite:///"):] if knowledge_store_url.startswith("sqlite:///") else None
+    if store_file is not None and not os.path.exists(store_file):
+        return {"missing": len(roster_df)}
+    # Imported here: app.services pulls in ADK, which full refreshes don't need
+    from app.services.knowledge_store import KnowledgeStore
+
+    knowledge_store = KnowledgeStore(db_url=knowledge_store_url)
+    counts: Dict[str, int] = {}
+    for _, row in roster_df.iterrows():
+        stored = knowledge_store.get(f"{row['First Name']} {row['Last Name']}", row["Year"])
+        reason = knowledge_store.needs_refresh(stored, max_age_days=max_age_days) or "reused"
+        counts[reason] = counts.get(reason, 0) + 1
+    return counts
+
+
+def _mean_and_p90(values: pd.Series) -> Dict[str, float]:
+    return {"mean": float(values.mean()), "p90": float(values.quantile(0.9))}
+
+
+def plan_run(
+    roster_csv_path: str,
+    results_csv_path: str,
+    refresh_mode: str = KNOWLEDGE_STORE_REFRESH_MODE,
+    max_age_days: float = KNOWLEDGE_STORE_MAX_AGE_DAYS,
+    concurrency: int = PLANNER_CONCURRENCY,
+    model_rpm: float = PLANNER_MODEL_REQUESTS_PER_MINUTE,
+    search_rpm: float = PLANNER_SEARCH_REQUESTS_PER_MINUTE,
+    knowledge_store_url: str = KNOWLEDGE_STORE_URL,
+    snapshot_path: str = METRICS_SNAPSHOT_PATH,
+) -> Dict[str, Any]:
+    """
+    Estimate a run of main.py over a roster from the history of earlier runs.
+
+    Args:
+        roster_csv_path: Roster CSV (First Name, Last Name, Year)
+        results_csv_path: Results CSV of earlier runs; its runs/ directory holds the event logs
+        refresh_mode: "full" or "incremental", as for main.py
+        max_age_days: Maximum age of a reusable stored record
+        concurrency: Rows in flight at once
+        model_rpm: Model requests per minute allowed
+        search_rpm: Search requests per minute allowed
+        knowledge_store_url: Database URL of the knowledge store
+        snapshot_path: Metrics snapshot of the last run
+
+    Returns:
+        The plan: roster breakdown, per-row history, and token, cost, call and
+        wall time estimates for the rows to research (with what reuse saves)
+    """
+    roster_df = pd.read_csv(roster_csv_path)
+    breakdown = classify_roster(roster_df, refresh_mode, max_age_days, knowledge_store_url)
+    reused_rows = breakdown.get("reused", 0)
+    rows_to_research = len(roster_df) - reused_rows
+
+    model = pricing_model()
+    prices = MODEL_PRICES_PER_MILLION_TOKENS[model]
+    tokens_df = load_token_history(results_csv_path)
+    events = load_event_history(os.path.join(os.path.dirname(os.path.abspath(results_csv_path)), EVENT_LOG_DIRNAME))
+    metrics = load_metrics_history(snapshot_path)
+
+    if len(tokens_df):
+        tokens_per_row = {field: _mean_and_p90(tokens_df[field]) for field in tokens_df.columns}
+        costs = tokens_df.apply(lambda row: row_cost(row.to_dict(), prices), axis=1)
+        cost_per_row = _mean_and_p90(costs)
+    else:
+        tokens_per_row = {field: {"mean": value, "p90": value} for field, value in PLANNER_DEFAULT_TOKENS_PER_ROW.items()}
+        cost = row_cost(PLANNER_DEFAULT_TOKENS_PER_ROW, prices)
+        cost_per_row = {"mean": cost, "p90": cost}
+    if events["row_seconds"]:
+        row_seconds = _mean_and_p90(pd.Series(events["row_seconds"]))
+    else:
+        seconds = metrics["row_seconds"] or PLANNER_DEFAULT_ROW_SECONDS
+        row_seconds = {"mean": seconds, "p90": seconds}
+    model_calls_per_row = (
+        sum(events["model_calls"]) / len(events["model_calls"])
+        if events["model_calls"] else PLANNER_DEFAULT_MODEL_CALLS_PER_ROW
+    )
+    if metrics["searches_per_row"] is not None:
+        searches_per_row = metrics["searches_per_row"]
+    else:
+        from app.utils.search_utils import SOCIAL_MEDIA_PLATFORMS
+
+        searches_per_row = float(len(SOCIAL_MEDIA_PLATFORMS))  # One search per platform
+    finished = events["researched"] + events["failed"]
+    failure_rate = events["failed"] / finished if finished else 0.0
+
+    def wall_seconds_by_bound(rows: int) -> Dict[str, float]:
+        # Wall time is set by the slowest of row latency at this concurrency and the two rate limits
+        return {
+            "row latency": rows * row_seconds["mean"] / max(concurrency, 1),
+            "model rate limit": rows * model_calls_per_row / model_rpm * 60,
+            "search rate limit": rows * searches_per_row / search_rpm * 60,
+        }
+
+    bounds = wall_seconds_by_bound(rows_to_research)
+    limited_by = max(bounds, key=bounds.get)
+    total_tokens_per_row = sum(
+        tokens_per_row[field]["mean"]
+        for field in ("prompt_token_count", "candidates_token_count", "thoughts_token_count")
+        if field in tokens_per_row
+    )
+    return {
+        "roster_rows": len(roster_df),
+        "refresh_mode": refresh_mode,
+        "breakdown": breakdown,
+        "rows_to_research": rows_to_research,
+        "history": {
+            "token_rows": len(tokens_df),
+            "timed_rows": len(events["row_seconds"]),
+            "failure_rate": failure_rate,
+        },
+        "pricing_model": model,
+        "tokens_per_row": tokens_per_row,
+        "cost_per_row_usd": cost_per_row,
+        "row_seconds": row_seconds,
+        "model_calls_per_row": model_calls_per_row,
+        "searches_per_row": searches_per_row,
+        "estimate": {
+            "tokens": rows_to_research * total_tokens_per_row,
+            "cost_usd": rows_to_research * cost_per_row["mean"],
+            "cost_usd_p90": rows_to_research * cost_per_row["p90"],
+            "model_calls": math.ceil(rows_to_research * model_calls_per_row),
+            "search_calls": math.ceil(rows_to_research * searches_per_row),
+            "expected_failures": round(rows_to_research * failure_rate),
+            "wall_seconds": bounds[limited_by],
+            "wall_seconds_by_bound": bounds,
+            "limited_by": limited_by,
+            "concurrency": concurrency,
+        },
+        "reuse_savings": {
+            "rows": reused_rows,
+            "tokens": reused_rows * total_tokens_per_row,
+            "cost_usd": reused_rows * cost_per_row["mean"],
+            "wall_seconds": max(wall_seconds_by_bound(len(roster_df)).values()) - bounds[limited_by],
+        },
+    }
+
+
+def _format_duration(seconds: float) -> str:
+    hours, remainder = divmod(int(round(seconds)), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h {minutes:02d}m {seconds:02d}s"
+
+
+def format_plan(plan: Dict[str, Any]) -> str:
+    """Human-readable summary of a plan_run() result."""
+    estimate = plan["estimate"]
+    savings = plan["reuse_savings"]
+    history = plan["history"]
+    breakdown = ", ".join(f"{reason} {count}" for reason, count in sorted(plan["breakdown"].items()))
+    source = "defaults (no history)" if not history["token_rows"] else f"{history['token_rows']} researched rows"
+    lines = [
+        f"Roster: {plan['roster_rows']} rows ({plan['refresh_mode']} refresh: {breakdown})",
+        f"To research: {plan['rows_to_research']} rows",
+        f"History: tokens from {source}, times from {history['timed_rows']} logged rows, "
+        f"{history['failure_rate']:.1%} of rows failed",
+        "",
+        "Per row (mean / p90):",
+    ]
+    for field, values in plan["tokens_per_row"].items():
+        lines.append(f"  {field:<28} {values['mean']:>10,.0f} / {values['p90']:,.0f}")
+    lines += [
+        f"  {'cost (' + plan['pricing_model'] + ')':<28} {plan['cost_per_row_usd']['mean']:>10.4f} / "
+        f"{plan['cost_per_row_usd']['p90']:.4f} USD",
+        f"  {'seconds':<28} {plan['row_seconds']['mean']:>10.1f} / {plan['row_seconds']['p90']:.1f}",
+        f"  {'model calls':<28} {plan['model_calls_per_row']:>10.1f}",
+        f"  {'search calls':<28} {plan['searches_per_row']:>10.1f}",
+        "",
+        "Estimate:",
+        f"  tokens          {estimate['tokens']:,.0f}",
+        f"  cost            {estimate['cost_usd']:.2f} USD (p90 rows: {estimate['cost_usd_p90']:.2f} USD)",
+        f"  model calls     {estimate['model_calls']:,}",
+        f"  search calls    {estimate['search_calls']:,}",
+        f"  failures        ~{estimate['expected_failures']}",
+        f"  wall time       {_format_duration(estimate['wall_seconds'])} at concurrency "
+        f"{estimate['concurrency']} (limited by {estimate['limited_by']})",
+    ]
+    for bound, seconds in estimate["wall_seconds_by_bound"].items():
+        lines.append(f"    {bound:<18} {_format_duration(seconds)}")
+    lines += [
+        "",
+        f"Saved by reusing {savings['rows']} stored rows: {savings['tokens']:,.0f} tokens, "
+        f"{savings['cost_usd']:.2f} USD, {_format_duration(savings['wall_seconds'])}",
+    ]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("roster_csv", nargs="?", default=os.path.join(project_root, "data", "residents_base_info.csv"))
+    parser.add_argument("--results", default=os.path.join(project_root, "data", "alumni_results.csv"),
+                        help="Results CSV of earlier runs (history)")
+    parser.add_argument("--refresh-mode", choices=["full", "incremental"], default=KNOWLEDGE_STORE_REFRESH_MODE)
+    parser.add_argument("--max-age-days", type=float, default=KNOWLEDGE_STORE_MAX_AGE_DAYS)
+    parser.add_argument("--concurrency", type=int, default=PLANNER_CONCURRENCY)
+    parser.add_argument("--model-rpm", type=float, default=PLANNER_MODEL_REQUESTS_PER_MINUTE,
+                        help="Model requests per minute allowed")
+    parser.add_argument("--search-rpm", type=float, default=PLANNER_SEARCH_REQUESTS_PER_MINUTE,
+                        help="Search requests per minute allowed")
+    parser.add_argument("--knowledge-store", default=KNOWLEDGE_STORE_URL, help="Knowledge store database URL")
+    parser.add_argument("--metrics-snapshot", default=METRICS_SNAPSHOT_PATH,
+                        help="Metrics snapshot of the last run (search calls per row)")
+    parser.add_argument("--json", dest="json_path", help="Also write the plan to this JSON file")
+    args = parser.parse_args()
+
+    plan = plan_run(
+        args.roster_csv,
+        args.results,
+        refresh_mode=args.refresh_mode,
+        max_age_days=args.max_age_days,
+        concurrency=args.concurrency,
+        model_rpm=args.model_rpm,
+        search_rpm=args.search_rpm,
+        knowledge_store_url=args.knowledge_store,
+        snapshot_path=args.metrics_snapshot,
+    )
+    print(format_plan(plan))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(plan, f, indent=2)
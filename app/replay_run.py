@@ -0,0 +1,133 @@
+"""Replay a recorded run offline from its cassette, optionally under cProfile.
+
+Every model and search call is served from a cassette recorded with
+``app/main.py --record-cassette``, so call_root_agent_async, parsing and the
+output stages run on real data without Gemini or DDGS. Recorded latencies are
+scaled by --time-scale (0 replays as fast as possible, 1 with the original timing).
+
+The replay runs in a temporary directory (full refresh against an empty
+knowledge store), so data/ is left untouched. Rows that were not recorded, e.g.
+reused rows of an incremental run, fail with a cassette miss.
+
+Usage:
+    python -m app.replay_run data/cassettes/run.jsonl.gz
+    python -m app.replay_run data/cassettes/run.jsonl.gz --time-scale 1 --profile replay.prof
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import contextlib
+import cProfile
+import os
+import pstats
+import tempfile
+import time
+from typing import List, Optional
+
+from app.agents.agent_factory import get_root_agent
+from app.agents.alumni_researcher_agent.subagents.formatter_agent import batch_formatter_agent
+from app.configs.benchmark import CASSETTE_REPLAY_TIME_SCALE
+from app.utils.cassette_utils import Cassette, install_cassette
+from app.utils.context_cache_utils import static_context_cache
+from app.utils.institution_utils import institution_index
+
+
+async def replay(
+    cassette_path: str,
+    roster_path: str,
+    output_dir: str,
+    time_scale: float,
+    knowledge_store_url: Optional[str] = None,
+) -> Cassette:
+    """
+    Run the recorded agent mode over the roster with the cassette installed.
+
+    Args:
+        cassette_path: Recorded cassette
+        roster_path: Roster CSV of the recorded run
+        output_dir: Directory for the results, event log and metrics snapshot
+        time_scale: Recorded latency factor
+        knowledge_store_url: Knowledge store (email_finder mode reads the stored
+                             research from it; defaults to an empty one in output_dir)
+
+    Returns:
+        The cassette, with its replay counts
+    """
+    from app.main import main
+    from app.find_emails import find_emails
+
+    cassette = Cassette(cassette_path, mode="replay", time_scale=time_scale)
+    agent_mode = cassette.metadata.get("agent_mode", "alumni_researcher")
+    install_cassette(cassette, [get_root_agent(agent_mode), batch_formatter_agent])
+    # Replayed models have no genai client; keep the institution index in memory
+    static_context_cache.enabled = False
+    institution_index.path = None
+    institution_index.clear()
+
+    if knowledge_store_url is None:
+        knowledge_store_url = f"sqlite:///{os.path.join(output_dir, 'knowledge_store.db')}"
+    if agent_mode == "email_finder":
+        await find_emails(
+            csv_path=roster_path,
+            results_csv_path=os.path.join(output_dir, "alumni_emails.csv"),
+            knowledge_store_url=knowledge_store_url,
+        )
+    else:
+        await main(
+            csv_path=roster_path,
+            results_csv_path=os.path.join(output_dir, "alumni_results.csv"),
+            refresh_mode="full",
+            knowledge_store_url=knowledge_store_url,
+            verify_urls=False,
+            metrics_server=False,
+            metrics_snapshot_path=os.path.join(output_dir, "run_metrics.json"),
+        )
+    return cassette
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cassette", help="Cassette recorded with app/main.py --record-cassette")
+    parser.add_argument("--roster", help="Roster CSV of the recorded run (defaults to data/residents_base_info.csv)")
+    parser.add_argument("--time-scale", type=float, default=CASSETTE_REPLAY_TIME_SCALE,
+                        help="Recorded latency factor: 1 original timing, 0.1 ten times faster, 0 none")
+    parser.add_argument("--output-dir", help="Keep the replay's results here (defaults to a temporary directory)")
+    parser.add_argument("--knowledge-store", help="Knowledge store URL (email_finder cassettes need the stored research)")
+    parser.add_argument("--profile", metavar="PATH", help="Run under cProfile and write the stats to this file")
+    parser.add_argument("--top", type=int, default=25, help="Functions shown from the profile (by cumulative time)")
+    parser.add_argument("--quiet", action="store_true", help="Hide the run's per-row output")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    roster = args.roster or os.path.join(project_root, "data", "residents_base_info.csv")
+
+    with contextlib.ExitStack() as stack:
+        output_dir = args.output_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(output_dir, exist_ok=True)
+        if args.quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        profiler = cProfile.Profile() if args.profile else None
+
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        cassette = asyncio.run(replay(args.cassette, roster, output_dir, args.time_scale, args.knowledge_store))
+        if profiler is not None:
+            profiler.disable()
+        wall_seconds = time.perf_counter() - start
+
+    print(f"\n{cassette.format_report()} in {wall_seconds:.2f}s (time scale {args.time_scale:g})")
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"Profile written to {args.profile}\n")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Serve single-alumnus lookups from one warm ADKService over HTTP.
+
+The batch script pays the full startup (imports, agent construction, session
+database reset) for every invocation. The service keeps its sessions in its own
+database (SERVICE_SESSION_DATABASE_URL), so it can run while a batch does. This service pays it once and then answers
+lookups: repeats come from the knowledge store, identical lookups in flight share
+one agent run, and at most SERVICE_MAX_CONCURRENCY agent runs go at once (see
+app/services/lookup_service.py and app/configs/service.py).
+
+Endpoints:
+    GET /lookup?name=<full name>&year=<year of entry>[&refresh=1]
+        JSON LookupResult (200; 400 without a name, 502 if the research failed,
+        504 after SERVICE_REQUEST_TIMEOUT_SECONDS)
+    GET /stats      Lookup counts and latency per source (cache, research, coalesced, failed)
+    GET /metrics    Run metrics in Prometheus text format
+
+Usage:
+    python -m app.serve
+    python -m app.serve --port 8000 --max-concurrency 8
+    python -m app.serve --lookup "Jane Doe" --year 2012   # one lookup, then exit (cold)
+    curl 'http://127.0.0.1:8765/lookup?name=Jane%20Doe&year=2012'
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import dotenv
+
+from app.configs.app import logger
+from app.configs.institutions import INSTITUTION_INDEX_ENABLED
+from app.configs.knowledge_store import KNOWLEDGE_STORE_URL
+from app.configs.llms import CONTEXT_CACHE_ENABLED
+from app.configs.service import (
+    SERVICE_HOST,
+    SERVICE_MAX_CONCURRENCY,
+    SERVICE_PORT,
+    SERVICE_REQUEST_TIMEOUT_SECONDS,
+    SERVICE_SESSION_DATABASE_URL,
+    SERVICE_USER_ID,
+)
+from app.services import ADKService, KnowledgeStore, LookupService
+from app.utils.browser_utils import close_browser_pool
+from app.utils.context_cache_utils import static_context_cache
+from app.utils.institution_utils import institution_index
+from app.utils.metrics_utils import run_metrics
+from app.utils.model_client_utils import model_client_pool
+
+TRUE_VALUES = {"1", "true", "yes"}
+
+
+class _LookupRequestHandler(BaseHTTPRequestHandler):
+    server_state: "LookupServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("Lookup service: " + format, *args)
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        if parts.path == "/lookup":
+            self._lookup(parse_qs(parts.query))
+        elif parts.path == "/stats":
+            self._send(200, json.dumps(self.server_state.service.report(), indent=2), "application/json")
+        elif parts.path == "/metrics":
+            self._send(200, run_metrics.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def _lookup(self, params: dict) -> None:
+        name = (params.get("name") or [""])[0].strip()
+        if not name:
+            self._send(400, json.dumps({"error": "the name parameter is required"}), "application/json")
+            return
+        year = (params.get("year") or [""])[0]
+        refresh = (params.get("refresh") or [""])[0].lower() in TRUE_VALUES
+        state = self.server_state
+        future = asyncio.run_coroutine_threadsafe(state.service.lookup(name, year, refresh=refresh), state.loop)
+        try:
+            result = future.result(timeout=state.request_timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            # The agent run is shielded and keeps going; a later lookup finds it stored
+            self._send(504, json.dumps({"error": "lookup timed out", "name": name}), "application/json")
+            return
+        status = 502 if result.source == "failed" else 200
+        self._send(status, json.dumps(result.to_dict(), default=str), "application/json")
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class LookupServer:
+    """HTTP front end of a LookupService; handler threads hand lookups to the service's event loop."""
+
+    def __init__(
+        self,
+        service: LookupService,
+        loop: asyncio.AbstractEventLoop,
+        host: str = SERVICE_HOST,
+        port: int = SERVICE_PORT,
+        request_timeout_seconds: float = SERVICE_REQUEST_TIMEOUT_SECONDS,
+    ) -> None:
+        self.service = service
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.request_timeout_seconds = request_timeout_seconds
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> Optional[str]:
+        if self._server is None:
+            return None
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self) -> None:
+        handler = type("LookupRequestHandler", (_LookupRequestHandler,), {"server_state": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="lookup-server", daemon=True)
+        self._thread.start()
+        logger.info("Serving lookups on %s", self.url)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+async def start_lookup_service(
+    host: str = SERVICE_HOST,
+    port: Optional[int] = SERVICE_PORT,
+    max_concurrency: int = SERVICE_MAX_CONCURRENCY,
+    knowledge_store_url: str = KNOWLEDGE_STORE_URL,
+) -> Tuple[LookupService, Optional[LookupServer]]:
+    """
+    Initialize the warm service and, unless port is None, start serving it over HTTP.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one; None serves no HTTP)
+        max_concurrency: Agent runs at once across all lookups
+        knowledge_store_url: Database URL of the knowledge store
+
+    Returns:
+        Tuple of (lookup service, HTTP server or None)
+    """
+    dotenv.load_dotenv()
+    run_metrics.reset()
+    adk_service = ADKService(
+        user_id=SERVICE_USER_ID,
+        agent_mode="alumni_researcher",
+        session_db_url=SERVICE_SESSION_DATABASE_URL,
+    )
+    await adk_service.initialize()
+    service = LookupService(adk_service, KnowledgeStore(db_url=knowledge_store_url), max_concurrency=max_concurrency)
+    server = None
+    if port is not None:
+        server = LookupServer(service, asyncio.get_running_loop(), host=host, port=port)
+        server.start()
+    return service, server
+
+
+async def stop_lookup_service(service: LookupService, server: Optional[LookupServer]) -> None:
+    """Stop serving, wait for formatter batches and release the run-wide resources."""
+    if server is not None:
+        server.stop()
+    await service.adk_service.close()
+    await close_browser_pool()
+    if CONTEXT_CACHE_ENABLED:
+        await static_context_cache.close()
+    await model_client_pool.aclose()
+    if INSTITUTION_INDEX_ENABLED:
+        institution_index.save()
+
+
+async def serve(host: str, port: int, max_concurrency: int) -> None:
+    """Serve lookups until SIGINT or SIGTERM."""
+    service, server = await start_lookup_service(host, port, max_concurrency)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"Serving lookups on {server.url}/lookup (Ctrl+C to stop)")
+    try:
+        await stop.wait()
+    finally:
+        await stop_lookup_service(service, server)
+        print(f"\n{service.format_report()}")
+
+
+async def lookup_once(
+    name: str,
+    year: str,
+    refresh: bool = False,
+    knowledge_store_url: str = KNOWLEDGE_STORE_URL,
+) -> None:
+    """Look up one alumnus without serving HTTP and print the result."""
+    service, _ = await start_lookup_service(port=None, knowledge_store_url=knowledge_store_url)
+    try:
+        result = await service.lookup(name, year, refresh=refresh)
+    finally:
+        await stop_lookup_service(service, None)
+    print(json.dumps(result.to_dict(), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--max-concurrency", type=int, default=SERVICE_MAX_CONCURRENCY,
+                        help="Agent runs at once across all lookups")
+    parser.add_argument("--lookup", metavar="NAME", help="Look up one alumnus and exit instead of serving")
+    parser.add_argument("--year", default="", help="Year of entry for --lookup")
+    parser.add_argument("--refresh", action="store_true", help="With --lookup: research even if a record is stored")
+    args = parser.parse_args()
+    if args.lookup:
+        asyncio.run(lookup_once(args.lookup, args.year, args.refresh))
+    else:
+        asyncio.run(serve(args.host, args.port, args.max_concurrency))
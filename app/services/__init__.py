@@ -1,3 +1,9 @@
 from .adk_service import ADKService
+from .batch_formatter import BatchFormatter, FormatterInput
+from .knowledge_store import KnowledgeStore
+from .lookup_service import LookupResult, LookupService
+from .result_sinks import RunOutputs
+from .staged_pipeline import StagedAlumniPipeline, StagedRow
+from .url_verifier import UrlVerifier, verify_result_rows
 
-__all__ = ["ADKService"]
+__all__ = ["ADKService", "BatchFormatter", "FormatterInput", "KnowledgeStore", "LookupResult", "LookupService", "RunOutputs", "StagedAlumniPipeline", "StagedRow", "UrlVerifier", "verify_result_rows"]
@@ -1,20 +1,52 @@
+import asyncio
 import uuid
 import json
 import time
-from typing import Optional, Dict, Any, Tuple
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Tuple
 from google.adk.sessions import DatabaseSessionService, InMemorySessionService
 from google.adk.runners import Runner
+from pydantic import BaseModel
 from app.configs.app import APP_NAME, logger
-from app.configs.database import SQLALCHEMY_DATABASE_URL
-from app.agents.agent_factory import get_root_agent, AgentMode
-from app.utils.agent_utils import call_root_agent_async
+from app.configs.database import SQLALCHEMY_DATABASE_URL, reset_database
+from app.configs.institutions import INSTITUTION_INDEX_ENABLED
+from app.agents.agent_factory import get_output_schema, get_root_agent, AgentMode
+from app.utils.agent_utils import agent_model_names, call_root_agent_async, merge_token_counts
+from app.utils.cascade_utils import (
+    BACKGROUND_STAGE,
+    CHEAP_TIER,
+    FORMATTER_STAGE,
+    STAGE_OUTPUT_KEYS,
+    STAGE_STATE_KEYS,
+    STAGES,
+    STRONG_TIER,
+    StageUsageHandler,
+    assess_stage,
+    model_cascade,
+    practices_missing,
+    row_tier,
+)
+from app.utils.event_utils import EventHandler
+from app.utils.institution_utils import institution_index
+from app.utils.metrics_utils import MetricsEventHandler, run_metrics
+from app.utils.streaming_utils import FinalResult, PartialResult, PartialResultHandler
+from app.utils.thinking_utils import needs_retry, score_result, thinking_budget_controller
+from app.agents import state_keys
+from app.configs.llms import ADAPTIVE_THINKING_ENABLED, AGENT_MAX_ATTEMPTS, FORMATTER_BATCH_ENABLED
 from app.agents.alumni_researcher_agent.subagents.formatter_agent import AlumniResearcherOutputSchema
+from app.agents.alumni_researcher_agent.subagents.social_media_agent.callbacks import ALUMNI_NAME_PATTERN
+from app.services.batch_formatter import BatchFormatter, FormatterInput
 
 
 class ADKService:
     """Service for managing Google ADK sessions and AI agent interactions."""
 
-    def __init__(self, user_id: str, agent_mode: AgentMode = "alumni_researcher") -> None:
+    def __init__(
+        self,
+        user_id: str,
+        agent_mode: AgentMode = "alumni_researcher",
+        batch_formatter: Optional[BatchFormatter] = None,
+        session_db_url: Optional[str] = None,
+    ) -> None:
         """
         Initialize ADK service with user_id and agent_mode.
         Creates runner once during initialization. Sessions are created per query.
@@ -22,20 +54,29 @@ class ADKService:
         Args:
             user_id: User identifier
             agent_mode: Agent mode to use
+            batch_formatter: Formats alumni in batches instead of the pipeline's
+                formatter agent (created by initialize() if FORMATTER_BATCH_ENABLED)
+            session_db_url: Session database URL; by default the batch session
+                database, which is reset here (sessions only live for one run)
         """
         try:
+            if session_db_url is None:
+                reset_database()
             self.session_service = DatabaseSessionService(
-                db_url=SQLALCHEMY_DATABASE_URL
+                db_url=session_db_url or SQLALCHEMY_DATABASE_URL
             )
         except Exception as e:
-            logger.error(f"Error initializing session service: {e}")
+            logger.error("Error initializing session service: %s", e)
             self.session_service = InMemorySessionService()
 
         self.user_id = user_id
         self.agent_mode = agent_mode
+        self.batch_formatter = batch_formatter
+        self.output_schema = get_output_schema(agent_mode)
         
         # Runner will be set by initialize() method (created once)
         self.runner: Optional[Runner] = None
+        self.agent_models: Dict[str, str] = {}
 
     async def initialize(self) -> None:
         """Create runner once. Must be called after __init__."""
@@ -46,31 +87,345 @@ class ADKService:
             app_name=APP_NAME,
             session_service=self.session_service,
         )
+        # Model per agent, for the per-model token metrics
+        self.agent_models = agent_model_names(root_agent)
+        if self.batch_formatter is None and FORMATTER_BATCH_ENABLED and self.agent_mode == "alumni_researcher":
+            self.batch_formatter = BatchFormatter()
         
-        logger.info(f"Initialized ADKService: user_id={self.user_id}, agent_mode={self.agent_mode}, runner created")
+        logger.info("Initialized ADKService: user_id=%s, agent_mode=%s, runner created", self.user_id, self.agent_mode)
+
+    async def close(self) -> None:
+        """Wait for formatter batches still in flight."""
+        if self.batch_formatter is not None:
+            await self.batch_formatter.close()
 
     async def get_agent_response(
         self, 
         query: str,
         initial_state: Optional[Dict[str, Any]] = None,
-    ) -> Tuple[Optional[AlumniResearcherOutputSchema], Optional[Dict[str, Any]]]:
+    ) -> Tuple[Optional[BaseModel], Optional[Dict[str, Any]]]:
         """
         Get the response from the agent and parse it into structured format.
-        Creates a new session for each query, but reuses the runner.
+        
+        Waits for the FinalResult of stream_agent_response (see there for
+        retries, the model cascade, batch formatting and canonicalization).
         
         Args:
             query: User's query string
+            initial_state: Optional initial session state
             
         Returns:
             Tuple of (parsed_response, token_counts) or (None, None) on error
         """
+        final = None
+        async for partial in self.stream_agent_response(query, initial_state):
+            if isinstance(partial, FinalResult):
+                final = partial
+        return final.response, final.token_counts
+
+    async def stream_agent_response(
+        self,
+        query: str,
+        initial_state: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[PartialResult]:
+        """
+        Research one row and yield typed partial results as its stages finish.
+        
+        Yields a BackgroundReady when the background information agent is done, a
+        SocialLinksSelected when the social media links are chosen, and finally a
+        FinalResult with the parsed response and token counts. Creates a new
+        session for each attempt, but reuses the runner.
+        
+        A failed attempt (no parseable response) is retried up to AGENT_MAX_ATTEMPTS
+        times; the attempt number is put in session state so retries escalate the
+        sub-agents' thinking budgets. Token counts are summed across attempts.
+        Partials of a retried attempt are yielded again by the retry.
+        
+        With the model cascade enabled (alumni researcher mode), the sub-agents
+        first run on the cheap model and each stage's output is checked locally;
+        the retry escalates only the first stage that failed to its agent's own
+        model and skips the stages before it (their partials are not yielded
+        again). A failed escalated attempt falls back to the cheap result.
+        
+        With a batch formatter, the pipeline stops before its formatter agent and
+        the alumnus is formatted together with other concurrent alumni instead.
+        
+        Practice names and URLs of a parsed alumni researcher response are
+        canonicalized and deduplicated against the shared institution index.
+        
+        The row runs in its own task; closing the generator early cancels it.
+        
+        Args:
+            query: User's query string
+            initial_state: Optional initial session state
+            
+        Yields:
+            BackgroundReady and SocialLinksSelected partials, then one FinalResult
+        """
         if self.runner is None:
             raise ValueError("ADKService not initialized. Call initialize() first.")
         
+        partials: asyncio.Queue = asyncio.Queue()
+        
+        async def run_row() -> None:
+            try:
+                await self._run_row(query, initial_state, partials.put_nowait)
+            finally:
+                partials.put_nowait(None)
+        
+        row_task = asyncio.create_task(run_row())
+        try:
+            while (partial := await partials.get()) is not None:
+                yield partial
+            await row_task  # Re-raise what the row raised
+        finally:
+            if not row_task.done():
+                row_task.cancel()
+
+    async def _run_row(
+        self,
+        query: str,
+        initial_state: Optional[Dict[str, Any]],
+        emit: Callable[[PartialResult], None],
+    ) -> None:
+        """Run a row's attempts with the row metrics and emit its FinalResult."""
+        run_metrics.rows_in_flight.inc()
+        row_start = time.perf_counter()
+        try:
+            parsed_response, total_token_counts, attempt, tier = await self._get_agent_response(
+                query, initial_state, emit, row_start
+            )
+        finally:
+            run_metrics.rows_in_flight.dec()
+            run_metrics.stage_seconds.observe(time.perf_counter() - row_start, stage="row")
+        run_metrics.rows.inc(outcome="success" if parsed_response is not None else "failed")
+        emit(FinalResult(
+            attempt=attempt,
+            tier=tier,
+            elapsed_seconds=time.perf_counter() - row_start,
+            response=parsed_response,
+            token_counts=total_token_counts,
+        ))
+
+    async def _get_agent_response(
+        self,
+        query: str,
+        initial_state: Optional[Dict[str, Any]],
+        emit: Callable[[PartialResult], None],
+        row_start: float,
+    ) -> Tuple[Optional[BaseModel], Optional[Dict[str, Any]], int, str]:
+        """
+        Run the attempts of a row and canonicalize the result.
+        
+        With the model cascade, each attempt's stage outputs are checked in
+        pipeline order (see cascade_utils.assess_stage). The first stage that is
+        not confident is escalated to its agent's own model for the next attempt:
+        the stages before it keep their outputs (carried into the new session,
+        where their agents are skipped) and the ones after it run again on their
+        tiers with its new output.
+        
+        Returns:
+            Tuple of (parsed_response, token_counts, attempt, tier) of the result kept
+        """
+        parsed_response = None
+        total_token_counts: Optional[Dict[str, Any]] = None
+        cascade = (
+            model_cascade.enabled
+            and self.agent_mode == "alumni_researcher"
+            and AGENT_MAX_ATTEMPTS > 1
+        )
+        name_match = ALUMNI_NAME_PATTERN.search(query)
+        full_name = name_match.group(1).strip() if name_match else None
+        stage_tiers: Dict[str, str] = {}
+        if cascade:
+            # The batch formatter runs outside the pipeline (and the cascade) on the formatter's own model
+            stage_tiers = {
+                stage: CHEAP_TIER for stage in STAGES
+                if stage != FORMATTER_STAGE or self.batch_formatter is None
+            }
+        carried_state: Dict[str, Any] = {}
+        accepted_stages: List[str] = []
+        cascade_attempts = []
+        escalation_reasons: Dict[str, str] = {}
+        cheap_result = None
+        for attempt in range(1, AGENT_MAX_ATTEMPTS + 1):
+            session_state = dict(initial_state) if initial_state is not None else {}
+            session_state[state_keys.ATTEMPT] = attempt
+            if cascade:
+                session_state.update(carried_state)
+                session_state[state_keys.MODEL_TIERS] = dict(stage_tiers)
+                session_state[state_keys.CASCADE_ACCEPTED_STAGES] = list(accepted_stages)
+            if self.batch_formatter is not None:
+                session_state[state_keys.FORMATTER_DEFERRED] = True
+            
+            stage_usage = StageUsageHandler()
+            parsed_response, token_counts, session_id = await self._get_agent_response_once(
+                query=query,
+                session_state=session_state,
+                handlers=[
+                    PartialResultHandler(emit, attempt, stage_tiers, row_start),
+                    *([stage_usage] if cascade else []),
+                ],
+            )
+            total_token_counts = merge_token_counts(total_token_counts, token_counts)
+            await self._record_thinking_budgets(session_id, parsed_response)
+            
+            if cascade:
+                cascade_attempts.extend(
+                    (stage, stage_tiers[stage], stage_usage.token_counts[stage], stage_usage.seconds.get(stage, 0.0))
+                    for stage in STAGES
+                    if stage in stage_usage.token_counts and stage in stage_tiers and stage not in accepted_stages
+                )
+                state = await self._session_state(session_id)
+                failed_stage, reason = self._failed_stage(state, parsed_response, full_name, stage_tiers, accepted_stages)
+                # A stage already on the strong tier (or outside the cascade), or a failure on
+                # the last attempt, is only retried if the attempt failed
+                escalate = failed_stage is not None and stage_tiers.get(failed_stage) == CHEAP_TIER
+                if escalate and attempt < AGENT_MAX_ATTEMPTS:
+                    logger.info(
+                        "Escalating the %s stage of %s to the strong model: %s", failed_stage, full_name or query, reason
+                    )
+                    if parsed_response is not None:
+                        cheap_result = (parsed_response, attempt, dict(stage_tiers))
+                    escalation_reasons[failed_stage] = reason
+                    stage_tiers[failed_stage] = STRONG_TIER
+                    # The stages before the escalated one keep their outputs
+                    accepted_stages = [stage for stage in STAGES[:STAGES.index(failed_stage)] if stage in STAGE_STATE_KEYS]
+                    carried_state = {
+                        key: state[key] for stage in accepted_stages for key in STAGE_STATE_KEYS[stage] if key in state
+                    }
+                    parsed_response = None
+                    continue
+            if not needs_retry(parsed_response):
+                break
+            if attempt < AGENT_MAX_ATTEMPTS:
+                run_metrics.record_error("attempt", "RetriedAttempt")
+                logger.warning("Attempt %s failed, retrying with escalated thinking budgets", attempt)
+        
+        kept_attempt, kept_tier = attempt, row_tier(stage_tiers)
+        if cascade:
+            if parsed_response is None and cheap_result is not None:
+                # The escalated attempts failed; keep the last result before the escalation
+                parsed_response, kept_attempt, stage_tiers = cheap_result
+                kept_tier = row_tier(stage_tiers)
+            model_cascade.record_row(
+                stage_tiers if parsed_response is not None else None, cascade_attempts, escalation_reasons
+            )
+        
+        if isinstance(parsed_response, AlumniResearcherOutputSchema) and INSTITUTION_INDEX_ENABLED:
+            parsed_response = institution_index.canonicalize_record(parsed_response)
+        
+        return parsed_response, total_token_counts, kept_attempt, kept_tier
+
+    async def _session_state(self, session_id: str) -> Dict[str, Any]:
+        """State of a finished session (empty if it cannot be loaded)."""
+        try:
+            session = await self.session_service.get_session(
+                app_name=APP_NAME,
+                user_id=self.user_id,
+                session_id=session_id,
+            )
+        except Exception as e:
+            logger.error("Error loading session %s: %s", session_id, e)
+            return {}
+        return dict(session.state) if session is not None else {}
+
+    @staticmethod
+    def _failed_stage(
+        state: Dict[str, Any],
+        parsed_response: Optional[BaseModel],
+        full_name: Optional[str],
+        stage_tiers: Dict[str, str],
+        accepted_stages: List[str],
+    ) -> Tuple[Optional[str], str]:
+        """
+        Find the first stage of a cascade attempt whose output is not confident.
+
+        Stages accepted on an earlier attempt, and stages outside the cascade (the
+        batch formatter), are not checked, except that a record without current
+        practices fails a background stage still on the cheap tier.
+
+        Returns:
+            Tuple of (stage, reason), or (None, "confident") if every stage passed
+        """
+        outputs = {stage: state.get(key) for stage, key in STAGE_OUTPUT_KEYS.items()}
+        outputs[FORMATTER_STAGE] = parsed_response
+        for stage in STAGES:
+            if stage in accepted_stages or stage not in stage_tiers:
+                continue
+            accepted, reason = assess_stage(stage, outputs[stage], full_name)
+            if not accepted:
+                return stage, reason
+        if stage_tiers[BACKGROUND_STAGE] == CHEAP_TIER and practices_missing(parsed_response):
+            return BACKGROUND_STAGE, "no current practices"
+        return None, "confident"
+
+    async def _record_thinking_budgets(
+        self,
+        session_id: str,
+        parsed_response: Optional[BaseModel],
+    ) -> None:
+        """Report the thinking budgets used in a session, with the result quality, to the controller."""
+        if not ADAPTIVE_THINKING_ENABLED:
+            return
+        try:
+            session = await self.session_service.get_session(
+                app_name=APP_NAME,
+                user_id=self.user_id,
+                session_id=session_id,
+            )
+        except Exception as e:
+            logger.error("Error loading session for thinking budget report: %s", e)
+            return
+        if session is None:
+            return
+        thinking_budget_controller.record_row(
+            session.state.get(state_keys.THINKING_BUDGET_LOG, []),
+            score_result(parsed_response),
+        )
+
+    async def _format_in_batch(
+        self,
+        query: str,
+        session_id: str,
+        token_counts: Dict[str, Any],
+    ) -> Tuple[Optional[BaseModel], Optional[Dict[str, Any]], str]:
+        """Format a session's upstream results with the batch formatter."""
+        session = await self.session_service.get_session(
+            app_name=APP_NAME,
+            user_id=self.user_id,
+            session_id=session_id,
+        )
+        state = session.state if session is not None else {}
+        parsed_response, batch_token_counts = await self.batch_formatter.format(
+            FormatterInput(
+                query=query,
+                background_information=str(state.get(state_keys.BACKGROUND_INFORMATION, "")),
+                social_media_links=str(state.get(state_keys.SOCIAL_MEDIA_LINKS, "")),
+            )
+        )
+        return parsed_response, merge_token_counts(token_counts, batch_token_counts), session_id
+
+    async def _get_agent_response_once(
+        self,
+        query: str,
+        session_state: Dict[str, Any],
+        handlers: Optional[List[EventHandler]] = None,
+    ) -> Tuple[Optional[BaseModel], Optional[Dict[str, Any]], str]:
+        """
+        Run the agent once in a new session and parse the response.
+        
+        Args:
+            query: User's query string
+            session_state: Initial state for the new session
+            handlers: Extra event handlers for the run (e.g. partial results)
+            
+        Returns:
+            Tuple of (parsed_response, token_counts, session_id); parsed_response is
+            None on error
+        """
         # Create a new session for this query
-        # Use provided initial_state or empty dict
         session_id = str(uuid.uuid4())
-        session_state = initial_state if initial_state is not None else {}
         
         await self.session_service.create_session(
             app_name=APP_NAME,
@@ -79,69 +434,89 @@ class ADKService:
             state=session_state,
         )
         
-        logger.info(f"Created new session for query: session_id={session_id}")
+        logger.info("Created new session for query: session_id=%s", session_id)
         
         start_time = time.time()
 
         try: 
-            logger.info(f"Calling root agent in mode: {self.agent_mode}")
+            logger.info("Calling root agent in mode: %s", self.agent_mode)
             response_text, token_counts = await call_root_agent_async(
                 runner=self.runner,
                 user_id=self.user_id,
                 session_id=session_id,
                 query=query,
+                handlers=[MetricsEventHandler(self.agent_models), *(handlers or [])],
             )
+            run_metrics.stage_seconds.observe(time.time() - start_time, stage="agent_run")
             
-            if not response_text:
-                logger.warning("No response text received from agent")
-                return None, token_counts
+            if self.batch_formatter is not None:
+                return await self._format_in_batch(query, session_id, token_counts)
             
-            # Parse JSON response into Pydantic model
-            # Note: agent_utils.py extracts the raw text from event.content.parts[0].text
-            # We handle the JSON parsing here to convert it into the structured schema
-            try:
-                response_text = response_text.strip()
-                
-                # Check if response looks like JSON (should start with '{' for structured output)
-                if not response_text.startswith('{'):
-                    # Try to find JSON object in the response (in case there's extra text)
-                    json_start = response_text.find('{')
-                    if json_start >= 0:
-                        json_end = response_text.rfind('}') + 1
-                        if json_end > json_start:
-                            response_text = response_text[json_start:json_end]
-                        else:
-                            raise ValueError("No valid JSON object found in response")
-                    else:
-                        raise ValueError(f"Response does not contain valid JSON. Response starts with: {response_text[:100]}")
-                
-                # Parse JSON string into dictionary
-                parsed_data = json.loads(response_text)
-                
-                # Validate and parse into Pydantic model
-                parsed_response = AlumniResearcherOutputSchema(**parsed_data)
-                
+            parsed_response = self.parse_response(response_text)
+            if parsed_response is not None:
                 elapsed_time = time.time() - start_time
-                logger.info(f"Root agent completed successfully in {elapsed_time:.2f} seconds")
-                logger.info(f"Total tokens used: {token_counts.get('total_token_count', 0)}")
-                return parsed_response, token_counts
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {e}")
-                logger.error(f"Response text (first 500 chars): {response_text[:500]}")
-                return None, token_counts
-            except ValueError as e:
-                logger.error(f"Invalid response format: {e}")
-                logger.error(f"Response text (first 500 chars): {response_text[:500]}")
-                return None, token_counts
-            except Exception as parse_error:
-                logger.error(f"Failed to parse response into schema: {parse_error}")
-                logger.error(f"Response text (first 500 chars): {response_text[:500]}")
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                return None, token_counts
+                logger.info("Root agent completed successfully in %.2f seconds", elapsed_time)
+                logger.info("Total tokens used: %s", token_counts.get('total_token_count', 0))
+            return parsed_response, token_counts, session_id
                 
         except Exception as e:
             elapsed_time = time.time() - start_time
-            logger.error(f"Error getting agent response: {e}")
-            return None, None
\ No newline at end of file
+            run_metrics.record_error("agent_run", e)
+            logger.error("Error getting agent response: %s", e)
+            return None, None, session_id
+
+    def parse_response(self, response_text: Optional[str]) -> Optional[BaseModel]:
+        """
+        Parse the final agent response into the agent mode's output schema.
+        
+        Args:
+            response_text: Final response text of the agent run
+            
+        Returns:
+            The parsed response, or None if it is empty or cannot be parsed
+        """
+        if not response_text:
+            logger.warning("No response text received from agent")
+            run_metrics.record_error("parse", "EmptyResponse")
+            return None
+        
+        # Parse JSON response into Pydantic model
+        # Note: agent_utils.py extracts the raw text from event.content.parts[0].text
+        # We handle the JSON parsing here to convert it into the structured schema
+        try:
+            response_text = response_text.strip()
+            
+            # Check if response looks like JSON (should start with '{' for structured output)
+            if not response_text.startswith('{'):
+                # Try to find JSON object in the response (in case there's extra text)
+                json_start = response_text.find('{')
+                if json_start >= 0:
+                    json_end = response_text.rfind('}') + 1
+                    if json_end > json_start:
+                        response_text = response_text[json_start:json_end]
+                    else:
+                        raise ValueError("No valid JSON object found in response")
+                else:
+                    raise ValueError(f"Response does not contain valid JSON. Response starts with: {response_text[:100]}")
+            
+            # Parse JSON string into dictionary
+            parsed_data = json.loads(response_text)
+            
+            # Validate and parse into the agent mode's Pydantic model
+            return self.output_schema(**parsed_data)
+            
+        except json.JSONDecodeError as e:
+            run_metrics.record_error("parse", e)
+            logger.error("Failed to parse JSON response: %s", e)
+            logger.error("Response text (first 500 chars): %.500s", response_text)
+            return None
+        except ValueError as e:
+            run_metrics.record_error("parse", e)
+            logger.error("Invalid response format: %s", e)
+            logger.error("Response text (first 500 chars): %.500s", response_text)
+            return None
+        except Exception as parse_error:
+            run_metrics.record_error("parse", parse_error)
+            logger.error("Failed to parse response into schema: %s", parse_error, exc_info=True)
+            logger.error("Response text (first 500 chars): %.500s", response_text)
+            return None
@@ -0,0 +1,277 @@
+"""Formatter step for several alumni per model call, fed by a micro-batching queue."""
+
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from pydantic import ValidationError
+
+from app.agents.alumni_researcher_agent.subagents.formatter_agent import (
+    AlumniResearcherOutputSchema,
+    batch_formatter_agent,
+)
+from app.configs.app import APP_NAME, logger
+from app.configs.llms import (
+    FORMATTER_BATCH_MAX_RERUNS,
+    FORMATTER_BATCH_MAX_SIZE,
+    FORMATTER_BATCH_MAX_WAIT_SECONDS,
+)
+from app.utils.agent_utils import agent_model_names, call_root_agent_async, merge_token_counts
+from app.utils.batching_utils import MicroBatcher
+from app.utils.metrics_utils import MetricsEventHandler, run_metrics
+
+# Social media link fields; a value must be empty or a URL
+LINK_FIELDS = ["x_twitter_link", "linkedin_link", "doximity_link", "google_scholar_link", "facebook_link"]
+
+
+@dataclass
+class FormatterInput:
+    """Upstream results of one alumnus, as the formatter agent would have seen them."""
+
+    query: str
+    background_information: str
+    social_media_links: str
+
+
+def build_batch_query(items: Dict[str, FormatterInput]) -> str:
+    """Render the alumni of a batch as one message, one "### Alumnus <id>" section each."""
+    sections = []
+    for alumni_id, item in items.items():
+        sections.append(
+            f"### Alumnus {alumni_id}\n"
+            f"Query: {item.query}\n\n"
+            f"Background information agent output:\n{item.background_information or '(none)'}\n\n"
+            f"Social media agent output:\n{item.social_media_links or '(none)'}"
+        )
+    return "\n\n".join(sections)
+
+
+def parse_batch_response(response_text: Optional[str]) -> List[Dict[str, Any]]:
+    """Extract the records list from the batch formatter's JSON reply (empty if unparseable)."""
+    if not response_text:
+        return []
+    start, end = response_text.find("{"), response_text.rfind("}") + 1
+    if start < 0 or end <= start:
+        return []
+    try:
+        records = json.loads(response_text[start:end]).get("records", [])
+    except (json.JSONDecodeError, AttributeError):
+        return []
+    return [record for record in records if isinstance(record, dict)] if isinstance(records, list) else []
+
+
+def validate_record(record: Dict[str, Any]) -> Tuple[Optional[AlumniResearcherOutputSchema], Optional[str]]:
+    """
+    Validate one formatted record independently of the rest of its batch.
+
+    Args:
+        record: Record from the batch reply, without its alumni_id
+
+    Returns:
+        Tuple of (parsed record, None) or (None, reason it failed)
+    """
+    try:
+        parsed = AlumniResearcherOutputSchema(**record)
+    except ValidationError as e:
+        return None, f"schema: {e.errors()[0]['msg']}"
+    names = [name for name in parsed.current_practices_names.split(",") if name.strip()]
+    urls = parsed.current_practices_urls.split(",") if parsed.current_practices_urls.strip() else []
+    if len(urls) > len(names):
+        return None, f"{len(urls)} practice URLs for {len(names)} practice names"
+    for field in LINK_FIELDS:
+        value = getattr(parsed, field).strip()
+        if value and not value.startswith(("http://", "https://")):
+            return None, f"{field} is not a URL: {value[:60]}"
+    return parsed, None
+
+
+class BatchFormatterStats:
+    """Thread-safe counters for batched formatting."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.records_requested = 0
+        self.records_valid = 0
+        self.records_rerun = 0
+        self.records_failed = 0
+
+    def record_call(self, requested: int, valid: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.records_requested += requested
+            self.records_valid += valid
+
+    def record_outcome(self, rerun: int, failed: int) -> None:
+        with self._lock:
+            self.records_rerun += rerun
+            self.records_failed += failed
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize batched formatting.
+
+        Returns:
+            Dict with formatter calls, records per call, records re-run after failing
+            validation and records that never validated
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "records_per_call": self.records_requested / self.calls if self.calls else 0.0,
+                "records_rerun": self.records_rerun,
+                "records_failed": self.records_failed,
+            }
+
+    def format_report(self) -> str:
+        """Render report() as plain text."""
+        report = self.report()
+        if not report["calls"]:
+            return "No batch formatter data recorded."
+        return (
+            f"Formatter calls: {report['calls']} ({report['records_per_call']:.1f} alumni per call), "
+            f"records re-run: {report['records_rerun']}, failed validation: {report['records_failed']}"
+        )
+
+
+class BatchFormatter:
+    """
+    Format alumni in batches with batch_formatter_agent.
+
+    Callers submit one alumnus at a time with format(); a MicroBatcher groups
+    concurrent submissions into batches of up to max_batch_size. Each record of a
+    reply is validated on its own, and only the records that are missing or fail
+    validation are sent again (up to max_reruns more calls). The tokens of a call
+    are split evenly across the alumni it formatted.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = FORMATTER_BATCH_MAX_SIZE,
+        max_wait_seconds: float = FORMATTER_BATCH_MAX_WAIT_SECONDS,
+        max_reruns: int = FORMATTER_BATCH_MAX_RERUNS,
+    ) -> None:
+        """
+        Args:
+            max_batch_size: Maximum alumni per model call
+            max_wait_seconds: Maximum time the first alumnus of a batch waits for more
+            max_reruns: Extra calls for records that fail validation
+        """
+        self.max_reruns = max_reruns
+        self.user_id = "batch_formatter"
+        # Batch sessions are single-use, so they are not persisted
+        self.session_service = InMemorySessionService()
+        self.runner = Runner(
+            agent=batch_formatter_agent,
+            app_name=APP_NAME,
+            session_service=self.session_service,
+        )
+        self.batcher: MicroBatcher[FormatterInput, Tuple[Optional[AlumniResearcherOutputSchema], Dict[str, Any]]] = (
+            MicroBatcher(
+                self._format_batch,
+                max_batch_size=max_batch_size,
+                max_wait_seconds=max_wait_seconds,
+                name="batch_formatter",
+            )
+        )
+        self.stats = BatchFormatterStats()
+        self.agent_models = agent_model_names(batch_formatter_agent)
+
+    async def format(
+        self, item: FormatterInput
+    ) -> Tuple[Optional[AlumniResearcherOutputSchema], Dict[str, Any]]:
+        """
+        Format one alumnus as part of the next batch.
+
+        Args:
+            item: The alumnus's upstream results
+
+        Returns:
+            Tuple of (record, or None if it never validated; this alumnus's share of the tokens)
+        """
+        return await self.batcher.submit(item)
+
+    async def close(self) -> None:
+        await self.batcher.close()
+
+    async def _call(self, items: Dict[str, FormatterInput]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Run one batch formatter call in a fresh session."""
+        session_id = str(uuid.uuid4())
+        await self.session_service.create_session(
+            app_name=APP_NAME,
+            user_id=self.user_id,
+            session_id=session_id,
+        )
+        start = time.perf_counter()
+        response_text, token_counts = await call_root_agent_async(
+            runner=self.runner,
+            user_id=self.user_id,
+            session_id=session_id,
+            query=build_batch_query(items),
+            handlers=[MetricsEventHandler(self.agent_models)],
+        )
+        run_metrics.stage_seconds.observe(time.perf_counter() - start, stage="formatter_batch")
+        await self.session_service.delete_session(
+            app_name=APP_NAME,
+            user_id=self.user_id,
+            session_id=session_id,
+        )
+        return parse_batch_response(response_text), token_counts
+
+    async def _format_batch(
+        self, batch: List[FormatterInput]
+    ) -> List[Tuple[Optional[AlumniResearcherOutputSchema], Dict[str, Any]]]:
+        pending = {str(index + 1): item for index, item in enumerate(batch)}
+        records: Dict[str, AlumniResearcherOutputSchema] = {}
+        token_counts: Dict[str, Optional[Dict[str, Any]]] = {alumni_id: None for alumni_id in pending}
+        rerun = 0
+
+        for attempt in range(self.max_reruns + 1):
+            if not pending:
+                break
+            if attempt > 0:
+                rerun += len(pending)
+            try:
+                replies, call_tokens = await self._call(pending)
+            except Exception as e:
+                run_metrics.record_error("formatter_batch", e)
+                logger.error("Batch formatter call for %s alumni failed: %s", len(pending), e)
+                replies, call_tokens = [], {}
+
+            share = _split_token_counts(call_tokens, len(pending))
+            for alumni_id in pending:
+                token_counts[alumni_id] = merge_token_counts(token_counts[alumni_id], share)
+
+            valid = 0
+            for reply in replies:
+                alumni_id = str(reply.pop("alumni_id", ""))
+                if alumni_id not in pending or alumni_id in records:
+                    continue
+                parsed, reason = validate_record(reply)
+                if parsed is None:
+                    run_metrics.record_error("formatter_batch", "InvalidRecord")
+                    logger.warning("Batch formatter record %s failed validation: %s", alumni_id, reason)
+                    continue
+                records[alumni_id] = parsed
+                valid += 1
+            self.stats.record_call(len(pending), valid)
+            pending = {alumni_id: item for alumni_id, item in pending.items() if alumni_id not in records}
+
+        self.stats.record_outcome(rerun, len(pending))
+        if pending:
+            logger.warning("Batch formatter gave up on %s of %s alumni", len(pending), len(batch))
+        return [(records.get(alumni_id), token_counts[alumni_id] or {}) for alumni_id in token_counts]
+
+
+def _split_token_counts(token_counts: Optional[Dict[str, Any]], parts: int) -> Dict[str, Any]:
+    """Divide the integer token counts of one call evenly across the alumni it covered."""
+    return {
+        key: value // parts
+        for key, value in (token_counts or {}).items()
+        if isinstance(value, int) and parts
+    }
@@ -0,0 +1,231 @@
+"""Cross-run store of resolved alumni records for incremental roster refreshes."""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.agents.alumni_researcher_agent.subagents.formatter_agent import AlumniResearcherOutputSchema
+from app.configs.app import logger
+from app.configs.knowledge_store import (
+    KNOWLEDGE_STORE_MAX_AGE_DAYS,
+    KNOWLEDGE_STORE_REQUIRED_FIELDS,
+    KNOWLEDGE_STORE_URL,
+)
+
+Base = declarative_base()
+
+# Record fields holding URLs (practice URLs are a comma-separated list)
+URL_FIELDS = [
+    "current_practices_urls",
+    "x_twitter_link",
+    "linkedin_link",
+    "doximity_link",
+    "google_scholar_link",
+    "facebook_link",
+]
+
+
+class AlumniRecord(Base):
+    """One resolved alumnus, keyed by normalized name and year of entry."""
+
+    __tablename__ = "alumni_records"
+
+    key = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    year_of_entry = Column(String, nullable=False, default="")
+    record_json = Column(Text, nullable=False)
+    source_urls_json = Column(Text, nullable=False, default="[]")
+    token_counts_json = Column(Text, nullable=False, default="{}")
+    incomplete = Column(Boolean, nullable=False, default=False)
+    researched_at = Column(DateTime, nullable=False)
+    first_researched_at = Column(DateTime, nullable=False)
+    refresh_count = Column(Integer, nullable=False, default=0)
+
+
+@dataclass
+class StoredAlumnus:
+    """A record loaded from the knowledge store."""
+
+    name: str
+    year_of_entry: str
+    record: AlumniResearcherOutputSchema
+    source_urls: List[str]
+    token_counts: Dict[str, Any]
+    incomplete: bool
+    researched_at: datetime
+
+
+def record_key(name: str, year_of_entry: Any) -> str:
+    """Normalize name and year into the store's primary key."""
+    return f"{' '.join(str(name).lower().split())}|{str(year_of_entry).strip()}"
+
+
+def is_incomplete(
+    record: AlumniResearcherOutputSchema,
+    required_fields: Optional[List[str]] = None,
+) -> bool:
+    """Check whether any required field of a record is empty."""
+    fields = required_fields if required_fields is not None else KNOWLEDGE_STORE_REQUIRED_FIELDS
+    return any(not (getattr(record, field, "") or "").strip() for field in fields)
+
+
+def extract_source_urls(record: AlumniResearcherOutputSchema) -> List[str]:
+    """Collect the distinct URLs a record was resolved to, in field order."""
+    urls: List[str] = []
+    for field in URL_FIELDS:
+        for url in (getattr(record, field, "") or "").split(","):
+            url = url.strip()
+            if url and url not in urls:
+                urls.append(url)
+    return urls
+
+
+class KnowledgeStore:
+    """SQLite-backed store of AlumniResearcherOutputSchema records with timestamps and source URLs."""
+
+    def __init__(self, db_url: str = KNOWLEDGE_STORE_URL) -> None:
+        """
+        Open (and create if needed) the knowledge store.
+
+        Args:
+            db_url: SQLAlchemy database URL
+        """
+        if db_url.startswith("sqlite:///"):
+            os.makedirs(os.path.dirname(os.path.abspath(db_url[len("sqlite:///"):])), exist_ok=True)
+        self.engine = create_engine(db_url, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self._session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self._lock = threading.Lock()
+        logger.info("Opened knowledge store at %s", db_url)
+
+    def get(self, name: str, year_of_entry: Any) -> Optional[StoredAlumnus]:
+        """
+        Load the stored record of an alumnus.
+
+        Args:
+            name: Full name of the alumnus
+            year_of_entry: Year of entry to Yale
+
+        Returns:
+            The stored record, or None if the alumnus has never been researched
+        """
+        with self._lock, self._session_factory() as session:
+            row = session.get(AlumniRecord, record_key(name, year_of_entry))
+            if row is None:
+                return None
+            return StoredAlumnus(
+                name=row.name,
+                year_of_entry=row.year_of_entry,
+                record=AlumniResearcherOutputSchema(**json.loads(row.record_json)),
+                source_urls=json.loads(row.source_urls_json),
+                token_counts=json.loads(row.token_counts_json),
+                incomplete=row.incomplete,
+                researched_at=row.researched_at.replace(tzinfo=timezone.utc),
+            )
+
+    def put(
+        self,
+        name: str,
+        year_of_entry: Any,
+        record: AlumniResearcherOutputSchema,
+        token_counts: Optional[Dict[str, Any]] = None,
+        researched_at: Optional[datetime] = None,
+    ) -> StoredAlumnus:
+        """
+        Insert or replace the record of an alumnus.
+
+        Args:
+            name: Full name of the alumnus
+            year_of_entry: Year of entry to Yale
+            record: Freshly researched record
+            token_counts: Tokens spent researching it
+            researched_at: Research time (defaults to now, UTC)
+
+        Returns:
+            The stored record
+        """
+        researched_at = researched_at or datetime.now(timezone.utc)
+        source_urls = extract_source_urls(record)
+        incomplete = is_incomplete(record)
+        with self._lock, self._session_factory() as session:
+            key = record_key(name, year_of_entry)
+            row = session.get(AlumniRecord, key)
+            if row is None:
+                row = AlumniRecord(key=key, first_researched_at=researched_at, refresh_count=0)
+                session.add(row)
+            else:
+                row.refresh_count += 1
+            row.name = name
+            row.year_of_entry = str(year_of_entry)
+            row.record_json = record.model_dump_json()
+            row.source_urls_json = json.dumps(source_urls)
+            row.token_counts_json = json.dumps(token_counts or {}, default=str)
+            row.incomplete = incomplete
+            row.researched_at = researched_at
+            session.commit()
+        return StoredAlumnus(
+            name=name,
+            year_of_entry=str(year_of_entry),
+            record=record,
+            source_urls=source_urls,
+            token_counts=token_counts or {},
+            incomplete=incomplete,
+            researched_at=researched_at,
+        )
+
+    @staticmethod
+    def needs_refresh(
+        stored: Optional[StoredAlumnus],
+        max_age_days: float = KNOWLEDGE_STORE_MAX_AGE_DAYS,
+        now: Optional[datetime] = None,
+    ) -> Optional[str]:
+        """
+        Decide whether an alumnus has to be re-researched in an incremental refresh.
+
+        Args:
+            stored: Stored record, or None if there is none
+            max_age_days: Records older than this are stale
+            now: Reference time (defaults to now, UTC)
+
+        Returns:
+            Reason ("missing", "incomplete" or "stale"), or None if the stored record
+            can be reused
+        """
+        if stored is None:
+            return "missing"
+        if stored.incomplete:
+            return "incomplete"
+        now = now or datetime.now(timezone.utc)
+        if now - stored.researched_at > timedelta(days=max_age_days):
+            return "stale"
+        return None
+
+    def mark_incomplete(self, name: str, year_of_entry: Any) -> bool:
+        """
+        Flag a stored record for re-research in the next incremental refresh.
+
+        Args:
+            name: Full name of the alumnus
+            year_of_entry: Year of entry to Yale
+
+        Returns:
+            True if a stored record was flagged, False if there is none
+        """
+        with self._lock, self._session_factory() as session:
+            row = session.get(AlumniRecord, record_key(name, year_of_entry))
+            if row is None:
+                return False
+            row.incomplete = True
+            session.commit()
+            return True
+
+    def count(self) -> int:
+        """Number of stored alumni."""
+        with self._lock, self._session_factory() as session:
+            return session.query(AlumniRecord).count()
@@ -0,0 +1,241 @@
+"""Single-alumnus lookups on a warm ADKService, with coalescing, caching and a concurrency limit."""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from app.configs.app import logger
+from app.configs.service import (
+    SERVICE_CACHE_MAX_AGE_DAYS,
+    SERVICE_LATENCY_WINDOW,
+    SERVICE_MAX_CONCURRENCY,
+)
+from app.services.adk_service import ADKService
+from app.services.knowledge_store import KnowledgeStore, record_key
+from app.utils.metrics_utils import run_metrics
+
+LOOKUP_SOURCES = ("cache", "research", "coalesced", "failed")
+
+
+@dataclass
+class LookupResult:
+    """Answer to one lookup request."""
+
+    name: str
+    year_of_entry: str
+    source: str  # "cache", "research", "coalesced" (shared another request's run) or "failed"
+    record: Optional[BaseModel] = None
+    researched_at: Optional[datetime] = None
+    token_counts: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "year_of_entry": self.year_of_entry,
+            "source": self.source,
+            "record": self.record.model_dump() if self.record is not None else None,
+            "researched_at": self.researched_at.isoformat() if self.researched_at else None,
+            "token_counts": self.token_counts,
+            "error": self.error,
+            "elapsed_seconds": self.elapsed_seconds,
+        }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+class LookupService:
+    """
+    Research single alumni on request, on one ADKService that stays initialized.
+
+    A complete stored record younger than max_age_days is returned from the
+    knowledge store without an agent run. Lookups of an alumnus whose research is
+    already in flight wait for that run instead of starting another. At most
+    max_concurrency agent runs go at once; further lookups queue for a slot.
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        adk_service: ADKService,
+        knowledge_store: KnowledgeStore,
+        max_concurrency: int = SERVICE_MAX_CONCURRENCY,
+        max_age_days: float = SERVICE_CACHE_MAX_AGE_DAYS,
+    ) -> None:
+        """
+        Args:
+            adk_service: Initialized alumni researcher service
+            knowledge_store: Store serving repeats and receiving every researched record
+            max_concurrency: Agent runs at once across all lookups
+            max_age_days: Maximum age of a stored record served as is
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        self.adk_service = adk_service
+        self.knowledge_store = knowledge_store
+        self.max_concurrency = max_concurrency
+        self.max_age_days = max_age_days
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counts: Dict[str, int] = {source: 0 for source in LOOKUP_SOURCES}
+        self.agent_runs = 0
+        self.queued = 0
+        self.max_queued = 0
+        self._latencies: Dict[str, Deque[float]] = {
+            source: deque(maxlen=SERVICE_LATENCY_WINDOW) for source in LOOKUP_SOURCES
+        }
+
+    async def lookup(self, name: str, year_of_entry: Any = "", refresh: bool = False) -> LookupResult:
+        """
+        Return the record of one alumnus, researching it only when needed.
+
+        Args:
+            name: Full name of the alumnus
+            year_of_entry: Year of entry to Yale (part of the cache key)
+            refresh: Research again even if a usable record is stored
+
+        Returns:
+            The lookup result; source "failed" (with error set) if the research failed
+        """
+        start = time.perf_counter()
+        name = " ".join(str(name).split())
+        year_of_entry = str(year_of_entry).strip()
+        key = record_key(name, year_of_entry)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            source = "coalesced"
+        else:
+            stored = None if refresh else self.knowledge_store.get(name, year_of_entry)
+            if stored is not None and KnowledgeStore.needs_refresh(stored, self.max_age_days) is None:
+                result = LookupResult(
+                    name=name,
+                    year_of_entry=year_of_entry,
+                    source="cache",
+                    record=stored.record,
+                    researched_at=stored.researched_at,
+                )
+                return self._finish(result, start)
+            source = "research"
+            task = asyncio.create_task(self._research(name, year_of_entry), name=f"lookup-{key}")
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+
+        try:
+            # Shielded so a request that gives up does not cancel the run others wait for
+            result = await asyncio.shield(task)
+        except Exception as e:
+            logger.error("Lookup of %s (%s) failed: %s", name, year_of_entry, e)
+            result = LookupResult(name=name, year_of_entry=year_of_entry, source="failed", error=str(e))
+            return self._finish(result, start)
+        result = LookupResult(
+            name=result.name,
+            year_of_entry=result.year_of_entry,
+            source=source,
+            record=result.record,
+            researched_at=result.researched_at,
+            token_counts=result.token_counts if source == "research" else {},
+        )
+        return self._finish(result, start)
+
+    async def _research(self, name: str, year_of_entry: str) -> LookupResult:
+        """Run the agent for one alumnus (once a concurrency slot is free) and store the record."""
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            with self._lock:
+                self.queued -= 1
+        try:
+            with self._lock:
+                self.agent_runs += 1
+            query = f"alumni name: {name}, year of entry: {year_of_entry}"
+            response, token_counts = await self.adk_service.get_agent_response(query=query)
+        finally:
+            self._slots.release()
+        if response is None:
+            raise ValueError("Agent returned None response")
+        stored = self.knowledge_store.put(name, year_of_entry, response, token_counts=token_counts)
+        return LookupResult(
+            name=name,
+            year_of_entry=year_of_entry,
+            source="research",
+            record=stored.record,
+            researched_at=stored.researched_at,
+            token_counts=token_counts or {},
+        )
+
+    def _finish(self, result: LookupResult, start: float) -> LookupResult:
+        result.elapsed_seconds = time.perf_counter() - start
+        with self._lock:
+            self.counts[result.source] += 1
+            self._latencies[result.source].append(result.elapsed_seconds)
+        run_metrics.lookups.inc(source=result.source)
+        run_metrics.stage_seconds.observe(result.elapsed_seconds, stage=f"lookup:{result.source}")
+        return result
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the lookups served so far.
+
+        Returns:
+            Dict with uptime, requests, counts and p50/p95 latency (over the last
+            SERVICE_LATENCY_WINDOW lookups) per source, agent runs, requests per
+            agent run, alumni in flight, and current and peak lookups waiting for
+            a concurrency slot
+        """
+        with self._lock:
+            counts = dict(self.counts)
+            latencies = {source: list(values) for source, values in self._latencies.items()}
+            requests = sum(counts.values())
+            return {
+                "uptime_seconds": time.time() - self.started_at,
+                "requests": requests,
+                "counts": counts,
+                "p50_seconds": {source: _percentile(values, 50) for source, values in latencies.items()},
+                "p95_seconds": {source: _percentile(values, 95) for source, values in latencies.items()},
+                "agent_runs": self.agent_runs,
+                "requests_per_agent_run": requests / self.agent_runs if self.agent_runs else 0.0,
+                "in_flight": len(self._in_flight),
+                "max_concurrency": self.max_concurrency,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+            }
+
+    def format_report(self) -> str:
+        report = self.report()
+        if not report["requests"]:
+            return "No lookups served."
+        lines = [
+            f"Lookups: {report['requests']}, agent runs: {report['agent_runs']} "
+            f"(max {report['max_concurrency']} at once, peak {report['max_queued']} waiting)"
+        ]
+        for source in LOOKUP_SOURCES:
+            if report["counts"][source]:
+                lines.append(
+                    f"  {source}: {report['counts'][source]}, p50 {report['p50_seconds'][source]:.3f}s, "
+                    f"p95 {report['p95_seconds'][source]:.3f}s"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,286 @@
+"""Output sinks for the results table, the errors file and the per-run event log."""
+
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.configs.app import logger
+from app.configs.output import EVENT_LOG_DIRNAME, PARQUET_ROW_GROUP_SIZE
+
+# Results table columns and their types ("int" or "string"), in output order
+RESULT_COLUMNS = {
+    "Name": "string",
+    "Year of Entry to Yale": "int",
+    "Current Practices Names": "string",
+    "Current Practices URLs": "string",
+    "Current Practice Narrative": "string",
+    "Additional Information": "string",
+    "X (Twitter) Link": "string",
+    "LinkedIn Link": "string",
+    "Doximity Link": "string",
+    "Google Scholar Link": "string",
+    "Facebook Link": "string",
+    "Total tokens used": "int",
+    "Prompt tokens used": "int",
+    "Candidates tokens used": "int",
+    "Cached content tokens used": "int",
+    "Thoughts tokens used": "int",
+}
+TOKEN_COLUMNS = [column for column in RESULT_COLUMNS if column.endswith("tokens used")]
+
+
+def _coerce(value: Any, column_type: str) -> Any:
+    """Convert a row value to its column type (None when an int column holds no number)."""
+    if column_type == "int":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return "" if value is None else str(value)
+
+
+class ResultSink:
+    """A destination for results table rows."""
+
+    path: str
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Write one row as soon as it is available."""
+        raise NotImplementedError
+
+    def rewrite(self, rows: List[Dict[str, Any]]) -> None:
+        """Replace everything written so far with rows that gained columns (e.g. URL checks)."""
+
+    def close(self) -> None:
+        """Flush and release the output file."""
+
+
+class CsvResultSink(ResultSink):
+    """
+    Results CSV appended one row at a time.
+
+    Extra columns a row has beyond RESULT_COLUMNS are kept after the known ones;
+    token columns always come last. A row with columns the file does not have yet
+    makes the sink rewrite the file with the union of the columns (earlier rows
+    get empty values), so no column is dropped.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._columns: Optional[List[str]] = None
+
+    @staticmethod
+    def _column_order(columns: List[str]) -> List[str]:
+        other_columns = [column for column in columns if column not in TOKEN_COLUMNS]
+        return other_columns + [column for column in TOKEN_COLUMNS if column in columns]
+
+    def write(self, row: Dict[str, Any]) -> None:
+        first = self._columns is None
+        if first:
+            self._columns = self._column_order(list(row))
+        else:
+            new_columns = [column for column in row if column not in self._columns]
+            if new_columns:
+                self._add_columns(new_columns)
+        pd.DataFrame([row], columns=self._columns).to_csv(
+            self.path, mode="w" if first else "a", header=first, index=False
+        )
+
+    def _add_columns(self, new_columns: List[str]) -> None:
+        """Rewrite the file so its header also has new_columns (empty for the rows so far)."""
+        logger.info("Results CSV gained columns %s; rewriting %s", new_columns, self.path)
+        # Read as text so the rows already written are rewritten unchanged
+        written_df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        self._columns = self._column_order(self._columns + new_columns)
+        written_df.reindex(columns=self._columns, fill_value="").to_csv(self.path, index=False)
+
+    def rewrite(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        results_df = pd.DataFrame(rows)
+        self._columns = self._column_order(list(results_df.columns))
+        results_df[self._columns].to_csv(self.path, index=False)
+
+
+class ParquetResultSink(ResultSink):
+    """
+    Typed Parquet results table written in row groups.
+
+    Rows are buffered and written every row_group_size rows, so memory stays
+    bounded on large rosters; the file is readable once the sink is closed.
+    Columns outside RESULT_COLUMNS are not written, and rewrite() is not
+    supported (URL check results are in the event log instead).
+    """
+
+    def __init__(self, path: str, row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "The parquet result format needs pyarrow (pip install pyarrow), "
+                "or remove \"parquet\" from RESULT_FORMATS"
+            ) from e
+        self._pa = pa
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([
+            pa.field(column, pa.int64() if column_type == "int" else pa.string())
+            for column, column_type in RESULT_COLUMNS.items()
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._buffer: List[Dict[str, Any]] = []
+        self.rows_written = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._buffer.append({column: _coerce(row.get(column), column_type) for column, column_type in RESULT_COLUMNS.items()})
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        self._writer.write_table(self._pa.Table.from_pylist(self._buffer, schema=self.schema))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        self._writer = None
+
+
+class JsonlLog:
+    """Append-only JSON Lines file; every record is flushed as it is written."""
+
+    def __init__(self, path: str, run_id: str) -> None:
+        self.path = path
+        self.run_id = run_id
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        self.records = 0
+
+    def write(self, event: str, **fields: Any) -> None:
+        """
+        Write one record.
+
+        Args:
+            event: Record type (e.g. "researched", "failed")
+            **fields: JSON-serializable payload; values that are not are written as strings
+        """
+        record = {
+            "run_id": self.run_id,
+            "time": datetime.now(timezone.utc).isoformat(),
+            "event": event,
+            **fields,
+        }
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        self.records += 1
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class RunOutputs:
+    """
+    Everything a run writes: the results table in each format, the errors file
+    and the event log.
+
+    Paths are derived from the results CSV path: data/alumni_results.csv gives
+    data/alumni_results.parquet, data/alumni_results_errors.jsonl and
+    data/runs/<run id>.jsonl.
+    """
+
+    def __init__(
+        self,
+        results_csv_path: str,
+        formats: List[str],
+        event_log: bool = True,
+    ) -> None:
+        """
+        Args:
+            results_csv_path: Results CSV path (used as the base for the other paths)
+            formats: Results table formats ("csv", "parquet")
+            event_log: Write the per-run event log
+        """
+        unknown = set(formats) - {"csv", "parquet"}
+        if unknown:
+            raise ValueError(f"Invalid result formats: {sorted(unknown)}. Supported: 'csv', 'parquet'")
+        base_path = os.path.splitext(results_csv_path)[0]
+        self.run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+
+        self.sinks: List[ResultSink] = []
+        if "csv" in formats:
+            self.sinks.append(CsvResultSink(results_csv_path))
+        if "parquet" in formats:
+            try:
+                self.sinks.append(ParquetResultSink(f"{base_path}.parquet"))
+            except ImportError as e:
+                # A missing optional dependency should not abort the run; CSV still has every row
+                logger.warning("Skipping the parquet results table: %s", e)
+
+        self.errors = JsonlLog(f"{base_path}_errors.jsonl", self.run_id)
+        self.events: Optional[JsonlLog] = None
+        if event_log:
+            runs_dir = os.path.join(os.path.dirname(os.path.abspath(results_csv_path)), EVENT_LOG_DIRNAME)
+            self.events = JsonlLog(os.path.join(runs_dir, f"{self.run_id}.jsonl"), self.run_id)
+        self.rows: List[Dict[str, Any]] = []
+
+    @property
+    def paths(self) -> List[str]:
+        """Every file this run writes."""
+        paths = [sink.path for sink in self.sinks] + [self.errors.path]
+        return paths + ([self.events.path] if self.events is not None else [])
+
+    def event(self, event: str, **fields: Any) -> None:
+        """Write an event to the event log (no-op when it is disabled)."""
+        if self.events is not None:
+            self.events.write(event, **fields)
+
+    def write_result(self, row: Dict[str, Any], **trace: Any) -> None:
+        """
+        Write a results table row to every sink and its trace to the event log.
+
+        Args:
+            row: Results table row
+            **trace: Event payload, e.g. event="researched", record=..., token_counts=...
+        """
+        self.rows.append(row)
+        for sink in self.sinks:
+            sink.write(row)
+        event = trace.pop("event", "researched")
+        self.event(event, name=row.get("Name"), year_of_entry=row.get("Year of Entry to Yale"), **trace)
+
+    def write_error(self, name: str, year_of_entry: Any, error: BaseException) -> None:
+        """Write a failed alumnus to the errors file and the event log."""
+        fields = {
+            "name": name,
+            "year_of_entry": year_of_entry,
+            "error_type": type(error).__name__,
+            "error": str(error),
+        }
+        self.errors.write("failed", **fields)
+        self.event("failed", **fields)
+
+    def rewrite(self) -> None:
+        """Rewrite the sinks that support it from the (annotated) rows."""
+        for sink in self.sinks:
+            sink.rewrite(self.rows)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error("Error closing result sink %s: %s", sink.path, e)
+        self.errors.close()
+        if self.events is not None:
+            self.events.close()
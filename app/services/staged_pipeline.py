@@ -0,0 +1,370 @@
+"""Alumni research as a staged pipeline: search, sub-agents, verification and writes in their own stages."""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from google.adk.runners import Runner
+from pydantic import BaseModel
+from tqdm import tqdm
+
+from app.agents import state_keys
+from app.agents.alumni_researcher_agent.subagents import (
+    background_information_agent,
+    formatter_agent,
+    social_media_agent,
+)
+from app.configs.app import APP_NAME, logger
+from app.configs.institutions import INSTITUTION_INDEX_ENABLED
+from app.configs.llms import ADAPTIVE_THINKING_ENABLED, AGENT_MAX_ATTEMPTS, SOCIAL_MEDIA_MAX_LINKS
+from app.configs.pipeline import STAGE_QUEUE_SIZE, STAGE_RATE_LIMITS, STAGE_WORKERS
+from app.services.adk_service import ADKService
+from app.services.batch_formatter import FormatterInput
+from app.services.knowledge_store import KnowledgeStore
+from app.services.result_sinks import RunOutputs
+from app.services.url_verifier import UrlVerifier, annotate_row, row_urls
+from app.utils.agent_utils import call_root_agent_async, merge_token_counts
+from app.utils.cascade_utils import (
+    BACKGROUND_STAGE,
+    CHEAP_TIER,
+    FORMATTER_STAGE,
+    STRONG_TIER,
+    assess_stage,
+    model_cascade,
+    practices_missing,
+)
+from app.utils.institution_utils import institution_index
+from app.utils.metrics_utils import MetricsEventHandler, run_metrics
+from app.utils.pipeline_utils import Stage, StagedExecutor
+from app.utils.search_utils import collect_social_media_candidates
+from app.utils.thinking_utils import needs_retry, score_result, thinking_budget_controller
+
+EMPTY_TOKEN_COUNTS = {
+    "total_token_count": 0,
+    "prompt_token_count": 0,
+    "candidates_token_count": 0,
+    "cached_content_token_count": 0,
+    "thoughts_token_count": 0,
+}
+
+
+@dataclass
+class StagedRow:
+    """One alumnus on its way through the stages; each stage adds to it."""
+
+    alumni_name: str
+    year_of_entry: Any
+    query: str
+    refresh_reason: str
+    state: Dict[str, Any] = field(default_factory=dict)
+    token_counts: Optional[Dict[str, Any]] = None
+    response: Optional[BaseModel] = None
+    row_data: Optional[Dict[str, Any]] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    # Model cascade: tier of each stage's kept output, (stage, tier, token counts,
+    # seconds) per agent run, and why each escalated stage was escalated
+    stage_tiers: Dict[str, str] = field(default_factory=dict)
+    cascade_attempts: List[Tuple[str, str, Optional[Dict[str, Any]], float]] = field(default_factory=list)
+    escalation_reasons: Dict[str, str] = field(default_factory=dict)
+
+
+class StagedAlumniPipeline:
+    """
+    Research alumni through a StagedExecutor instead of one Runner call per row.
+
+    Each sub-agent gets its own Runner and runs in its own session, created from
+    the state the earlier stages built up (the "state" handoff mode), with the
+    message the sequential pipeline would have given it as the previous agent's
+    reply. A background or social media run that leaves its output key empty
+    (call_root_agent_async logs agent errors instead of raising them) and a
+    formatter response that cannot be parsed are retried (up to
+    AGENT_MAX_ATTEMPTS) with the attempt number raised, which escalates the
+    thinking budget. A failed row is written to the errors file by the stage
+    that failed it.
+
+    With the model cascade, each agent stage first runs on the cheap model and
+    only a stage whose output fails its local check (cascade_utils.assess_stage)
+    is escalated to its agent's own model; a record without current practices
+    escalates the background stage and is formatted again.
+    """
+
+    def __init__(
+        self,
+        adk_service: ADKService,
+        knowledge_store: KnowledgeStore,
+        outputs: RunOutputs,
+        build_row_data: Callable[[str, Any, BaseModel, Dict[str, Any]], Dict[str, Any]],
+        verify_urls: bool = False,
+        workers: Optional[Dict[str, int]] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+        queue_size: int = STAGE_QUEUE_SIZE,
+    ) -> None:
+        """
+        Args:
+            adk_service: Initialized alumni researcher service (session service,
+                         response parsing and the optional batch formatter)
+            knowledge_store: Store the researched records are saved to
+            outputs: Result sinks the rows are written to
+            build_row_data: Builds a results row from (name, year, response, token counts)
+            verify_urls: Check each row's URLs in a verification stage before writing it
+                         (main.py flags the failing rows after the run)
+            workers: Workers per stage (defaults to STAGE_WORKERS)
+            rate_limits: Item starts per second per stage (defaults to STAGE_RATE_LIMITS)
+            queue_size: Capacity of each stage's input queue
+        """
+        if social_media_agent.include_contents != "none":
+            raise ValueError("The staged pipeline needs the 'state' agent handoff mode")
+        self.adk_service = adk_service
+        self.knowledge_store = knowledge_store
+        self.outputs = outputs
+        self.build_row_data = build_row_data
+        self.verify_urls = verify_urls
+        self.workers = {**STAGE_WORKERS, **(workers or {})}
+        self.rate_limits = {**STAGE_RATE_LIMITS, **(rate_limits or {})}
+        self.queue_size = queue_size
+        self.runners = {
+            agent.name: Runner(agent=agent, app_name=APP_NAME, session_service=adk_service.session_service)
+            for agent in (background_information_agent, social_media_agent, formatter_agent)
+        }
+        self.cascade = model_cascade.enabled and AGENT_MAX_ATTEMPTS > 1
+        self.executor: Optional[StagedExecutor] = None
+        self._verifier: Optional[UrlVerifier] = None
+        self.researched_rows = 0
+        self.failed_rows = 0
+
+    def _stage(self, name: str, handler: Callable[[StagedRow], Any]) -> Stage:
+        return Stage(
+            name=name,
+            handler=handler,
+            workers=self.workers[name],
+            rate_per_second=self.rate_limits.get(name),
+            queue_size=self.queue_size,
+        )
+
+    async def run(self, rows: Iterable[StagedRow]) -> None:
+        """Push the rows through every stage; returns when each is written or failed."""
+        stages = [
+            self._stage("search", self._search),
+            self._stage("background", self._background),
+            self._stage("social_media", self._social_media),
+            self._stage("formatter", self._format),
+        ]
+        if self.verify_urls:
+            stages.append(self._stage("verification", self._verify))
+        stages.append(self._stage("write", self._write))
+        self.executor = StagedExecutor(stages, on_error=self._on_error)
+        self._verifier = UrlVerifier() if self.verify_urls else None
+        try:
+            await self.executor.run(rows)
+        finally:
+            if self._verifier is not None:
+                await self._verifier.aclose()
+                self._verifier = None
+
+    async def _run_agent(
+        self,
+        agent_name: str,
+        message: str,
+        row: StagedRow,
+        tier: str = STRONG_TIER,
+    ) -> Optional[str]:
+        """Run one sub-agent on a model tier in a new session holding the row's state, then take back the updated state."""
+        session_service = self.adk_service.session_service
+        user_id = self.adk_service.user_id
+        session_id = str(uuid.uuid4())
+        row.state[state_keys.MODEL_TIERS] = {agent_name: tier}
+        start = time.perf_counter()
+        await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            session_id=session_id,
+            state=row.state,
+        )
+        response_text, token_counts = await call_root_agent_async(
+            runner=self.runners[agent_name],
+            user_id=user_id,
+            session_id=session_id,
+            query=message,
+            handlers=[MetricsEventHandler(self.adk_service.agent_models)],
+        )
+        row.token_counts = merge_token_counts(row.token_counts, token_counts)
+        if self.cascade:
+            row.cascade_attempts.append((agent_name, tier, token_counts, time.perf_counter() - start))
+        session = await session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        if session is not None:
+            row.state = dict(session.state)
+        return response_text
+
+    async def _run_stage_agent(self, agent_name: str, message: str, row: StagedRow, output_key: str) -> None:
+        """
+        Run a sub-agent until it writes its output key, retrying up to AGENT_MAX_ATTEMPTS.
+
+        With the model cascade, the first attempt runs on the cheap tier and an
+        output that fails assess_stage escalates the stage: the next attempt runs on
+        the agent's own model. A stage escalated by a later stage starts there, at
+        the escalated attempt. If the strong attempts leave the output key empty,
+        the cheap output is kept.
+
+        Raises:
+            ValueError: If every attempt left the output key empty
+        """
+        escalated = agent_name in row.escalation_reasons
+        tier = CHEAP_TIER if self.cascade and not escalated else STRONG_TIER
+        # Cheap output of an escalated stage, kept if the strong attempts fail
+        fallback = row.state.get(output_key) if escalated else None
+        for attempt in range(2 if escalated else 1, AGENT_MAX_ATTEMPTS + 1):
+            row.state[state_keys.ATTEMPT] = attempt
+            # Drop an earlier attempt's output so a failed run cannot pass for a successful one
+            row.state.pop(output_key, None)
+            await self._run_agent(agent_name, message, row, tier)
+            output = row.state.get(output_key)
+            if tier == CHEAP_TIER:
+                accepted, reason = assess_stage(agent_name, output, row.alumni_name)
+                if accepted:
+                    break
+                fallback = output
+                self._escalate(row, agent_name, reason)
+                tier = STRONG_TIER
+                continue
+            if str(output or "").strip():
+                break
+            if attempt < AGENT_MAX_ATTEMPTS:
+                run_metrics.record_error("attempt", "RetriedAttempt")
+                logger.warning("%s attempt %s failed for %s, retrying", agent_name, attempt, row.alumni_name)
+        if not str(row.state.get(output_key) or "").strip():
+            if not str(fallback or "").strip():
+                raise ValueError(f"{agent_name} returned no {output_key}")
+            row.state[output_key] = fallback
+            tier = CHEAP_TIER
+        if self.cascade:
+            row.stage_tiers[agent_name] = tier
+
+    @staticmethod
+    def _escalate(row: StagedRow, stage: str, reason: str) -> None:
+        logger.info("Escalating the %s stage of %s to the strong model: %s", stage, row.alumni_name, reason)
+        row.escalation_reasons[stage] = reason
+
+    async def _search(self, row: StagedRow) -> StagedRow:
+        run_metrics.rows_in_flight.inc()
+        row.state[state_keys.ALUMNI_QUERY] = row.query
+        row.state[state_keys.SOCIAL_MEDIA_SEARCH_RESULTS] = await asyncio.to_thread(
+            collect_social_media_candidates, row.alumni_name, SOCIAL_MEDIA_MAX_LINKS
+        )
+        row.state[state_keys.SOCIAL_MEDIA_SEARCH_NAME] = row.alumni_name
+        return row
+
+    async def _background(self, row: StagedRow) -> StagedRow:
+        await self._run_stage_agent(
+            background_information_agent.name, row.query, row, state_keys.BACKGROUND_INFORMATION
+        )
+        return row
+
+    async def _social_media(self, row: StagedRow) -> StagedRow:
+        # The query keeps the alumni name where the resolver callback looks for it
+        background = row.state.get(state_keys.BACKGROUND_INFORMATION, "")
+        await self._run_stage_agent(
+            social_media_agent.name, f"{row.query}\n\n{background}", row, state_keys.SOCIAL_MEDIA_LINKS
+        )
+        return row
+
+    async def _format(self, row: StagedRow) -> StagedRow:
+        response = await self._format_record(row)
+        if self.cascade and row.stage_tiers.get(BACKGROUND_STAGE) == CHEAP_TIER and practices_missing(response):
+            # The practices come from the background research: escalate it and format again
+            self._escalate(row, BACKGROUND_STAGE, "no current practices")
+            await self._background(row)
+            if row.stage_tiers[BACKGROUND_STAGE] == STRONG_TIER:
+                response = await self._format_record(row) or response
+        if ADAPTIVE_THINKING_ENABLED:
+            thinking_budget_controller.record_row(
+                row.state.get(state_keys.THINKING_BUDGET_LOG, []),
+                score_result(response),
+            )
+        if response is None:
+            raise ValueError("Agent returned None response")
+        if INSTITUTION_INDEX_ENABLED:
+            response = institution_index.canonicalize_record(response)
+        row.response = response
+        row.token_counts = row.token_counts or dict(EMPTY_TOKEN_COUNTS)
+        row.row_data = self.build_row_data(row.alumni_name, row.year_of_entry, response, row.token_counts)
+        return row
+
+    async def _format_record(self, row: StagedRow) -> Optional[BaseModel]:
+        """Format the row's results with the batch formatter or the formatter agent (None if it failed)."""
+        social_media_links = str(row.state.get(state_keys.SOCIAL_MEDIA_LINKS, ""))
+        batch_formatter = self.adk_service.batch_formatter
+        if batch_formatter is not None:
+            response, token_counts = await batch_formatter.format(
+                FormatterInput(
+                    query=row.query,
+                    background_information=str(row.state.get(state_keys.BACKGROUND_INFORMATION, "")),
+                    social_media_links=social_media_links,
+                )
+            )
+            row.token_counts = merge_token_counts(row.token_counts, token_counts)
+            # The batch formatter runs outside the cascade
+            return response
+        response = None
+        tier = CHEAP_TIER if self.cascade and FORMATTER_STAGE not in row.escalation_reasons else STRONG_TIER
+        for attempt in range(1, AGENT_MAX_ATTEMPTS + 1):
+            row.state[state_keys.ATTEMPT] = attempt
+            response = self.adk_service.parse_response(
+                await self._run_agent(formatter_agent.name, social_media_links, row, tier)
+            )
+            if tier == CHEAP_TIER:
+                accepted, reason = assess_stage(FORMATTER_STAGE, response, row.alumni_name)
+                if accepted:
+                    break
+                self._escalate(row, FORMATTER_STAGE, reason)
+                tier = STRONG_TIER
+                continue
+            if not needs_retry(response):
+                break
+            if attempt < AGENT_MAX_ATTEMPTS:
+                run_metrics.record_error("attempt", "RetriedAttempt")
+                logger.warning("Formatter attempt %s failed for %s, retrying", attempt, row.alumni_name)
+        if self.cascade:
+            row.stage_tiers[FORMATTER_STAGE] = tier
+        return response
+
+    async def _verify(self, row: StagedRow) -> StagedRow:
+        checks = await self._verifier.verify_many(row_urls(row.row_data))
+        annotate_row(row.row_data, checks)
+        return row
+
+    async def _write(self, row: StagedRow) -> StagedRow:
+        self.knowledge_store.put(row.alumni_name, row.year_of_entry, row.response, token_counts=row.token_counts)
+        elapsed = time.perf_counter() - row.started_at
+        self.outputs.write_result(
+            row.row_data,
+            event="researched",
+            refresh_reason=row.refresh_reason,
+            elapsed_seconds=elapsed,
+            record=row.response.model_dump(),
+            token_counts=row.token_counts,
+        )
+        self.researched_rows += 1
+        if self.cascade:
+            model_cascade.record_row(row.stage_tiers, row.cascade_attempts, row.escalation_reasons)
+        run_metrics.rows_in_flight.dec()
+        run_metrics.rows.inc(outcome="success")
+        run_metrics.stage_seconds.observe(elapsed, stage="row")
+        tqdm.write(f"✓ Processed and saved: {row.alumni_name} (Year: {row.year_of_entry})")
+        return row
+
+    async def _on_error(self, stage: str, row: StagedRow, error: Exception) -> None:
+        self.failed_rows += 1
+        if self.cascade:
+            model_cascade.record_row(None, row.cascade_attempts, row.escalation_reasons)
+        run_metrics.rows_in_flight.dec()
+        run_metrics.rows.inc(outcome="failed")
+        tqdm.write(f"Error in the {stage} stage for {row.alumni_name} with year of entry {row.year_of_entry}: {error}")
+        self.outputs.write_error(row.alumni_name, row.year_of_entry, error)
+        tqdm.write(f"✗ Error saved for: {row.alumni_name}")
+
+    def format_report(self) -> str:
+        if self.executor is None:
+            return "No staged pipeline run recorded."
+        return f"{self.executor.format_report()}\nWall time: {self.executor.wall_seconds:.1f}s"
@@ -0,0 +1,279 @@
+"""Concurrent verification of the URLs written to the results CSV."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.configs.app import logger
+from app.configs.http import (
+    URL_VERIFICATION_HEAD_FALLBACK_STATUSES,
+    URL_VERIFICATION_INCONCLUSIVE_STATUSES,
+    URL_VERIFICATION_MAX_CONNECTIONS,
+    URL_VERIFICATION_MAX_REDIRECTS,
+    URL_VERIFICATION_PER_HOST_LIMIT,
+    URL_VERIFICATION_TIMEOUT_SECONDS,
+    URL_VERIFICATION_USER_AGENT,
+)
+
+# Results CSV columns holding URLs ("Current Practices URLs" is comma-separated)
+URL_COLUMNS = [
+    "Current Practices URLs",
+    "X (Twitter) Link",
+    "LinkedIn Link",
+    "Doximity Link",
+    "Google Scholar Link",
+    "Facebook Link",
+]
+
+# Errors of one URL's check; the URLs come from model output, so malformed ones
+# (httpx.InvalidURL, or a ValueError from urlsplit, e.g. "https://[bad") are expected
+CHECK_ERRORS = (httpx.HTTPError, httpx.InvalidURL, ValueError)
+
+
+@dataclass
+class UrlCheck:
+    """Outcome of verifying one URL."""
+
+    url: str
+    status: str  # "ok", "broken" or "blocked"
+    status_code: Optional[int] = None
+    final_url: Optional[str] = None
+    method: Optional[str] = None
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+
+def normalize_url(url: str) -> str:
+    """Strip whitespace and add https:// to scheme-less URLs (the formatter sometimes omits it)."""
+    url = url.strip()
+    if url and "://" not in url:
+        url = f"https://{url}"
+    return url
+
+
+def row_urls(row: Dict[str, Any]) -> List[str]:
+    """Collect the distinct, normalized URLs of a results row in column order."""
+    urls: List[str] = []
+    for column in URL_COLUMNS:
+        value = row.get(column)
+        if not isinstance(value, str):
+            continue
+        for url in value.split(","):
+            url = normalize_url(url)
+            if url and url not in urls:
+                urls.append(url)
+    return urls
+
+
+class UrlVerifier:
+    """
+    Verify URLs concurrently over one pooled httpx.AsyncClient.
+
+    Each URL is checked at most once per verifier (results and in-flight checks are
+    cached by URL), and requests to the same host are capped by a per-host semaphore.
+    Use as an async context manager so the connection pool is closed afterwards.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = URL_VERIFICATION_MAX_CONNECTIONS,
+        per_host_limit: int = URL_VERIFICATION_PER_HOST_LIMIT,
+        timeout_seconds: float = URL_VERIFICATION_TIMEOUT_SECONDS,
+        max_redirects: int = URL_VERIFICATION_MAX_REDIRECTS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        """
+        Args:
+            max_connections: Connection pool size across all hosts
+            per_host_limit: Maximum concurrent requests per host
+            timeout_seconds: Timeout per request
+            max_redirects: Maximum redirects followed per request
+            transport: Optional httpx transport (for offline tooling)
+        """
+        self.per_host_limit = per_host_limit
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout_seconds,
+            follow_redirects=True,
+            max_redirects=max_redirects,
+            headers={"User-Agent": URL_VERIFICATION_USER_AGENT},
+            transport=transport,
+        )
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._cache: Dict[str, asyncio.Task] = {}
+        self.requests_sent = 0
+
+    async def __aenter__(self) -> "UrlVerifier":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def verify(self, url: str) -> UrlCheck:
+        """
+        Verify one URL, reusing the result (or the in-flight check) for repeated URLs.
+
+        Args:
+            url: URL to check
+
+        Returns:
+            The check result
+        """
+        url = normalize_url(url)
+        task = self._cache.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._check(url))
+            self._cache[url] = task
+        return await task
+
+    async def verify_many(self, urls: List[str]) -> Dict[str, UrlCheck]:
+        """Verify URLs concurrently and return the results keyed by normalized URL."""
+        checks = await asyncio.gather(*(self.verify(url) for url in urls))
+        return {check.url: check for check in checks}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _request(self, method: str, url: str) -> httpx.Response:
+        self.requests_sent += 1
+        # Stream so a GET fallback does not download the page body
+        async with self._client.stream(method, url) as response:
+            return response
+
+    async def _check(self, url: str) -> UrlCheck:
+        start = time.perf_counter()
+        method = "HEAD"
+        try:
+            semaphore = self._host_semaphore(url)
+        except ValueError as e:
+            return self._failed(url, method, e, start)
+        async with semaphore:
+            try:
+                response = await self._request("HEAD", url)
+                if response.status_code in URL_VERIFICATION_HEAD_FALLBACK_STATUSES:
+                    method = "GET"
+                    response = await self._request("GET", url)
+            except CHECK_ERRORS as e:
+                # Some servers drop HEAD requests entirely; give GET one chance (not for malformed URLs)
+                if method == "HEAD" and isinstance(e, httpx.HTTPError):
+                    method = "GET"
+                    try:
+                        response = await self._request("GET", url)
+                    except CHECK_ERRORS as e_get:
+                        return self._failed(url, method, e_get, start)
+                else:
+                    return self._failed(url, method, e, start)
+
+        status_code = response.status_code
+        if status_code < 400:
+            status = "ok"
+        elif status_code in URL_VERIFICATION_INCONCLUSIVE_STATUSES:
+            status = "blocked"
+        else:
+            status = "broken"
+        return UrlCheck(
+            url=url,
+            status=status,
+            status_code=status_code,
+            final_url=str(response.url),
+            method=method,
+            elapsed_seconds=time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def _failed(url: str, method: str, error: Exception, start: float) -> UrlCheck:
+        logger.info("URL check failed for %s: %r", url, error)
+        return UrlCheck(
+            url=url,
+            status="broken",
+            method=method,
+            error=f"{type(error).__name__}: {error}",
+            elapsed_seconds=time.perf_counter() - start,
+        )
+
+
+def annotate_row(row: Dict[str, Any], checks: Dict[str, UrlCheck]) -> Dict[str, Any]:
+    """
+    Add URL verification columns to a results row.
+
+    Adds "URL Check" ("ok", "failed" or "" for rows without URLs), "Broken URLs"
+    and "Redirected URLs" (each "url -> detail", separated by "; ").
+
+    Args:
+        row: Results row (modified in place)
+        checks: Verification results keyed by normalized URL
+
+    Returns:
+        The annotated row
+    """
+    urls = row_urls(row)
+    broken = []
+    redirected = []
+    for url in urls:
+        check = checks.get(url)
+        if check is None:
+            continue
+        if check.status == "broken":
+            broken.append(f"{url} -> {check.status_code or check.error}")
+        elif check.final_url and check.final_url.rstrip("/") != url.rstrip("/"):
+            redirected.append(f"{url} -> {check.final_url}")
+    row["URL Check"] = ("failed" if broken else "ok") if urls else ""
+    row["Broken URLs"] = "; ".join(broken)
+    row["Redirected URLs"] = "; ".join(redirected)
+    return row
+
+
+async def verify_result_rows(
+    rows: List[Dict[str, Any]],
+    verifier: Optional[UrlVerifier] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Verify every URL in the results rows concurrently and annotate the rows.
+
+    Rows with an "Error" column set are left untouched.
+
+    Args:
+        rows: Results rows as written to the CSV (annotated in place)
+        verifier: Verifier to use; a new one (closed afterwards) if None
+
+    Returns:
+        The rows whose URL check failed
+    """
+    rows_to_check = [row for row in rows if not row.get("Error")]
+    urls = list(dict.fromkeys(url for row in rows_to_check for url in row_urls(row)))
+
+    owns_verifier = verifier is None
+    verifier = verifier or UrlVerifier()
+    try:
+        checks = await verifier.verify_many(urls)
+    finally:
+        if owns_verifier:
+            await verifier.aclose()
+
+    failing_rows = []
+    for row in rows_to_check:
+        annotate_row(row, checks)
+        if row["URL Check"] == "failed":
+            failing_rows.append(row)
+    logger.info(
+        "Verified %s URLs in %s rows: %s row(s) with broken URLs",
+        len(urls),
+        len(rows_to_check),
+        len(failing_rows),
+    )
+    return failing_rows
@@ -1,125 +1,99 @@
 """Agent utility functions for processing and calling AI agents."""
 
-from typing import Optional, List, Any
+import logging
+from typing import Optional, List, Any, Dict, Iterator, Union
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm
 from google.genai import types
 
+from app.configs.app import logger
 from app.utils.cmd_utils import display_system_message
+from app.utils.event_utils import (
+    DebugTraceHandler,
+    EventHandler,
+    EventPipeline,
+    FinalResponseHandler,
+    TokenAccountingHandler,
+)
 
 
-import logging
-from typing import Any, Optional
+def iter_llm_agents(agent: Any) -> Iterator[LlmAgent]:
+    """
+    Walk an agent tree depth-first and yield every LlmAgent in it.
+
+    Args:
+        agent: Root of the agent tree (any ADK agent)
+
+    Yields:
+        Each LlmAgent found in the tree, including the root if applicable
+    """
+    if isinstance(agent, LlmAgent):
+        yield agent
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        yield from iter_llm_agents(sub_agent)
 
-# Get logger
-logger = logging.getLogger("Recally")
+
+def set_agent_models(root_agent: Any, model: Union[str, BaseLlm]) -> None:
+    """
+    Point every LlmAgent in an agent tree at the given model.
+
+    The sub-agents are module-level singletons, so this affects every runner
+    built from the same tree. It is intended for offline tooling (benchmarks,
+    replay) that needs to swap Gemini for a local stand-in.
+
+    Args:
+        root_agent: Root of the agent tree
+        model: Model name or BaseLlm instance to assign
+    """
+    for agent in iter_llm_agents(root_agent):
+        agent.model = model
 
 
-async def process_agent_message(event: Any) -> Optional[str]:
+def agent_model_names(root_agent: Any) -> Dict[str, str]:
     """
-    Process and log agent response events, returning text only from final events.
+    Map every LlmAgent in an agent tree to the name of its model.
 
     Args:
-        event: Agent response event containing content parts
+        root_agent: Root of the agent tree
 
     Returns:
-        Extracted text content if event is final and has text, None otherwise
+        Dict of agent name to model name (agents without a model of their own
+        resolve to their ancestor's, as ADK does)
     """
-    # Log basic event info
-    logger.debug(f"Event ID: {event.id}, Author: {event.author}")
-
-    # Check for specific parts and log them
-    if logger.level == logging.DEBUG:
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, "executable_code") and part.executable_code:
-                    # Log executable code
-                    logger.debug(f"Agent generated code: {part.executable_code.code}")
-                elif (
-                    hasattr(part, "code_execution_result")
-                    and part.code_execution_result
-                ):
-                    # Log code execution results
-                    logger.debug(
-                        f"Code Execution Result: {part.code_execution_result.outcome} - Output: {part.code_execution_result.output}"
-                    )
-                elif hasattr(part, "tool_response") and part.tool_response:
-                    # Log tool responses
-                    logger.debug(f"Tool Response: {part.tool_response.output}")
-                elif hasattr(part, "function_call") and part.function_call:
-                    # Log function calls
-                    logger.debug(f"Function Call: {part.function_call.name}")
-                elif hasattr(part, "function_response") and part.function_response:
-                    # Log function responses
-                    logger.debug(
-                        f"Function Response: {part.function_response.response}"
-                    )
-                # Log any text parts found in any event for debugging
-                elif hasattr(part, "text") and part.text and not part.text.isspace():
-                    logger.debug(f"Text content: '{part.text.strip()}'")
-
-    # Check for final response
-    final_response = None
-    if hasattr(event, "is_final_response") and event.is_final_response():
-        logger.info("Final agent response detected")
-        if (
-            event.content
-            and event.content.parts
-            and hasattr(event.content.parts[0], "text")
-            and event.content.parts[0].text
-        ):
-            final_response = event.content.parts[0].text.strip()
-            logger.info(f"Final agent response text: {final_response[:100]}...")
-        else:
-            logger.warning("Final agent response detected but no text content found")
-    else:
-        logger.debug("Non-final event - no text returned")
+    return {agent.name: agent.canonical_model.model for agent in iter_llm_agents(root_agent)}
 
-    return final_response
 
-def get_token_counts(event):
+def merge_token_counts(
+    total: Optional[dict],
+    token_counts: Optional[dict],
+) -> Optional[dict]:
     """
-    Extract token counts from an event object's usage_metadata.
-    
+    Add one call's accumulated token counts (as returned by call_root_agent_async) to a running total.
+
     Args:
-        event: Event object containing usage_metadata
-        
+        total: Running total, or None if nothing has been accumulated yet
+        token_counts: Token counts to add, or None
+
     Returns:
-        dict: Dictionary containing all token counts
+        The merged token counts (None only if both inputs are None)
     """
-    try:
-        usage_metadata = event.usage_metadata
-        
-        # Extract basic token counts
-        token_counts = {
-            'total_token_count': getattr(usage_metadata, 'total_token_count', 0),
-            'prompt_token_count': getattr(usage_metadata, 'prompt_token_count', 0),
-            'candidates_token_count': getattr(usage_metadata, 'candidates_token_count', 0),
-            'cached_content_token_count': getattr(usage_metadata, 'cached_content_token_count', 0),
-            'thoughts_token_count': getattr(usage_metadata, 'thoughts_token_count', 0)
-        }
-        
-        # Extract cache tokens details
-        if hasattr(usage_metadata, 'cache_tokens_details') and usage_metadata.cache_tokens_details:
-            cache_tokens = {}
-            for item in usage_metadata.cache_tokens_details:
-                modality = item.modality.name if hasattr(item.modality, 'name') else str(item.modality)
-                cache_tokens[modality.lower()] = item.token_count
-            token_counts['cache_tokens_by_modality'] = cache_tokens
-        
-        # Extract prompt tokens details
-        if hasattr(usage_metadata, 'prompt_tokens_details') and usage_metadata.prompt_tokens_details:
-            prompt_tokens = {}
-            for item in usage_metadata.prompt_tokens_details:
-                modality = item.modality.name if hasattr(item.modality, 'name') else str(item.modality)
-                prompt_tokens[modality.lower()] = item.token_count
-            token_counts['prompt_tokens_by_modality'] = prompt_tokens
-        
+    if token_counts is None:
+        return total
+    if total is None:
         return token_counts
-        
-    except AttributeError as e:
-        # If the event doesn't have usage_metadata or expected structure
-        return {'error': f'Could not extract token counts: {str(e)}'}
-    except Exception as e:
-        return {'error': f'Unexpected error: {str(e)}'}
+
+    merged = dict(total)
+    for key, value in token_counts.items():
+        if isinstance(value, int) and isinstance(merged.get(key, 0), int):
+            merged[key] = merged.get(key, 0) + value
+        elif isinstance(value, dict):
+            modality_counts = dict(merged.get(key) or {})
+            for modality, count in value.items():
+                modality_counts[modality] = modality_counts.get(modality, 0) + count
+            merged[key] = modality_counts
+        elif isinstance(value, list):
+            merged[key] = list(merged.get(key) or []) + value
+    return merged
 
 
 def process_user_message(
@@ -201,6 +175,7 @@ async def call_root_agent_async(
     query: str,
     images: Optional[List[Any]] = None,
     voice_notes: Optional[List[Any]] = None,
+    handlers: Optional[List[EventHandler]] = None,
 ) -> tuple[Optional[str], dict]:
     """
     Call the root agent asynchronously with multimodal content.
@@ -208,6 +183,10 @@ async def call_root_agent_async(
     This function handles low-level event processing and text extraction.
     It does NOT parse JSON or convert responses to structured formats.
     For structured output parsing, see ADKService.get_agent_response().
+    
+    Every event goes through an EventPipeline: token accounting, final-response
+    capture, debug tracing (only when the app logger is at DEBUG), then any
+    extra handlers.
 
     Args:
         runner: ADK runner instance
@@ -216,6 +195,7 @@ async def call_root_agent_async(
         query: User's text query
         images: List of image objects
         voice_notes: List of voice note objects
+        handlers: Extra event handlers, run after the built-in ones
 
     Returns:
         Tuple of (agent response text if available, accumulated token counts dict)
@@ -224,69 +204,21 @@ async def call_root_agent_async(
         by the caller (e.g., ADKService.get_agent_response()).
     """
     content = process_user_message(query, images, voice_notes)
-    final_response_text = None
-    
-    # Initialize token count accumulators
-    accumulated_token_counts = {
-        'total_token_count': 0,
-        'prompt_token_count': 0,
-        'candidates_token_count': 0,
-        'cached_content_token_count': 0,
-        'thoughts_token_count': 0,
-        'cache_tokens_by_modality': {},
-        'prompt_tokens_by_modality': {}
-    }
-    
-    # Track individual event token counts for API
-    event_token_counts = []
+    tokens = TokenAccountingHandler()
+    final_response = FinalResponseHandler()
+    pipeline = EventPipeline([tokens, final_response, DebugTraceHandler(), *(handlers or [])])
 
     try:
         async for event in runner.run_async(
             user_id=user_id, session_id=session_id, new_message=content
         ):
-            # Get token counts for this event
-            token_counts = get_token_counts(event)
-            
-            # Log individual event token counts
-            if 'error' not in token_counts:
-                event_token_counts.append({
-                    'event_id': getattr(event, 'id', 'unknown'),
-                    'author': getattr(event, 'author', 'unknown'),
-                    'token_counts': token_counts
-                })
-                
-                # Accumulate token counts
-                for key in ['total_token_count', 'prompt_token_count', 'candidates_token_count', 
-                           'cached_content_token_count', 'thoughts_token_count']:
-                    if key in token_counts and token_counts[key] is not None:
-                        accumulated_token_counts[key] += token_counts[key]
-                
-                # Accumulate modality-specific counts
-                if 'cache_tokens_by_modality' in token_counts:
-                    for modality, count in token_counts['cache_tokens_by_modality'].items():
-                        accumulated_token_counts['cache_tokens_by_modality'][modality] = \
-                            accumulated_token_counts['cache_tokens_by_modality'].get(modality, 0) + count
-                
-                if 'prompt_tokens_by_modality' in token_counts:
-                    for modality, count in token_counts['prompt_tokens_by_modality'].items():
-                        accumulated_token_counts['prompt_tokens_by_modality'][modality] = \
-                            accumulated_token_counts['prompt_tokens_by_modality'].get(modality, 0) + count
-                
-                logger.debug(f"Event {getattr(event, 'id', 'unknown')} token counts: {token_counts}")
-            
-            # Process the agent message for final response
-            response = await process_agent_message(event)
-
-            if response:
-                final_response_text = response
-                
+            pipeline(event)
     except Exception as e:
         display_system_message(f"Error during agent call: {e}")
+    pipeline.finish()
 
-    # Add event-level details to accumulated counts for API response
-    accumulated_token_counts['event_details'] = event_token_counts
-    
-    # Log final accumulated token counts
-    logger.info(f"Total accumulated token counts: {accumulated_token_counts}")
+    accumulated_token_counts = tokens.token_counts()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Total accumulated token counts: %s", tokens.totals)
 
-    return final_response_text, accumulated_token_counts
+    return final_response.text, accumulated_token_counts
@@ -0,0 +1,121 @@
+"""Micro-batching queue that groups concurrent requests into batches."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Set, Tuple, TypeVar
+
+from app.configs.app import logger
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+
+class MicroBatcher(Generic[ItemT, ResultT]):
+    """
+    Collect items submitted by concurrent callers and process them in batches.
+
+    A batch is dispatched when it reaches max_batch_size items or when
+    max_wait_seconds have passed since its first item arrived, whichever comes
+    first. Batches are processed concurrently, so a slow batch does not hold up
+    the collection of the next one.
+
+    ``process_batch`` receives the items of a batch and must return one result
+    per item, in order; a result that is an Exception is raised to that item's
+    caller. If ``process_batch`` itself raises, every caller in the batch gets
+    the exception.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[ItemT]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait_seconds: float,
+        name: str = "batcher",
+    ) -> None:
+        """
+        Args:
+            process_batch: Coroutine function that processes one batch
+            max_batch_size: Maximum items per batch
+            max_wait_seconds: Maximum time the first item of a batch waits for more
+            name: Name used in log messages
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: ItemT) -> ResultT:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            The item's result from process_batch
+        """
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> None:
+        """Group queued items into batches and dispatch them."""
+        while True:
+            batch: List[Tuple[ItemT, asyncio.Future]] = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[ItemT, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        items = [item for item, _ in batch]
+        try:
+            results = await self.process_batch(items)
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: {len(results)} results for a batch of {len(batch)}")
+        except Exception as e:
+            logger.error("%s: batch of %s failed: %s", self.name, len(batch), e)
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    async def close(self) -> None:
+        """Stop collecting and wait for batches already dispatched."""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
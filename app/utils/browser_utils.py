@@ -0,0 +1,268 @@
+"""Pool of warm headless-browser contexts for fetching JS-rendered pages."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Set
+from urllib.parse import urlsplit
+
+from app.configs.app import logger
+from app.configs.http import (
+    BROWSER_BLOCKED_HOST_PATTERNS,
+    BROWSER_BLOCKED_RESOURCE_TYPES,
+    BROWSER_CONTEXT_MAX_PAGES,
+    BROWSER_CONTEXT_WAIT_SECONDS,
+    BROWSER_PAGE_MAX_CHARS,
+    BROWSER_PAGE_SETTLE_SECONDS,
+    BROWSER_PAGE_TIMEOUT_SECONDS,
+    BROWSER_POOL_CONTEXTS,
+    URL_VERIFICATION_USER_AGENT,
+)
+
+
+@dataclass
+class PageFetchResult:
+    """Rendered text of one page, or the error that prevented fetching it."""
+
+    url: str
+    final_url: Optional[str] = None
+    status_code: Optional[int] = None
+    title: str = ""
+    text: str = ""
+    truncated: bool = False
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+
+class _PooledContext:
+    """A browser context plus the number of pages it has served."""
+
+    def __init__(self, context: Any) -> None:
+        self.context = context
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """
+    Fetch pages with a shared Chromium instance and a fixed set of warm contexts.
+
+    Launching a browser costs far more than rendering a typical profile page, so
+    one browser is started on first use and BROWSER_POOL_CONTEXTS contexts are
+    reused across fetches; the context count also bounds page concurrency. Every
+    context aborts image/media/font requests and analytics hosts, and is replaced
+    after BROWSER_CONTEXT_MAX_PAGES pages.
+    """
+
+    def __init__(
+        self,
+        contexts: int = BROWSER_POOL_CONTEXTS,
+        page_timeout_seconds: float = BROWSER_PAGE_TIMEOUT_SECONDS,
+        settle_seconds: float = BROWSER_PAGE_SETTLE_SECONDS,
+        max_chars: int = BROWSER_PAGE_MAX_CHARS,
+        context_max_pages: int = BROWSER_CONTEXT_MAX_PAGES,
+        context_wait_seconds: float = BROWSER_CONTEXT_WAIT_SECONDS,
+        blocked_resource_types: Optional[List[str]] = None,
+        blocked_host_patterns: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Args:
+            contexts: Warm browser contexts (and maximum pages open at once)
+            page_timeout_seconds: Navigation timeout per page
+            settle_seconds: Extra wait for client-side rendering after DOMContentLoaded
+            max_chars: Maximum characters of visible text returned per page
+            context_max_pages: Pages served before a context is replaced
+            context_wait_seconds: Maximum wait for a free context per fetch
+            blocked_resource_types: Playwright resource types to abort
+            blocked_host_patterns: Host substrings whose requests are aborted
+        """
+        self.contexts = contexts
+        self.page_timeout_seconds = page_timeout_seconds
+        self.settle_seconds = settle_seconds
+        self.max_chars = max_chars
+        self.context_max_pages = context_max_pages
+        self.context_wait_seconds = context_wait_seconds
+        self.blocked_resource_types = set(
+            blocked_resource_types if blocked_resource_types is not None else BROWSER_BLOCKED_RESOURCE_TYPES
+        )
+        self.blocked_host_patterns = (
+            blocked_host_patterns if blocked_host_patterns is not None else BROWSER_BLOCKED_HOST_PATTERNS
+        )
+
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._busy: Set[_PooledContext] = set()  # Contexts lent to a fetch
+        self._start_lock = asyncio.Lock()
+        self.pages_fetched = 0
+        self.requests_blocked = 0
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Launch the browser and open the warm contexts (no-op if already started)."""
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+            # Imported here so the app runs without the browser stack when the
+            # fetch tool is disabled
+            from playwright.async_api import async_playwright
+
+            start = time.perf_counter()
+            self._playwright = await async_playwright().start()
+            try:
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                idle: asyncio.Queue = asyncio.Queue()
+                for _ in range(self.contexts):
+                    idle.put_nowait(await self._new_context())
+            except Exception:
+                # Leave the pool unstarted (e.g. no browser binary), so the next fetch retries
+                if self._browser is not None:
+                    await self._browser.close()
+                    self._browser = None
+                await self._playwright.stop()
+                self._playwright = None
+                raise
+            self._idle = idle
+            logger.info(
+                "Browser pool started with %s contexts in %.2fs", self.contexts, time.perf_counter() - start
+            )
+
+    async def close(self) -> None:
+        """Close every context (idle or lent to a fetch), the browser and the Playwright driver."""
+        if self._browser is None:
+            return
+        contexts = list(self._busy)
+        self._busy.clear()
+        while self._idle is not None and not self._idle.empty():
+            contexts.append(self._idle.get_nowait())
+        for pooled in contexts:
+            try:
+                await pooled.context.close()
+            except Exception as e:
+                logger.info("Closing a browser context failed: %r", e)
+        await self._browser.close()
+        await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+        self._idle = None
+
+    async def _new_context(self) -> _PooledContext:
+        context = await self._browser.new_context(user_agent=URL_VERIFICATION_USER_AGENT)
+        context.set_default_navigation_timeout(self.page_timeout_seconds * 1000)
+        await context.route("**/*", self._route)
+        return _PooledContext(context)
+
+    async def _route(self, route: Any) -> None:
+        request = route.request
+        host = (urlsplit(request.url).hostname or "").lower()
+        if request.resource_type in self.blocked_resource_types or any(
+            pattern in host for pattern in self.blocked_host_patterns
+        ):
+            self.requests_blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def fetch(self, url: str) -> PageFetchResult:
+        """
+        Render a page in a warm context and return its title and visible text.
+
+        Waits up to context_wait_seconds for a free context when all of them are busy.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            The fetch result; browser start failures, navigation errors and
+            timeouts are reported in result.error rather than raised
+        """
+        start = time.perf_counter()
+        pooled = None
+        page = None
+        try:
+            await self.start()
+            pooled = await asyncio.wait_for(self._idle.get(), timeout=self.context_wait_seconds)
+            self._busy.add(pooled)
+            page = await pooled.context.new_page()
+            response = await page.goto(url, wait_until="domcontentloaded")
+            if self.settle_seconds > 0:
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=self.settle_seconds * 1000)
+                except Exception:
+                    # Pages that keep polling never go idle; use what has rendered so far
+                    pass
+            text = " ".join((await page.inner_text("body")).split())
+            self.pages_fetched += 1
+            return PageFetchResult(
+                url=url,
+                final_url=page.url,
+                status_code=response.status if response is not None else None,
+                title=await page.title(),
+                text=text[: self.max_chars],
+                truncated=len(text) > self.max_chars,
+                elapsed_seconds=time.perf_counter() - start,
+            )
+        except Exception as e:
+            logger.info("Browser fetch failed for %s: %r", url, e)
+            return PageFetchResult(
+                url=url,
+                error=f"{type(e).__name__}: {e}",
+                elapsed_seconds=time.perf_counter() - start,
+            )
+        finally:
+            if pooled is not None:
+                await self._release(pooled, page)
+
+    async def _release(self, pooled: _PooledContext, page: Any) -> None:
+        """Close a fetch's page and return its context, or a replacement, to the idle queue."""
+        if pooled not in self._busy:
+            return  # The pool was closed during the fetch (close() closed the context)
+        self._busy.discard(pooled)
+        idle = self._idle
+        try:
+            if page is not None:
+                await page.close()
+            pooled.pages_served += 1
+            if pooled.pages_served >= self.context_max_pages:
+                await pooled.context.close()
+                pooled = await self._new_context()
+        except Exception as e:
+            logger.info("Replacing a browser context after an error: %r", e)
+            try:
+                pooled = await self._new_context()
+            except Exception as e_new:
+                # Keep the pool at full size; fetches on a broken context report errors
+                logger.info("Could not open a replacement browser context: %r", e_new)
+        if self._idle is idle:
+            idle.put_nowait(pooled)
+        else:
+            # Closed while the context was being released
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+
+
+# Process-wide pool shared by the fetch tool (started on first use)
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the shared browser pool, creating it on first use."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+async def close_browser_pool() -> None:
+    """Close the shared browser pool if it was started."""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
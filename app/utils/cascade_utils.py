@@ -0,0 +1,349 @@
+"""Model cascade: run each sub-agent on a cheap model first and escalate only the stages that fail.
+
+Every stage (background information, social media, formatter) first runs on
+CASCADE_CHEAP_MODEL. Its output is checked locally (assess_stage) and, if it is
+not confident, only that stage is escalated: it runs again on its agent's own
+model, while the stages whose outputs were accepted keep them. The tier of each
+agent is a per-agent override in session state (MODEL_TIERS) that the
+before-model callback reads. ADKService escalates within the sequential pipeline
+(accepted upstream outputs are carried into the retry's session and their agents
+skipped); the staged pipeline escalates inside the stage that failed. The cascade
+keeps per-stage and per-row counts of the outputs accepted per tier, tokens and
+seconds, and estimates what the run saved against running every stage on the
+strong tier only.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel
+
+from app.agents import state_keys
+from app.configs.llms import (
+    CASCADE_CHEAP_MODEL,
+    CASCADE_NAMELESS_PLATFORMS,
+    CASCADE_REQUIRE_PRACTICES,
+    MODEL_CASCADE_ENABLED,
+)
+from app.configs.planner import MODEL_PRICES_PER_MILLION_TOKENS
+from app.utils.event_utils import TOKEN_COUNT_FIELDS, EventHandler
+from app.utils.pricing_utils import pricing_model, row_cost
+from app.utils.resolver_utils import parse_social_media_selection
+from app.utils.search_utils import name_tokens
+from app.utils.thinking_utils import needs_retry
+
+CHEAP_TIER = "cheap"
+STRONG_TIER = "strong"
+TIERS = (CHEAP_TIER, STRONG_TIER)
+
+# Cascade stages in pipeline order (the sub-agent names), and the session state key
+# each one writes its output to (the formatter's output is the parsed record)
+BACKGROUND_STAGE = "background_information_agent"
+SOCIAL_MEDIA_STAGE = "social_media_agent"
+FORMATTER_STAGE = "formatter_agent"
+STAGES = (BACKGROUND_STAGE, SOCIAL_MEDIA_STAGE, FORMATTER_STAGE)
+STAGE_OUTPUT_KEYS = {
+    BACKGROUND_STAGE: state_keys.BACKGROUND_INFORMATION,
+    SOCIAL_MEDIA_STAGE: state_keys.SOCIAL_MEDIA_LINKS,
+}
+# State an accepted stage's results are carried over in when a later stage escalates
+STAGE_STATE_KEYS = {
+    BACKGROUND_STAGE: [state_keys.BACKGROUND_INFORMATION, state_keys.GROUNDING_SOURCES],
+    SOCIAL_MEDIA_STAGE: [state_keys.SOCIAL_MEDIA_LINKS],
+}
+
+
+def assess_stage(stage: str, output: Any, full_name: Optional[str]) -> Tuple[bool, str]:
+    """
+    Decide locally whether a stage's cheap-tier output can be accepted without escalating.
+
+    Args:
+        stage: Stage (sub-agent name) that produced the output
+        output: Its output: background text, "Platform: url" selection, or the
+                parsed formatter record (None if it did not parse)
+        full_name: Alumni name from the query (None skips the link check)
+
+    Returns:
+        Tuple of (accepted, reason); the reason names the first failed check
+    """
+    if stage == FORMATTER_STAGE:
+        if needs_retry(output):
+            return False, "no parseable response"
+        return True, "confident"
+    text = str(output or "").strip()
+    if not text:
+        return False, f"no {STAGE_OUTPUT_KEYS[stage]}"
+    if stage == SOCIAL_MEDIA_STAGE:
+        tokens = name_tokens(full_name) if full_name else []
+        if tokens:
+            last_name = tokens[-1]
+            for platform_name, link in parse_social_media_selection(text).items():
+                if not link or platform_name in CASCADE_NAMELESS_PLATFORMS:
+                    continue
+                if last_name not in re.sub(r"[^a-z0-9]", "", link.lower()):
+                    return False, f"{platform_name} link does not match the name"
+    return True, "confident"
+
+
+def practices_missing(response: Optional[BaseModel]) -> bool:
+    """
+    Whether a parsed record lists no current practice (when CASCADE_REQUIRE_PRACTICES).
+
+    The practices come from the background information agent's research (the
+    formatter only restructures them), so a record without any escalates the
+    background stage rather than the formatter.
+    """
+    if not CASCADE_REQUIRE_PRACTICES or response is None:
+        return False
+    return not str(response.model_dump().get("current_practices_names", "")).strip()
+
+
+def row_tier(stage_tiers: Dict[str, str]) -> str:
+    """Tier of a row: strong if any of its stages' kept outputs came from the strong tier."""
+    return STRONG_TIER if STRONG_TIER in stage_tiers.values() else CHEAP_TIER
+
+
+class StageUsageHandler(EventHandler):
+    """
+    Event pipeline handler that splits a run's tokens and time between the cascade stages.
+
+    A stage runs from the previous stage's last event (or the start of the run) to
+    its own last event; events of agents nested in a stage (e.g. the google_search
+    agent) count toward that stage.
+    """
+
+    def __init__(self) -> None:
+        self.token_counts: Dict[str, Dict[str, int]] = {}
+        self.seconds: Dict[str, float] = {}
+        self._stage: Optional[str] = None
+        self._stage_start = time.perf_counter()
+        self._last_event = self._stage_start
+
+    def handle(self, event: Any) -> None:
+        stage = event.author if event.author in STAGES else self._stage
+        if stage is None:
+            return
+        if stage != self._stage:
+            if self._stage is not None:
+                self._finish_stage()
+            self._stage = stage
+        self._last_event = time.perf_counter()
+        counts = self.token_counts.setdefault(stage, dict.fromkeys(TOKEN_COUNT_FIELDS, 0))
+        usage = event.usage_metadata
+        if usage is not None:
+            for key in TOKEN_COUNT_FIELDS:
+                counts[key] += getattr(usage, key) or 0
+
+    def _finish_stage(self) -> None:
+        self.seconds[self._stage] = self.seconds.get(self._stage, 0.0) + self._last_event - self._stage_start
+        self._stage_start = self._last_event
+
+    def finish(self) -> None:
+        if self._stage is not None:
+            self._finish_stage()
+            self._stage = None
+
+
+class ModelCascade:
+    """Track the outputs accepted per stage and tier, and what the cheap tier cost compared to the strong one."""
+
+    def __init__(self, cheap_model: str) -> None:
+        """
+        Args:
+            cheap_model: Model every sub-agent uses on the cheap tier
+        """
+        self.cheap_model = cheap_model
+        self.enabled = MODEL_CASCADE_ENABLED
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.rows_by_tier: Dict[str, int] = {tier: 0 for tier in TIERS}
+            self.stages_by_tier: Dict[str, Dict[str, int]] = {stage: {tier: 0 for tier in TIERS} for stage in STAGES}
+            self.failed_rows = 0
+            self.escalation_reasons: Dict[str, int] = {}
+            # Per-row stage attempts: [(stage, tier, token_counts, seconds)]
+            self._rows: List[List[Tuple[str, str, Dict[str, Any], float]]] = []
+
+    def record_row(
+        self,
+        stage_tiers: Optional[Dict[str, str]],
+        attempts: List[Tuple[str, str, Optional[Dict[str, Any]], float]],
+        escalation_reasons: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Record one row's stage attempts and the tier each kept output came from.
+
+        Args:
+            stage_tiers: Tier of each stage's kept output, or None if the row failed
+            attempts: (stage, tier, token counts, seconds) per stage run, in order
+            escalation_reasons: Why each escalated stage's cheap output was not accepted
+        """
+        with self._lock:
+            if stage_tiers is None:
+                self.failed_rows += 1
+            else:
+                self.rows_by_tier[row_tier(stage_tiers)] += 1
+                for stage, tier in stage_tiers.items():
+                    self.stages_by_tier[stage][tier] += 1
+            for stage, reason in (escalation_reasons or {}).items():
+                key = f"{stage}: {reason}"
+                self.escalation_reasons[key] = self.escalation_reasons.get(key, 0) + 1
+            self._rows.append([
+                (stage, tier, token_counts or {}, seconds) for stage, tier, token_counts, seconds in attempts
+            ])
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the cascade.
+
+        Token and latency savings are estimates against running each stage once on
+        the strong tier: a stage that was escalated counts with its strong attempt,
+        one accepted on the cheap tier with its tokens at strong prices and the mean
+        time of the run's strong attempts of that stage (its own time if there were
+        none).
+
+        Returns:
+            Dict with rows and fraction per tier, outputs and cheap fraction per
+            stage, failed rows, escalation reasons, total tokens, seconds and USD
+            cost per tier, and the estimated strong-only cost and seconds with the
+            savings against them (USD figures are None when a model has no price)
+        """
+        with self._lock:
+            rows = [list(attempts) for attempts in self._rows]
+            rows_by_tier = dict(self.rows_by_tier)
+            stages_by_tier = {stage: dict(counts) for stage, counts in self.stages_by_tier.items()}
+            failed_rows = self.failed_rows
+            escalation_reasons = dict(self.escalation_reasons)
+        cheap_prices = MODEL_PRICES_PER_MILLION_TOKENS.get(self.cheap_model)
+        strong_prices = MODEL_PRICES_PER_MILLION_TOKENS[pricing_model()]
+        tier_prices = {CHEAP_TIER: cheap_prices, STRONG_TIER: strong_prices}
+
+        tokens = {tier: 0 for tier in TIERS}
+        seconds = {tier: 0.0 for tier in TIERS}
+        cost: Dict[str, Optional[float]] = {tier: 0.0 for tier in TIERS}
+        strong_stage_seconds: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        for attempts in rows:
+            for stage, tier, token_counts, attempt_seconds in attempts:
+                tokens[tier] += token_counts.get("total_token_count", 0)
+                seconds[tier] += attempt_seconds
+                if tier == STRONG_TIER:
+                    strong_stage_seconds[stage].append(attempt_seconds)
+                if cost[tier] is not None and tier_prices[tier] is not None:
+                    cost[tier] += row_cost(token_counts, tier_prices[tier])
+                else:
+                    cost[tier] = None
+        mean_strong_seconds = {
+            stage: sum(values) / len(values) for stage, values in strong_stage_seconds.items() if values
+        }
+
+        # Each stage of each row once on the strong tier: its last strong attempt if
+        # it escalated, otherwise its last cheap attempt's tokens at strong prices
+        baseline_cost = 0.0
+        baseline_seconds = 0.0
+        for attempts in rows:
+            for stage in STAGES:
+                stage_attempts = [attempt for attempt in attempts if attempt[0] == stage]
+                if not stage_attempts:
+                    continue
+                strong = [attempt for attempt in stage_attempts if attempt[1] == STRONG_TIER]
+                _, _, token_counts, attempt_seconds = strong[-1] if strong else stage_attempts[-1]
+                baseline_cost += row_cost(token_counts, strong_prices)
+                if strong or stage not in mean_strong_seconds:
+                    baseline_seconds += attempt_seconds
+                else:
+                    baseline_seconds += mean_strong_seconds[stage]
+
+        total_cost = None if None in cost.values() else sum(cost.values())
+        total_seconds = sum(seconds.values())
+        researched = sum(rows_by_tier.values()) + failed_rows
+        return {
+            "rows": researched,
+            "rows_by_tier": rows_by_tier,
+            "fraction_by_tier": {
+                tier: count / researched if researched else 0.0 for tier, count in rows_by_tier.items()
+            },
+            "stages_by_tier": stages_by_tier,
+            "cheap_fraction_by_stage": {
+                stage: counts[CHEAP_TIER] / sum(counts.values()) if sum(counts.values()) else 0.0
+                for stage, counts in stages_by_tier.items()
+            },
+            "failed_rows": failed_rows,
+            "escalation_reasons": escalation_reasons,
+            "tokens_by_tier": tokens,
+            "seconds_by_tier": seconds,
+            "cost_by_tier_usd": cost,
+            "cost_usd": total_cost,
+            "strong_only_cost_usd": baseline_cost,
+            "cost_saved_usd": None if total_cost is None else baseline_cost - total_cost,
+            "seconds": total_seconds,
+            "strong_only_seconds": baseline_seconds,
+            "seconds_saved": baseline_seconds - total_seconds,
+        }
+
+    def format_report(self) -> str:
+        report = self.report()
+        if not report["rows"]:
+            return "No rows ran through the model cascade."
+        stages = ", ".join(
+            f"{stage} {counts[CHEAP_TIER]}/{sum(counts.values())}"
+            for stage, counts in report["stages_by_tier"].items()
+        )
+        lines = [
+            f"Rows entirely on {self.cheap_model}: {report['rows_by_tier'][CHEAP_TIER]}/{report['rows']} "
+            f"({report['fraction_by_tier'][CHEAP_TIER]:.0%}), with an escalated stage: "
+            f"{report['rows_by_tier'][STRONG_TIER]} ({report['fraction_by_tier'][STRONG_TIER]:.0%}), "
+            f"failed: {report['failed_rows']}",
+            f"Stage outputs accepted on the cheap tier: {stages}",
+            f"Tokens: {report['tokens_by_tier'][CHEAP_TIER]:,} cheap, {report['tokens_by_tier'][STRONG_TIER]:,} strong",
+        ]
+        if report["escalation_reasons"]:
+            reasons = ", ".join(f"{reason} ({count})" for reason, count in sorted(report["escalation_reasons"].items()))
+            lines.append(f"Escalated because: {reasons}")
+        if report["cost_usd"] is not None:
+            lines.append(
+                f"Cost: ${report['cost_usd']:.4f} vs. ~${report['strong_only_cost_usd']:.4f} strong only "
+                f"(saved ~${report['cost_saved_usd']:.4f})"
+            )
+        lines.append(
+            f"Model time: {report['seconds']:.1f}s vs. ~{report['strong_only_seconds']:.1f}s strong only "
+            f"(saved ~{report['seconds_saved']:.1f}s)"
+        )
+        return "\n".join(lines)
+
+
+model_cascade = ModelCascade(CASCADE_CHEAP_MODEL)
+
+
+def model_cascade_before_model_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+) -> Optional[LlmResponse]:
+    """Before-model callback that sends the requests of an agent on the cheap tier to the cheap model."""
+    tiers = callback_context.state.get(state_keys.MODEL_TIERS) or {}
+    if tiers.get(callback_context.agent_name) == CHEAP_TIER:
+        llm_request.model = model_cascade.cheap_model
+    return None
+
+
+def accepted_stage_before_agent_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    Before-agent callback that skips a stage whose output an earlier attempt already had accepted.
+
+    The accepted output is in the session's initial state; it becomes the agent's
+    reply, so the later agents see it as if the agent had run.
+    """
+    stage = callback_context.agent_name
+    if stage not in (callback_context.state.get(state_keys.CASCADE_ACCEPTED_STAGES) or []):
+        return None
+    output = str(callback_context.state.get(STAGE_OUTPUT_KEYS[stage]) or "")
+    if not output.strip():
+        return None
+    return types.Content(role="model", parts=[types.Part(text=output)])
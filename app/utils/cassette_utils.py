@@ -0,0 +1,321 @@
+"""Record and replay model and search interactions of a real run ("cassettes").
+
+A cassette is a gzip-compressed JSON-lines file: a header line, then one line
+per model call (the LlmResponses it yielded) or ddgs.text call (its results),
+each with its latency and a key derived from the request. Replaying serves the
+recorded responses in place of Gemini and DDGS, with the original latencies
+scaled by a time factor, so the rest of the pipeline (call_root_agent_async,
+parsing, outputs) runs offline on real data.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Iterable, List, Optional
+
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+from app.configs.app import logger
+from app.utils.agent_utils import iter_llm_agents
+from app.utils.search_utils import set_search_client_factory
+
+CASSETTE_VERSION = 1
+
+# Label ADK attaches to every model request with the calling agent's name
+ADK_AGENT_NAME_LABEL = "adk_agent_name"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay when a request was never recorded."""
+
+
+def model_request_key(model_name: str, llm_request: LlmRequest) -> str:
+    """
+    Key a model request by its model, calling agent and conversation.
+
+    Function call ids (random per run) and the system instruction (moved into a
+    context cache when caching is on) are left out, so the same conversation
+    gets the same key with and without context caching.
+
+    Args:
+        model_name: Name of the model being called
+        llm_request: The request
+
+    Returns:
+        Hex digest of the normalized request
+    """
+    contents = []
+    for content in llm_request.contents:
+        parts = []
+        for part in content.parts or []:
+            if part.thought:
+                continue
+            if part.text is not None:
+                parts.append({"text": part.text})
+            elif part.function_call is not None:
+                parts.append({"call": part.function_call.name, "args": part.function_call.args or {}})
+            elif part.function_response is not None:
+                parts.append({"response": part.function_response.name, "value": part.function_response.response or {}})
+        contents.append({"role": content.role, "parts": parts})
+    labels = llm_request.config.labels or {}
+    payload = {"model": model_name, "agent": labels.get(ADK_AGENT_NAME_LABEL, ""), "contents": contents}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def search_request_key(query: str, max_results: Optional[int]) -> str:
+    """Key a ddgs.text call by its query and result limit."""
+    return f"{query}\x1f{max_results}"
+
+
+class Cassette:
+    """
+    Interactions of one run, keyed by request, written to or read from a gzip JSONL file.
+
+    Repeated requests (retries, identical searches) are kept in call order and
+    served back in the same order; the last one is repeated once they run out.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str,
+        time_scale: float = 1.0,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Args:
+            path: Cassette file (conventionally *.jsonl.gz)
+            mode: "record" (overwrites path) or "replay"
+            time_scale: Replay latency factor: 1.0 original timing, 0.1 ten
+                        times faster, 0 no delay
+            metadata: Run details stored in the header when recording (e.g. the
+                      roster and agent mode); read back from the file in replay
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Invalid cassette mode: {mode}. Supported: 'record', 'replay'")
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Deque[Dict[str, Any]]]] = {"model": defaultdict(deque), "search": defaultdict(deque)}
+        self._last: Dict[str, Dict[str, Dict[str, Any]]] = {"model": {}, "search": {}}
+        self.recorded = {"model": 0, "search": 0}
+        self.replayed = {"model": 0, "search": 0}
+        self._file = None
+        if mode == "record":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({
+                "kind": "header",
+                "version": CASSETTE_VERSION,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "metadata": self.metadata,
+            })
+        else:
+            self._load()
+
+    def _write(self, line: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(line, separators=(",", ":"), default=str) + "\n")
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for raw in f:
+                line = json.loads(raw)
+                if line["kind"] == "header":
+                    if line.get("version") != CASSETTE_VERSION:
+                        raise ValueError(f"Unsupported cassette version {line.get('version')} in {self.path}")
+                    self.metadata = line.get("metadata", {})
+                    continue
+                self._entries[line["kind"]][line["key"]].append(line)
+        logger.info(
+            "Loaded cassette %s: %s model calls, %s searches",
+            self.path,
+            sum(len(entries) for entries in self._entries["model"].values()),
+            sum(len(entries) for entries in self._entries["search"].values()),
+        )
+
+    def record(self, kind: str, key: str, latency: float, **payload: Any) -> None:
+        """Append one interaction to the cassette file."""
+        with self._lock:
+            self._write({"kind": kind, "key": key, "latency": round(latency, 4), **payload})
+            self.recorded[kind] += 1
+
+    def next(self, kind: str, key: str, description: str) -> Dict[str, Any]:
+        """
+        Return the next recorded interaction for a request.
+
+        Raises:
+            CassetteMissError: If the request was never recorded
+        """
+        with self._lock:
+            entries = self._entries[kind].get(key)
+            if entries:
+                entry = entries.popleft()
+                self._last[kind][key] = entry
+            elif key in self._last[kind]:
+                entry = self._last[kind][key]
+            else:
+                raise CassetteMissError(f"No recorded {kind} interaction for {description} in {self.path}")
+            self.replayed[kind] += 1
+        return entry
+
+    def delay(self, latency: float) -> float:
+        """Replay delay for a recorded latency."""
+        return max(0.0, latency * self.time_scale)
+
+    def close(self) -> None:
+        """Finish the cassette file (recording only)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def format_report(self) -> str:
+        counts = self.recorded if self.mode == "record" else self.replayed
+        verb = "Recorded" if self.mode == "record" else "Replayed"
+        return f"{verb} {counts['model']} model calls and {counts['search']} searches ({self.path})"
+
+
+class RecordingLlm(BaseLlm):
+    """Wraps a real model and records every response it yields to a cassette."""
+
+    inner: Any
+    _cassette: Cassette = PrivateAttr()
+
+    def __init__(self, inner: BaseLlm, cassette: Cassette) -> None:
+        super().__init__(model=inner.model, inner=inner)
+        self._cassette = cassette
+
+    @property
+    def api_client(self) -> Any:
+        # Lets the context cache create caches through the wrapped model's client
+        return getattr(self.inner, "api_client", None)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = model_request_key(self.model, llm_request)
+        agent_name = (llm_request.config.labels or {}).get(ADK_AGENT_NAME_LABEL, "")
+        responses: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                # Dumped before ADK adds function call ids to the content
+                responses.append(response.model_dump(mode="json", exclude_none=True))
+                yield response
+        except Exception as e:
+            self._cassette.record(
+                "model", key, time.perf_counter() - start,
+                agent=agent_name, model=self.model, responses=responses, error=f"{type(e).__name__}: {e}",
+            )
+            raise
+        self._cassette.record(
+            "model", key, time.perf_counter() - start, agent=agent_name, model=self.model, responses=responses,
+        )
+
+
+class ReplayLlm(BaseLlm):
+    """Serves recorded responses from a cassette in place of a model."""
+
+    _cassette: Cassette = PrivateAttr()
+
+    def __init__(self, model: str, cassette: Cassette) -> None:
+        super().__init__(model=model)
+        self._cassette = cassette
+
+    @property
+    def api_client(self) -> None:
+        # No context caching in replay; requests are keyed without the system instruction
+        return None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent_name = (llm_request.config.labels or {}).get(ADK_AGENT_NAME_LABEL, "")
+        entry = self._cassette.next(
+            "model",
+            model_request_key(self.model, llm_request),
+            f"{agent_name or 'model'} request ({self.model})",
+        )
+        await asyncio.sleep(self._cassette.delay(entry["latency"]))
+        for response in entry["responses"]:
+            yield LlmResponse.model_validate(response)
+        if entry.get("error"):
+            raise RuntimeError(f"Replayed model failure: {entry['error']}")
+
+
+class RecordingSearchClient:
+    """Wraps a DDGS client and records every text() call to a cassette."""
+
+    def __init__(self, inner: Any, cassette: Cassette) -> None:
+        self.inner = inner
+        self.cassette = cassette
+
+    def text(self, query: str, max_results: Optional[int] = None, **kwargs: Any) -> List[Dict[str, str]]:
+        key = search_request_key(query, max_results)
+        start = time.perf_counter()
+        try:
+            results = list(self.inner.text(query, max_results=max_results, **kwargs) or [])
+        except Exception as e:
+            self.cassette.record("search", key, time.perf_counter() - start, results=[], error=f"{type(e).__name__}: {e}")
+            raise
+        self.cassette.record("search", key, time.perf_counter() - start, results=results)
+        return results
+
+
+class ReplaySearchClient:
+    """Serves recorded ddgs.text results from a cassette."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+
+    def text(self, query: str, max_results: Optional[int] = None, **kwargs: Any) -> List[Dict[str, str]]:
+        entry = self.cassette.next("search", search_request_key(query, max_results), f"search {query!r}")
+        time.sleep(self.cassette.delay(entry["latency"]))
+        if entry.get("error"):
+            raise RuntimeError(f"Replayed search failure: {entry['error']}")
+        return entry["results"]
+
+
+def install_cassette(
+    cassette: Cassette,
+    root_agents: Iterable[Any],
+    search_client_factory: Optional[Callable[[], Any]] = None,
+) -> None:
+    """
+    Route the model calls of the given agent trees and all ddgs.text calls through a cassette.
+
+    Every LlmAgent keeps its own model name: recording wraps its model,
+    replay replaces it. The agents are module-level singletons, so this affects
+    every runner built from them.
+
+    Args:
+        cassette: Cassette in "record" or "replay" mode
+        root_agents: Roots of the agent trees to route (e.g. the root agent and
+                     the batch formatter agent)
+        search_client_factory: Factory of the real search client when recording
+                               (defaults to DDGS)
+    """
+    for root_agent in root_agents:
+        for agent in iter_llm_agents(root_agent):
+            model = agent.canonical_model
+            if cassette.mode == "record":
+                agent.model = RecordingLlm(model, cassette)
+            else:
+                agent.model = ReplayLlm(model.model, cassette)
+
+    if cassette.mode == "record":
+        if search_client_factory is None:
+            from ddgs import DDGS
+            search_client_factory = DDGS
+        set_search_client_factory(lambda: RecordingSearchClient(search_client_factory(), cassette))
+    else:
+        set_search_client_factory(lambda: ReplaySearchClient(cassette))
@@ -0,0 +1,339 @@
+"""Run-wide explicit context caching of the sub-agents' static instructions.
+
+Every alumnus runs in a new ADK session, so ADK's session-scoped context cache
+never reuses a cache across the roster. Here the static part of each request
+(system instruction, tool declarations, tool config) is registered once as a
+cached content, keyed by its fingerprint, and every later request with the same
+prefix references the cache instead of resending it. The agents put their long
+prompts in ``static_instruction`` so this prefix does not change between alumni.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from app.configs.app import logger
+from app.configs.llms import (
+    CONTEXT_CACHE_ENABLED,
+    CONTEXT_CACHE_MIN_TOKENS,
+    CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+    CONTEXT_CACHE_RETRY_SECONDS,
+    CONTEXT_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass
+class CacheEntry:
+    """A cached content registered for one static request prefix."""
+
+    name: str
+    model: str
+    agent_name: str
+    client: Any
+    expire_time: float
+    token_count: int
+
+
+def static_prefix_fingerprint(model: str, llm_request: LlmRequest) -> str:
+    """Fingerprint of the parts of a request that go into a cache (model, instruction, tools)."""
+    config = llm_request.config
+    payload = {
+        "model": model,
+        "system_instruction": config.system_instruction,
+        "tools": [tool.model_dump() for tool in config.tools or [] if isinstance(tool, types.Tool)],
+        "tool_config": config.tool_config.model_dump() if config.tool_config else None,
+    }
+    return hashlib.sha256(str(payload).encode()).hexdigest()[:16]
+
+
+def estimate_prefix_tokens(llm_request: LlmRequest, chars_per_token: int = 4) -> int:
+    """Rough token count of the system instruction and tool declarations."""
+    config = llm_request.config
+    chars = len(config.system_instruction) if isinstance(config.system_instruction, str) else 0
+    for tool in config.tools or []:
+        if isinstance(tool, types.Tool):
+            chars += len(tool.model_dump_json(exclude_none=True))
+    return chars // chars_per_token
+
+
+class StaticContextCache:
+    """
+    Registry of cached contents for static request prefixes, shared by all sessions of a run.
+
+    A cache is created the first time a prefix is seen, extended when less than
+    the refresh margin of its TTL is left, and deleted by close(). Concurrent
+    requests with the same prefix wait for a single creation. Prompt tokens served
+    from a cache vs. sent inline are counted per agent.
+
+    Caches are server-side and shared across event loops, but genai clients (their
+    httpx connections) and asyncio locks belong to the loop they were made on, so
+    both are kept per running loop and dropped once that loop is closed.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CONTEXT_CACHE_ENABLED,
+        ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS,
+        refresh_margin_seconds: int = CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+        min_tokens: int = CONTEXT_CACHE_MIN_TOKENS,
+        retry_seconds: int = CONTEXT_CACHE_RETRY_SECONDS,
+    ) -> None:
+        """
+        Args:
+            enabled: Use caches at all (usage is still counted when disabled)
+            ttl_seconds: Lifetime of a created or extended cache
+            refresh_margin_seconds: Extend a cache when less than this is left
+            min_tokens: Prefixes estimated below this are sent inline
+            retry_seconds: After a failed creation, send the prefix inline this long
+        """
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.min_tokens = min_tokens
+        self.retry_seconds = retry_seconds
+        self._entries: Dict[str, CacheEntry] = {}
+        # Running loop -> model name -> genai client, and -> prefix key -> creation lock
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[str, Any]] = {}
+        self._creation_locks: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._stats_lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self.caches_created = 0
+        self.caches_refreshed = 0
+
+    async def apply(self, model: Any, agent_name: str, llm_request: LlmRequest) -> Optional[str]:
+        """
+        Point a request at the cache for its static prefix, creating or extending the cache if needed.
+
+        The request's system instruction, tools and tool config are removed when a
+        cache is used. Requests for models without a genai client, small prefixes
+        and prefixes whose cache could not be created are left unchanged.
+
+        Args:
+            model: The agent's resolved model (a Gemini instance or a stand-in with ``api_client``)
+            agent_name: Calling agent, for the per-agent report
+            llm_request: Request about to be sent (modified in place)
+
+        Returns:
+            Name of the cache used, or None if the request was left unchanged
+        """
+        config = llm_request.config
+        if not self.enabled or config.cached_content or not config.system_instruction:
+            return None
+        client = self._client_for(model)
+        if client is None or estimate_prefix_tokens(llm_request) < self.min_tokens:
+            return None
+
+        model_name = llm_request.model or getattr(model, "model", "")
+        key = static_prefix_fingerprint(model_name, llm_request)
+        if self._failed_until.get(key, 0.0) > time.time():
+            return None
+
+        loop_locks = self._creation_locks.setdefault(asyncio.get_running_loop(), {})
+        lock = loop_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None and entry.expire_time - now < self.refresh_margin_seconds:
+                entry = await self._refresh(client, key, entry)
+            if entry is None:
+                entry = await self._create(client, key, model_name, agent_name, llm_request)
+            if entry is None:
+                return None
+
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+        config.cached_content = entry.name
+        return entry.name
+
+    def _client_for(self, model: Any) -> Any:
+        """
+        genai client of a model, reused per model name on the running loop.
+
+        ADK builds a new Gemini instance per request, so without reuse every request
+        would open a new client; a client from another (possibly closed) loop cannot
+        be used.
+        """
+        model_name = getattr(model, "model", None)
+        if model_name is None:
+            return None
+        self._drop_closed_loops()
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        if model_name not in clients:
+            try:
+                clients[model_name] = getattr(model, "api_client", None)
+            except Exception as e:
+                logger.warning("No genai client for %s, context caching disabled for it: %s", model_name, e)
+                clients[model_name] = None
+        return clients[model_name]
+
+    def _drop_closed_loops(self) -> None:
+        """Forget clients and locks of event loops that have been closed."""
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+        for loop in [loop for loop in self._creation_locks if loop.is_closed()]:
+            del self._creation_locks[loop]
+
+    async def _create(
+        self,
+        client: Any,
+        key: str,
+        model_name: str,
+        agent_name: str,
+        llm_request: LlmRequest,
+    ) -> Optional[CacheEntry]:
+        config = llm_request.config
+        try:
+            cached_content = await client.aio.caches.create(
+                model=model_name,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name=f"{agent_name}-static-{key}",
+                ),
+            )
+        except Exception as e:
+            logger.warning("Could not create context cache for %s, sending instructions inline: %s", agent_name, e)
+            self._failed_until[key] = time.time() + self.retry_seconds
+            return None
+
+        usage = cached_content.usage_metadata
+        entry = CacheEntry(
+            name=cached_content.name,
+            model=model_name,
+            agent_name=agent_name,
+            client=client,
+            expire_time=time.time() + self.ttl_seconds,
+            token_count=(usage.total_token_count or 0) if usage else 0,
+        )
+        self._entries[key] = entry
+        with self._stats_lock:
+            self.caches_created += 1
+        logger.info("Created context cache %s for %s (%s tokens)", entry.name, agent_name, entry.token_count)
+        return entry
+
+    async def _refresh(self, client: Any, key: str, entry: CacheEntry) -> Optional[CacheEntry]:
+        """Extend a cache's TTL; on failure, forget it so a new one is created."""
+        try:
+            await client.aio.caches.update(
+                name=entry.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+        except Exception as e:
+            logger.warning("Could not extend context cache %s, creating a new one: %s", entry.name, e)
+            del self._entries[key]
+            return None
+        entry.expire_time = time.time() + self.ttl_seconds
+        with self._stats_lock:
+            self.caches_refreshed += 1
+        return entry
+
+    def record_usage(self, agent_name: str, usage: Optional[types.GenerateContentResponseUsageMetadata]) -> None:
+        """Count the prompt tokens of one model response, split into cached and uncached."""
+        if usage is None:
+            return
+        prompt = usage.prompt_token_count or 0
+        cached = usage.cached_content_token_count or 0
+        with self._stats_lock:
+            counts = self._usage.setdefault(agent_name, {"calls": 0, "prompt": 0, "cached": 0})
+            counts["calls"] += 1
+            counts["prompt"] += prompt
+            counts["cached"] += cached
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize prompt tokens per agent.
+
+        Returns:
+            Dict of agent name -> calls, prompt tokens, cached tokens, uncached tokens
+            and the cached fraction
+        """
+        with self._stats_lock:
+            return {
+                agent_name: {
+                    "calls": counts["calls"],
+                    "prompt_tokens": counts["prompt"],
+                    "cached_tokens": counts["cached"],
+                    "uncached_tokens": counts["prompt"] - counts["cached"],
+                    "cached_fraction": counts["cached"] / counts["prompt"] if counts["prompt"] else 0.0,
+                }
+                for agent_name, counts in sorted(self._usage.items())
+            }
+
+    def format_report(self) -> str:
+        """Render report() as a plain-text table."""
+        report = self.report()
+        if not report:
+            return "No context cache data recorded."
+        lines = [f"{'Agent':<30} {'Calls':>6} {'Prompt':>10} {'Cached':>10} {'Uncached':>10} {'Cached %':>9}"]
+        for agent_name, row in report.items():
+            lines.append(
+                f"{agent_name:<30} {row['calls']:>6} {row['prompt_tokens']:>10} {row['cached_tokens']:>10} "
+                f"{row['uncached_tokens']:>10} {row['cached_fraction']:>9.0%}"
+            )
+        lines.append(f"Caches created: {self.caches_created}, extended: {self.caches_refreshed}")
+        return "\n".join(lines)
+
+    async def close(self) -> None:
+        """Delete every cache created in this run (storage is billed until expiry)."""
+        entries = list(self._entries.values())
+        self._entries.clear()
+        clients = self._clients.get(asyncio.get_running_loop(), {})
+        for entry in entries:
+            # Prefer this loop's client; the creating loop's may be closed by now
+            client = clients.get(entry.model) or entry.client
+            try:
+                await client.aio.caches.delete(name=entry.name)
+            except Exception as e:
+                logger.warning("Could not delete context cache %s: %s", entry.name, e)
+
+    def reset(self) -> None:
+        """Forget caches, clients and counters without deleting anything remotely."""
+        self._entries.clear()
+        self._clients.clear()
+        self._creation_locks.clear()
+        self._failed_until.clear()
+        with self._stats_lock:
+            self._usage.clear()
+            self.caches_created = 0
+            self.caches_refreshed = 0
+
+
+# Shared registry used by every sub-agent's cache callbacks
+static_context_cache = StaticContextCache()
+
+
+async def context_cache_before_model_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+) -> Optional[LlmResponse]:
+    """
+    Before-model callback that moves the static prefix of a request into the run-wide cache.
+
+    Must be the last before-model callback, after anything that edits the instruction.
+    """
+    if not static_context_cache.enabled:
+        return None
+    model = callback_context._invocation_context.agent.canonical_model
+    await static_context_cache.apply(model, callback_context.agent_name, llm_request)
+    return None
+
+
+def context_cache_after_model_callback(
+    callback_context: CallbackContext,
+    llm_response: LlmResponse,
+) -> Optional[LlmResponse]:
+    """After-model callback that counts cached vs. uncached prompt tokens per agent."""
+    static_context_cache.record_usage(callback_context.agent_name, llm_response.usage_metadata)
+    return None
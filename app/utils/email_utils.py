@@ -0,0 +1,350 @@
+"""Email candidate extraction and scoring for the email finder agent.
+
+The email finder starts from what an alumni researcher run already resolved: the
+stored practice URLs and the domains of their institutions. Emails found on those
+pages (or, for what they do not answer, in new searches restricted to the
+institution domains) are scored locally against the alumnus's name and domains,
+so that an unambiguous email needs no model call at all.
+"""
+
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.configs.app import logger
+from app.configs.http import URL_VERIFICATION_USER_AGENT
+from app.configs.llms import (
+    EMAIL_FINDER_AUTO_SELECT_MIN_MARGIN,
+    EMAIL_FINDER_AUTO_SELECT_MIN_SCORE,
+    EMAIL_FINDER_MAX_PAGES,
+    EMAIL_FINDER_PAGE_TIMEOUT_SECONDS,
+    EMAIL_FINDER_SEARCH_RESULTS,
+)
+from app.utils.institution_utils import InstitutionIndex, registrable_domain, split_csv_field
+from app.utils.search_utils import name_tokens, search_web
+
+EMAIL_PATTERN = re.compile(r"(?<![\w.+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+# "jane.doe [at] yale [dot] edu" and similar spellings used against scrapers
+_OBFUSCATED_AT = re.compile(r"\s*[\[({]\s*at\s*[\])}]\s*", re.IGNORECASE)
+_OBFUSCATED_DOT = re.compile(r"\s*[\[({]\s*dot\s*[\])}]\s*", re.IGNORECASE)
+# File names that look like emails ("logo@2x.png")
+_ASSET_SUFFIX = re.compile(r"\.(?:png|jpe?g|gif|svg|webp|css|js)$", re.IGNORECASE)
+
+# Shared mailboxes, never a person's own address
+GENERIC_LOCAL_PARTS = {
+    "admin", "appointments", "careers", "contact", "feedback", "help", "hr", "info",
+    "jobs", "marketing", "media", "news", "no-reply", "noreply", "office", "press",
+    "privacy", "radiology", "referrals", "support", "webmaster",
+}
+FREE_MAIL_DOMAINS = {"aol.com", "gmail.com", "hotmail.com", "icloud.com", "outlook.com", "yahoo.com"}
+
+
+def extract_emails(text: str) -> List[str]:
+    """
+    Find the distinct personal-looking email addresses in a page or snippet.
+
+    Args:
+        text: HTML or plain text
+
+    Returns:
+        Lowercase addresses in order of first appearance, without shared mailboxes
+        and asset file names
+    """
+    text = _OBFUSCATED_DOT.sub(".", _OBFUSCATED_AT.sub("@", text or ""))
+    emails: List[str] = []
+    for match in EMAIL_PATTERN.findall(text):
+        email = match.lower().strip(".")
+        local = email.split("@", 1)[0]
+        if _ASSET_SUFFIX.search(email) or local in GENERIC_LOCAL_PARTS or email in emails:
+            continue
+        emails.append(email)
+    return emails
+
+
+async def _fetch_page_html(client: httpx.AsyncClient, url: str) -> str:
+    response = await client.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+# Fetches a page's HTML with a shared client. Offline tooling (benchmarks, replay)
+# swaps it via set_page_fetcher.
+_page_fetcher: Callable[[httpx.AsyncClient, str], Awaitable[str]] = _fetch_page_html
+
+
+def set_page_fetcher(fetcher: Optional[Callable[[httpx.AsyncClient, str], Awaitable[str]]] = None) -> None:
+    """
+    Replace the coroutine used to fetch practice pages.
+
+    Args:
+        fetcher: Async callable (client, url) -> HTML. Pass None to restore the
+                 default HTTP fetch.
+    """
+    global _page_fetcher
+    _page_fetcher = fetcher if fetcher is not None else _fetch_page_html
+
+
+async def collect_page_email_candidates(
+    urls: List[str],
+    max_pages: int = EMAIL_FINDER_MAX_PAGES,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch stored practice pages and collect the emails on them.
+
+    Pages that fail to load are skipped (the agent can still search).
+
+    Args:
+        urls: Practice URLs from the stored record, best first
+        max_pages: Maximum number of pages fetched
+
+    Returns:
+        Candidates as dicts with email, source (the page URL) and on_practice_page=True
+    """
+    candidates: List[Dict[str, Any]] = []
+    urls = [url if "://" in url else f"https://{url}" for url in urls if url][:max_pages]
+    if not urls:
+        return candidates
+    async with httpx.AsyncClient(
+        timeout=EMAIL_FINDER_PAGE_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        headers={"User-Agent": URL_VERIFICATION_USER_AGENT},
+    ) as client:
+        for url in urls:
+            try:
+                html = await _page_fetcher(client, url)
+            except Exception as e:
+                logger.info("Could not fetch practice page %s: %s", url, e)
+                continue
+            email_finder_stats.record_page()
+            for email in extract_emails(html):
+                candidates.append({"email": email, "source": url, "on_practice_page": True})
+    return candidates
+
+
+def search_email_candidates(
+    full_name: str,
+    domains: List[str],
+    max_results: int = EMAIL_FINDER_SEARCH_RESULTS,
+) -> List[Dict[str, Any]]:
+    """
+    Search for a person's email, one search per institution domain (or one broad search).
+
+    Args:
+        full_name: Full name of the alumnus
+        domains: Institution domains to restrict the searches to; empty for a broad search
+        max_results: Results per search
+
+    Returns:
+        Candidates as dicts with email, source (the result URL) and on_practice_page=False
+    """
+    queries = [f'"{full_name}" email {domain}' for domain in domains] or [f'"{full_name}" radiologist email']
+    candidates: List[Dict[str, Any]] = []
+    for query in queries:
+        email_finder_stats.record_search()
+        for result in search_web(query, max_results=max_results):
+            for email in extract_emails(f"{result['title']} {result['body']}"):
+                candidates.append({"email": email, "source": result["href"], "on_practice_page": False})
+    return candidates
+
+
+def score_email_candidate(full_name: str, email: str, institution_domains: List[str], on_practice_page: bool) -> float:
+    """
+    Score how likely an email is the alumnus's own work address.
+
+    The local part matching the last name counts most (+4, +2 more with the first
+    name, +1 with only its initial), then an institution domain (+3) and being on
+    the alumnus's own practice page (+1). Free webmail loses a point.
+
+    Args:
+        full_name: Full name of the alumnus
+        email: Lowercase email address
+        institution_domains: Registrable domains of the alumnus's institutions
+        on_practice_page: Whether the email was found on a stored practice page
+
+    Returns:
+        Score from -1 to 10
+    """
+    local, _, domain = email.partition("@")
+    compact_local = re.sub(r"[^a-z]", "", local)
+    tokens = name_tokens(full_name)
+    score = 0.0
+    if tokens and len(tokens) >= 2 and tokens[-1] in compact_local:
+        score += 4
+        first = tokens[0]
+        if first in compact_local:
+            score += 2
+        elif compact_local.startswith(first[0]) or compact_local.endswith(first[0]):
+            score += 1
+    if registrable_domain(domain) in institution_domains:
+        score += 3
+    if on_practice_page:
+        score += 1
+    if domain in FREE_MAIL_DOMAINS:
+        score -= 1
+    return score
+
+
+def rank_email_candidates(
+    full_name: str,
+    candidates: List[Dict[str, Any]],
+    institution_domains: List[str],
+) -> List[Dict[str, Any]]:
+    """
+    Merge candidates by address and sort them by score.
+
+    Args:
+        full_name: Full name of the alumnus
+        candidates: Raw candidates (email, source, on_practice_page)
+        institution_domains: Registrable domains of the alumnus's institutions
+
+    Returns:
+        One dict per address with email, score, name_match (last name in the local
+        part) and sources, highest score first
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    last_name = (name_tokens(full_name) or [""])[-1]
+    for candidate in candidates:
+        email = candidate["email"]
+        entry = merged.setdefault(email, {
+            "email": email,
+            "score": float("-inf"),
+            "name_match": bool(last_name) and last_name in re.sub(r"[^a-z]", "", email.split("@", 1)[0]),
+            "sources": [],
+        })
+        entry["score"] = max(
+            entry["score"],
+            score_email_candidate(full_name, email, institution_domains, candidate.get("on_practice_page", False)),
+        )
+        if candidate.get("source") and candidate["source"] not in entry["sources"]:
+            entry["sources"].append(candidate["source"])
+    return sorted(merged.values(), key=lambda entry: (-entry["score"], entry["email"]))
+
+
+def resolve_email_candidates(
+    ranked: List[Dict[str, Any]],
+    min_score: float = EMAIL_FINDER_AUTO_SELECT_MIN_SCORE,
+    min_margin: float = EMAIL_FINDER_AUTO_SELECT_MIN_MARGIN,
+) -> Optional[Dict[str, Any]]:
+    """
+    Pick the best candidate when it is unambiguous.
+
+    Args:
+        ranked: Output of rank_email_candidates
+        min_score: Minimum score of the best candidate
+        min_margin: Minimum lead over the runner-up
+
+    Returns:
+        The best candidate, or None if the choice is left to the agent
+    """
+    if not ranked or ranked[0]["score"] < min_score:
+        return None
+    if len(ranked) > 1 and ranked[0]["score"] - ranked[1]["score"] < min_margin:
+        return None
+    return ranked[0]
+
+
+def format_email_candidates_table(ranked: List[Dict[str, Any]], top_k: int) -> str:
+    """Render the top candidates as a compact table for the agent."""
+    if not ranked:
+        return "No candidate emails found."
+    lines = ["email | score | found on"]
+    for entry in ranked[:top_k]:
+        lines.append(f"{entry['email']} | {entry['score']:g} | {', '.join(entry['sources'][:2])}")
+    return "\n".join(lines)
+
+
+def build_email_research(record: Optional[Any], index: InstitutionIndex) -> Dict[str, Any]:
+    """
+    Extract what the email finder reuses from a stored alumni researcher record.
+
+    Args:
+        record: Stored AlumniResearcherOutputSchema, or None if the alumnus was never researched
+        index: Institution index, for the other known domains of each practice
+
+    Returns:
+        Dict with practice_urls, institution_domains and a short text summary
+        (all empty without a record)
+    """
+    if record is None:
+        return {"practice_urls": [], "institution_domains": [], "summary": ""}
+    names = split_csv_field(record.current_practices_names or "")
+    urls = split_csv_field(record.current_practices_urls or "")
+    urls += [""] * (len(names) - len(urls))
+    domains: List[str] = []
+    for name, url in zip(names, urls):
+        for domain in index.domains(name, url):
+            if domain not in domains:
+                domains.append(domain)
+    practice_urls = [url for url in urls if url]
+    practices = ", ".join(f"{name} ({url})" if url else name for name, url in zip(names, urls))
+    summary_lines = [
+        f"Practices: {practices or 'none found'}",
+        f"Institution domains: {', '.join(domains) or 'unknown'}",
+    ]
+    if record.current_practice_narrative:
+        summary_lines.append(f"Narrative: {record.current_practice_narrative}")
+    return {"practice_urls": practice_urls, "institution_domains": domains, "summary": "\n".join(summary_lines)}
+
+
+class EmailFinderStats:
+    """Thread-safe counters for how much of the email lookup the stored research covered."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.rows = 0
+            self.rows_with_research = 0
+            self.rows_resolved = 0
+            self.pages_fetched = 0
+            self.searches = 0
+
+    def record_row(self, has_research: bool, resolved: bool) -> None:
+        """
+        Count one alumnus passed through the local resolver.
+
+        Args:
+            has_research: The alumnus had a stored alumni researcher record
+            resolved: The email was chosen without a model call
+        """
+        with self._lock:
+            self.rows += 1
+            self.rows_with_research += has_research
+            self.rows_resolved += resolved
+
+    def record_page(self) -> None:
+        with self._lock:
+            self.pages_fetched += 1
+
+    def record_search(self) -> None:
+        with self._lock:
+            self.searches += 1
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the email finder's reuse of stored research.
+
+        Returns:
+            Dict with rows, rows with stored research, rows resolved without the
+            model, practice pages fetched and new searches
+        """
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "rows_with_stored_research": self.rows_with_research,
+                "rows_resolved_without_llm": self.rows_resolved,
+                "practice_pages_fetched": self.pages_fetched,
+                "new_searches": self.searches,
+            }
+
+    def format_report(self) -> str:
+        report = self.report()
+        return "\n".join(f"{key.replace('_', ' ').capitalize():<28} {value}" for key, value in report.items())
+
+
+# Shared stats reported by the email finder run
+email_finder_stats = EmailFinderStats()
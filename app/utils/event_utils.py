@@ -0,0 +1,145 @@
+"""Per-event processing pipeline for agent runs.
+
+call_root_agent_async feeds every event of a run through an EventPipeline of
+independent handlers: token accounting, final-response capture and (only when
+the app logger is at DEBUG) part-by-part tracing. Handlers that are disabled
+are dropped when the pipeline is built, so they cost nothing per event.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.configs.app import logger
+
+# Integer usage fields summed across the events of a run
+TOKEN_COUNT_FIELDS = (
+    "total_token_count",
+    "prompt_token_count",
+    "candidates_token_count",
+    "cached_content_token_count",
+    "thoughts_token_count",
+)
+
+
+class EventHandler:
+    """
+    One stage of the event pipeline.
+
+    Subclasses implement handle(), and finish() if they need to act once the
+    run is over; a handler whose ``enabled`` is False when the pipeline is built
+    is left out of it entirely.
+    """
+
+    enabled: bool = True
+
+    def handle(self, event: Any) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        """Called once after the last event."""
+
+
+class TokenAccountingHandler(EventHandler):
+    """Sum token usage across events and keep the per-event counts."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, int] = dict.fromkeys(TOKEN_COUNT_FIELDS, 0)
+        self.cache_tokens_by_modality: Dict[str, int] = {}
+        self.prompt_tokens_by_modality: Dict[str, int] = {}
+        self.event_details: List[Dict[str, Any]] = []
+
+    def handle(self, event: Any) -> None:
+        usage = event.usage_metadata
+        if usage is None:
+            return
+        counts = {
+            "total_token_count": usage.total_token_count or 0,
+            "prompt_token_count": usage.prompt_token_count or 0,
+            "candidates_token_count": usage.candidates_token_count or 0,
+            "cached_content_token_count": usage.cached_content_token_count or 0,
+            "thoughts_token_count": usage.thoughts_token_count or 0,
+        }
+        totals = self.totals
+        for key, value in counts.items():
+            totals[key] += value
+        if usage.cache_tokens_details:
+            _add_modality_counts(self.cache_tokens_by_modality, usage.cache_tokens_details)
+        if usage.prompt_tokens_details:
+            _add_modality_counts(self.prompt_tokens_by_modality, usage.prompt_tokens_details)
+        self.event_details.append({"event_id": event.id, "author": event.author, "token_counts": counts})
+
+    def token_counts(self) -> Dict[str, Any]:
+        """Accumulated counts in the format call_root_agent_async returns."""
+        return {
+            **self.totals,
+            "cache_tokens_by_modality": dict(self.cache_tokens_by_modality),
+            "prompt_tokens_by_modality": dict(self.prompt_tokens_by_modality),
+            "event_details": self.event_details,
+        }
+
+
+def _add_modality_counts(totals: Dict[str, int], details: Iterable[Any]) -> None:
+    for item in details:
+        modality = item.modality.name if hasattr(item.modality, "name") else str(item.modality)
+        modality = modality.lower()
+        totals[modality] = totals.get(modality, 0) + (item.token_count or 0)
+
+
+class FinalResponseHandler(EventHandler):
+    """Keep the text of the last final response that has text."""
+
+    def __init__(self) -> None:
+        self.text: Optional[str] = None
+
+    def handle(self, event: Any) -> None:
+        if not event.is_final_response():
+            return
+        parts = event.content.parts if event.content else None
+        text = parts[0].text if parts else None
+        if text and text.strip():
+            self.text = text.strip()
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Final response from %s has no text content", event.author)
+
+
+class DebugTraceHandler(EventHandler):
+    """Log every event's parts (code, tool calls and responses, text); enabled only at DEBUG."""
+
+    def __init__(self) -> None:
+        self.enabled = logger.isEnabledFor(logging.DEBUG)
+
+    def handle(self, event: Any) -> None:
+        logger.debug("Event ID: %s, Author: %s", event.id, event.author)
+        if event.usage_metadata is not None:
+            logger.debug("Event %s usage: %s", event.id, event.usage_metadata.model_dump(exclude_none=True))
+        for part in (event.content.parts if event.content else None) or []:
+            if part.executable_code:
+                logger.debug("Agent generated code: %s", part.executable_code.code)
+            elif part.code_execution_result:
+                logger.debug(
+                    "Code Execution Result: %s - Output: %s",
+                    part.code_execution_result.outcome,
+                    part.code_execution_result.output,
+                )
+            elif part.function_call:
+                logger.debug("Function Call: %s", part.function_call.name)
+            elif part.function_response:
+                logger.debug("Function Response: %s", part.function_response.response)
+            elif part.text and not part.text.isspace():
+                logger.debug("Text content: '%s'", part.text.strip())
+
+
+class EventPipeline:
+    """Run each event through the enabled handlers, in order."""
+
+    def __init__(self, handlers: Iterable[EventHandler]) -> None:
+        self.handlers = [handler for handler in handlers if handler.enabled]
+        self._handle = [handler.handle for handler in self.handlers]
+
+    def __call__(self, event: Any) -> None:
+        for handle in self._handle:
+            handle(event)
+
+    def finish(self) -> None:
+        for handler in self.handlers:
+            handler.finish()
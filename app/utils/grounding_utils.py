@@ -0,0 +1,328 @@
+"""Social media candidates from the background information agent's google_search grounding.
+
+The background agent's google_search results often include the alumnus's LinkedIn,
+Doximity or Google Scholar page. Its grounding sources are kept in session state and
+classified by platform when the social media candidates are collected; a platform
+whose grounding already holds a profile URL carrying the full name is not searched
+with DDGS again. Prefetched rows are searched in full before their grounding
+exists, so the collector is off by default, like the search prefetcher is on.
+"""
+
+import asyncio
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from app.agents import state_keys
+from app.configs.app import logger
+from app.configs.http import URL_VERIFICATION_USER_AGENT
+from app.configs.llms import (
+    GROUNDING_CANDIDATES_ENABLED,
+    GROUNDING_MAX_REDIRECTS,
+    GROUNDING_REDIRECT_TIMEOUT_SECONDS,
+    GROUNDING_SNIPPET_CHARS,
+)
+from app.utils.search_utils import (
+    SOCIAL_MEDIA_PLATFORMS,
+    collect_social_media_candidates_async,
+    name_in_url_slug,
+)
+
+# Where the Gemini API points grounding chunk URIs; the real page is the redirect target
+GROUNDING_REDIRECT_HOSTS = {"vertexaisearch.cloud.google.com"}
+
+# ADK's google_search agent tool (bypass_multi_tools_limit) leaves the search's grounding here
+AGENT_TOOL_GROUNDING_KEY = "temp:_adk_grounding_metadata"
+
+
+class GroundingCandidateCollector:
+    """
+    Switch for the grounding candidates and the pooled client their redirects are resolved with.
+
+    httpx connections belong to the event loop that opened them, so a call on
+    another loop (a later asyncio.run) gets a new client. Each client is closed
+    when its loop shuts down (a task asyncio.run cancels on exit) or by aclose().
+    """
+
+    def __init__(self) -> None:
+        self.enabled = GROUNDING_CANDIDATES_ENABLED
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=GROUNDING_REDIRECT_TIMEOUT_SECONDS,
+                follow_redirects=False,
+                headers={"User-Agent": URL_VERIFICATION_USER_AGENT},
+            )
+            self._loop = loop
+            loop.create_task(self._close_on_loop_exit(self._client))
+        return self._client
+
+    async def _close_on_loop_exit(self, client: httpx.AsyncClient) -> None:
+        """Wait until cancelled (asyncio.run cancels leftover tasks on exit), then close the client."""
+        try:
+            await asyncio.Future()
+        finally:
+            if self._client is client:
+                self._client, self._loop = None, None
+            # Closing twice is a no-op, so this is safe after aclose() too
+            await client.aclose()
+
+    async def resolve_redirect(self, uri: str) -> Optional[str]:
+        """
+        Follow one grounding redirect to the page it points at.
+
+        Args:
+            uri: Grounding chunk URI on a GROUNDING_REDIRECT_HOSTS host
+
+        Returns:
+            The redirect target, or None if the request failed or did not redirect
+        """
+        try:
+            response = await self._http_client().head(uri)
+        except httpx.HTTPError as e:
+            logger.warning("Could not resolve grounding redirect %s: %s", uri, e)
+            return None
+        return response.headers.get("Location") if response.is_redirect else None
+
+    async def aclose(self) -> None:
+        """Close the pooled connections (the next redirect creates a new client)."""
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+
+grounding_collector = GroundingCandidateCollector()
+
+
+def extract_grounding_sources(metadata: Optional[types.GroundingMetadata]) -> List[Dict[str, str]]:
+    """
+    List the web sources of a grounded response with the text they support.
+
+    Args:
+        metadata: Grounding metadata of a model response
+
+    Returns:
+        One dict per web chunk with uri, title and text (the response segments
+        citing it, joined)
+    """
+    if metadata is None or not metadata.grounding_chunks:
+        return []
+    texts: Dict[int, List[str]] = {}
+    for support in metadata.grounding_supports or []:
+        segment_text = support.segment.text if support.segment else None
+        if not segment_text:
+            continue
+        for index in support.grounding_chunk_indices or []:
+            texts.setdefault(index, []).append(segment_text)
+    sources = []
+    for index, chunk in enumerate(metadata.grounding_chunks):
+        if chunk.web is None or not chunk.web.uri:
+            continue
+        sources.append({
+            "uri": chunk.web.uri,
+            "title": chunk.web.title or chunk.web.domain or "",
+            "text": " ".join(texts.get(index, [])),
+        })
+    return sources
+
+
+def grounding_sources_after_model_callback(
+    callback_context: CallbackContext,
+    llm_response: LlmResponse,
+) -> Optional[LlmResponse]:
+    """After-model callback that keeps the background agent's grounding sources in session state."""
+    if not grounding_collector.enabled:
+        return None
+    sources = extract_grounding_sources(llm_response.grounding_metadata)
+    sources += extract_grounding_sources(callback_context.state.get(AGENT_TOOL_GROUNDING_KEY))
+    if not sources:
+        return None
+    known = list(callback_context.state.get(state_keys.GROUNDING_SOURCES) or [])
+    known_uris = {source["uri"] for source in known}
+    for source in sources:
+        if source["uri"] not in known_uris:
+            known.append(source)
+            known_uris.add(source["uri"])
+    callback_context.state[state_keys.GROUNDING_SOURCES] = known
+    return None
+
+
+def _platform_for(text: str) -> Optional[str]:
+    """The platform whose URL patterns occur in a URL or domain, if any."""
+    text_lower = text.lower()
+    for platform_name, config in SOCIAL_MEDIA_PLATFORMS.items():
+        if any(pattern in text_lower for pattern in config["url_patterns"]):
+            return platform_name
+    return None
+
+
+async def grounding_candidates(
+    full_name: str,
+    sources: Iterable[Mapping[str, str]],
+) -> Tuple[Dict[str, List[Dict[str, str]]], List[str]]:
+    """
+    Classify grounding sources by platform as social media candidates.
+
+    Redirect URIs are only resolved when their title names a platform's domain
+    (at most GROUNDING_MAX_REDIRECTS per call, resolved concurrently). A platform
+    counts as covered when one of its candidates has the platform's profile URL
+    shape and carries every part of the name; other candidates are kept but do
+    not stop the search.
+
+    Args:
+        full_name: Full name of the alumnus
+        sources: Grounding sources as stored by grounding_sources_after_model_callback
+
+    Returns:
+        Tuple of (candidates per platform with title, href and body; covered
+        platforms), both in SOCIAL_MEDIA_PLATFORMS order
+    """
+    kept: List[Tuple[Mapping[str, str], str]] = []
+    redirects: List[int] = []
+    for source in sources:
+        href = source.get("uri", "")
+        if urlsplit(href).hostname in GROUNDING_REDIRECT_HOSTS:
+            if _platform_for(source.get("title", "")) is None or len(redirects) >= GROUNDING_MAX_REDIRECTS:
+                continue
+            redirects.append(len(kept))
+        kept.append((source, href))
+    targets = await asyncio.gather(*(grounding_collector.resolve_redirect(kept[index][1]) for index in redirects))
+    for index, target in zip(redirects, targets):
+        kept[index] = (kept[index][0], target or "")
+
+    found: Dict[str, List[Dict[str, str]]] = {}
+    for source, href in kept:
+        platform_name = _platform_for(href)
+        if platform_name is None:
+            continue
+        found.setdefault(platform_name, []).append({
+            "title": source.get("title", ""),
+            "href": href,
+            "body": source.get("text", "")[:GROUNDING_SNIPPET_CHARS],
+        })
+    candidates = {name: found[name] for name in SOCIAL_MEDIA_PLATFORMS if name in found}
+    covered = [
+        platform_name
+        for platform_name, results in candidates.items()
+        if any(
+            re.search(SOCIAL_MEDIA_PLATFORMS[platform_name]["profile_url_pattern"], result["href"], re.IGNORECASE)
+            and name_in_url_slug(full_name, result["href"])
+            for result in results
+        )
+    ]
+    return candidates, covered
+
+
+class GroundingCandidateStats:
+    """Thread-safe counters for the DDGS searches the grounding candidates saved."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.rows = 0
+            self.rows_with_candidates = 0
+            self.candidates = 0
+            self.platforms_covered = 0
+            self.searches_saved = 0
+
+    def record(self, candidates: int, platforms_covered: int, searches_saved: int) -> None:
+        """
+        Count one alumnus whose social media candidates were collected.
+
+        Args:
+            candidates: Candidates taken from the grounding sources
+            platforms_covered: Platforms the grounding covered
+            searches_saved: DDGS searches skipped (0 when the row was prefetched)
+        """
+        with self._lock:
+            self.rows += 1
+            self.rows_with_candidates += 1 if candidates else 0
+            self.candidates += candidates
+            self.platforms_covered += platforms_covered
+            self.searches_saved += searches_saved
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize how much the grounding sources contributed.
+
+        Returns:
+            Dict with rows, rows with grounding candidates, candidates, covered
+            platforms and DDGS searches saved (total and per alumnus)
+        """
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "rows_with_candidates": self.rows_with_candidates,
+                "candidates": self.candidates,
+                "platforms_covered": self.platforms_covered,
+                "searches_saved": self.searches_saved,
+                "searches_saved_per_row": self.searches_saved / self.rows if self.rows else 0.0,
+            }
+
+    def format_report(self) -> str:
+        """Render report() as plain text."""
+        report = self.report()
+        if not report["rows"]:
+            return "No grounding candidate data recorded."
+        return (
+            f"Rows with grounding candidates: {report['rows_with_candidates']}/{report['rows']} "
+            f"({report['candidates']} candidates, {report['platforms_covered']} platforms covered)\n"
+            f"DDGS searches saved: {report['searches_saved']} "
+            f"({report['searches_saved_per_row']:.2f} per alumnus)"
+        )
+
+
+grounding_candidate_stats = GroundingCandidateStats()
+
+
+async def collect_candidates_with_grounding(
+    state: Mapping[str, Any],
+    full_name: str,
+    max_links: int,
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Collect a person's social media candidates, searching only the platforms the grounding does not cover.
+
+    Grounding candidates come first in each platform's list. Prefetched results
+    already hold every platform, so they save no searches.
+
+    Args:
+        state: Session state holding the background agent's grounding sources
+        full_name: Full name of the alumnus
+        max_links: Maximum search results per platform
+
+    Returns:
+        Dictionary mapping platform name to its candidates (title, href, body),
+        in SOCIAL_MEDIA_PLATFORMS order
+    """
+    if not grounding_collector.enabled:
+        return await collect_social_media_candidates_async(full_name, max_links)
+    grounded, covered = await grounding_candidates(full_name, state.get(state_keys.GROUNDING_SOURCES) or [])
+    searched = await collect_social_media_candidates_async(full_name, max_links, skip_platforms=covered)
+    results_by_platform: Dict[str, List[Dict[str, str]]] = {}
+    for platform_name in SOCIAL_MEDIA_PLATFORMS:
+        results = list(grounded.get(platform_name, []))
+        seen = {result["href"].rstrip("/").lower() for result in results}
+        for result in searched.get(platform_name, []):
+            if result.get("href", "").rstrip("/").lower() not in seen:
+                results.append(result)
+        results_by_platform[platform_name] = results
+    grounding_candidate_stats.record(
+        candidates=sum(len(results) for results in grounded.values()),
+        platforms_covered=len(covered),
+        searches_saved=sum(1 for platform_name in covered if platform_name not in searched),
+    )
+    return results_by_platform
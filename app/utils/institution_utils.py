@@ -0,0 +1,332 @@
+"""Institution canonicalization index shared across the roster.
+
+The same hospitals and practices recur across hundreds of alumni under slightly
+different names ("Johns Hopkins Hospital", "The Johns Hopkins Hospital", "JHH").
+The index maps names and domains to one canonical entry, learns new aliases as
+rows are processed, and is persisted between runs.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.configs.app import logger
+from app.configs.institutions import (
+    INSTITUTION_GENERIC_DOMAINS,
+    INSTITUTION_HINT_MAX_ENTRIES,
+    INSTITUTION_HINT_MIN_SEEN,
+    INSTITUTION_INDEX_PATH,
+)
+
+# Words that do not distinguish one institution name from another
+_NAME_STOPWORDS = {"the", "of", "at", "and", "inc", "llc", "pc", "pllc", "pa"}
+
+# Second-level labels under which registrations happen one level deeper (e.g. nhs.uk, ac.uk)
+_SECOND_LEVEL_LABELS = {"ac", "co", "com", "edu", "gov", "net", "nhs", "org"}
+
+
+def normalize_institution_name(name: str) -> str:
+    """Lowercase ASCII name with punctuation and filler words removed, for alias matching."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    ascii_name = ascii_name.lower().replace("&", " and ").replace("'s", "s")
+    tokens = re.split(r"[^a-z0-9]+", ascii_name)
+    return " ".join(token for token in tokens if token and token not in _NAME_STOPWORDS)
+
+
+def institution_acronym(name: str) -> str:
+    """Initials of the significant words of a name ("Johns Hopkins Hospital" -> "jhh")."""
+    return "".join(token[0] for token in normalize_institution_name(name).split())
+
+
+def registrable_domain(url: str) -> str:
+    """
+    Approximate the registrable domain of a URL ("https://www.med.yale.edu/x" -> "yale.edu").
+
+    Args:
+        url: URL, with or without scheme
+
+    Returns:
+        Lowercase domain, or "" if the URL has no host
+    """
+    url = url.strip()
+    if not url:
+        return ""
+    host = (urlsplit(url if "://" in url else f"https://{url}").hostname or "").lower()
+    labels = [label for label in host.split(".") if label]
+    if len(labels) <= 2:
+        return ".".join(labels)
+    keep = 3 if labels[-2] in _SECOND_LEVEL_LABELS and len(labels[-1]) == 2 else 2
+    return ".".join(labels[-keep:])
+
+
+def split_csv_field(value: str) -> List[str]:
+    """Split a comma-separated output field, keeping empty positions."""
+    return [item.strip() for item in value.split(",")] if value and value.strip() else []
+
+
+class InstitutionIndex:
+    """Canonical institutions with aliases and domains, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = INSTITUTION_INDEX_PATH) -> None:
+        """
+        Args:
+            path: JSON file to load from and save to (None keeps the index in memory)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # id -> {"name", "aliases", "domains", "seen", "name_counts"}
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._by_alias: Dict[str, int] = {}
+        self._by_domain: Dict[str, int] = {}
+        self._by_acronym: Dict[str, int] = {}
+        self._dirty = False
+        self.lookups = 0
+        self.hits = 0
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Forget every institution and reset the lookup counters (the file is left as is)."""
+        with self._lock:
+            self._entries.clear()
+            self._by_alias.clear()
+            self._by_domain.clear()
+            self._by_acronym.clear()
+            self._dirty = False
+            self.lookups = 0
+            self.hits = 0
+
+    def _load(self, path: str) -> None:
+        with open(path) as f:
+            data = json.load(f)
+        for entry in data.get("institutions", []):
+            entry_id = len(self._entries)
+            self._entries[entry_id] = {
+                "name": entry["name"],
+                "aliases": list(entry.get("aliases", [])),
+                "domains": list(entry.get("domains", [])),
+                "seen": int(entry.get("seen", 0)),
+                "name_counts": dict(entry.get("name_counts", {entry["name"]: 1})),
+            }
+            self._register(entry_id)
+        logger.info("Loaded %s institutions from %s", len(self._entries), path)
+
+    def save(self) -> None:
+        """Write the index to its JSON file if anything changed since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "institutions": sorted(
+                    self._entries.values(), key=lambda entry: (-entry["seen"], entry["name"])
+                )
+            }
+            self._dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, self.path)
+        logger.info("Saved %s institutions to %s", len(payload['institutions']), self.path)
+
+    def _register(self, entry_id: int) -> None:
+        """Index an entry's name, aliases, acronym and domains (caller holds the lock)."""
+        entry = self._entries[entry_id]
+        for alias in [entry["name"], *entry["aliases"]]:
+            self._by_alias.setdefault(normalize_institution_name(alias), entry_id)
+        acronym = institution_acronym(entry["name"])
+        if len(acronym) >= 3:
+            self._by_acronym.setdefault(acronym, entry_id)
+        for domain in entry["domains"]:
+            self._by_domain.setdefault(domain, entry_id)
+
+    @staticmethod
+    def _choose_name(entry: Dict[str, Any]) -> None:
+        """
+        Make the most common spelled-out variant the canonical name (caller holds the lock).
+
+        Bare acronyms ("JHH") only win when nothing else has been seen; ties go to
+        the longer, usually more official, name.
+        """
+        counts = entry["name_counts"]
+        entry["name"] = max(
+            counts,
+            key=lambda variant: (not variant.replace(" ", "").isupper(), counts[variant], len(variant)),
+        )
+        entry["aliases"] = [variant for variant in counts if variant != entry["name"]]
+
+    def _find(self, name: str, domain: str) -> Optional[int]:
+        """Find the entry for a name/domain pair (caller holds the lock)."""
+        key = normalize_institution_name(name)
+        if key in self._by_alias:
+            return self._by_alias[key]
+        if domain and domain not in INSTITUTION_GENERIC_DOMAINS and domain in self._by_domain:
+            return self._by_domain[domain]
+        # A bare acronym ("JHH", "MGH") matches the institution with those initials
+        compact = re.sub(r"[^A-Za-z]", "", name)
+        if 3 <= len(compact) <= 6 and compact.isupper() and " " not in name.strip():
+            return self._by_acronym.get(compact.lower())
+        return None
+
+    def resolve(self, name: str, url: str = "", learn: bool = True) -> Tuple[str, Optional[int]]:
+        """
+        Map a practice name (and its URL) to its canonical institution name.
+
+        Args:
+            name: Practice name as written by the agent
+            url: Practice URL from the same position, if any
+            learn: Add unknown institutions, new aliases and new domains to the index
+
+        Returns:
+            Tuple of (canonical name, entry id); the id is None for an empty name
+        """
+        name = " ".join(name.split())
+        if not name:
+            return "", None
+        domain = registrable_domain(url)
+        with self._lock:
+            self.lookups += 1
+            entry_id = self._find(name, domain)
+            if entry_id is not None:
+                self.hits += 1
+            if not learn:
+                return (self._entries[entry_id]["name"] if entry_id is not None else name), entry_id
+
+            if entry_id is None:
+                entry_id = len(self._entries)
+                self._entries[entry_id] = {
+                    "name": name, "aliases": [], "domains": [], "seen": 0, "name_counts": {},
+                }
+            entry = self._entries[entry_id]
+            entry["name_counts"][name] = entry["name_counts"].get(name, 0) + 1
+            self._choose_name(entry)
+            self._dirty = True
+            if domain and domain not in INSTITUTION_GENERIC_DOMAINS and domain not in entry["domains"]:
+                entry["domains"].append(domain)
+            self._register(entry_id)
+            return entry["name"], entry_id
+
+    def domains(self, name: str, url: str = "") -> List[str]:
+        """
+        Domains of the institution a practice name (and its URL) resolves to, without learning.
+
+        Args:
+            name: Practice name
+            url: Practice URL from the same position, if any
+
+        Returns:
+            The URL's own domain first (unless it is a generic host), then the other
+            domains known for the institution
+        """
+        domain = registrable_domain(url)
+        domains = [domain] if domain and domain not in INSTITUTION_GENERIC_DOMAINS else []
+        name = " ".join(name.split())
+        if not name:
+            return domains
+        with self._lock:
+            entry_id = self._find(name, domain)
+            known = list(self._entries[entry_id]["domains"]) if entry_id is not None else []
+        return domains + [known_domain for known_domain in known if known_domain not in domains]
+
+    def canonicalize_practices(self, names: str, urls: str, learn: bool = True) -> Tuple[str, str]:
+        """
+        Canonicalize and deduplicate the comma-separated practice name and URL fields.
+
+        Names and URLs are paired by position. When several names resolve to the
+        same institution, the first position is kept and its URL is filled from a
+        later duplicate if it was empty.
+
+        Args:
+            names: current_practices_names as written by the formatter
+            urls: current_practices_urls in the same order
+            learn: Update the index with what this row contains
+
+        Returns:
+            Tuple of (names, urls) in the same comma-separated format
+        """
+        name_items = split_csv_field(names)
+        url_items = split_csv_field(urls)
+        if not name_items:
+            return names, urls
+        url_items += [""] * (len(name_items) - len(url_items))
+
+        kept_names: List[str] = []
+        kept_urls: List[str] = []
+        position_by_entry: Dict[int, int] = {}
+        seen_entries = set()
+        for name, url in zip(name_items, url_items):
+            canonical, entry_id = self.resolve(name, url, learn=learn)
+            if entry_id is None:
+                continue
+            if entry_id in position_by_entry:
+                position = position_by_entry[entry_id]
+                if not kept_urls[position] and url:
+                    kept_urls[position] = url
+                continue
+            position_by_entry[entry_id] = len(kept_names)
+            kept_names.append(canonical)
+            kept_urls.append(url)
+            seen_entries.add(entry_id)
+
+        # URLs listed beyond the names have no practice to attach to; keep them at the end
+        kept_urls.extend(url for url in url_items[len(name_items):] if url)
+
+        if learn:
+            with self._lock:
+                for entry_id in seen_entries:
+                    self._entries[entry_id]["seen"] += 1
+                self._dirty = True
+        return ", ".join(kept_names), ", ".join(kept_urls) if any(kept_urls) else ""
+
+    def canonicalize_record(self, record: Any, learn: bool = True) -> Any:
+        """Return a copy of an AlumniResearcherOutputSchema with canonical, deduplicated practices."""
+        names, urls = self.canonicalize_practices(
+            record.current_practices_names or "",
+            record.current_practices_urls or "",
+            learn=learn,
+        )
+        return record.model_copy(update={"current_practices_names": names, "current_practices_urls": urls})
+
+    def hint(
+        self,
+        max_entries: int = INSTITUTION_HINT_MAX_ENTRIES,
+        min_seen: int = INSTITUTION_HINT_MIN_SEEN,
+    ) -> str:
+        """
+        Short list of the most common known institutions for agent instructions.
+
+        Args:
+            max_entries: Maximum institutions listed
+            min_seen: Minimum number of alumni an institution must have been seen for
+
+        Returns:
+            One line per institution ("- Name (domain; also: alias, alias)"), or ""
+            if none qualifies
+        """
+        with self._lock:
+            entries = sorted(
+                (entry for entry in self._entries.values() if entry["seen"] >= min_seen),
+                key=lambda entry: (-entry["seen"], entry["name"]),
+            )[:max_entries]
+            lines = []
+            for entry in entries:
+                details = []
+                if entry["domains"]:
+                    details.append(entry["domains"][0])
+                if entry["aliases"]:
+                    details.append("also: " + ", ".join(entry["aliases"][:3]))
+                lines.append(f"- {entry['name']}" + (f" ({'; '.join(details)})" if details else ""))
+        return "\n".join(lines)
+
+
+# Shared index used by ADKService and the background information agent's hint callback
+institution_index = InstitutionIndex()
@@ -0,0 +1,150 @@
+"""Queue-based application logging with lazily formatted records."""
+
+import atexit
+import json
+import logging
+import queue
+import signal
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+from tqdm import tqdm
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TqdmStreamHandler(logging.StreamHandler):
+    """Console handler that writes above tqdm progress bars instead of breaking them."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock QueueHandler merges msg and args in the calling thread so records
+    can cross process boundaries; the queue here is in-process, so the record is
+    passed through as is and formatted off the event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(
+    logger: logging.Logger,
+    level: int,
+    log_format: str,
+    console: bool = True,
+    file_path: Optional[str] = None,
+    json_path: Optional[str] = None,
+    use_queue: bool = True,
+) -> Optional[QueueListener]:
+    """
+    Attach the console, file and JSON sinks to a logger.
+
+    With use_queue, the logger only gets a queue handler and a listener thread
+    formats and writes the records, so a log call costs the caller one queue put.
+
+    Args:
+        logger: Logger to configure (its existing handlers are removed)
+        level: Logger level; records below it are dropped before any formatting
+        log_format: Format of the console and file sinks
+        console: Write to stderr (above any tqdm progress bar)
+        file_path: Plain-text log file (None disables it)
+        json_path: JSON-lines log file (None disables it)
+        use_queue: Hand records to a listener thread instead of writing inline
+
+    Returns:
+        The started listener (stopped at exit), or None without the queue
+    """
+    logger.setLevel(level)
+    logger.handlers.clear()
+    # Not in any of the formats; skips collecting them for every record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    handlers: List[logging.Handler] = []
+    if console:
+        handlers.append(TqdmStreamHandler())
+    if file_path:
+        handlers.append(logging.FileHandler(file_path, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(log_format))
+    if json_path:
+        json_handler = logging.FileHandler(json_path, encoding="utf-8")
+        json_handler.setFormatter(JsonLogFormatter())
+        handlers.append(json_handler)
+
+    if not use_queue:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return None
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+
+def set_log_level(logger: logging.Logger, level: int) -> None:
+    """Change a logger's level at runtime (e.g. to turn verbose tracing on mid-run)."""
+    logger.setLevel(level)
+
+
+def install_log_level_toggle(
+    logger: logging.Logger,
+    verbose_level: int,
+    signal_name: str = "SIGUSR1",
+) -> bool:
+    """
+    Toggle a logger between its current level and verbose_level on a signal.
+
+    For example ``kill -USR1 <pid>`` turns debug tracing on in a running
+    pipeline, and a second signal turns it off again.
+
+    Args:
+        logger: Logger whose level is toggled
+        verbose_level: Level used while verbose tracing is on
+        signal_name: Name of the signal (not available on every platform)
+
+    Returns:
+        True if the handler was installed
+    """
+    signum = getattr(signal, signal_name, None)
+    if signum is None:
+        return False
+    normal_level = logger.level
+
+    def toggle(received_signum, frame) -> None:
+        set_log_level(logger, normal_level if logger.level == verbose_level else verbose_level)
+
+    try:
+        signal.signal(signum, toggle)
+    except ValueError:
+        # Not called from the main thread
+        return False
+    return True
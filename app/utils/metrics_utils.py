@@ -0,0 +1,411 @@
+"""Live run metrics: in-memory counters, gauges and histograms with Prometheus and JSON output.
+
+ADKService, the event pipeline and search_utils record into the shared
+``run_metrics``; a MetricsServer started by main.py serves them in Prometheus
+text format on a local port and writes a JSON snapshot file periodically.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.configs.app import logger
+from app.configs.metrics import (
+    METRICS_HOST,
+    METRICS_LATENCY_BUCKETS,
+    METRICS_PORT,
+    METRICS_SNAPSHOT_INTERVAL_SECONDS,
+    METRICS_SNAPSHOT_PATH,
+)
+from app.utils.event_utils import EventHandler
+
+# Token usage fields recorded per model, by the "kind" label
+TOKEN_KINDS = {
+    "prompt": "prompt_token_count",
+    "candidates": "candidates_token_count",
+    "cached": "cached_content_token_count",
+    "thoughts": "thoughts_token_count",
+}
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """Base for labelled metrics; values are keyed by the tuple of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: Tuple[str, ...], value: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+    def values(self) -> Dict[str, Any]:
+        """Current values keyed by comma-joined label values ("" without labels)."""
+        with self._lock:
+            return {",".join(key): self._snapshot_value(value) for key, value in sorted(self._values.items())}
+
+    def _snapshot_value(self, value: Any) -> Any:
+        return value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds; each value is [bucket counts..., sum, count]."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _render_value(self, key: Tuple[str, ...], value: Any) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip([*self.buckets, float("inf")], value):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            bucket_labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(value[-2])}")
+        lines.append(f"{self.name}_count{labels} {value[-1]}")
+        return lines
+
+    def _snapshot_value(self, value: Any) -> Dict[str, Any]:
+        count = value[-1]
+        return {
+            "count": count,
+            "mean": value[-2] / count if count else 0.0,
+            "p50": self._quantile(value, 0.5),
+            "p95": self._quantile(value, 0.95),
+        }
+
+    def _quantile(self, value: List[Any], q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if it is above the last bound)."""
+        count = value[-1]
+        if not count:
+            return None
+        target = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, value):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return None
+
+
+class RunMetrics:
+    """The metrics of one pipeline run, with derived rates for the JSON snapshot."""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.rows = Counter("alumni_rows_total", "Alumni rows finished, by outcome", ["outcome"])
+        self.rows_in_flight = Gauge("alumni_rows_in_flight", "Alumni rows currently being researched")
+        self.stage_seconds = Histogram(
+            "alumni_stage_seconds", "Latency of pipeline stages (row, agent run, sub-agents, search)", ["stage"]
+        )
+        self.tokens = Counter("alumni_model_tokens_total", "Model tokens used, by model and kind", ["model", "kind"])
+        self.model_calls = Counter("alumni_model_calls_total", "Model responses received, by model", ["model"])
+        self.search_calls = Counter("alumni_search_calls_total", "DDGS text searches, by outcome", ["outcome"])
+        self.errors = Counter("alumni_errors_total", "Errors, by stage and error class", ["stage", "error_class"])
+        self.stage_queue_depth = Gauge(
+            "alumni_stage_queue_depth", "Items waiting in each staged executor stage's input queue", ["stage"]
+        )
+        self.lookups = Counter(
+            "alumni_lookups_total", "Lookup service requests, by source (cache, research, coalesced, failed)", ["source"]
+        )
+        self._metrics = [
+            self.rows, self.rows_in_flight, self.stage_seconds, self.tokens,
+            self.model_calls, self.search_calls, self.errors, self.stage_queue_depth,
+            self.lookups,
+        ]
+
+    def reset(self) -> None:
+        """Clear every metric and restart the clock (start of a run or benchmark)."""
+        for metric in self._metrics:
+            metric.reset()
+        self.started_at = time.time()
+
+    def record_error(self, stage: str, error: Any) -> None:
+        """Count an error; ``error`` is an exception, or an error class name."""
+        error_class = error if isinstance(error, str) else type(error).__name__
+        self.errors.inc(stage=stage, error_class=error_class)
+
+    def record_tokens(self, model: str, usage: Any) -> None:
+        """Count one model response's usage metadata against its model (called per event, so one lock)."""
+        self.model_calls.inc(model=model)
+        values = self.tokens._values
+        with self.tokens._lock:
+            for kind, field in TOKEN_KINDS.items():
+                value = getattr(usage, field, None)
+                if value:
+                    key = (model, kind)
+                    values[key] = values.get(key, 0) + value
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current values plus rates since the start of the run.
+
+        Returns:
+            Dict with uptime, rows/sec, in-flight rows, tokens/minute per model and
+            kind, error rate per finished row and every metric's values
+        """
+        uptime = max(time.time() - self.started_at, 1e-9)
+        rows = self.rows.values()
+        finished = sum(rows.values())
+        tokens_per_minute: Dict[str, Dict[str, float]] = {}
+        for key, value in self.tokens.values().items():
+            model, kind = key.rsplit(",", 1)
+            tokens_per_minute.setdefault(model, {})[kind] = value * 60 / uptime
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": uptime,
+            "rows_per_second": finished / uptime,
+            "rows_in_flight": self.rows_in_flight.values().get("", 0),
+            "tokens_per_minute": tokens_per_minute,
+            "error_rate_per_row": self.errors.total() / finished if finished else 0.0,
+            "metrics": {metric.name: metric.values() for metric in self._metrics},
+        }
+
+
+# Shared metrics recorded by ADKService, the event pipeline and search_utils
+run_metrics = RunMetrics()
+
+
+class MetricsEventHandler(EventHandler):
+    """
+    Event pipeline handler that records tokens per model, model errors and sub-agent latency.
+
+    A sub-agent's stage runs from the previous agent's last event (or the start
+    of the run) to its own last event.
+    """
+
+    def __init__(self, agent_models: Dict[str, str], metrics: RunMetrics = run_metrics) -> None:
+        """
+        Args:
+            agent_models: Model name per agent name, for token attribution
+            metrics: Metrics to record into
+        """
+        self.agent_models = agent_models
+        self.metrics = metrics
+        self._author: Optional[str] = None
+        self._stage_start = time.perf_counter()
+        self._last_event = self._stage_start
+
+    def handle(self, event: Any) -> None:
+        now = time.perf_counter()
+        author = event.author
+        if author != self._author:
+            if self._author is not None:
+                self._finish_stage()
+            self._author = author
+        self._last_event = now
+        if event.usage_metadata is not None:
+            self.metrics.record_tokens(self.agent_models.get(author, "unknown"), event.usage_metadata)
+        if event.error_code:
+            self.metrics.record_error("model", str(event.error_code))
+
+    def _finish_stage(self) -> None:
+        self.metrics.stage_seconds.observe(self._last_event - self._stage_start, stage=f"agent:{self._author}")
+        self._stage_start = self._last_event
+
+    def finish(self) -> None:
+        if self._author is not None:
+            self._finish_stage()
+            self._author = None
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    metrics: RunMetrics = run_metrics
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = self.metrics.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body = json.dumps(self.metrics.snapshot(), indent=2).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """
+    Serve run metrics over HTTP and write periodic JSON snapshots, from daemon threads.
+
+    Either output can be disabled by passing port=None or snapshot_path=None.
+    """
+
+    def __init__(
+        self,
+        metrics: RunMetrics = run_metrics,
+        host: str = METRICS_HOST,
+        port: Optional[int] = METRICS_PORT,
+        snapshot_path: Optional[str] = METRICS_SNAPSHOT_PATH,
+        snapshot_interval_seconds: float = METRICS_SNAPSHOT_INTERVAL_SECONDS,
+    ) -> None:
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval_seconds = snapshot_interval_seconds
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def url(self) -> Optional[str]:
+        if self._server is None:
+            return None
+        return f"http://{self.host}:{self._server.server_address[1]}/metrics"
+
+    def start(self) -> None:
+        if self.port is not None:
+            handler = type("MetricsRequestHandler", (_MetricsRequestHandler,), {"metrics": self.metrics})
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            except OSError as e:
+                logger.error("Could not start the metrics server on %s:%s: %s", self.host, self.port, e)
+            else:
+                self._server.daemon_threads = True
+                self._spawn(self._server.serve_forever)
+                logger.info("Serving run metrics on %s", self.url)
+        if self.snapshot_path:
+            self._spawn(self._snapshot_loop)
+
+    def _spawn(self, target: Any) -> None:
+        thread = threading.Thread(target=target, name=f"metrics-{target.__name__}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop.wait(self.snapshot_interval_seconds):
+            self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        """Write the JSON snapshot file atomically."""
+        if not self.snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.metrics.snapshot(), f, indent=2)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.error("Could not write the metrics snapshot: %s", e)
+
+    def stop(self) -> None:
+        """Stop serving and write a final snapshot."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.write_snapshot()
+
+    def __enter__(self) -> "MetricsServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,179 @@
+"""One pooled model client shared by every LlmAgent.
+
+An LlmAgent whose model is a name gets a new Gemini instance from ADK for every
+request, and with it a new genai client and HTTP session, so no connection is
+reused between model calls. agent_model() instead gives the agents PooledGemini
+models, whose requests all go through one genai client on one httpx client with
+the connection limits, keep-alive, timeouts and retries of app/configs/llms.py.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import httpx
+from google.adk.models import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.registry import LLMRegistry
+from google.genai import Client, types
+
+from app.configs.app import logger
+from app.configs.llms import (
+    MODEL_CLIENT_CONNECT_TIMEOUT_SECONDS,
+    MODEL_CLIENT_HTTP2,
+    MODEL_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+    MODEL_CLIENT_MAX_CONNECTIONS,
+    MODEL_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+    MODEL_CLIENT_RETRY_ATTEMPTS,
+    MODEL_CLIENT_RETRY_INITIAL_DELAY_SECONDS,
+    MODEL_CLIENT_RETRY_MAX_DELAY_SECONDS,
+    MODEL_CLIENT_RETRY_STATUS_CODES,
+    MODEL_CLIENT_SHARED,
+    MODEL_CLIENT_TIMEOUT_SECONDS,
+)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ModelClientPool:
+    """
+    Build the shared genai client on first use and hand it to every PooledGemini.
+
+    The client is created lazily, so the API key only has to be in the environment
+    by the first model call. httpx connections belong to the event loop that opened
+    them, so each loop gets its own client, closed when the loop shuts down (a
+    task asyncio.run cancels on exit) or by aclose().
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Running loop (None outside one) -> (client, its httpx client)
+        self._clients: Dict[Optional[asyncio.AbstractEventLoop], Tuple[Client, httpx.AsyncClient]] = {}
+        self._closers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self.clients_created = 0
+
+    def client(self, headers: Optional[Dict[str, str]] = None) -> Client:
+        """
+        Return the shared genai client for the running event loop.
+
+        Args:
+            headers: Extra headers of every request (ADK's tracking headers),
+                used when the client is created
+
+        Returns:
+            The shared client
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            entry = self._clients.get(loop)
+            if entry is None:
+                entry = self._clients[loop] = self._build(headers)
+                self.clients_created += 1
+                if loop is not None:
+                    self._closers[loop] = loop.create_task(self._close_on_loop_exit(loop, entry[1]))
+            return entry[0]
+
+    async def _close_on_loop_exit(self, loop: asyncio.AbstractEventLoop, http_client: httpx.AsyncClient) -> None:
+        """Wait until cancelled (asyncio.run cancels leftover tasks on exit), then close the loop's client."""
+        try:
+            await asyncio.Future()
+        finally:
+            with self._lock:
+                entry = self._clients.get(loop)
+                if entry is not None and entry[1] is http_client:
+                    del self._clients[loop]
+                    self._closers.pop(loop, None)
+            # Closing twice is a no-op, so this is safe after aclose() too
+            await http_client.aclose()
+
+    def _build(self, headers: Optional[Dict[str, str]]) -> tuple[Client, httpx.AsyncClient]:
+        http2 = MODEL_CLIENT_HTTP2
+        if http2 and not _http2_available():
+            logger.warning("MODEL_CLIENT_HTTP2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1")
+            http2 = False
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MODEL_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=MODEL_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=MODEL_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(MODEL_CLIENT_TIMEOUT_SECONDS, connect=MODEL_CLIENT_CONNECT_TIMEOUT_SECONDS),
+            http2=http2,
+        )
+        client = Client(
+            http_options=types.HttpOptions(
+                headers=headers,
+                # genai passes its own per-request timeout (milliseconds) to httpx
+                timeout=int(MODEL_CLIENT_TIMEOUT_SECONDS * 1000),
+                retry_options=types.HttpRetryOptions(
+                    attempts=MODEL_CLIENT_RETRY_ATTEMPTS,
+                    initial_delay=MODEL_CLIENT_RETRY_INITIAL_DELAY_SECONDS,
+                    max_delay=MODEL_CLIENT_RETRY_MAX_DELAY_SECONDS,
+                    http_status_codes=MODEL_CLIENT_RETRY_STATUS_CODES,
+                ),
+                # A custom httpx client also keeps genai off its per-client aiohttp session
+                httpx_async_client=http_client,
+            )
+        )
+        logger.info(
+            "Created shared model client: %s connections (%s kept alive), %s",
+            MODEL_CLIENT_MAX_CONNECTIONS,
+            MODEL_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            "HTTP/2" if http2 else "HTTP/1.1",
+        )
+        return client, http_client
+
+    async def aclose(self) -> None:
+        """Close the running loop's shared connections (the next model call creates a new client)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            entry = self._clients.pop(loop, None)
+            closer = self._closers.pop(loop, None) if loop is not None else None
+        if closer is not None:
+            closer.cancel()
+        if entry is not None:
+            await entry[1].aclose()
+
+
+model_client_pool = ModelClientPool()
+
+
+class PooledGemini(Gemini):
+    """Gemini model whose requests go through the shared client of model_client_pool."""
+
+    @property
+    def api_client(self) -> Client:
+        return model_client_pool.client(self._tracking_headers)
+
+
+_models: Dict[str, PooledGemini] = {}
+
+
+def agent_model(model_name: str) -> Union[str, BaseLlm]:
+    """
+    Model to construct an LlmAgent with.
+
+    Args:
+        model_name: Model name from app/configs/llms.py
+
+    Returns:
+        The PooledGemini for the name (one instance per name), or the name itself
+        if MODEL_CLIENT_SHARED is off or ADK resolves it to another model class
+    """
+    if not MODEL_CLIENT_SHARED or not issubclass(LLMRegistry.resolve(model_name), Gemini):
+        return model_name
+    if model_name not in _models:
+        _models[model_name] = PooledGemini(model=model_name)
+    return _models[model_name]
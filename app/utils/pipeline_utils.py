@@ -0,0 +1,222 @@
+"""Staged executor: items flow through stages connected by bounded queues."""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.configs.app import logger
+from app.utils.metrics_utils import run_metrics
+
+
+class RateLimiter:
+    """Space the starts of a stage's work items at least 1/rate seconds apart (shared by its workers)."""
+
+    def __init__(self, rate_per_second: float) -> None:
+        if rate_per_second <= 0:
+            raise ValueError(f"rate_per_second must be positive, got {rate_per_second}")
+        self.interval = 1.0 / rate_per_second
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for the next start slot and return the seconds waited."""
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_start = max(now, self._next_start) + self.interval
+        return max(wait, 0.0)
+
+
+@dataclass
+class Stage:
+    """
+    One step of a staged pipeline.
+
+    ``handler`` takes an item and returns the item handed to the next stage. An
+    exception ends the item's trip through the pipeline; it is passed to the
+    executor's on_error instead.
+    """
+
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    rate_per_second: Optional[float] = None
+    queue_size: int = 8
+
+
+class StageStats:
+    """Thread-safe counters for one stage."""
+
+    def __init__(self, name: str, workers: int) -> None:
+        self.name = name
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.throttled_seconds = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def record_queue_depth(self, depth: int) -> None:
+        with self._lock:
+            self.queue_depth = depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+        run_metrics.stage_queue_depth.set(depth, stage=self.name)
+
+    def record_item(self, seconds: float, throttled_seconds: float, failed: bool) -> None:
+        with self._lock:
+            self.busy_seconds += seconds
+            self.throttled_seconds += throttled_seconds
+            if failed:
+                self.failed += 1
+            else:
+                self.processed += 1
+        run_metrics.stage_seconds.observe(seconds, stage=f"staged:{self.name}")
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        """
+        Summarize the stage over a run of wall_seconds.
+
+        Returns:
+            Dict with workers, items processed and failed, items/sec, utilization
+            (busy time per worker over the run), mean seconds per item, seconds
+            spent waiting on the rate limit, and current and peak input queue depth
+        """
+        with self._lock:
+            items = self.processed + self.failed
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "items_per_second": items / wall_seconds if wall_seconds > 0 else 0.0,
+                "utilization": self.busy_seconds / (self.workers * wall_seconds) if wall_seconds > 0 else 0.0,
+                "mean_seconds": self.busy_seconds / items if items else 0.0,
+                "throttled_seconds": self.throttled_seconds,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class StagedExecutor:
+    """
+    Run items through a sequence of stages, each with its own workers and input queue.
+
+    Every stage reads from a bounded queue and writes to the next stage's, so a
+    slow stage fills its input queue and holds back the stages before it
+    (backpressure) without starving the stages after it. A stage's rate limit
+    spaces the starts of its items across all of its workers.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        on_error: Optional[Callable[[str, Any, Exception], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Args:
+            stages: The stages, in order
+            on_error: Called with (stage name, item, exception) when a stage fails an item
+        """
+        if not stages:
+            raise ValueError("A staged executor needs at least one stage")
+        self.stages = stages
+        self.on_error = on_error
+        self.stats: Dict[str, StageStats] = {stage.name: StageStats(stage.name, stage.workers) for stage in stages}
+        self.wall_seconds = 0.0
+        self._queues: List[asyncio.Queue] = []
+
+    async def run(self, items: Iterable[Any]) -> None:
+        """
+        Push items through every stage and return when all of them are done.
+
+        Args:
+            items: Items for the first stage (fed as its queue has room)
+        """
+        start = time.perf_counter()
+        self._queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        workers: List[List[asyncio.Task]] = []
+        for index, stage in enumerate(self.stages):
+            limiter = RateLimiter(stage.rate_per_second) if stage.rate_per_second else None
+            workers.append([
+                asyncio.create_task(self._work(index, limiter), name=f"stage-{stage.name}-{worker}")
+                for worker in range(stage.workers)
+            ])
+        try:
+            for item in items:
+                await self._put(0, item)
+            # Each stage hands its items on before marking them done, so once a
+            # stage's queue is joined every item is past it
+            for queue, stage_workers in zip(self._queues, workers):
+                await queue.join()
+                for task in stage_workers:
+                    task.cancel()
+        finally:
+            for stage_workers in workers:
+                for task in stage_workers:
+                    task.cancel()
+            await asyncio.gather(*(task for stage_workers in workers for task in stage_workers), return_exceptions=True)
+            self.wall_seconds = time.perf_counter() - start
+
+    async def _put(self, index: int, item: Any) -> None:
+        queue = self._queues[index]
+        await queue.put(item)
+        self.stats[self.stages[index].name].record_queue_depth(queue.qsize())
+
+    async def _work(self, index: int, limiter: Optional[RateLimiter]) -> None:
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        queue = self._queues[index]
+        while True:
+            item = await queue.get()
+            stats.record_queue_depth(queue.qsize())
+            try:
+                throttled = await limiter.acquire() if limiter is not None else 0.0
+                start = time.perf_counter()
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    stats.record_item(time.perf_counter() - start, throttled, failed=True)
+                    await self._fail(stage.name, item, e)
+                    continue
+                stats.record_item(time.perf_counter() - start, throttled, failed=False)
+                if index + 1 < len(self.stages):
+                    await self._put(index + 1, result)
+            except Exception as e:
+                # A failing rate limiter or hand-off must not end the worker, or
+                # its queue would never be joined
+                await self._fail(stage.name, item, e)
+            finally:
+                queue.task_done()
+
+    async def _fail(self, stage_name: str, item: Any, error: Exception) -> None:
+        """Count and log an item the stage could not pass on, and hand it to on_error (whose own errors are logged)."""
+        run_metrics.record_error(f"staged:{stage_name}", error)
+        logger.warning("Stage %s failed an item: %s", stage_name, error)
+        if self.on_error is None:
+            return
+        try:
+            await self.on_error(stage_name, item, error)
+        except Exception as e:
+            run_metrics.record_error(f"staged:{stage_name}:on_error", e)
+            logger.exception("Error handler of stage %s failed: %s", stage_name, e)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage report (see StageStats.report), in stage order."""
+        return {name: stats.report(self.wall_seconds) for name, stats in self.stats.items()}
+
+    def format_report(self) -> str:
+        lines = []
+        for name, report in self.report().items():
+            lines.append(
+                f"{name}: {report['processed']} done, {report['failed']} failed, "
+                f"{report['items_per_second']:.2f}/s on {report['workers']} worker(s) "
+                f"({report['utilization']:.0%} busy, {report['mean_seconds']:.2f}s per item), "
+                f"peak queue {report['max_queue_depth']}"
+                + (f", {report['throttled_seconds']:.1f}s rate-limited" if report["throttled_seconds"] else "")
+            )
+        return "\n".join(lines)
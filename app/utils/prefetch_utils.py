@@ -0,0 +1,219 @@
+"""Prefetching of the social media searches for upcoming roster rows."""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.configs.app import logger
+
+SearchResults = Dict[str, List[Dict[str, str]]]
+
+
+def estimate_results_bytes(results_by_platform: SearchResults) -> int:
+    """Approximate memory held by a row's search results (the characters of every field)."""
+    return sum(
+        len(result.get("title", "")) + len(result.get("href", "")) + len(result.get("body", ""))
+        for results in results_by_platform.values()
+        for result in results
+    )
+
+
+class SearchPrefetcher:
+    """
+    Run the social media searches of upcoming rows in background threads.
+
+    Finished results are kept in a bounded in-memory store (by entry count and
+    approximate size) until the row's social media step takes them. Over the size
+    cap, the rows furthest ahead are evicted first, since the next rows are about
+    to be used. A row whose searches are still running waits for them instead of
+    searching again. Rows that end without taking their results (e.g. a failed
+    background step) must be discarded.
+    """
+
+    def __init__(
+        self,
+        collect: Callable[[str, int], SearchResults],
+        workers: int,
+        max_entries: int,
+        max_bytes: int,
+    ) -> None:
+        """
+        Args:
+            collect: Searches every platform for one name: (full_name, max_links) -> results
+            workers: Background search threads
+            max_entries: Maximum rows held (finished or in flight)
+            max_bytes: Maximum approximate size of the finished results held
+        """
+        self.collect = collect
+        self.workers = workers
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._entries: "OrderedDict[Tuple[str, int], Future]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, int], int] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.scheduled = 0
+            self.hits = 0
+            self.waits = 0
+            self.misses = 0
+            self.evicted = 0
+            self.skipped = 0
+            self.discarded = 0
+
+    @property
+    def active(self) -> bool:
+        """Whether prefetching was started in this run (lookups are only counted then)."""
+        return self._executor is not None
+
+    def prefetch(self, names: Iterable[str], max_links: int) -> None:
+        """
+        Start the searches for the given names, unless already held or the store is full.
+
+        Args:
+            names: Full names of the rows about to be researched, in roster order
+            max_links: Maximum search results per platform (part of the key)
+        """
+        if not self.enabled:
+            return
+        scheduled = []
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="search-prefetch")
+            for name in names:
+                key = (name, max_links)
+                if key in self._entries:
+                    continue
+                if len(self._entries) >= self.max_entries:
+                    self.skipped += 1
+                    continue
+                future = self._executor.submit(self.collect, name, max_links)
+                self._entries[key] = future
+                self.scheduled += 1
+                scheduled.append((key, future))
+        # Outside the lock: a future that is already done runs _on_done right here
+        for key, future in scheduled:
+            future.add_done_callback(lambda done, key=key: self._on_done(key, done))
+
+    def _on_done(self, key: Tuple[str, int], future: Future) -> None:
+        """Account for a finished prefetch and evict the furthest-ahead finished rows over the size cap."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        size = estimate_results_bytes(future.result())
+        with self._lock:
+            if self._entries.get(key) is not future:
+                return
+            self._sizes[key] = size
+            while sum(self._sizes.values()) > self.max_bytes:
+                newest = next(k for k in reversed(self._entries) if k in self._sizes)
+                del self._entries[newest]
+                del self._sizes[newest]
+                self.evicted += 1
+
+    def _pop(self, full_name: str, max_links: int) -> Optional[Future]:
+        """Remove a row's entry from the store and count the lookup."""
+        key = (full_name, max_links)
+        with self._lock:
+            future = self._entries.pop(key, None)
+            self._sizes.pop(key, None)
+            if future is None:
+                self.misses += 1
+            elif future.done():
+                self.hits += 1
+            else:
+                self.waits += 1
+        return future
+
+    def take(self, full_name: str, max_links: int) -> Optional[SearchResults]:
+        """
+        Return a row's prefetched results and drop them from the store.
+
+        Blocks while the row's searches are still running, so only call it off the
+        event loop (use take_async there).
+
+        Returns:
+            The results, or None if the row was not prefetched (or its prefetch failed)
+        """
+        future = self._pop(full_name, max_links)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Prefetched search for %s failed, searching again: %s", full_name, e)
+            return None
+
+    async def take_async(self, full_name: str, max_links: int) -> Optional[SearchResults]:
+        """Like take(), but awaits searches still running instead of blocking the event loop."""
+        future = self._pop(full_name, max_links)
+        if future is None:
+            return None
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            logger.warning("Prefetched search for %s failed, searching again: %s", full_name, e)
+            return None
+
+    def discard(self, full_name: str, max_links: int) -> None:
+        """
+        Drop a row's entry if its results were never taken, cancelling searches not yet started.
+
+        Args:
+            full_name: Full name the row was prefetched for
+            max_links: Maximum search results per platform (part of the key)
+        """
+        key = (full_name, max_links)
+        with self._lock:
+            future = self._entries.pop(key, None)
+            self._sizes.pop(key, None)
+            if future is None:
+                return
+            self.discarded += 1
+        future.cancel()
+
+    def close(self) -> None:
+        """Drop queued prefetches and release the worker threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._entries.clear()
+            self._sizes.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize how often a row's searches were served from the prefetch store.
+
+        Returns:
+            Dict with scheduled prefetches, hits (finished in time), waits (still
+            running), misses (searched on the spot), hit rate (hits and waits per
+            lookup), evicted, skipped (store full) and discarded (never taken) rows
+        """
+        with self._lock:
+            lookups = self.hits + self.waits + self.misses
+            return {
+                "scheduled": self.scheduled,
+                "hits": self.hits,
+                "waits": self.waits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.waits) / lookups if lookups else 0.0,
+                "evicted": self.evicted,
+                "skipped": self.skipped,
+                "discarded": self.discarded,
+            }
+
+    def format_report(self) -> str:
+        report = self.report()
+        return (
+            f"Rows served from prefetch: {report['hits'] + report['waits']}/"
+            f"{report['hits'] + report['waits'] + report['misses']} ({report['hit_rate']:.0%}; "
+            f"{report['waits']} waited for searches still running)\n"
+            f"Prefetched rows: {report['scheduled']}, evicted: {report['evicted']}, "
+            f"skipped (store full): {report['skipped']}, discarded (row ended first): {report['discarded']}"
+        )
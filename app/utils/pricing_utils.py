@@ -0,0 +1,21 @@
+"""Token pricing shared by the dry-run planner and the model cascade."""
+
+from typing import Dict, List
+
+from app.configs.planner import MODEL_PRICES_PER_MILLION_TOKENS, PLANNER_DEFAULT_TOKENS_PER_ROW, PLANNER_MODELS
+
+
+def row_cost(tokens: Dict[str, float], prices: Dict[str, float]) -> float:
+    """USD cost of one row's token counts (cached tokens are part of the prompt count)."""
+    cached = tokens.get("cached_content_token_count", 0)
+    uncached = max(tokens.get("prompt_token_count", 0) - cached, 0)
+    output = tokens.get("candidates_token_count", 0) + tokens.get("thoughts_token_count", 0)
+    return (uncached * prices["input"] + cached * prices["cached"] + output * prices["output"]) / 1e6
+
+
+def pricing_model(models: List[str] = PLANNER_MODELS) -> str:
+    """The most expensive priced model among the agents' models."""
+    priced = [model for model in models if model in MODEL_PRICES_PER_MILLION_TOKENS]
+    if not priced:
+        raise ValueError(f"No price for any of {models}; add them to MODEL_PRICES_PER_MILLION_TOKENS")
+    return max(priced, key=lambda model: row_cost(PLANNER_DEFAULT_TOKENS_PER_ROW, MODEL_PRICES_PER_MILLION_TOKENS[model]))
@@ -0,0 +1,234 @@
+"""Rule-based social media profile selection.
+
+Many alumni have exactly one candidate per platform whose URL slug carries their
+name and whose snippet mentions radiology, or only namesakes in other professions.
+Those platforms are resolved here without a model call; only the remaining ones
+are left to the social media agent.
+"""
+
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from app.agents import state_keys
+from app.configs.llms import (
+    SOCIAL_MEDIA_AUTO_SELECT_MIN_MARGIN,
+    SOCIAL_MEDIA_AUTO_SELECT_MIN_SCORE,
+)
+from app.utils.search_utils import (
+    SOCIAL_MEDIA_PLATFORMS,
+    name_in_profile,
+    name_in_url_slug,
+    name_tokens,
+    names_other_profession,
+)
+
+
+def could_be_person(full_name: str, result: Dict[str, str]) -> bool:
+    """Check whether a result names the person (URL slug or title) and no other profession."""
+    title = result.get("title", "").lower()
+    tokens = name_tokens(full_name)
+    named = name_in_url_slug(full_name, result.get("href", "")) or (
+        bool(tokens) and all(token in title for token in tokens)
+    )
+    return named and not names_other_profession(result)
+
+
+def resolve_social_media_candidates(
+    full_name: str,
+    ranked_by_platform: Dict[str, List[Dict[str, Any]]],
+    results_by_platform: Optional[Mapping[str, List[Dict[str, str]]]] = None,
+    min_score: float = SOCIAL_MEDIA_AUTO_SELECT_MIN_SCORE,
+    min_margin: float = SOCIAL_MEDIA_AUTO_SELECT_MIN_MARGIN,
+) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Pick a link per platform where the ranked candidates leave no real choice.
+
+    Candidates that name a non-medical profession (and no radiology or physician
+    context) are namesakes and do not count. A platform resolves to an empty link
+    when no candidate is left, or when the ranker dropped every search result and
+    none of them could be the person (could_be_person). It resolves to its best
+    candidate when that candidate's URL (or, for ID-style profile URLs, its title)
+    contains the full name, its score is at least min_score and it beats the
+    runner-up by at least min_margin. Every other platform is left to the LLM.
+
+    Args:
+        full_name: Full name of the person searched for
+        ranked_by_platform: Candidates as returned by rank_social_media_candidates
+        results_by_platform: The search results ranked_by_platform was ranked from
+                             (without them, an empty ranked list counts as no results)
+        min_score: Minimum score of the best candidate
+        min_margin: Minimum score lead over the second-best candidate
+
+    Returns:
+        Tuple of (selected link per resolved platform, platforms left ambiguous),
+        both in ranked_by_platform order
+    """
+    selected: Dict[str, str] = {}
+    ambiguous: List[str] = []
+    for platform_name, candidates in ranked_by_platform.items():
+        if not candidates:
+            dropped = (results_by_platform or {}).get(platform_name) or []
+            if any(could_be_person(full_name, result) for result in dropped):
+                ambiguous.append(platform_name)
+            else:
+                selected[platform_name] = ""
+            continue
+        plausible = [candidate for candidate in candidates if not names_other_profession(candidate)]
+        if not plausible:
+            selected[platform_name] = ""
+            continue
+        best = plausible[0]
+        runner_up_score = plausible[1]["score"] if len(plausible) > 1 else None
+        if (
+            best["score"] >= min_score
+            and (runner_up_score is None or best["score"] - runner_up_score >= min_margin)
+            and name_in_profile(full_name, best)
+        ):
+            selected[platform_name] = best["href"]
+        else:
+            ambiguous.append(platform_name)
+    return selected, ambiguous
+
+
+def format_social_media_selection(selected: Dict[str, str]) -> str:
+    """Render selected links in the "Platform: URL" format the formatter agent expects."""
+    return "\n".join(f"{platform_name}: {url}" for platform_name, url in selected.items())
+
+
+def parse_social_media_selection(text: str) -> Dict[str, str]:
+    """
+    Read a "Platform: URL" selection back into links per platform.
+
+    Args:
+        text: Selection of the resolver or the social media agent
+
+    Returns:
+        Link per platform named on its own line (empty if none was chosen), in
+        SOCIAL_MEDIA_PLATFORMS order; other lines are ignored
+    """
+    platform_names = {platform_name.lower(): platform_name for platform_name in SOCIAL_MEDIA_PLATFORMS}
+    found: Dict[str, str] = {}
+    for line in text.splitlines():
+        label, separator, url = line.partition(":")
+        platform_name = platform_names.get(label.strip(" -*`").lower())
+        if separator and platform_name is not None:
+            found[platform_name] = url.strip()
+    return {platform_name: found[platform_name] for platform_name in SOCIAL_MEDIA_PLATFORMS if platform_name in found}
+
+
+class SocialMediaResolverStats:
+    """Thread-safe counters for how much link selection the resolver took off the LLM."""
+
+    # Model calls the social media agent makes per alumnus: the search tool call
+    # and the selection that follows the tool response. A fully resolved alumnus
+    # skips both; a partly resolved one still makes both, with fewer candidates.
+    LLM_CALLS_PER_ROW = 2
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.rows_resolved = 0
+        self.rows_partly_resolved = 0
+        self.platforms_auto_selected = 0
+        self.platforms_deferred = 0
+
+    def record(self, resolved_platforms: int, deferred_platforms: int) -> None:
+        """
+        Count one alumnus passed through the resolver.
+
+        Args:
+            resolved_platforms: Platforms resolved without the LLM
+            deferred_platforms: Platforms left to the LLM
+        """
+        with self._lock:
+            self.rows += 1
+            self.platforms_auto_selected += resolved_platforms
+            self.platforms_deferred += deferred_platforms
+            if deferred_platforms == 0:
+                self.rows_resolved += 1
+            else:
+                self.rows_partly_resolved += 1
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize resolver activity.
+
+        Returns:
+            Dict with rows seen, rows resolved without the LLM, LLM calls avoided and
+            auto-selected vs. deferred platform counts
+        """
+        with self._lock:
+            platforms = self.platforms_auto_selected + self.platforms_deferred
+            return {
+                "rows": self.rows,
+                "rows_resolved_without_llm": self.rows_resolved,
+                "llm_calls_avoided": self.rows_resolved * self.LLM_CALLS_PER_ROW,
+                "platforms_auto_selected": self.platforms_auto_selected,
+                "platforms_deferred": self.platforms_deferred,
+                "auto_selected_fraction": self.platforms_auto_selected / platforms if platforms else 0.0,
+            }
+
+    def format_report(self) -> str:
+        """Render report() as plain text."""
+        report = self.report()
+        if not report["rows"]:
+            return "No social media resolver data recorded."
+        return (
+            f"Rows resolved without the LLM: {report['rows_resolved_without_llm']}/{report['rows']}, "
+            f"social media LLM calls avoided: {report['llm_calls_avoided']}\n"
+            f"Platforms auto-selected: {report['platforms_auto_selected']} "
+            f"({report['auto_selected_fraction']:.0%}), left to the LLM: {report['platforms_deferred']}"
+        )
+
+
+# Shared counters updated by the social media agent's before-agent callback
+social_media_resolver_stats = SocialMediaResolverStats()
+
+
+def filter_platforms(
+    results_by_platform: Dict[str, List[Dict[str, str]]],
+    platforms: List[str],
+) -> Dict[str, List[Dict[str, str]]]:
+    """Keep only the given platforms (in their original order)."""
+    return {name: results for name, results in results_by_platform.items() if name in platforms}
+
+
+def searched_candidates_for(state: Mapping[str, Any], alumni_name: str) -> Optional[Dict[str, List[Dict[str, str]]]]:
+    """
+    Return the candidates a search stage collected before the social media agent ran, if they belong to this name.
+
+    Args:
+        state: Session state
+        alumni_name: Name the candidates are needed for
+
+    Returns:
+        Raw candidates per platform, or None if nothing was searched for this name
+    """
+    searched = state.get(state_keys.SOCIAL_MEDIA_SEARCH_RESULTS)
+    if searched is None:
+        return None
+    searched_name = state.get(state_keys.SOCIAL_MEDIA_SEARCH_NAME) or ""
+    if searched_name.strip().lower() != alumni_name.strip().lower():
+        return None
+    return searched
+
+
+def pending_candidates_for(state: Mapping[str, Any], alumni_name: str) -> Optional[Dict[str, List[Dict[str, str]]]]:
+    """
+    Return the candidates the resolver left to the LLM, if they belong to this name.
+
+    Args:
+        state: Session state
+        alumni_name: Name the search tool was called with
+
+    Returns:
+        Raw candidates per ambiguous platform, or None if the resolver did not run
+        for this name
+    """
+    pending = state.get(state_keys.SOCIAL_MEDIA_PENDING_CANDIDATES)
+    if pending is None:
+        return None
+    resolved_name = state.get(state_keys.SOCIAL_MEDIA_RESOLVED_NAME) or ""
+    if resolved_name.strip().lower() != alumni_name.strip().lower():
+        return None
+    return pending
@@ -1,36 +1,94 @@
 """Search utilities for finding social media profiles using DDGS."""
 
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import re
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
 from ddgs import DDGS
 
+from app.configs.llms import (
+    SEARCH_PREFETCH_ENABLED,
+    SEARCH_PREFETCH_MAX_BYTES,
+    SEARCH_PREFETCH_MAX_ENTRIES,
+    SEARCH_PREFETCH_WORKERS,
+)
+from app.utils.metrics_utils import run_metrics
+from app.utils.prefetch_utils import SearchPrefetcher
+
 logger = logging.getLogger(__name__)
 
+# Factory used to build the search client for each profile search. Defaults to
+# DDGS; offline tooling (benchmarks, replay) swaps it via set_search_client_factory.
+_search_client_factory: Callable[[], Any] = DDGS
+
 
 # Define social media platforms and their URL patterns
 SOCIAL_MEDIA_PLATFORMS = {
     "X (Twitter)": {
         "search_name": "X (Twitter)",
         "url_patterns": ["twitter.com", "x.com"],
+        "profile_url_pattern": r"(?:twitter|x)\.com/(?!search|hashtag|i/|intent|home)\w+/?(?:\?.*)?$",
     },
     "LinkedIn": {
         "search_name": "LinkedIn",
         "url_patterns": ["linkedin.com"],
+        "profile_url_pattern": r"linkedin\.com/in/[^/?#]+/?$",
     },
     "Doximity": {
         "search_name": "Doximity",
         "url_patterns": ["doximity.com"],
+        "profile_url_pattern": r"doximity\.com/(?:pub|profiles)/[^/?#]+/?$",
     },
     "Google Scholar": {
         "search_name": "Google Scholar",
         "url_patterns": ["scholar.google.com", "scholar.google"],
+        "profile_url_pattern": r"scholar\.google\.[a-z.]+/citations\?(?:.*&)?user=",
     },
     "Facebook": {
         "search_name": "Facebook",
         "url_patterns": ["facebook.com"],
+        "profile_url_pattern": r"facebook\.com/(?:profile\.php\?id=\d+|[\w.]+/?$)",
     },
 }
 
+# URL path segments that mark posts, search pages and other non-profile pages
+NON_PROFILE_URL_PATTERN = re.compile(
+    r"/(?:posts|status|statuses|pulse|groups|events|photos|videos|watch|hashtag|"
+    r"search|jobs|company|school|feed|scholar)(?:[/?_]|$)",
+    re.IGNORECASE,
+)
+
+# Profile URLs that carry an ID instead of the person's name (Google Scholar, numeric Facebook profiles)
+ID_PROFILE_URL_PATTERN = re.compile(r"/citations\?(?:.*&)?user=|/profile\.php\?id=", re.IGNORECASE)
+
+# Text that suggests the page belongs to a radiologist / physician
+RADIOLOGY_PATTERN = re.compile(r"radiolog|imaging|neuroradiolog|interventional", re.IGNORECASE)
+PHYSICIAN_PATTERN = re.compile(r"\bmd\b|m\.d\.|\bdr\.|physician", re.IGNORECASE)
+# Text that names a non-medical occupation (a namesake, unless the page also mentions medicine)
+OTHER_PROFESSION_PATTERN = re.compile(
+    r"\b(?:software|engineer|developer|programmer|attorney|lawyer|realtor|real estate|accountant|"
+    r"student|teacher|designer|photographer|musician|artist|marketing|sales)\b",
+    re.IGNORECASE,
+)
+
+
+def set_search_client_factory(factory: Optional[Callable[[], Any]] = None) -> None:
+    """
+    Replace the factory used to create the search client.
+    
+    The factory must return an object exposing ``text(query, max_results=...)``
+    with the same result shape as ``DDGS.text``.
+    
+    Args:
+        factory: Zero-argument callable returning a search client. Pass None
+                 to restore the default DDGS client.
+    """
+    global _search_client_factory
+    _search_client_factory = factory if factory is not None else DDGS
+
 
 def _matches_platform(url: str, platform_patterns: List[str]) -> bool:
     """
@@ -67,14 +125,16 @@ def _search_platform(
     """
     # Construct search query
     query = f"{full_name}, radiology, {platform_name}"
-    logger.info(f"Searching for: {query}")
+    logger.info("Searching for: %s", query)
     
     matching_results = []
     platform_config = SOCIAL_MEDIA_PLATFORMS[platform_name]
     url_patterns = platform_config["url_patterns"]
     
+    start = time.perf_counter()
     try:
         results = ddgs.text(query, max_results=max_results)
+        run_metrics.search_calls.inc(outcome="ok")
         
         for result in results:
             href = result.get("href", "")
@@ -88,45 +148,127 @@ def _search_platform(
                 })
                 
         logger.info(
-            f"Found {len(matching_results)} matching results for {platform_name}"
+            "Found %s matching results for %s", len(matching_results), platform_name
         )
         
     except Exception as e:
-        logger.error(f"Error searching for {platform_name}: {e}")
+        logger.error("Error searching for %s: %s", platform_name, e)
+        run_metrics.search_calls.inc(outcome="error")
+        run_metrics.record_error("search", e)
+    run_metrics.stage_seconds.observe(time.perf_counter() - start, stage="search")
     
     return matching_results
 
 
-def search_social_media_profiles(
+def search_web(query: str, max_results: int = 10) -> List[Dict[str, str]]:
+    """
+    Run one text search with the search client and return its results.
+    
+    Args:
+        query: Search query
+        max_results: Maximum number of results to return
+        
+    Returns:
+        List of dictionaries with title, href and body (empty if the search failed)
+    """
+    logger.info("Searching for: %s", query)
+    results: List[Dict[str, str]] = []
+    start = time.perf_counter()
+    try:
+        for result in _search_client_factory().text(query, max_results=max_results):
+            results.append({
+                "title": result.get("title", ""),
+                "href": result.get("href", ""),
+                "body": result.get("body", ""),
+            })
+        run_metrics.search_calls.inc(outcome="ok")
+    except Exception as e:
+        logger.error("Error searching for %s: %s", query, e)
+        run_metrics.search_calls.inc(outcome="error")
+        run_metrics.record_error("search", e)
+    run_metrics.stage_seconds.observe(time.perf_counter() - start, stage="search")
+    return results
+
+
+def collect_social_media_candidates(
     full_name: str,
     max_links: int = 20,
-) -> str:
+    skip_platforms: Iterable[str] = (),
+) -> Dict[str, List[Dict[str, str]]]:
     """
-    Search for a person's social media profiles across multiple platforms.
+    Search every social media platform for a person and return the raw candidates.
     
-    This function searches for the given person's name across five social media
-    platforms (X/Twitter, LinkedIn, Doximity, Google Scholar, and Facebook) and
-    returns a markdown-formatted report with categorized links.
+    The results are taken from the search prefetcher when the row's searches were
+    started ahead of time (see app/utils/prefetch_utils.py).
     
     Args:
         full_name: Full name of the person to search for
         max_links: Maximum number of search results to collect per platform
                   (default: 20)
+        skip_platforms: Platforms not to search (the caller already has candidates
+                        for them); prefetched results still include them
         
     Returns:
-        A markdown-formatted string containing categorized links by platform
+        Dictionary mapping platform name to its list of matching results
+        (title, href, body), in SOCIAL_MEDIA_PLATFORMS order; skipped platforms
+        are left out
+    """
+    if search_prefetcher.active:
+        prefetched = search_prefetcher.take(full_name, max_links)
+        if prefetched is not None:
+            return prefetched
+    return _search_social_media_platforms(full_name, max_links, skip_platforms)
+
+
+async def collect_social_media_candidates_async(
+    full_name: str,
+    max_links: int = 20,
+    skip_platforms: Iterable[str] = (),
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Like collect_social_media_candidates, for callers on the event loop.
+
+    Prefetched searches still running are awaited and on-the-spot searches run in
+    a worker thread, so other rows keep running meanwhile.
+    """
+    if search_prefetcher.active:
+        prefetched = await search_prefetcher.take_async(full_name, max_links)
+        if prefetched is not None:
+            return prefetched
+    return await asyncio.to_thread(_search_social_media_platforms, full_name, max_links, skip_platforms)
+
+
+def _search_social_media_platforms(
+    full_name: str,
+    max_links: int,
+    skip_platforms: Iterable[str] = (),
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Search every social media platform for a person (one search per platform).
+    
+    Args:
+        full_name: Full name of the person to search for
+        max_links: Maximum number of search results to collect per platform
+        skip_platforms: Platforms not to search
+        
+    Returns:
+        Dictionary mapping platform name to its list of matching results
+        (title, href, body), in SOCIAL_MEDIA_PLATFORMS order
     """
-    logger.info(f"Starting social media search for: {full_name}")
+    skip_platforms = set(skip_platforms)
+    logger.info("Starting social media search for: %s", full_name)
     
-    # Initialize DDGS
-    ddgs = DDGS()
+    # Initialize the search client (DDGS unless overridden)
+    ddgs = _search_client_factory()
     
     # Dictionary to store results by platform
     results_by_platform: Dict[str, List[Dict[str, str]]] = {}
     
     # Search each platform
     for platform_name in SOCIAL_MEDIA_PLATFORMS.keys():
-        logger.info(f"Searching {platform_name}...")
+        if platform_name in skip_platforms:
+            continue
+        logger.info("Searching %s...", platform_name)
         results = _search_platform(
             ddgs=ddgs,
             full_name=full_name,
@@ -135,6 +277,35 @@ def search_social_media_profiles(
         )
         results_by_platform[platform_name] = results
     
+    return results_by_platform
+
+
+# Runs the platform searches of upcoming roster rows while earlier rows are researched
+search_prefetcher = SearchPrefetcher(
+    collect=_search_social_media_platforms,
+    workers=SEARCH_PREFETCH_WORKERS,
+    max_entries=SEARCH_PREFETCH_MAX_ENTRIES,
+    max_bytes=SEARCH_PREFETCH_MAX_BYTES,
+)
+search_prefetcher.enabled = SEARCH_PREFETCH_ENABLED
+
+
+def format_social_media_markdown(
+    full_name: str,
+    results_by_platform: Dict[str, List[Dict[str, str]]],
+    max_links: int = 20,
+) -> str:
+    """
+    Render per-platform candidates as the markdown report given to the social media agent.
+    
+    Args:
+        full_name: Full name of the person searched for
+        results_by_platform: Candidates as returned by collect_social_media_candidates
+        max_links: Maximum number of results collected per platform (shown in the header)
+        
+    Returns:
+        A markdown-formatted string containing categorized links by platform
+    """
     # Generate markdown report
     markdown_lines = [
         f"# Social Media Profile Search Results for {full_name}",
@@ -188,3 +359,207 @@ def search_social_media_profiles(
     
     return "\n".join(markdown_lines)
 
+
+def name_tokens(full_name: str) -> List[str]:
+    """Lowercase ASCII name tokens, ignoring initials and punctuation."""
+    ascii_name = unicodedata.normalize("NFKD", full_name).encode("ascii", "ignore").decode()
+    return [token for token in re.split(r"[^a-z0-9]+", ascii_name.lower()) if len(token) > 1]
+
+
+def _url_slug(href: str) -> str:
+    """URL path and query without separators, so "jane-doe" and "janedoe" compare equal."""
+    parts = urlsplit(href)
+    return re.sub(r"[^a-z0-9]", "", (parts.path + parts.query).lower())
+
+
+def name_in_url_slug(full_name: str, href: str) -> bool:
+    """
+    Check whether every part of a person's name appears in a URL's path or query.
+    
+    Args:
+        full_name: Full name of the person
+        href: Candidate URL
+        
+    Returns:
+        True if all name tokens (initials ignored) occur in the URL slug
+    """
+    tokens = name_tokens(full_name)
+    slug = _url_slug(href)
+    return bool(tokens) and all(token in slug for token in tokens)
+
+
+def name_in_profile(full_name: str, result: Dict[str, str]) -> bool:
+    """
+    Check whether a candidate's URL names the person, or its title does where the URL cannot.
+
+    Args:
+        full_name: Full name of the person
+        result: Search result with title and href
+
+    Returns:
+        True if all name tokens occur in the URL slug, or in the title for profile
+        URLs that carry an ID instead of a name (ID_PROFILE_URL_PATTERN)
+    """
+    href = result.get("href", "")
+    if name_in_url_slug(full_name, href):
+        return True
+    title = result.get("title", "").lower()
+    tokens = name_tokens(full_name)
+    return bool(ID_PROFILE_URL_PATTERN.search(href)) and bool(tokens) and all(token in title for token in tokens)
+
+
+def names_other_profession(result: Dict[str, str]) -> bool:
+    """Check whether a result names a non-medical occupation and no radiology or physician context."""
+    text = f"{result.get('title', '')} {result.get('body', '')}"
+    return bool(OTHER_PROFESSION_PATTERN.search(text)) and not (
+        RADIOLOGY_PATTERN.search(text) or PHYSICIAN_PATTERN.search(text)
+    )
+
+
+def score_social_media_candidate(
+    full_name: str,
+    platform_name: str,
+    result: Dict[str, str],
+) -> Optional[float]:
+    """
+    Score how likely a search result is to be the person's profile on a platform.
+    
+    Signals: name tokens in the title and URL slug, radiology and physician
+    mentions, and whether the URL has the platform's profile-page shape.
+    
+    Args:
+        full_name: Full name of the person searched for
+        platform_name: Platform the result was found for
+        result: Search result with title, href and body
+        
+    Returns:
+        Score (higher is better), or None if the result is obviously not a
+        profile of this person (non-profile page, or no part of the name anywhere)
+    """
+    href = result.get("href", "")
+    title = result.get("title", "")
+    body = result.get("body", "")
+    
+    if NON_PROFILE_URL_PATTERN.search(urlsplit(href).path + "?" + urlsplit(href).query):
+        return None
+    
+    tokens = name_tokens(full_name)
+    if not tokens:
+        return 0.0
+    slug = _url_slug(href)
+    title_lower = title.lower()
+    title_hits = sum(1 for token in tokens if token in title_lower)
+    slug_hits = sum(1 for token in tokens if token in slug)
+    if ID_PROFILE_URL_PATTERN.search(href):
+        # The URL cannot carry the name, so the title counts for both
+        slug_hits = title_hits
+    if title_hits == 0 and slug_hits == 0 and not any(token in body.lower() for token in tokens):
+        return None
+    
+    score = 3.0 * title_hits / len(tokens) + 3.0 * slug_hits / len(tokens)
+    text = f"{title} {body}"
+    if RADIOLOGY_PATTERN.search(text):
+        score += 1.0
+    if PHYSICIAN_PATTERN.search(text):
+        score += 1.0
+    if "yale" in text.lower():
+        score += 0.5
+    if re.search(SOCIAL_MEDIA_PLATFORMS[platform_name]["profile_url_pattern"], href, re.IGNORECASE):
+        score += 1.0
+    return round(score, 1)
+
+
+def rank_social_media_candidates(
+    full_name: str,
+    results_by_platform: Dict[str, List[Dict[str, str]]],
+    top_k: int = 3,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Score candidates locally, drop obvious non-profiles and keep the top K per platform.
+    
+    Args:
+        full_name: Full name of the person searched for
+        results_by_platform: Candidates as returned by collect_social_media_candidates
+        top_k: Maximum number of candidates to keep per platform
+        
+    Returns:
+        Dictionary mapping platform name to its best candidates (each with a
+        "score" key added), highest score first
+    """
+    ranked: Dict[str, List[Dict[str, Any]]] = {}
+    for platform_name, results in results_by_platform.items():
+        scored = []
+        seen_urls = set()
+        for result in results:
+            href = result.get("href", "")
+            if not href or href in seen_urls:
+                continue
+            seen_urls.add(href)
+            score = score_social_media_candidate(full_name, platform_name, result)
+            if score is not None:
+                scored.append({**result, "score": score})
+        # sorted() is stable, so ties keep the search engine's order
+        ranked[platform_name] = sorted(scored, key=lambda item: item["score"], reverse=True)[:top_k]
+    return ranked
+
+
+def _table_cell(text: str, max_chars: int) -> str:
+    """Collapse whitespace, drop table separators and truncate for a table cell."""
+    text = " ".join(text.replace("|", "/").split())
+    return text if len(text) <= max_chars else text[: max_chars - 3].rstrip() + "..."
+
+
+def format_social_media_table(
+    full_name: str,
+    ranked_by_platform: Dict[str, List[Dict[str, Any]]],
+    snippet_chars: int = 160,
+) -> str:
+    """
+    Render ranked candidates as a compact pipe-separated table.
+    
+    Args:
+        full_name: Full name of the person searched for
+        ranked_by_platform: Candidates as returned by rank_social_media_candidates
+        snippet_chars: Maximum characters kept from each result's description
+        
+    Returns:
+        One header line plus one row per candidate (or a "none" row per empty platform)
+    """
+    lines = [
+        f"Candidates for {full_name} (best first; score = local name/profile match, higher is better)",
+        "platform | score | url | title | snippet",
+    ]
+    for platform_name, results in ranked_by_platform.items():
+        if not results:
+            lines.append(f"{platform_name} | - | none | |")
+            continue
+        for result in results:
+            lines.append(
+                f"{platform_name} | {result['score']} | {result.get('href', '')} | "
+                f"{_table_cell(result.get('title', ''), 100)} | "
+                f"{_table_cell(result.get('body', ''), snippet_chars)}"
+            )
+    return "\n".join(lines)
+
+
+def search_social_media_profiles(
+    full_name: str,
+    max_links: int = 20,
+) -> str:
+    """
+    Search for a person's social media profiles across multiple platforms.
+    
+    This function searches for the given person's name across five social media
+    platforms (X/Twitter, LinkedIn, Doximity, Google Scholar, and Facebook) and
+    returns a markdown-formatted report with categorized links.
+    
+    Args:
+        full_name: Full name of the person to search for
+        max_links: Maximum number of search results to collect per platform
+                  (default: 20)
+        
+    Returns:
+        A markdown-formatted string containing categorized links by platform
+    """
+    results_by_platform = collect_social_media_candidates(full_name, max_links)
+    return format_social_media_markdown(full_name, results_by_platform, max_links)
@@ -0,0 +1,99 @@
+"""Typed partial results of an alumni research row, emitted as the row's events arrive.
+
+ADKService.stream_agent_response yields a BackgroundReady once the background
+information agent has written its output, a SocialLinksSelected once the links
+are chosen (by the rule-based resolver or the social media agent), and a
+FinalResult with the parsed record when the row is done. Both partials are read
+from the state deltas of the run's events, so they cost one dict lookup per event.
+A row that is retried, or whose stage is escalated to the strong model, yields the
+partials of the stages that run again; the later ones supersede the earlier ones.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.agents import state_keys
+from app.utils.cascade_utils import BACKGROUND_STAGE, SOCIAL_MEDIA_STAGE, STRONG_TIER
+from app.utils.event_utils import EventHandler
+from app.utils.resolver_utils import parse_social_media_selection
+
+
+@dataclass
+class PartialResult:
+    """Common fields of everything stream_agent_response yields."""
+
+    attempt: int
+    # Model tier of the stage that produced it ("cheap" or "strong", see cascade_utils);
+    # for a FinalResult "strong" if any stage was escalated
+    tier: str
+    elapsed_seconds: float  # Since the row started
+
+
+@dataclass
+class BackgroundReady(PartialResult):
+    """Output of the background information agent."""
+
+    text: str
+
+
+@dataclass
+class SocialLinksSelected(PartialResult):
+    """Links chosen per platform (empty where none was chosen)."""
+
+    links: Dict[str, str]
+    text: str
+
+
+@dataclass
+class FinalResult(PartialResult):
+    """The row's result, as get_agent_response returns it; always yielded last."""
+
+    response: Optional[BaseModel]
+    token_counts: Optional[Dict[str, Any]]
+
+
+class PartialResultHandler(EventHandler):
+    """Event pipeline handler that emits a partial result when an event writes a stage's output key."""
+
+    def __init__(
+        self,
+        emit: Callable[[PartialResult], None],
+        attempt: int,
+        stage_tiers: Dict[str, str],
+        row_start: float,
+    ) -> None:
+        """
+        Args:
+            emit: Receives each partial result
+            attempt: Attempt number of the run
+            stage_tiers: Model tier per stage of the run (stages not in it run on the strong tier)
+            row_start: time.perf_counter() when the row started
+        """
+        self.emit = emit
+        self.attempt = attempt
+        self.stage_tiers = dict(stage_tiers)
+        self.row_start = row_start
+
+    def handle(self, event: Any) -> None:
+        state_delta = event.actions.state_delta if event.actions else None
+        if not state_delta:
+            return
+        if state_keys.BACKGROUND_INFORMATION in state_delta:
+            self.emit(BackgroundReady(
+                attempt=self.attempt,
+                tier=self.stage_tiers.get(BACKGROUND_STAGE, STRONG_TIER),
+                elapsed_seconds=time.perf_counter() - self.row_start,
+                text=str(state_delta[state_keys.BACKGROUND_INFORMATION]),
+            ))
+        if state_keys.SOCIAL_MEDIA_LINKS in state_delta:
+            text = str(state_delta[state_keys.SOCIAL_MEDIA_LINKS])
+            self.emit(SocialLinksSelected(
+                attempt=self.attempt,
+                tier=self.stage_tiers.get(SOCIAL_MEDIA_STAGE, STRONG_TIER),
+                elapsed_seconds=time.perf_counter() - self.row_start,
+                links=parse_social_media_selection(text),
+                text=text,
+            ))
@@ -0,0 +1,210 @@
+"""Adaptive thinking-budget selection for the sub-agents.
+
+The fixed budgets in app/configs/llms.py are sized for the hardest alumni. The
+controller here picks a budget per model call from cheap signals already in
+session state and only escalates to the full budget when a row is retried.
+"""
+
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel
+
+from app.agents import state_keys
+from app.configs.llms import (
+    ADAPTIVE_THINKING_ENABLED,
+    BACKGROUND_INFORMATION_THINKING_BUDGETS,
+    FORMATTER_SHORT_BACKGROUND_CHARS,
+    FORMATTER_THINKING_BUDGETS,
+    SOCIAL_MEDIA_FEW_CANDIDATES,
+    SOCIAL_MEDIA_THINKING_BUDGETS,
+)
+
+
+def needs_retry(response: Optional[BaseModel]) -> bool:
+    """
+    Whether a row's attempt failed and should be retried with escalated budgets.
+
+    Only a response that could not be parsed or validated into the output schema
+    (None) fails; empty fields are legitimate (e.g. an alumnus with no LinkedIn).
+    """
+    return response is None
+
+
+def score_result(response: Optional[BaseModel]) -> float:
+    """
+    Score a parsed agent result by the fraction of its fields that are populated.
+
+    For the budgets vs. quality report only; it never triggers a retry (see needs_retry).
+
+    Args:
+        response: Parsed output schema, or None if the row failed
+
+    Returns:
+        Value between 0.0 (failed or empty) and 1.0 (every field populated)
+    """
+    if response is None:
+        return 0.0
+    values = list(response.model_dump().values())
+    if not values:
+        return 0.0
+    return sum(1 for value in values if value) / len(values)
+
+
+class ThinkingBudgetController:
+    """Pick thinking budgets per call and aggregate thoughts tokens vs. result quality."""
+
+    def __init__(self, budgets: Dict[str, List[int]]) -> None:
+        """
+        Args:
+            budgets: Budget ladder per agent name, cheapest first. The last rung
+                     is used for every retry.
+        """
+        self.budgets = budgets
+        self._lock = threading.Lock()
+        # (agent_name, budget) -> running totals
+        self._stats: Dict[tuple, Dict[str, float]] = {}
+
+    def select_budget(self, agent_name: str, state: Mapping[str, Any]) -> Optional[int]:
+        """
+        Choose the thinking budget for the next model call of an agent.
+
+        Args:
+            agent_name: Name of the calling agent
+            state: Session state of the current alumnus
+
+        Returns:
+            Thinking budget in tokens, or None to leave the planner's budget as is
+        """
+        ladder = self.budgets.get(agent_name)
+        if not ladder:
+            return None
+        if state.get(state_keys.ATTEMPT, 1) > 1:
+            return ladder[-1]
+        level = self._first_attempt_level(agent_name, state)
+        return ladder[min(level, len(ladder) - 1)]
+
+    @staticmethod
+    def _first_attempt_level(agent_name: str, state: Mapping[str, Any]) -> int:
+        if agent_name == "social_media_agent":
+            candidate_count = state.get(state_keys.SOCIAL_MEDIA_CANDIDATE_COUNT)
+            # Before the search tool has run the model only has to issue the call;
+            # with no candidates there is nothing to choose between
+            if not candidate_count:
+                return 0
+            return 1 if candidate_count <= SOCIAL_MEDIA_FEW_CANDIDATES else 2
+        if agent_name == "formatter_agent":
+            background = state.get(state_keys.BACKGROUND_INFORMATION) or ""
+            return 0 if len(background) < FORMATTER_SHORT_BACKGROUND_CHARS else 1
+        return 0
+
+    def record_row(self, budget_log: List[Dict[str, Any]], quality: float) -> None:
+        """
+        Attribute one row's result quality to the budgets used for it.
+
+        Args:
+            budget_log: Entries written by the after-model callback for the row
+            quality: Result score (see score_result)
+        """
+        with self._lock:
+            for entry in budget_log:
+                key = (entry["agent"], entry["budget"])
+                stats = self._stats.setdefault(
+                    key, {"calls": 0, "thoughts_tokens": 0, "quality_sum": 0.0}
+                )
+                stats["calls"] += 1
+                stats["thoughts_tokens"] += entry.get("thoughts_tokens", 0)
+                stats["quality_sum"] += quality
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Summarize thoughts tokens and result quality per agent and budget.
+
+        Returns:
+            One dict per (agent, budget) with calls, mean thoughts tokens and mean
+            quality of the rows those calls contributed to
+        """
+        with self._lock:
+            return [
+                {
+                    "agent": agent_name,
+                    "budget": budget,
+                    "calls": int(stats["calls"]),
+                    "mean_thoughts_tokens": stats["thoughts_tokens"] / stats["calls"],
+                    "mean_quality": stats["quality_sum"] / stats["calls"],
+                }
+                for (agent_name, budget), stats in sorted(self._stats.items())
+            ]
+
+    def format_report(self) -> str:
+        """Render report() as a plain-text table."""
+        rows = self.report()
+        if not rows:
+            return "No thinking budget data recorded."
+        lines = [f"{'Agent':<30} {'Budget':>6} {'Calls':>6} {'Thoughts':>9} {'Quality':>8}"]
+        for row in rows:
+            lines.append(
+                f"{row['agent']:<30} {row['budget']:>6} {row['calls']:>6} "
+                f"{row['mean_thoughts_tokens']:>9.0f} {row['mean_quality']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+
+# Shared controller used by the sub-agent callbacks and ADKService
+thinking_budget_controller = ThinkingBudgetController(
+    budgets={
+        "background_information_agent": BACKGROUND_INFORMATION_THINKING_BUDGETS,
+        "social_media_agent": SOCIAL_MEDIA_THINKING_BUDGETS,
+        "formatter_agent": FORMATTER_THINKING_BUDGETS,
+    }
+)
+
+
+def adaptive_thinking_before_model_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+) -> Optional[LlmResponse]:
+    """Before-model callback that overrides the planner's thinking budget."""
+    if not ADAPTIVE_THINKING_ENABLED:
+        return None
+    budget = thinking_budget_controller.select_budget(
+        callback_context.agent_name, callback_context.state
+    )
+    if budget is None:
+        return None
+
+    # The planner shares one ThinkingConfig across requests, so copy instead of mutating
+    current = llm_request.config.thinking_config
+    llm_request.config.thinking_config = (
+        current.model_copy(update={"thinking_budget": budget})
+        if current is not None
+        else types.ThinkingConfig(thinking_budget=budget)
+    )
+    callback_context.state[state_keys.CURRENT_THINKING_BUDGET] = budget
+    return None
+
+
+def adaptive_thinking_after_model_callback(
+    callback_context: CallbackContext,
+    llm_response: LlmResponse,
+) -> Optional[LlmResponse]:
+    """After-model callback that logs the budget used and the thoughts tokens spent."""
+    budget = callback_context.state.get(state_keys.CURRENT_THINKING_BUDGET)
+    if budget is None:
+        return None
+    usage = llm_response.usage_metadata
+    thoughts_tokens = (usage.thoughts_token_count or 0) if usage else 0
+
+    # Reassign (not append) so the change is recorded in the event's state delta
+    budget_log = list(callback_context.state.get(state_keys.THINKING_BUDGET_LOG, []))
+    budget_log.append({
+        "agent": callback_context.agent_name,
+        "budget": budget,
+        "thoughts_tokens": thoughts_tokens,
+    })
+    callback_context.state[state_keys.THINKING_BUDGET_LOG] = budget_log
+    return None
@@ -0,0 +1,63 @@
+"""Verify the URLs in an existing results CSV and optionally flag failing rows.
+
+Usage:
+    python -m app.verify_urls
+    python -m app.verify_urls data/alumni_results.csv --output data/alumni_results_checked.csv --flag
+"""
+
+# Import config early to suppress warnings before ADK imports
+from app.configs import app as app_config  # This will apply warnings filters
+
+import argparse
+import asyncio
+import os
+import time
+
+import pandas as pd
+
+from app.services import KnowledgeStore, UrlVerifier, verify_result_rows
+
+
+async def verify_csv(results_csv_path: str, output_csv_path: str, flag: bool) -> None:
+    """
+    Check every URL in a results CSV and write the annotated rows.
+
+    Args:
+        results_csv_path: Results CSV written by app/main.py
+        output_csv_path: Where to write the annotated CSV (may be the input path)
+        flag: Mark rows with broken URLs as incomplete in the knowledge store
+    """
+    results_df = pd.read_csv(results_csv_path, dtype=str).fillna("")
+    rows = results_df.to_dict("records")
+
+    start = time.perf_counter()
+    async with UrlVerifier() as verifier:
+        failing_rows = await verify_result_rows(rows, verifier)
+        requests_sent = verifier.requests_sent
+    elapsed = time.perf_counter() - start
+
+    pd.DataFrame(rows).to_csv(output_csv_path, index=False)
+    print(f"Checked {len(rows)} rows ({requests_sent} requests) in {elapsed:.1f}s")
+    print(f"Rows with broken URLs: {len(failing_rows)}")
+    for row in failing_rows:
+        print(f"  {row['Name']}: {row['Broken URLs']}")
+
+    if flag:
+        knowledge_store = KnowledgeStore()
+        flagged = sum(
+            knowledge_store.mark_incomplete(row["Name"], row["Year of Entry to Yale"])
+            for row in failing_rows
+        )
+        print(f"Flagged {flagged} row(s) for re-research")
+    print(f"Annotated results saved to {output_csv_path}")
+
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("results_csv", nargs="?", default=os.path.join(project_root, "data", "alumni_results.csv"))
+    parser.add_argument("--output", help="Annotated CSV path (defaults to overwriting the input)")
+    parser.add_argument("--flag", action="store_true",
+                        help="Mark rows with broken URLs for re-research in the knowledge store")
+    args = parser.parse_args()
+    asyncio.run(verify_csv(args.results_csv, args.output or args.results_csv, args.flag))